@@ -5,24 +5,109 @@ Provides a helper for single-shot agent execution, eliminating boilerplate
 for session creation, runner setup, and response collection that was
 duplicated across cv_analyzer, interview_analyzer, transcript_processor,
 and document_detector agents.
+
+Runners are pooled: one Runner (with its own InMemorySessionService) is kept
+per agent and app name, and every call runs in a throwaway session that is
+deleted afterwards, so nothing accumulates between calls. Agents without
+tools can skip ADK entirely (direct=True) and go through the shared
+generate() layer, which also gives them the OpenAI fallback and a
+provider-side cache of their instruction.
 """
+import logging
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
 
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
+logger = logging.getLogger(__name__)
+
+# Pooled runners; agents built per call (e.g. with a dynamic instruction) rotate out
+RUNNER_POOL_SIZE = 32
+
+_USER_ID = "system"
+
+
+@dataclass
+class _PooledRunner:
+    agent: object  # Keeps the agent alive, so its id() can't be reused while pooled
+    runner: Runner
+    session_service: InMemorySessionService
+
+
+_runners: "OrderedDict[tuple[str, int], _PooledRunner]" = OrderedDict()
+
+
+def _get_runner(agent, app_name: str) -> _PooledRunner:
+    key = (app_name, id(agent))
+    pooled = _runners.get(key)
+    if pooled is None or pooled.agent is not agent:
+        session_service = InMemorySessionService()
+        pooled = _PooledRunner(agent, Runner(agent=agent, app_name=app_name, session_service=session_service), session_service)
+        _runners[key] = pooled
+        while len(_runners) > RUNNER_POOL_SIZE:
+            _runners.popitem(last=False)
+    _runners.move_to_end(key)
+    return pooled
+
+
+def clear_runner_pool():
+    """Drop all pooled runners (e.g. after redefining agents in tests)."""
+    _runners.clear()
+
+
+def _direct_kwargs(agent) -> Optional[dict]:
+    """generate() arguments equivalent to a plain single-turn agent, or None if ADK is needed."""
+    needs_adk = (
+        getattr(agent, "tools", None)
+        or getattr(agent, "sub_agents", None)
+        or getattr(agent, "output_schema", None)
+        or getattr(agent, "code_executor", None)
+        or getattr(agent, "global_instruction", None)
+        or getattr(agent, "static_instruction", None)
+        or any(
+            getattr(agent, name, None)
+            for name in ("before_agent_callback", "after_agent_callback", "before_model_callback", "after_model_callback")
+        )
+        or not isinstance(getattr(agent, "instruction", ""), str)
+        or not isinstance(getattr(agent, "model", None), str)
+    )
+    if needs_adk:
+        return None
+
+    kwargs = {
+        "model": agent.model,
+        "system_instruction": agent.instruction or None,
+        "context_cache": agent.name,
+    }
+    config = getattr(agent, "generate_content_config", None)
+    if config is not None:
+        kwargs["temperature"] = config.temperature
+        kwargs["max_output_tokens"] = config.max_output_tokens
+        if config.response_mime_type:
+            kwargs["response_mime_type"] = config.response_mime_type
+        if config.response_schema is not None:
+            kwargs["response_schema"] = config.response_schema
+    thinking_config = getattr(getattr(agent, "planner", None), "thinking_config", None)
+    if thinking_config is not None and thinking_config.thinking_budget is not None:
+        kwargs["thinking_budget"] = thinking_config.thinking_budget
+    return kwargs
+
 
 async def run_agent_once(
     agent,
     app_name: str,
     content: types.Content,
     session_id_prefix: str = "agent",
+    direct: bool = False,
 ) -> str:
     """
     Run an agent with a single message and return the final response text.
 
-    Creates a fresh InMemorySessionService and Runner per invocation,
+    Each call gets a fresh session on a pooled Runner, deleted afterwards,
     so there is no shared state between calls.
 
     Args:
@@ -30,29 +115,45 @@ async def run_agent_once(
         app_name: The app_name to use for session/runner.
         content: The message content (types.Content) to send.
         session_id_prefix: Prefix for the generated session ID.
+        direct: Call the model through generate() instead of ADK when the
+            agent has no tools, sub-agents or callbacks and a static
+            instruction (falls back to ADK otherwise).
 
     Returns:
         The concatenated text from the agent's final response.
     """
-    session_service = InMemorySessionService()
-    runner = Runner(agent=agent, app_name=app_name, session_service=session_service)
+    if direct:
+        kwargs = _direct_kwargs(agent)
+        if kwargs is not None:
+            from src.utils.llm import generate
 
+            return await generate(contents=[content], **kwargs)
+        logger.debug(f"Agent {getattr(agent, 'name', agent)} needs ADK, not running direct")
+
+    pooled = _get_runner(agent, app_name)
     session_id = f"{session_id_prefix}_{uuid.uuid4().hex[:8]}"
-    await session_service.create_session(
+    await pooled.session_service.create_session(
         app_name=app_name,
-        user_id="system",
+        user_id=_USER_ID,
         session_id=session_id,
     )
 
     response_text = ""
-    async for event in runner.run_async(
-        user_id="system",
-        session_id=session_id,
-        new_message=content,
-    ):
-        if event.is_final_response() and event.content:
-            for part in event.content.parts:
-                if hasattr(part, "text") and part.text:
-                    response_text += part.text
+    try:
+        async for event in pooled.runner.run_async(
+            user_id=_USER_ID,
+            session_id=session_id,
+            new_message=content,
+        ):
+            if event.is_final_response() and event.content:
+                for part in event.content.parts:
+                    if hasattr(part, "text") and part.text:
+                        response_text += part.text
+    finally:
+        await pooled.session_service.delete_session(
+            app_name=app_name,
+            user_id=_USER_ID,
+            session_id=session_id,
+        )
 
     return response_text
@@ -6,18 +6,30 @@ This module provides functionality to:
 2. Compare CV content against knockout and qualification questions
 3. Identify gaps where the CV doesn't provide sufficient information
 4. Generate clarification questions to ask the candidate
+5. Analyze one CV against the questions of several vacancies in one call,
+   with the CV profile and per-question-set results cached by content hash
 """
 
 from .agent import (
     analyze_cv,
     analyze_cv_base64,
+    analyze_cv_batch,
+    decode_cv_base64,
+    extract_cv_profile,
     CVAnalysisResult,
+    CVProfile,
     QuestionAnalysis,
 )
+from .cache import set_db_pool
 
 __all__ = [
     "analyze_cv",
     "analyze_cv_base64",
+    "analyze_cv_batch",
+    "decode_cv_base64",
+    "extract_cv_profile",
     "CVAnalysisResult",
+    "CVProfile",
     "QuestionAnalysis",
+    "set_db_pool",
 ]
@@ -4,21 +4,34 @@ CV Analyzer Agent for processing PDF CVs against interview questions.
 This agent analyzes PDF CVs and compares them against pre-screening interview
 questions to identify what information is available and what clarification
 questions need to be asked.
+
+The pipeline has two steps:
+
+1. Profile extraction: the PDF is sent to Gemini once to extract the CV's
+   full text and a structured profile. The result is cached per SHA-256 of
+   the PDF, so re-runs and other vacancies never upload the PDF again.
+2. Analysis: the CV text is compared with the question sets of one or more
+   vacancies in a single call. Results are cached per question set hash;
+   only vacancies whose questions are new or changed are analyzed.
 """
 
-from google.adk.agents.llm_agent import Agent
 from google.genai import types
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 import base64
+import hashlib
 import json
 import logging
-import re
+import time
+import uuid
 
-from agents.common.runner import run_agent_once
+from src.utils.llm import generate
+from .cache import get_cv_cache, question_set_hash
 
 logger = logging.getLogger(__name__)
 
+MODEL = "gemini-2.5-flash"  # Supports PDF natively, fast and cost-effective
+
 
 # =============================================================================
 # Data Classes for Results
@@ -42,21 +55,76 @@ class CVAnalysisResult:
     cv_summary: str                   # Brief summary of candidate profile
     clarification_questions: list[str]  # List of questions to ask candidate
     raw_response: Optional[str] = None
+    cached: bool = False              # Analysis reused for an unchanged question set
+
+
+@dataclass
+class CVProfile:
+    """Text and structured profile extracted from a CV, cached per PDF."""
+    content_hash: str                 # SHA-256 of the PDF
+    cv_text: str                      # Full text of the CV
+    profile: dict = field(default_factory=dict)  # Experience, education, skills, ...
+    summary: str = ""                 # Brief summary of candidate profile
 
 
 # =============================================================================
-# Agent Instruction
+# Agent Instructions
 # =============================================================================
 
+PROFILE_INSTRUCTION = """Je bent een expert in het lezen van CV's.
+
+Je ontvangt een PDF CV van een kandidaat. Zet het CV volledig om naar tekst en vat het profiel gestructureerd samen.
+
+## REGELS
+1. cv_text bevat de VOLLEDIGE tekst van het CV, in leesvolgorde, zonder iets weg te laten of samen te vatten
+2. profile bevat alleen informatie die in het CV staat - verzin niets
+3. Laat lijsten leeg als het CV er niets over zegt
+4. summary is een korte professionele samenvatting van de kandidaat (2-3 zinnen, Nederlands)
+"""
+
+PROFILE_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "cv_text": {"type": "STRING"},
+        "summary": {"type": "STRING"},
+        "profile": {
+            "type": "OBJECT",
+            "properties": {
+                "experience": {
+                    "type": "ARRAY",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "role": {"type": "STRING"},
+                            "employer": {"type": "STRING", "nullable": True},
+                            "period": {"type": "STRING", "nullable": True},
+                            "description": {"type": "STRING", "nullable": True},
+                        },
+                        "required": ["role"],
+                    },
+                },
+                "education": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "certificates": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "licenses": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "languages": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "availability": {"type": "STRING", "nullable": True},
+                "location": {"type": "STRING", "nullable": True},
+            },
+        },
+    },
+    "required": ["cv_text", "summary", "profile"],
+}
+
 INSTRUCTION = """Je bent een expert in het analyseren van CV's voor screening doeleinden.
 
-Je taak is om een CV (PDF) te analyseren en te vergelijken met de interviewvragen om te bepalen welke informatie al aanwezig is en welke verduidelijkingsvragen gesteld moeten worden.
+Je taak is om een CV te analyseren en te vergelijken met de interviewvragen van een of meer vacatures om te bepalen welke informatie al aanwezig is en welke verduidelijkingsvragen gesteld moeten worden.
 
 ## INPUT FORMAAT
 Je ontvangt:
-1. Een PDF CV van de kandidaat
-2. Een lijst met KNOCKOUT vragen (ja/nee vragen, verplichte eisen)
-3. Een lijst met KWALIFICATIE vragen (met ideaal antwoord voor context)
+1. De volledige tekst van het CV van de kandidaat
+2. Per vacature (V1, V2, ...) een lijst met KNOCKOUT vragen (ja/nee vragen, verplichte eisen)
+3. Per vacature een lijst met KWALIFICATIE vragen (met ideaal antwoord voor context)
 
 ## ANALYSE INSTRUCTIES
 
@@ -72,59 +140,62 @@ Je ontvangt:
 - Als er lacunes zijn: stel een gerichte verduidelijkingsvraag voor
 - is_answered = true als het CV voldoende informatie bevat
 
-## OUTPUT FORMAAT
-Antwoord ALLEEN met een JSON object in dit exacte formaat:
-
-```json
-{
-  "knockout_analysis": [
-    {
-      "id": "ko_1",
-      "question_text": "de originele vraag",
-      "cv_evidence": "wat het CV zegt over dit onderwerp, of 'Geen informatie gevonden'",
-      "is_answered": true,
-      "clarification_needed": null
-    }
-  ],
-  "qualification_analysis": [
-    {
-      "id": "qual_1",
-      "question_text": "de originele vraag",
-      "cv_evidence": "relevante ervaring/opleiding uit het CV",
-      "is_answered": false,
-      "clarification_needed": "Specifieke vraag om de lacune te vullen"
-    }
-  ],
-  "cv_summary": "Korte professionele samenvatting van de kandidaat (2-3 zinnen)",
-  "clarification_questions": [
-    "Vraag 1 om te stellen aan de kandidaat",
-    "Vraag 2 om te stellen aan de kandidaat"
-  ]
-}
-```
+## OUTPUT
+Geef per vacature (vacancy = V1, V2, ...) een knockout_analysis en qualification_analysis
+met een item per vraag (id en question_text zoals gegeven), plus clarification_questions.
 
 ## BELANGRIJKE REGELS
 1. Wees grondig maar realistisch - sommige informatie staat zelden in een CV (bijv. rijbewijs)
-2. cv_evidence moet concreet zijn - citeer of parafraseer wat je in het CV vindt
-3. clarification_questions is een verzamelde lijst van ALLE vragen die gesteld moeten worden
-4. De cv_summary moet professioneel en bondig zijn
-5. Antwoord ALLEEN met JSON, geen andere tekst
-6. clarification_needed kan null zijn als is_answered=true
-7. Formuleer verduidelijkingsvragen vriendelijk en professioneel in het Nederlands
+2. cv_evidence moet concreet zijn - citeer of parafraseer wat je in het CV vindt, of 'Geen informatie gevonden'
+3. clarification_questions is per vacature een verzamelde lijst van ALLE vragen die gesteld moeten worden
+4. Analyseer elke vacature onafhankelijk van de andere
+5. clarification_needed kan null zijn als is_answered=true
+6. Formuleer verduidelijkingsvragen vriendelijk en professioneel in het Nederlands
 """
 
+_QUESTION_ANALYSIS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "question_text": {"type": "STRING"},
+            "cv_evidence": {"type": "STRING"},
+            "is_answered": {"type": "BOOLEAN"},
+            "clarification_needed": {"type": "STRING", "nullable": True},
+        },
+        "required": ["id", "cv_evidence", "is_answered"],
+    },
+}
 
-# =============================================================================
-# Agent and Runner Setup
-# =============================================================================
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "vacancies": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "vacancy": {"type": "STRING"},
+                    "knockout_analysis": _QUESTION_ANALYSIS_SCHEMA,
+                    "qualification_analysis": _QUESTION_ANALYSIS_SCHEMA,
+                    "clarification_questions": {"type": "ARRAY", "items": {"type": "STRING"}},
+                },
+                "required": ["vacancy", "knockout_analysis", "qualification_analysis", "clarification_questions"],
+            },
+        },
+    },
+    "required": ["vacancies"],
+}
+
+# Bump when the analysis prompt built in analyze_cv_for_vacancies changes
+_ANALYSIS_PROMPT_REVISION = 1
 
-# Create the CV analyzer agent
-cv_analyzer_agent = Agent(
-    name="cv_analyzer",
-    model="gemini-2.5-flash",  # Supports PDF natively, fast and cost-effective
-    instruction=INSTRUCTION,
-    description="Agent for analyzing CVs against interview questions to identify clarification needs",
-)
+# Part of every analysis cache key: analyses made with another model,
+# instruction, schema or prompt revision are not reused
+ANALYSIS_VERSION = hashlib.sha256(
+    json.dumps([MODEL, INSTRUCTION, ANALYSIS_RESPONSE_SCHEMA, _ANALYSIS_PROMPT_REVISION], sort_keys=True).encode()
+).hexdigest()[:12]
 
 
 # =============================================================================
@@ -137,16 +208,16 @@ def format_questions_for_analysis(
 ) -> str:
     """
     Format questions for the agent to analyze.
-    
+
     Args:
         knockout_questions: List of knockout questions with id, question/question_text
         qualification_questions: List of qualification questions with id, question/question_text, ideal_answer
-        
+
     Returns:
         Formatted questions string
     """
     lines = []
-    
+
     if knockout_questions:
         lines.append("## KNOCKOUT VRAGEN")
         for q in knockout_questions:
@@ -154,7 +225,7 @@ def format_questions_for_analysis(
             text = q.get("question_text", q.get("question", ""))
             lines.append(f"- {qid}: {text}")
         lines.append("")
-    
+
     if qualification_questions:
         lines.append("## KWALIFICATIE VRAGEN")
         for q in qualification_questions:
@@ -165,160 +236,256 @@ def format_questions_for_analysis(
             if ideal:
                 lines.append(f"  IDEAAL ANTWOORD: {ideal}")
         lines.append("")
-    
+
     return "\n".join(lines)
 
 
 from src.utils.text_utils import extract_json_from_response as parse_agent_response
 
 
+def _match_analyses(questions: list[dict], analyses: list[dict]) -> list[dict]:
+    """One analysis per question, in question order; questions the model skipped need clarification."""
+    by_id = {a.get("id"): a for a in analyses}
+    matched = []
+    for q in questions:
+        text = q.get("question_text", q.get("question", ""))
+        a = by_id.get(q.get("id"), {})
+        matched.append({
+            "id": q.get("id", ""),
+            "question_text": a.get("question_text") or text,
+            "cv_evidence": a.get("cv_evidence", "Geen informatie gevonden"),
+            "is_answered": bool(a.get("is_answered", False)),
+            "clarification_needed": a.get("clarification_needed") if a else text,
+        })
+    return matched
+
+
+def _result_from_analysis(
+    analysis: dict, summary: str, raw_response: Optional[str] = None, cached: bool = False,
+) -> CVAnalysisResult:
+    """Build a CVAnalysisResult from a (cached) analysis dict."""
+    return CVAnalysisResult(
+        knockout_analysis=[QuestionAnalysis(**qa) for qa in analysis.get("knockout_analysis", [])],
+        qualification_analysis=[QuestionAnalysis(**qa) for qa in analysis.get("qualification_analysis", [])],
+        cv_summary=summary,
+        clarification_questions=analysis.get("clarification_questions", []),
+        raw_response=raw_response,
+        cached=cached,
+    )
+
+
+def _error_result(summary: str, raw_response: Optional[str] = None) -> CVAnalysisResult:
+    return CVAnalysisResult(
+        knockout_analysis=[],
+        qualification_analysis=[],
+        cv_summary=summary,
+        clarification_questions=[],
+        raw_response=raw_response,
+    )
+
+
 # =============================================================================
-# Main Analysis Function
+# Profile Extraction
 # =============================================================================
 
+async def extract_cv_profile(pdf_data: bytes, workspace_id: Optional[uuid.UUID] = None) -> Optional[CVProfile]:
+    """
+    Extract the text and structured profile of a PDF CV, once per PDF.
+
+    Args:
+        pdf_data: Raw PDF bytes (not base64 encoded)
+        workspace_id: Workspace to persist the profile in (memory only if None)
+
+    Returns:
+        CVProfile, or None if the model response could not be parsed
+    """
+    content_hash = hashlib.sha256(pdf_data).hexdigest()
+    cache = get_cv_cache()
+    profile = await cache.get_profile(workspace_id, content_hash)
+    if profile is not None:
+        logger.info(f"CV profile cache hit: {content_hash[:12]}")
+        return profile
+
+    t0 = time.time()
+    response_text = await generate(
+        contents=[types.Content(role="user", parts=[
+            types.Part(inline_data=types.Blob(mime_type="application/pdf", data=pdf_data)),
+            types.Part(text="Zet dit CV om naar tekst en een gestructureerd profiel."),
+        ])],
+        model=MODEL,
+        system_instruction=PROFILE_INSTRUCTION,
+        temperature=0.0,
+        response_schema=PROFILE_RESPONSE_SCHEMA,
+    )
+    parsed = parse_agent_response(response_text)
+    if not parsed or not parsed.get("cv_text"):
+        logger.error("Failed to parse CV profile response")
+        return None
+
+    profile = CVProfile(
+        content_hash=content_hash,
+        cv_text=parsed["cv_text"],
+        profile=parsed.get("profile") or {},
+        summary=parsed.get("summary", ""),
+    )
+    logger.info(f"CV profile extracted in {time.time() - t0:.2f}s: {len(profile.cv_text)} chars, {len(pdf_data)} bytes PDF")
+    await cache.store_profile(workspace_id, profile)
+    return profile
+
+
+# =============================================================================
+# Main Analysis Functions
+# =============================================================================
+
+async def analyze_cv_batch(
+    pdf_data: bytes,
+    question_sets: dict[str, tuple[list[dict], list[dict]]],
+    workspace_id: Optional[uuid.UUID] = None,
+) -> dict[str, CVAnalysisResult]:
+    """
+    Analyze a PDF CV against the questions of several vacancies in one call.
+
+    Question sets that were analyzed before for this CV (same question set
+    hash) are taken from the cache; identical question sets are analyzed once.
+
+    Args:
+        pdf_data: Raw PDF bytes (not base64 encoded)
+        question_sets: Key (e.g. vacancy ID) -> (knockout_questions, qualification_questions)
+        workspace_id: Workspace to cache the profile and analyses in (memory only if None)
+
+    Returns:
+        Key -> CVAnalysisResult
+    """
+    logger.info("=" * 60)
+    logger.info(f"CV ANALYZER: {len(question_sets)} question set(s), PDF size: {len(pdf_data)} bytes")
+    logger.info("=" * 60)
+
+    profile = await extract_cv_profile(pdf_data, workspace_id)
+    if profile is None:
+        return {key: _error_result("Fout bij het analyseren van het CV") for key in question_sets}
+
+    hashes = {key: question_set_hash(ko, qual, ANALYSIS_VERSION) for key, (ko, qual) in question_sets.items()}
+    cache = get_cv_cache()
+    analyses = await cache.get_analyses(workspace_id, profile.content_hash, sorted(set(hashes.values())))
+    cached_hashes = set(analyses)
+
+    # One prompt entry per distinct question set that still needs analysis
+    pending: dict[str, tuple[list[dict], list[dict]]] = {}
+    for key, (ko, qual) in question_sets.items():
+        if hashes[key] not in analyses:
+            pending.setdefault(hashes[key], (ko, qual))
+
+    raw_response = None
+    if pending:
+        labels = {f"V{i}": qhash for i, qhash in enumerate(pending, start=1)}
+        sections = [
+            f"# VACATURE {label}\n\n{format_questions_for_analysis(*pending[qhash])}"
+            for label, qhash in labels.items()
+        ]
+        prompt_text = f"""Analyseer het volgende CV en vergelijk het met de interviewvragen van elke vacature.
+
+# CV
+
+{profile.cv_text}
+
+{chr(10).join(sections)}"""
+
+        t0 = time.time()
+        raw_response = await generate(
+            contents=[types.Content(role="user", parts=[types.Part(text=prompt_text)])],
+            model=MODEL,
+            system_instruction=INSTRUCTION,
+            temperature=0.1,
+            response_schema=ANALYSIS_RESPONSE_SCHEMA,
+        )
+        logger.info(f"Analyzed {len(pending)} question set(s) in {time.time() - t0:.2f}s")
+
+        parsed = parse_agent_response(raw_response) or {}
+        fresh = {}
+        for item in parsed.get("vacancies", []):
+            qhash = labels.get(item.get("vacancy"))
+            if qhash is None or qhash in fresh:
+                continue
+            ko, qual = pending[qhash]
+            fresh[qhash] = {
+                "knockout_analysis": _match_analyses(ko, item.get("knockout_analysis", [])),
+                "qualification_analysis": _match_analyses(qual, item.get("qualification_analysis", [])),
+                "clarification_questions": item.get("clarification_questions", []),
+            }
+        if len(fresh) < len(pending):
+            logger.error(f"CV analysis response covered {len(fresh)}/{len(pending)} question sets")
+        await cache.store_analyses(workspace_id, profile.content_hash, fresh)
+        analyses.update(fresh)
+
+    results = {}
+    for key, qhash in hashes.items():
+        if qhash not in analyses:
+            results[key] = _error_result("Fout bij het analyseren van het CV", raw_response)
+            continue
+        cached = qhash in cached_hashes
+        results[key] = _result_from_analysis(
+            analyses[qhash], profile.summary, None if cached else raw_response, cached=cached,
+        )
+
+    logger.info(f"Analysis complete: {len(cached_hashes)} cached, {len(pending)} analyzed")
+    return results
+
+
 async def analyze_cv(
     pdf_data: bytes,
     knockout_questions: list[dict],
     qualification_questions: list[dict],
+    workspace_id: Optional[uuid.UUID] = None,
 ) -> CVAnalysisResult:
     """
     Analyze a PDF CV against interview questions.
-    
+
     Args:
         pdf_data: Raw PDF bytes (not base64 encoded)
         knockout_questions: List of knockout questions with id, question_text
         qualification_questions: List of qualification questions with id, question_text, ideal_answer
-        
+        workspace_id: Workspace to cache the profile and analysis in (memory only if None)
+
     Returns:
         CVAnalysisResult with analysis for each question and clarification questions
     """
-    # Format questions for the prompt
-    formatted_questions = format_questions_for_analysis(
-        knockout_questions, 
-        qualification_questions
+    results = await analyze_cv_batch(
+        pdf_data, {"": (knockout_questions, qualification_questions)}, workspace_id,
     )
-    
-    # Build the text prompt
-    prompt_text = f"""Analyseer het bijgevoegde CV en vergelijk het met de volgende interviewvragen.
+    return results[""]
 
-{formatted_questions}
 
-Geef je analyse als JSON."""
-
-    logger.info("=" * 60)
-    logger.info("CV ANALYZER: Starting analysis")
-    logger.info("=" * 60)
-    logger.info(f"PDF size: {len(pdf_data)} bytes")
-    logger.info(f"Knockout questions: {len(knockout_questions)}")
-    logger.info(f"Qualification questions: {len(qualification_questions)}")
-    logger.info("-" * 40)
-    
-    # Build the content with both PDF and text prompt
-    # The PDF is passed as inline_data, the prompt as text
-    content = types.Content(
-        role="user",
-        parts=[
-            # PDF document
-            types.Part(
-                inline_data=types.Blob(
-                    mime_type="application/pdf",
-                    data=pdf_data
-                )
-            ),
-            # Text prompt with questions
-            types.Part(text=prompt_text)
-        ]
-    )
-
-    # Run the agent
-    response_text = await run_agent_once(
-        agent=cv_analyzer_agent,
-        app_name="cv_analyzer_app",
-        content=content,
-        session_id_prefix="cv_analysis",
-    )
-    
-    logger.info("Agent response received")
-    logger.debug(f"Raw response: {response_text[:500]}...")
-    
-    # Parse the response
-    parsed = parse_agent_response(response_text)
-    
-    if not parsed:
-        logger.error("Failed to parse agent response, returning empty results")
-        return CVAnalysisResult(
-            knockout_analysis=[],
-            qualification_analysis=[],
-            cv_summary="Fout bij het analyseren van het CV",
-            clarification_questions=[],
-            raw_response=response_text
-        )
-    
-    # Convert to result objects
-    knockout_analysis = []
-    for ka in parsed.get("knockout_analysis", []):
-        knockout_analysis.append(QuestionAnalysis(
-            id=ka.get("id", ""),
-            question_text=ka.get("question_text", ""),
-            cv_evidence=ka.get("cv_evidence", ""),
-            is_answered=ka.get("is_answered", False),
-            clarification_needed=ka.get("clarification_needed")
-        ))
-    
-    qualification_analysis = []
-    for qa in parsed.get("qualification_analysis", []):
-        qualification_analysis.append(QuestionAnalysis(
-            id=qa.get("id", ""),
-            question_text=qa.get("question_text", ""),
-            cv_evidence=qa.get("cv_evidence", ""),
-            is_answered=qa.get("is_answered", False),
-            clarification_needed=qa.get("clarification_needed")
-        ))
-    
-    result = CVAnalysisResult(
-        knockout_analysis=knockout_analysis,
-        qualification_analysis=qualification_analysis,
-        cv_summary=parsed.get("cv_summary", ""),
-        clarification_questions=parsed.get("clarification_questions", []),
-        raw_response=response_text
-    )
-    
-    logger.info(f"Analysis complete: {len(knockout_analysis)} knockout, {len(qualification_analysis)} qualification")
-    logger.info(f"Clarification questions needed: {len(result.clarification_questions)}")
-    logger.info("=" * 60)
-    
-    return result
+def decode_cv_base64(pdf_base64: str) -> Optional[bytes]:
+    """Decode a base64-encoded PDF, or None if it isn't valid base64."""
+    try:
+        return base64.b64decode(pdf_base64)
+    except Exception as e:
+        logger.error(f"Failed to decode base64 PDF: {e}")
+        return None
 
 
 async def analyze_cv_base64(
     pdf_base64: str,
     knockout_questions: list[dict],
     qualification_questions: list[dict],
+    workspace_id: Optional[uuid.UUID] = None,
 ) -> CVAnalysisResult:
     """
     Analyze a PDF CV (base64 encoded) against interview questions.
-    
+
     This is a convenience wrapper that decodes base64 before calling analyze_cv.
-    
+
     Args:
         pdf_base64: Base64-encoded PDF data
         knockout_questions: List of knockout questions
         qualification_questions: List of qualification questions
-        
+        workspace_id: Workspace to cache the profile and analysis in
+
     Returns:
         CVAnalysisResult with analysis for each question
     """
-    # Decode base64 to bytes
-    try:
-        pdf_data = base64.b64decode(pdf_base64)
-    except Exception as e:
-        logger.error(f"Failed to decode base64 PDF: {e}")
-        return CVAnalysisResult(
-            knockout_analysis=[],
-            qualification_analysis=[],
-            cv_summary="Fout bij het decoderen van de PDF (ongeldige base64)",
-            clarification_questions=[],
-            raw_response=None
-        )
-    
-    return await analyze_cv(pdf_data, knockout_questions, qualification_questions)
+    pdf_data = decode_cv_base64(pdf_base64)
+    if pdf_data is None:
+        return _error_result("Fout bij het decoderen van de PDF (ongeldige base64)")
+
+    return await analyze_cv(pdf_data, knockout_questions, qualification_questions, workspace_id)
@@ -0,0 +1,178 @@
+"""
+Content-addressed cache for CV profiles and CV analyses.
+
+A CV is identified by the SHA-256 of its PDF. Two things are cached:
+
+- the profile: the CV's full text and structured profile, extracted once per
+  PDF (the only step that sends the PDF to the model);
+- analyses: the per-question analysis of a CV against one vacancy's question
+  set, keyed by a hash of the questions (ids, texts and ideal answers) and
+  the analysis version (model, instruction, schema, prompt revision). When
+  the recruiter changes a question, or the analysis itself changes, the hash
+  changes and the CV is analyzed again; re-runs and other candidates'
+  vacancies with identical questions reuse the stored result.
+
+Lookups go to an in-process LRU first, then to agents.cv_profiles /
+agents.cv_question_analyses when a pool is configured. Persisted entries are
+scoped to the workspace, so CVs never leak across tenants; without a
+workspace only the in-process LRU is used.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from .agent import CVProfile
+
+logger = logging.getLogger(__name__)
+
+# In-process entries per kind
+CACHE_MAX_PROFILES = 256
+CACHE_MAX_ANALYSES = 1024
+
+_db_pool: Optional[asyncpg.Pool] = None
+
+
+def set_db_pool(pool: asyncpg.Pool):
+    """Set the database pool used to look up and persist CV profiles and analyses."""
+    global _db_pool
+    _db_pool = pool
+
+
+def question_set_hash(knockout_questions: list[dict], qualification_questions: list[dict], version: str = "") -> str:
+    """Fingerprint of a question set: everything about the questions (and the analysis version) that influences the analysis."""
+    def _canonical(questions: list[dict]) -> list[list[str]]:
+        return [
+            [q.get("id", ""), q.get("question_text", q.get("question", "")), q.get("ideal_answer", "") or ""]
+            for q in questions
+        ]
+
+    canonical = json.dumps(
+        {"ko": _canonical(knockout_questions), "qual": _canonical(qualification_questions), "version": version},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _LRU(OrderedDict):
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def get_recent(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
+class CVCache:
+    """Two-level (memory, database) cache of CV profiles and analyses."""
+
+    def __init__(self, max_profiles: int = CACHE_MAX_PROFILES, max_analyses: int = CACHE_MAX_ANALYSES):
+        self._profiles = _LRU(max_profiles)
+        self._analyses = _LRU(max_analyses)
+
+    async def get_profile(self, workspace_id: Optional[uuid.UUID], content_hash: str) -> Optional["CVProfile"]:
+        """Return the cached profile of a CV, or None."""
+        profile = self._profiles.get_recent((workspace_id, content_hash))
+        if profile is not None or workspace_id is None or _db_pool is None:
+            return profile
+
+        try:
+            from src.repositories.cv_analysis_repo import CVAnalysisRepository
+
+            row = await CVAnalysisRepository(_db_pool).get_profile(workspace_id, content_hash)
+        except Exception as e:
+            logger.warning(f"CV profile cache lookup failed: {e}")
+            return None
+        if row is None:
+            return None
+
+        from .agent import CVProfile
+
+        data = row["profile"]
+        profile = CVProfile(
+            content_hash=content_hash,
+            cv_text=row["cv_text"],
+            profile=json.loads(data) if isinstance(data, str) else data,
+            summary=row["summary"],
+        )
+        self._profiles.put((workspace_id, content_hash), profile)
+        return profile
+
+    async def store_profile(self, workspace_id: Optional[uuid.UUID], profile: "CVProfile"):
+        """Cache a freshly extracted profile (persisted when scoped to a workspace)."""
+        self._profiles.put((workspace_id, profile.content_hash), profile)
+        if workspace_id is None or _db_pool is None:
+            return
+        try:
+            from src.repositories.cv_analysis_repo import CVAnalysisRepository
+
+            await CVAnalysisRepository(_db_pool).save_profile(
+                workspace_id, profile.content_hash, profile.cv_text, profile.profile, profile.summary,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to persist CV profile: {e}")
+
+    async def get_analyses(
+        self, workspace_id: Optional[uuid.UUID], content_hash: str, question_set_hashes: list[str],
+    ) -> dict[str, dict]:
+        """Return cached analyses of a CV, keyed by question set hash (missing ones are left out)."""
+        found = {}
+        for qhash in question_set_hashes:
+            analysis = self._analyses.get_recent((workspace_id, content_hash, qhash))
+            if analysis is not None:
+                found[qhash] = analysis
+
+        missing = [qhash for qhash in question_set_hashes if qhash not in found]
+        if not missing or workspace_id is None or _db_pool is None:
+            return found
+        try:
+            from src.repositories.cv_analysis_repo import CVAnalysisRepository
+
+            stored = await CVAnalysisRepository(_db_pool).get_analyses(workspace_id, content_hash, missing)
+        except Exception as e:
+            logger.warning(f"CV analysis cache lookup failed: {e}")
+            return found
+        for qhash, analysis in stored.items():
+            self._analyses.put((workspace_id, content_hash, qhash), analysis)
+        return {**found, **stored}
+
+    async def store_analyses(self, workspace_id: Optional[uuid.UUID], content_hash: str, analyses: dict[str, dict]):
+        """Cache fresh analyses, keyed by question set hash (persisted when scoped to a workspace)."""
+        for qhash, analysis in analyses.items():
+            self._analyses.put((workspace_id, content_hash, qhash), analysis)
+        if workspace_id is None or _db_pool is None:
+            return
+        try:
+            from src.repositories.cv_analysis_repo import CVAnalysisRepository
+
+            await CVAnalysisRepository(_db_pool).save_analyses(workspace_id, content_hash, analyses)
+        except Exception as e:
+            logger.warning(f"Failed to persist CV analyses: {e}")
+
+    def clear(self):
+        self._profiles.clear()
+        self._analyses.clear()
+
+
+_cache = CVCache()
+
+
+def get_cv_cache() -> CVCache:
+    """Get the process-wide CV cache."""
+    return _cache
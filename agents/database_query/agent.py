@@ -4,17 +4,17 @@ import os
 import re
 import asyncio
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools import ToolContext
 from typing import Optional
 import asyncpg
 
-# Reference to the database pool - will be set by app.py or created lazily
-_db_pool: Optional[asyncpg.Pool] = None
+from .analytics_pool import ANALYTICS_STATEMENT_TIMEOUT_MS, QueryRejected, run_query
+from .schema_catalog import get_schema_catalog, peek_schema_catalog
 
-# SQL query timeout in seconds
-SQL_QUERY_TIMEOUT = 10
-# Maximum rows to return
-SQL_MAX_ROWS = 100
+# Reference to the database pool (schema discovery) - will be set by app.py or created lazily.
+# LLM-written SQL (execute_sql, sample_data) runs on the read-only analytics pool.
+_db_pool: Optional[asyncpg.Pool] = None
 
 
 def set_db_pool(pool: asyncpg.Pool):
@@ -49,21 +49,9 @@ async def discover_tables(tool_context: ToolContext) -> dict:
     Returns:
         Dictionary with table names and their descriptions
     """
-    pool = await get_pool()
-
-    rows = await pool.fetch("""
-        SELECT
-            t.table_name,
-            COALESCE(obj_description((t.table_schema || '.' || t.table_name)::regclass), '') as description
-        FROM information_schema.tables t
-        WHERE t.table_schema = 'ats'
-        AND t.table_type = 'BASE TABLE'
-        ORDER BY t.table_name
-    """)
-
-    tables = {}
-    for row in rows:
-        tables[row["table_name"]] = row["description"] or "No description"
+    catalog = await get_schema_catalog(await get_pool())
+
+    tables = {name: description or "No description" for name, description in catalog.tables.items()}
 
     return {
         "schema": "ats",
@@ -84,31 +72,11 @@ async def discover_columns(tool_context: ToolContext, table_name: str) -> dict:
     Returns:
         Dictionary with column details including name, type, and if nullable
     """
-    pool = await get_pool()
-
-    rows = await pool.fetch("""
-        SELECT
-            column_name,
-            data_type,
-            is_nullable,
-            column_default,
-            COALESCE(col_description((table_schema || '.' || table_name)::regclass, ordinal_position), '') as description
-        FROM information_schema.columns
-        WHERE table_schema = 'ats' AND table_name = $1
-        ORDER BY ordinal_position
-    """, table_name)
-
-    if not rows:
-        return {"error": f"Table '{table_name}' not found in ats schema"}
+    catalog = await get_schema_catalog(await get_pool())
 
-    columns = []
-    for row in rows:
-        columns.append({
-            "name": row["column_name"],
-            "type": row["data_type"],
-            "nullable": row["is_nullable"] == "YES",
-            "description": row["description"] or None
-        })
+    columns = catalog.columns.get(table_name)
+    if not columns:
+        return {"error": f"Table '{table_name}' not found in ats schema"}
 
     return {
         "table": table_name,
@@ -125,28 +93,10 @@ async def discover_relationships(tool_context: ToolContext) -> dict:
     Returns:
         List of foreign key relationships showing how tables connect
     """
-    pool = await get_pool()
-
-    rows = await pool.fetch("""
-        SELECT
-            tc.table_name as from_table,
-            kcu.column_name as from_column,
-            ccu.table_name as to_table,
-            ccu.column_name as to_column
-        FROM information_schema.table_constraints tc
-        JOIN information_schema.key_column_usage kcu
-            ON tc.constraint_name = kcu.constraint_name
-            AND tc.table_schema = kcu.table_schema
-        JOIN information_schema.constraint_column_usage ccu
-            ON ccu.constraint_name = tc.constraint_name
-            AND ccu.table_schema = tc.table_schema
-        WHERE tc.constraint_type = 'FOREIGN KEY'
-        AND tc.table_schema = 'ats'
-        ORDER BY tc.table_name
-    """)
+    catalog = await get_schema_catalog(await get_pool())
 
     relationships = []
-    for row in rows:
+    for row in catalog.relationships:
         relationships.append({
             "from": f"{row['from_table']}.{row['from_column']}",
             "to": f"{row['to_table']}.{row['to_column']}",
@@ -163,15 +113,30 @@ async def discover_relationships(tool_context: ToolContext) -> dict:
 # SQL Execution Tool
 # ============================================================================
 
+def row_to_dict(row: asyncpg.Record) -> dict:
+    """Convert a result row to JSON-serializable values."""
+    row_dict = {}
+    for key, value in row.items():
+        if hasattr(value, "isoformat"):
+            row_dict[key] = value.isoformat()
+        elif isinstance(value, (dict, list)):
+            row_dict[key] = value
+        elif value is not None:
+            row_dict[key] = str(value) if not isinstance(value, (int, float, bool)) else value
+        else:
+            row_dict[key] = None
+    return row_dict
+
+
 async def execute_sql(tool_context: ToolContext, query: str) -> dict:
     """
     Execute a read-only SQL query against the database.
 
     IMPORTANT:
     - Use 'ats.' prefix for all tables (e.g., ats.vacancies, ats.applications)
-    - Only SELECT queries are allowed
-    - Results limited to 100 rows
-    - Timeout after 10 seconds
+    - Only SELECT queries are allowed (runs in a read-only transaction)
+    - Results limited to 100 rows (and ~64 KB)
+    - Timeout after 10 seconds; very expensive plans are rejected up front
 
     Args:
         query: A SELECT SQL query. Must start with SELECT or WITH.
@@ -179,8 +144,6 @@ async def execute_sql(tool_context: ToolContext, query: str) -> dict:
     Returns:
         Dictionary with rows, columns, and row count
     """
-    pool = await get_pool()
-
     # Normalize and validate
     normalized = " ".join(query.split()).strip()
     query_lower = normalized.lower()
@@ -204,42 +167,30 @@ async def execute_sql(tool_context: ToolContext, query: str) -> dict:
     if ";" in query_no_strings.strip().rstrip(";"):
         return {"error": "Multiple statements not allowed"}
 
-    # Add LIMIT if missing
-    if "limit" not in query_lower:
-        query = query.rstrip().rstrip(";") + f" LIMIT {SQL_MAX_ROWS}"
+    query = query.rstrip().rstrip(";")
+    timeout_s = ANALYTICS_STATEMENT_TIMEOUT_MS // 1000
 
     try:
-        async with asyncio.timeout(SQL_QUERY_TIMEOUT):
-            rows = await pool.fetch(query)
-
-        if not rows:
-            return {"rows": [], "row_count": 0, "columns": [], "message": "No results"}
-
-        columns = list(rows[0].keys())
-        result_rows = []
-
-        for row in rows[:SQL_MAX_ROWS]:
-            row_dict = {}
-            for key, value in row.items():
-                if hasattr(value, "isoformat"):
-                    row_dict[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    row_dict[key] = value
-                elif value is not None:
-                    row_dict[key] = str(value) if not isinstance(value, (int, float, bool)) else value
-                else:
-                    row_dict[key] = None
-            result_rows.append(row_dict)
+        # Streams through a cursor: stops at the row/byte cap instead of fetching everything
+        result = await run_query(query, row_to_dict)
+
+        if not result["rows"]:
+            return {"rows": [], "row_count": 0, "columns": result["columns"], "message": "No results"}
 
         return {
-            "rows": result_rows,
-            "row_count": len(result_rows),
-            "columns": columns,
-            "truncated": len(rows) >= SQL_MAX_ROWS
+            "rows": result["rows"],
+            "row_count": len(result["rows"]),
+            "columns": result["columns"],
+            "truncated": result["truncated"],
         }
 
-    except asyncio.TimeoutError:
-        return {"error": "Query timed out (10s limit)", "hint": "Simplify query or add WHERE filters"}
+    except QueryRejected as e:
+        return {
+            "error": f"Query too expensive ({e}, ~{e.plan_rows:.0f} rows estimated)",
+            "hint": "Add WHERE filters (e.g. a date range), aggregate with GROUP BY, or avoid cross joins"
+        }
+    except (asyncpg.QueryCanceledError, asyncio.TimeoutError):
+        return {"error": f"Query timed out ({timeout_s}s limit)", "hint": "Simplify query or add WHERE filters"}
     except asyncpg.PostgresError as e:
         return {"error": f"SQL error: {str(e)}", "hint": "Check table/column names with discover_columns"}
     except Exception as e:
@@ -259,37 +210,28 @@ async def sample_data(tool_context: ToolContext, table_name: str, limit: int = 5
     Returns:
         Sample rows from the table
     """
-    pool = await get_pool()
-    limit = min(limit, 20)
+    limit = max(1, min(int(limit), 20))
+    if not re.fullmatch(r"[a-z_][a-z0-9_]*", table_name):
+        return {"error": f"Invalid table name: {table_name}", "hint": "Use discover_tables() to see available tables"}
 
     try:
-        rows = await pool.fetch(f"SELECT * FROM ats.{table_name} ORDER BY created_at DESC LIMIT $1", limit)
+        result = await run_query(
+            f"SELECT * FROM ats.{table_name} ORDER BY created_at DESC LIMIT {limit}",
+            row_to_dict,
+            max_rows=limit,
+        )
 
-        if not rows:
+        if not result["rows"]:
             return {"table": table_name, "rows": [], "message": "Table is empty"}
 
-        columns = list(rows[0].keys())
-        result_rows = []
-
-        for row in rows:
-            row_dict = {}
-            for key, value in row.items():
-                if hasattr(value, "isoformat"):
-                    row_dict[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    row_dict[key] = value
-                elif value is not None:
-                    row_dict[key] = str(value) if not isinstance(value, (int, float, bool)) else value
-                else:
-                    row_dict[key] = None
-            result_rows.append(row_dict)
-
         return {
             "table": table_name,
-            "columns": columns,
-            "rows": result_rows,
-            "row_count": len(result_rows)
+            "columns": result["columns"],
+            "rows": result["rows"],
+            "row_count": len(result["rows"])
         }
+    except (QueryRejected, asyncpg.QueryCanceledError, asyncio.TimeoutError) as e:
+        return {"error": f"Sample failed: {str(e) or 'timeout'}", "hint": "Use execute_sql with a WHERE filter"}
     except asyncpg.PostgresError as e:
         return {"error": f"Table error: {str(e)}", "hint": "Use discover_tables() to see available tables"}
 
@@ -320,7 +262,8 @@ Je hebt 5 tools om de database te bevragen:
 ## WERKWIJZE
 
 Bij ELKE vraag over data:
-1. EERST: Gebruik discover_tables() of discover_columns() om te begrijpen wat er is
+1. EERST: Zoek de tabellen, kolommen en foreign keys op in het DATABASE SCHEMA onderaan.
+   Staat er geen schema, of ontbreekt er iets, gebruik dan discover_tables() of discover_columns()
 2. DAN: Schrijf een SQL query met execute_sql()
 3. TENSLOTTE: Geef een duidelijk antwoord met de resultaten
 
@@ -353,10 +296,19 @@ Bij ELKE vraag over data:
 - Duidelijke samenvattingen
 """
 
+
+def build_instruction(context: ReadonlyContext) -> str:
+    """The instruction with the schema catalog digest, once the catalog is loaded."""
+    catalog = peek_schema_catalog()
+    if catalog is None:
+        return instruction
+    return f"{instruction}\n## DATABASE SCHEMA\n\n{catalog.digest}\n"
+
+
 root_agent = Agent(
     name="data_analist",
     model="gemini-3-pro-preview",
-    instruction=instruction,
+    instruction=build_instruction,
     description="Intelligente data analist die SQL queries schrijft om recruitment vragen te beantwoorden",
     tools=[
         discover_tables,
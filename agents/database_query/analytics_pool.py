@@ -0,0 +1,192 @@
+"""
+Isolated, read-only connection pool for the data query agent's SQL.
+
+execute_sql runs LLM-generated SQL. On the application pool a heavy query
+held one of its connections, and a client-side timeout left it running on
+the server. Analyst queries get their own small pool instead:
+
+- every query runs in a read-only transaction with a server-side
+  statement_timeout, a work_mem cap and a lock_timeout (SET LOCAL, so the
+  limits hold through the Supabase transaction pooler, which hands each
+  transaction to any server connection), so the server stops a query that
+  runs too long, whoever gave up waiting
+- ANALYTICS_DATABASE_URL can point it at a read replica (default DATABASE_URL)
+- queries are planned first (EXPLAIN) and rejected when the planner's
+  estimate is above ANALYTICS_MAX_PLAN_COST
+- results stream through a cursor and stop at a row and a byte cap, instead
+  of appending LIMIT to the SQL and fetching everything
+
+Every query's plan cost, duration and result size is logged and kept in the
+recent history returned by query_stats() (shown by /health/pool).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_POOL_MAX_SIZE = int(os.environ.get("ANALYTICS_POOL_MAX_SIZE", "2"))
+ANALYTICS_STATEMENT_TIMEOUT_MS = int(os.environ.get("ANALYTICS_STATEMENT_TIMEOUT_MS", "10000"))
+ANALYTICS_WORK_MEM = os.environ.get("ANALYTICS_WORK_MEM", "16MB")
+# Planner cost units (seq_page_cost = 1); well above a filtered scan of the ats tables
+ANALYTICS_MAX_PLAN_COST = float(os.environ.get("ANALYTICS_MAX_PLAN_COST", "500000"))
+ANALYTICS_MAX_ROWS = int(os.environ.get("ANALYTICS_MAX_ROWS", "100"))
+ANALYTICS_MAX_RESULT_BYTES = int(os.environ.get("ANALYTICS_MAX_RESULT_BYTES", str(64 * 1024)))
+
+# Rows fetched per cursor round trip
+_CURSOR_PREFETCH = 50
+# Client-side backstop on top of the server's statement_timeout
+_CLIENT_TIMEOUT_MARGIN = 5.0
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+_history: deque[dict] = deque(maxlen=50)
+_totals = {"queries": 0, "rejected": 0, "timeout": 0, "error": 0}
+
+
+class QueryRejected(Exception):
+    """The query's estimated cost is above ANALYTICS_MAX_PLAN_COST."""
+
+    def __init__(self, cost: float, plan_rows: float):
+        super().__init__(f"Estimated cost {cost:.0f} exceeds limit {ANALYTICS_MAX_PLAN_COST:.0f}")
+        self.cost = cost
+        self.plan_rows = plan_rows
+
+
+# Limits for the current transaction only (read-only comes from transaction(readonly=True))
+_LIMITS_SQL = f"""
+    SET LOCAL statement_timeout = {ANALYTICS_STATEMENT_TIMEOUT_MS};
+    SET LOCAL lock_timeout = 2000;
+    SET LOCAL work_mem = '{ANALYTICS_WORK_MEM}';
+"""
+
+
+async def get_analytics_pool() -> asyncpg.Pool:
+    """The analytics pool, created on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                database_url = os.environ.get("ANALYTICS_DATABASE_URL") or os.environ.get("DATABASE_URL")
+                if not database_url:
+                    raise RuntimeError("DATABASE_URL environment variable is required")
+                raw_url = database_url.replace("postgresql+asyncpg://", "postgresql://")
+                _pool = await asyncpg.create_pool(
+                    raw_url,
+                    min_size=0,
+                    max_size=ANALYTICS_POOL_MAX_SIZE,
+                    statement_cache_size=0,
+                    max_inactive_connection_lifetime=300.0,
+                )
+                replica = " (read replica)" if os.environ.get("ANALYTICS_DATABASE_URL") else ""
+                logger.info(
+                    f"📊 Analytics pool created{replica} (max={ANALYTICS_POOL_MAX_SIZE}, "
+                    f"statement_timeout={ANALYTICS_STATEMENT_TIMEOUT_MS}ms, work_mem={ANALYTICS_WORK_MEM})"
+                )
+    return _pool
+
+
+async def close_analytics_pool():
+    """Close the analytics pool (if it was created)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        logger.info("Analytics pool closed")
+
+
+def _record(entry: dict):
+    _history.append(entry)
+    _totals["queries"] += 1
+    outcome = entry["outcome"]
+    if outcome in _totals:
+        _totals[outcome] += 1
+    logger.info(
+        f"📊 Analytics query {outcome}: cost={entry.get('plan_cost')} rows={entry.get('rows')} "
+        f"bytes={entry.get('bytes')} {entry['duration_ms']}ms"
+    )
+
+
+def query_stats() -> dict:
+    """Totals and the most recent queries (cost, duration, size; without the SQL)."""
+    return {
+        **_totals,
+        "pool_size": _pool.get_size() if _pool is not None else 0,
+        "recent": list(_history)[-10:],
+    }
+
+
+async def run_query(query: str, convert_row, max_rows: int = ANALYTICS_MAX_ROWS) -> dict:
+    """
+    Plan and run a read-only query on the analytics pool.
+
+    Args:
+        query: A single SELECT/WITH statement (validated by the caller)
+        convert_row: Turns an asyncpg Record into a JSON-serializable dict
+        max_rows: Row cap (the byte cap is ANALYTICS_MAX_RESULT_BYTES)
+
+    Returns:
+        {"columns", "rows", "truncated", "plan_cost"}
+
+    Raises:
+        QueryRejected: The planner's estimate is above ANALYTICS_MAX_PLAN_COST
+        asyncpg.QueryCanceledError: statement_timeout hit (server-side)
+        asyncio.TimeoutError: The server didn't answer within the backstop
+        asyncpg.PostgresError: Any other SQL error
+    """
+    pool = await get_analytics_pool()
+    started = time.perf_counter()
+    entry = {"at": time.time(), "outcome": "cancelled", "plan_cost": None, "rows": 0, "bytes": 0}
+    columns: list[str] = []
+    rows: list[dict] = []
+    truncated = False
+
+    try:
+        async with asyncio.timeout(ANALYTICS_STATEMENT_TIMEOUT_MS / 1000 + _CLIENT_TIMEOUT_MARGIN):
+            async with pool.acquire() as conn:
+                async with conn.transaction(readonly=True):
+                    await conn.execute(_LIMITS_SQL)
+                    plan = json.loads(await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}"))[0]["Plan"]
+                    entry["plan_cost"] = round(plan["Total Cost"], 1)
+                    if plan["Total Cost"] > ANALYTICS_MAX_PLAN_COST:
+                        raise QueryRejected(plan["Total Cost"], plan["Plan Rows"])
+
+                    size = 0
+                    async for record in conn.cursor(query, prefetch=_CURSOR_PREFETCH):
+                        if not columns:
+                            columns = list(record.keys())
+                        if len(rows) >= max_rows:
+                            truncated = True
+                            break
+                        row = convert_row(record)
+                        row_size = len(json.dumps(row, default=str))
+                        if size + row_size > ANALYTICS_MAX_RESULT_BYTES and rows:
+                            truncated = True
+                            break
+                        size += row_size
+                        rows.append(row)
+                    entry["bytes"] = size
+        entry["outcome"] = "ok"
+    except QueryRejected:
+        entry["outcome"] = "rejected"
+        raise
+    except (asyncpg.QueryCanceledError, asyncio.TimeoutError):
+        entry["outcome"] = "timeout"
+        raise
+    except Exception:
+        entry["outcome"] = "error"
+        raise
+    finally:
+        entry["rows"] = len(rows)
+        entry["truncated"] = truncated
+        entry["duration_ms"] = round((time.perf_counter() - started) * 1000)
+        _record(entry)
+
+    return {"columns": columns, "rows": rows, "truncated": truncated, "plan_cost": entry["plan_cost"]}
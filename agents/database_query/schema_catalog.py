@@ -0,0 +1,176 @@
+"""
+Catalog of the ats schema for the data query agent.
+
+The agent used to explore the schema with discover_tables, discover_columns
+and discover_relationships in every conversation: information_schema and
+obj_description queries per call, and several LLM tool round trips before
+the first real query. The catalog is loaded once instead (three queries) and:
+
+- rendered as a compact digest (one line per table, one per foreign key)
+  that is appended to the agent's instruction, so most questions go straight
+  to execute_sql
+- used to answer the discover_* tools without querying the database
+
+It is refreshed after the schema migrations at startup, and reloaded when
+older than SCHEMA_CATALOG_TTL (for migrations applied outside the app). Its
+fingerprint changes with the schema, which invalidates SQL cached for it
+(see src/utils/nl_sql_cache.py).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CATALOG_TTL = float(os.environ.get("SCHEMA_CATALOG_TTL", "3600"))
+
+# Descriptions in the digest are cut to this length (the tools return them in full)
+_DIGEST_DESCRIPTION_CHARS = 80
+
+_TYPE_ALIASES = {
+    "character varying": "varchar",
+    "timestamp with time zone": "timestamptz",
+    "timestamp without time zone": "timestamp",
+    "double precision": "float8",
+    "USER-DEFINED": "enum",
+    "ARRAY": "array",
+}
+
+_TABLES_SQL = """
+    SELECT
+        t.table_name,
+        COALESCE(obj_description((t.table_schema || '.' || t.table_name)::regclass), '') as description
+    FROM information_schema.tables t
+    WHERE t.table_schema = 'ats'
+    AND t.table_type = 'BASE TABLE'
+    ORDER BY t.table_name
+"""
+
+_COLUMNS_SQL = """
+    SELECT
+        table_name,
+        column_name,
+        data_type,
+        is_nullable,
+        COALESCE(col_description((table_schema || '.' || table_name)::regclass, ordinal_position), '') as description
+    FROM information_schema.columns
+    WHERE table_schema = 'ats'
+    ORDER BY table_name, ordinal_position
+"""
+
+_RELATIONSHIPS_SQL = """
+    SELECT
+        tc.table_name as from_table,
+        kcu.column_name as from_column,
+        ccu.table_name as to_table,
+        ccu.column_name as to_column
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+        ON tc.constraint_name = kcu.constraint_name
+        AND tc.table_schema = kcu.table_schema
+    JOIN information_schema.constraint_column_usage ccu
+        ON ccu.constraint_name = tc.constraint_name
+        AND ccu.table_schema = tc.table_schema
+    WHERE tc.constraint_type = 'FOREIGN KEY'
+    AND tc.table_schema = 'ats'
+    ORDER BY tc.table_name, kcu.column_name
+"""
+
+
+@dataclass(frozen=True)
+class SchemaCatalog:
+    """Tables, columns and foreign keys of the ats schema."""
+    tables: dict[str, str]                  # table -> description
+    columns: dict[str, list[dict]]          # table -> [{name, type, nullable, description}]
+    relationships: list[dict]               # [{from_table, from_column, to_table, to_column}]
+    digest: str
+    fingerprint: str
+    loaded_at: float
+
+
+def _short_type(data_type: str) -> str:
+    return _TYPE_ALIASES.get(data_type, data_type)
+
+
+def _render_digest(tables: dict[str, str], columns: dict[str, list[dict]], relationships: list[dict]) -> str:
+    lines = []
+    for table, description in tables.items():
+        cols = ", ".join(f"{c['name']} {_short_type(c['type'])}" for c in columns.get(table, []))
+        line = f"ats.{table}({cols})"
+        if description:
+            line += f" -- {description[:_DIGEST_DESCRIPTION_CHARS]}"
+        lines.append(line)
+    if relationships:
+        lines.append("")
+        lines.append("Foreign keys:")
+        lines.extend(
+            f"{r['from_table']}.{r['from_column']} -> {r['to_table']}.{r['to_column']}"
+            for r in relationships
+        )
+    return "\n".join(lines)
+
+
+_catalog: Optional[SchemaCatalog] = None
+_refresh_lock = asyncio.Lock()
+
+
+async def refresh_schema_catalog(pool: asyncpg.Pool) -> SchemaCatalog:
+    """Load the catalog from information_schema (after migrations, or when it expired)."""
+    global _catalog
+    t0 = time.perf_counter()
+    table_rows, column_rows, relationship_rows = await asyncio.gather(
+        pool.fetch(_TABLES_SQL),
+        pool.fetch(_COLUMNS_SQL),
+        pool.fetch(_RELATIONSHIPS_SQL),
+    )
+
+    tables = {row["table_name"]: row["description"] for row in table_rows}
+    columns: dict[str, list[dict]] = {}
+    for row in column_rows:
+        if row["table_name"] in tables:
+            columns.setdefault(row["table_name"], []).append({
+                "name": row["column_name"],
+                "type": row["data_type"],
+                "nullable": row["is_nullable"] == "YES",
+                "description": row["description"] or None,
+            })
+    relationships = [dict(row) for row in relationship_rows]
+
+    digest = _render_digest(tables, columns, relationships)
+    _catalog = SchemaCatalog(
+        tables=tables,
+        columns=columns,
+        relationships=relationships,
+        digest=digest,
+        fingerprint=hashlib.sha256(digest.encode()).hexdigest()[:16],
+        loaded_at=time.monotonic(),
+    )
+    logger.info(
+        f"🗂️ Schema catalog loaded: {len(tables)} tables, {len(relationships)} foreign keys, "
+        f"{len(digest)} chars digest in {(time.perf_counter() - t0) * 1000:.0f}ms"
+    )
+    return _catalog
+
+
+async def get_schema_catalog(pool: asyncpg.Pool) -> SchemaCatalog:
+    """The catalog, (re)loaded once for all callers when missing or older than SCHEMA_CATALOG_TTL."""
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - catalog.loaded_at < SCHEMA_CATALOG_TTL:
+        return catalog
+    async with _refresh_lock:
+        catalog = _catalog
+        if catalog is not None and time.monotonic() - catalog.loaded_at < SCHEMA_CATALOG_TTL:
+            return catalog
+        return await refresh_schema_catalog(pool)
+
+
+def peek_schema_catalog() -> Optional[SchemaCatalog]:
+    """The loaded catalog (possibly expired), without loading it."""
+    return _catalog
@@ -137,6 +137,7 @@ class DocumentCollectionAgent:
         self.state = state
         self.type_cache = type_cache
         self.pending_image_data: bytes | None = None  # Set by router before process_message()
+        self.pending_images: list[bytes] = []  # All images of the message, when it has more than one
 
     # ── LLM interface (used by handlers) ──────────────────────────────
 
@@ -10,9 +10,10 @@ logger = logging.getLogger(__name__)
 
 async def extract_iban_from_image(image_data: bytes) -> str | None:
     """Extract IBAN from a bank card image. Returns the IBAN string or None."""
-    from agents.document_collection.recognition.agent import _client, _preprocess_image
+    from agents.document_collection.recognition.agent import _preprocess_image
+    from src.utils.llm import VISION_TIMEOUT, generate
 
-    image_data, mime_type = _preprocess_image(image_data)
+    image_data, mime_type = await _preprocess_image(image_data)
 
     prompt = (
         "This is a photo of a bank card or bank document. "
@@ -22,26 +23,27 @@ async def extract_iban_from_image(image_data: bytes) -> str | None:
     )
 
     try:
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: _client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[
-                    types.Part(inline_data=types.Blob(mime_type=mime_type, data=image_data)),
-                    types.Part(text=prompt),
-                ],
-                config=types.GenerateContentConfig(temperature=0),
-            ),
+        response_text = await generate(
+            contents=[types.Content(role="user", parts=[
+                types.Part(inline_data=types.Blob(mime_type=mime_type, data=image_data)),
+                types.Part(text=prompt),
+            ])],
+            model="gemini-2.0-flash",
+            temperature=0,
+            concurrency_group="vision",
+            timeout=VISION_TIMEOUT,
         )
 
-        result = (response.text or "").strip()
+        result = (response_text or "").strip()
         if not result or result.upper() == "NONE":
             return None
 
         logger.info(f"[IBAN-IMAGE] Extracted: {result}")
         return result
 
+    except asyncio.TimeoutError:
+        logger.warning("[IBAN-IMAGE] Extraction timed out")
+        return None
     except Exception as e:
         logger.warning(f"[IBAN-IMAGE] Extraction failed: {e}")
         return None
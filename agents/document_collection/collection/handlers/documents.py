@@ -13,6 +13,12 @@ import logging
 import re
 from typing import TYPE_CHECKING
 
+from agents.document_collection.collection.speculation import (
+    discard_back_window,
+    open_back_window,
+    take_back_result,
+)
+
 if TYPE_CHECKING:
     from agents.document_collection.collection.agent import DocumentCollectionAgent
 
@@ -43,13 +49,19 @@ def _simulate_verification(message: str) -> dict | None:
 
 
 async def _verify_document_image(
-    agent: DocumentCollectionAgent, enriched: dict, step: dict,
+    agent: DocumentCollectionAgent, enriched: dict, step: dict, speculate_back: bool = False,
 ) -> dict:
-    """Run real document verification via Gemini vision."""
-    from agents.document_collection.recognition.agent import verify_document
+    """
+    Run real document verification via Gemini vision.
+
+    Several images in one message are verified together in one call (as
+    front and back for front/back documents). With speculate_back, an image
+    arriving while the front is verified is pre-verified as the back.
+    """
+    from agents.document_collection.recognition.agent import verify_document, verify_document_pages
 
     slug = enriched["slug"]
-    image_data = agent.pending_image_data
+    images = agent.pending_images or [agent.pending_image_data]
 
     # Get extraction fields from verification_config
     extract_fields = None
@@ -64,14 +76,35 @@ async def _verify_document_image(
         item_slugs = [item.get("slug", "") for item in step.get("items", [])]
         available_types = agent.type_cache.get_doc_types_summary(item_slugs)
 
-    result = await verify_document(
-        image_data=image_data,
-        candidate_name=agent.state.candidate_name,
-        document_type_hint=slug,
-        extract_fields=extract_fields,
-        available_types=available_types,
-    )
+    verify_kwargs = {
+        "candidate_name": agent.state.candidate_name,
+        "document_type_hint": slug,
+        "extract_fields": extract_fields,
+        "available_types": available_types,
+        "workspace_id": getattr(agent.type_cache, "workspace_id", None),
+    }
+    if len(images) > 1:
+        sides = ["front", "back"] if _is_front_back(enriched) and len(images) == 2 else None
+        result = await verify_document_pages(images, page_labels=sides, **verify_kwargs)
+    else:
+        sides = None
+        if speculate_back:
+            open_back_window(agent.state.collection_id, slug, verify_kwargs)
+        result = await verify_document(image_data=images[0], **verify_kwargs)
+
+    verification = _verification_from_result(result)
+    if sides:
+        verification["sides"] = sides
 
+    logger.info(f"[DOC] Verified {slug}: passed={result.verification_passed}, "
+                f"category={result.document_category}, quality={result.image_quality}"
+                + (f", sides={sides}" if sides else ""))
+
+    return verification
+
+
+def _verification_from_result(result) -> dict:
+    """Verification dict stored in collected_documents from a DocumentVerificationResult."""
     verification = {
         "passed": result.verification_passed,
         "summary": result.verification_summary,
@@ -87,12 +120,13 @@ async def _verify_document_image(
     if result.extracted_name:
         verification["extracted_name"] = result.extracted_name
 
-    logger.info(f"[DOC] Verified {slug}: passed={result.verification_passed}, "
-                f"category={result.document_category}, quality={result.image_quality}")
-
     return verification
 
 
+def _is_front_back(enriched: dict) -> bool:
+    return enriched.get("scan_mode") == "front_back" or bool(enriched.get("requires_front_back"))
+
+
 def _get_current_item(agent: DocumentCollectionAgent, step: dict) -> dict | None:
     items = step.get("items", [])
     idx = agent.state.step_item_index
@@ -163,7 +197,7 @@ async def handle_documents(agent: DocumentCollectionAgent, message: str, has_ima
     # Check for verification
     verification = _simulate_verification(message)
     if not verification and has_image and agent.pending_image_data:
-        verification = await _verify_document_image(agent, enriched, step)
+        verification = await _verify_document_image(agent, enriched, step, speculate_back=_is_front_back(enriched))
     elif not verification and has_image:
         # Image flag set but no bytes available (download failed)
         verification = {"passed": True, "summary": "Document ontvangen."}
@@ -177,6 +211,7 @@ Max 2 zinnen."""
         )
 
     if not verification["passed"]:
+        discard_back_window(state.collection_id)
         retries = state.retry_counts.get(slug, 0) + 1
         state.retry_counts[slug] = retries
         if retries >= MAX_RETRIES:
@@ -203,25 +238,42 @@ Vraag vriendelijk om een nieuwe foto. Max 2 zinnen."""
             enriched = _build_item_from_cache(agent, {"slug": slug})
             logger.info(f"[DOC] Auto-resolved to different doc type: {resolved_slug}")
 
-    scan_mode = enriched.get("scan_mode", "single")
+    front_back = _is_front_back(enriched)
+    both_sides = verification.get("sides") == ["front", "back"]
     doc_data = {
-        "status": "front_verified" if scan_mode == "front_back" else "verified",
-        "sides_collected": ["front"] if scan_mode == "front_back" else ["single"],
+        "status": "front_verified" if front_back and not both_sides else "verified",
+        "sides_collected": verification.get("sides") or (["front"] if front_back else ["single"]),
         "verification": verification,
     }
     if verification.get("extracted_fields"):
         doc_data["extracted_fields"] = verification["extracted_fields"]
 
-    if scan_mode == "front_back":
+    if front_back and not both_sides:
         state.collected_documents[slug] = doc_data
+
+        # Back side already sent and pre-verified while the front was checked
+        back = await take_back_result(state.collection_id)
+        if back is not None and back.verification_passed:
+            _store_back_side(state, slug, _verification_from_result(back))
+            logger.info(f"[DOC] {slug}: back side taken from speculative verification")
+            return await _advance_to_next_item(agent, step, enriched)
+
         state.waiting_for_back = slug
+        if back is not None:
+            # The back was sent along but didn't pass: answer it as a failed back photo
+            logger.info(f"[DOC] {slug}: speculative back side failed verification")
+            return await _retry_back_side(
+                agent, step, enriched, _verification_from_result(back),
+                intro=f"Voorkant van **{enriched['name']}** is goed ontvangen ✅",
+            )
         return await agent._say(
             f"""Voorkant van **{enriched['name']}** is goed ontvangen ✅
 Vraag nu om de **achterkant**.
 Kort en vriendelijk, max 1 zin."""
         )
 
-    # Single scan — fully verified
+    # Single scan (or both sides in one message) — fully verified
+    discard_back_window(state.collection_id)
     state.collected_documents[slug] = doc_data
     return await _advance_to_next_item(agent, step, enriched)
 
@@ -255,28 +307,45 @@ Herinner vriendelijk. 📷 Max 1 zin."""
         )
 
     if not verification["passed"]:
-        retries = state.retry_counts.get(slug, 0) + 1
-        state.retry_counts[slug] = retries
-        if retries >= MAX_RETRIES:
-            state.waiting_for_back = None
-            state.skipped_items.append({
-                "slug": slug, "type": "document",
-                "name": enriched["name"],
-                "skip_reason": "max_retries",
-            })
-            return await _advance_to_next_item(agent, step, enriched, skipped=True)
-        feedback = verification.get("feedback_message", "De foto van de achterkant was niet duidelijk genoeg.")
-        return await agent._say(
-            f"""{feedback}
-Poging {retries}/{MAX_RETRIES}. Vraag om een nieuwe foto. Max 2 zinnen."""
-        )
+        return await _retry_back_side(agent, step, enriched, verification)
 
     # Back side verified — merge extracted fields
+    _store_back_side(state, slug, verification)
+    return await _advance_to_next_item(agent, step, enriched)
+
+
+async def _retry_back_side(
+    agent: DocumentCollectionAgent, step: dict, enriched: dict, verification: dict, intro: str = "",
+) -> str:
+    """Count a failed back photo: ask for a new one, or skip the document after MAX_RETRIES."""
+    state = agent.state
+    slug = enriched["slug"]
+    retries = state.retry_counts.get(slug, 0) + 1
+    state.retry_counts[slug] = retries
+    if retries >= MAX_RETRIES:
+        state.waiting_for_back = None
+        state.skipped_items.append({
+            "slug": slug, "type": "document",
+            "name": enriched["name"],
+            "skip_reason": "max_retries",
+        })
+        return await _advance_to_next_item(agent, step, enriched, skipped=True)
+    feedback = verification.get("feedback_message", "De foto van de achterkant was niet duidelijk genoeg.")
+    if intro:
+        feedback = f"{intro}\n{feedback}"
+    return await agent._say(
+        f"""{feedback}
+Poging {retries}/{MAX_RETRIES}. Vraag om een nieuwe foto. Max 2 zinnen."""
+    )
+
+
+def _store_back_side(state, slug: str, verification: dict) -> None:
+    """Mark a front-verified document as complete, merging the back's extracted fields."""
     existing = state.collected_documents.get(slug, {})
     sides = existing.get("sides_collected", [])
     sides.append("back")
-    existing_fields = existing.get("extracted_fields", {})
-    back_fields = verification.get("extracted_fields", {})
+    existing_fields = existing.get("extracted_fields") or {}
+    back_fields = verification.get("extracted_fields") or {}
     merged_fields = {**existing_fields, **{k: v for k, v in back_fields.items() if v}}
 
     state.collected_documents[slug] = {
@@ -286,7 +355,6 @@ Poging {retries}/{MAX_RETRIES}. Vraag om een nieuwe foto. Max 2 zinnen."""
         "extracted_fields": merged_fields if merged_fields else None,
     }
     state.waiting_for_back = None
-    return await _advance_to_next_item(agent, step, enriched)
 
 
 async def _ask_document(agent: DocumentCollectionAgent, enriched: dict) -> str:
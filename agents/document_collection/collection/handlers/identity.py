@@ -18,6 +18,11 @@ import re
 from typing import TYPE_CHECKING
 
 from agents.document_collection.collection.rules import WORK_PERMIT_SLUGS
+from agents.document_collection.collection.speculation import (
+    discard_back_window,
+    open_back_window,
+    take_back_result,
+)
 
 if TYPE_CHECKING:
     from agents.document_collection.collection.agent import DocumentCollectionAgent
@@ -105,11 +110,30 @@ def _detect_eu_from_nationality(nationality: str | None) -> bool | None:
     return normalized in _EU_NATIONALITIES
 
 
-async def _verify_identity_image(agent: DocumentCollectionAgent) -> dict:
-    """Run real document verification for identity documents via Gemini vision."""
-    from agents.document_collection.recognition.agent import verify_document
+def _identity_slug(category: str | None) -> str:
+    """Identity slug for a recognized document category (id_card when it isn't one)."""
+    return category if category in ("id_card", "passport", "driver_license") else "id_card"
+
+
+def _scan_mode(agent: DocumentCollectionAgent, slug: str) -> str:
+    """Scan mode of an identity document type: front_back or single."""
+    doc_type = agent.type_cache.get_doc_type(slug) if agent.type_cache else None
+    if doc_type:
+        return doc_type.get("scan_mode", "single")
+    return "front_back" if slug == "id_card" else "single"
 
-    image_data = agent.pending_image_data
+
+async def _verify_identity_image(agent: DocumentCollectionAgent, speculate_back: bool = False) -> dict:
+    """
+    Run real document verification for identity documents via Gemini vision.
+
+    Two images in one message are verified together as front and back in
+    one call. With speculate_back, an image arriving while this one is
+    verified is pre-verified as the back (see speculation.py).
+    """
+    from agents.document_collection.recognition.agent import verify_document, verify_document_pages
+
+    images = agent.pending_images or [agent.pending_image_data]
 
     # Get extraction fields — try id_card first (most common), will auto-detect anyway
     extract_fields = None
@@ -127,13 +151,23 @@ async def _verify_identity_image(agent: DocumentCollectionAgent) -> dict:
         {"slug": "driver_license", "name": "Rijbewijs"},
     ]
 
-    result = await verify_document(
-        image_data=image_data,
-        candidate_name=agent.state.candidate_name,
-        document_type_hint=None,  # Let it auto-detect
-        extract_fields=extract_fields,
-        available_types=available_types,
-    )
+    verify_kwargs = {
+        "candidate_name": agent.state.candidate_name,
+        "document_type_hint": None,  # Let it auto-detect
+        "extract_fields": extract_fields,
+        "available_types": available_types,
+        "workspace_id": getattr(agent.type_cache, "workspace_id", None),
+    }
+    sides = None
+    if len(images) > 1:
+        # The type (and so whether these are two sides or pages) is only known after classification
+        result = await verify_document_pages(images, page_labels=None, **verify_kwargs)
+        if len(images) == 2 and _scan_mode(agent, _identity_slug(result.document_category)) == "front_back":
+            sides = ["front", "back"]
+    else:
+        if speculate_back:
+            open_back_window(agent.state.collection_id, None, verify_kwargs)
+        result = await verify_document(image_data=images[0], **verify_kwargs)
 
     verification = {
         "passed": result.verification_passed,
@@ -154,6 +188,8 @@ async def _verify_identity_image(agent: DocumentCollectionAgent) -> dict:
     eu_status = _detect_eu_from_nationality(nationality)
     if eu_status is not None:
         verification["eu_citizen"] = eu_status
+    if sides:
+        verification["sides"] = sides
 
     logger.info(f"[IDENTITY] Verified: passed={result.verification_passed}, "
                 f"category={result.document_category}, quality={result.image_quality}, "
@@ -260,7 +296,7 @@ async def _handle_id_phase(agent: DocumentCollectionAgent, message: str, has_ima
 
     verification = _simulate_verification(message)
     if not verification and has_image and agent.pending_image_data:
-        verification = await _verify_identity_image(agent)
+        verification = await _verify_identity_image(agent, speculate_back=not state.waiting_for_back)
     elif not verification and has_image:
         verification = {"passed": True, "summary": "Document ontvangen."}
 
@@ -272,6 +308,7 @@ Max 1-2 zinnen."""
         )
 
     if not verification["passed"]:
+        discard_back_window(state.collection_id)
         slug = verification.get("resolved_slug", "identity")
         retries = state.retry_counts.get(slug, 0) + 1
         state.retry_counts[slug] = retries
@@ -285,14 +322,9 @@ Poging {retries}/{MAX_RETRIES}.
 Vraag vriendelijk om een nieuwe foto. Max 2 zinnen."""
         )
 
-    # Verification passed
-    resolved_slug = verification.get("resolved_slug", "id_card")
-    # Map recognized categories to valid identity slugs
-    if resolved_slug not in ("id_card", "passport", "driver_license"):
-        resolved_slug = "id_card"  # Default fallback
-
-    doc_type = agent.type_cache.get_doc_type(resolved_slug) if agent.type_cache else None
-    scan_mode = (doc_type or {}).get("scan_mode", "single") if doc_type else ("front_back" if resolved_slug == "id_card" else "single")
+    # Verification passed; map recognized categories to valid identity slugs
+    resolved_slug = _identity_slug(verification.get("resolved_slug", "id_card"))
+    scan_mode = _scan_mode(agent, resolved_slug)
 
     doc_data = {
         "verification": verification,
@@ -308,8 +340,22 @@ Vraag vriendelijk om een nieuwe foto. Max 2 zinnen."""
             state.collected_attributes["work_eligibility"] = {"value": "Ja"}
             logger.info("EU citizen detected from front-side scan — work_eligibility=true")
 
+    # Back side already sent and pre-verified while the front was checked
+    back_verification = None
+    failed_back = None
+    if scan_mode == "front_back" and not state.waiting_for_back and not verification.get("sides"):
+        back = await take_back_result(state.collection_id)
+        if back is not None and back.verification_passed:
+            back_verification = {"extracted_fields": back.extracted_fields}
+            logger.info(f"[IDENTITY] {resolved_slug}: back side taken from speculative verification")
+        elif back is not None:
+            failed_back = back
+            logger.info(f"[IDENTITY] {resolved_slug}: speculative back side failed verification")
+    else:
+        discard_back_window(state.collection_id)
+
     # Check if we need the back side
-    if scan_mode == "front_back" and not state.waiting_for_back:
+    if scan_mode == "front_back" and not state.waiting_for_back and not verification.get("sides") and not back_verification:
         doc_data["status"] = "front_verified"
         doc_data["sides_collected"] = ["front"]
         state.collected_documents[resolved_slug] = doc_data
@@ -317,6 +363,19 @@ Vraag vriendelijk om een nieuwe foto. Max 2 zinnen."""
         state.identity_phase = "waiting_id"
         # Auto-populate attributes from front-side extraction
         _auto_populate_attributes(state, doc_data)
+        if failed_back is not None:
+            # The back was sent along but didn't pass: answer it as a failed back photo
+            retries = state.retry_counts.get(resolved_slug, 0) + 1
+            state.retry_counts[resolved_slug] = retries
+            if retries >= MAX_RETRIES:
+                state.skipped_items.append({"slug": "identity", "type": "identity_verification", "skip_reason": "max_retries"})
+                return await agent._advance_step()
+            feedback = failed_back.feedback_message or "De foto van de achterkant was niet duidelijk genoeg."
+            return await agent._say(
+                f"""Voorkant van het identiteitsdocument is goed ontvangen ✅
+{feedback}
+Poging {retries}/{MAX_RETRIES}. Vraag om een nieuwe foto van de **achterkant**. Max 2 zinnen."""
+            )
         return await agent._say(
             f"""Voorkant van het identiteitsdocument is goed ontvangen ✅
 Vraag nu om de **achterkant**.
@@ -337,10 +396,18 @@ Kort en vriendelijk, max 1 zin."""
         doc_data["extracted_fields"] = merged_fields if merged_fields else None
         state.collected_documents[resolved_slug] = doc_data
         state.waiting_for_back = None
+    elif back_verification:
+        # Both sides verified in this turn (back pre-verified speculatively)
+        back_fields = back_verification.get("extracted_fields") or {}
+        merged_fields = {**(doc_data.get("extracted_fields") or {}), **{k: v for k, v in back_fields.items() if v}}
+        doc_data["status"] = "verified"
+        doc_data["sides_collected"] = ["front", "back"]
+        doc_data["extracted_fields"] = merged_fields if merged_fields else None
+        state.collected_documents[resolved_slug] = doc_data
     else:
-        # Single scan — fully verified
+        # Single scan (or both sides in one message) — fully verified
         doc_data["status"] = "verified"
-        doc_data["sides_collected"] = ["single"]
+        doc_data["sides_collected"] = verification.get("sides") or ["single"]
         state.collected_documents[resolved_slug] = doc_data
 
     # Auto-populate attributes from extracted fields
@@ -0,0 +1,106 @@
+"""
+Speculative back-side verification for front/back documents.
+
+Candidates usually send the front and the back of a card right after each
+other, as two WhatsApp messages. Without speculation the back arrives while
+the front turn is still verifying, and has to wait for that turn to finish,
+ask for the back, and then go through a second full verification.
+
+While a front is being verified for a document that needs both sides, the
+handler opens a speculation window for the collection. An image that arrives
+in that window (claim_back_image, called by the webhook) is pre-verified as
+the back right away, in parallel with the front. When the front passes, the
+handler takes the back result and completes the document in the same turn
+(or, if the back didn't pass, answers it as a failed back photo).
+When the window is discarded instead (the front failed, or turned out to be a
+single-sided document), a claimed image is released: the turn that owned the
+window answers it as a message of its own (take_released_image), so it isn't
+lost.
+
+Windows live in this process only: with several instances, a back that lands
+elsewhere simply goes through the normal waiting_for_back flow.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# A window is ignored after this long (e.g. its turn crashed before closing it)
+SPECULATION_TTL_SECONDS = 120
+
+
+@dataclass
+class _Window:
+    slug: Optional[str]
+    verify_kwargs: dict
+    opened_at: float = field(default_factory=time.monotonic)
+    back_task: Optional[asyncio.Task] = None
+    image_data: Optional[bytes] = None
+
+
+_windows: dict[str, _Window] = {}
+# Claimed images whose window was discarded, to be processed as normal messages
+_released: dict[str, bytes] = {}
+
+
+def open_back_window(collection_id: str, slug: Optional[str], verify_kwargs: dict):
+    """Start accepting a back image for this collection (kwargs as for verify_document)."""
+    if collection_id:
+        discard_back_window(collection_id)
+        _windows[collection_id] = _Window(slug, verify_kwargs)
+
+
+def claim_back_image(collection_id: str, image_data: bytes) -> bool:
+    """
+    Pre-verify an incoming image as the back side if a front is being verified.
+
+    Returns True when the image was claimed; the front's turn will answer for it.
+    """
+    from agents.document_collection.recognition.agent import verify_document
+
+    window = _windows.get(collection_id)
+    if window is None or window.back_task is not None:
+        return False
+    if time.monotonic() - window.opened_at > SPECULATION_TTL_SECONDS:
+        _windows.pop(collection_id, None)
+        return False
+
+    window.image_data = image_data
+    window.back_task = asyncio.create_task(verify_document(image_data, **window.verify_kwargs))
+    logger.info(f"[SPECULATIVE] Pre-verifying back of {window.slug or 'identity document'} for {collection_id}")
+    return True
+
+
+async def take_back_result(collection_id: str):
+    """Close the window; returns the back DocumentVerificationResult if one was claimed, else None."""
+    window = _windows.pop(collection_id, None)
+    if window is None or window.back_task is None:
+        return None
+    try:
+        return await window.back_task
+    except Exception as e:
+        logger.warning(f"[SPECULATIVE] Back verification failed for {collection_id}: {e}")
+        _released[collection_id] = window.image_data
+        return None
+
+
+def discard_back_window(collection_id: str):
+    """Close the window and drop any speculative result; a claimed image is released (take_released_image)."""
+    window = _windows.pop(collection_id, None)
+    if window is not None and window.back_task is not None:
+        window.back_task.cancel()
+        _released[collection_id] = window.image_data
+        logger.info(f"[SPECULATIVE] Released claimed image for {collection_id}: not used as a back side")
+
+
+def take_released_image(collection_id: str) -> Optional[bytes]:
+    """A claimed image whose window was discarded, if any (its webhook returned without answering)."""
+    window = _windows.get(collection_id)
+    if window is not None and window.back_task is not None:
+        # Left open by the turn (no take/discard): don't let its image go unanswered
+        discard_back_window(collection_id)
+    return _released.pop(collection_id, None)
@@ -9,7 +9,7 @@ import json
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class CollectionState:
     """All conversation state — serializable to/from JSON for DB persistence."""
 
@@ -1,88 +1,56 @@
 """
 TypeCache — dynamic type loading from DB for the collection agent.
 
-Loads all document and attribute type definitions for a workspace once,
-then serves fast lookups by slug. The agent uses this to get field specs,
-ai_hints, scan_mode, etc. at runtime instead of baking them into the plan.
+Serves the workspace's document and attribute type definitions by slug, from
+the process-wide type registry (src/utils/type_registry.py): agents of the
+same workspace share one snapshot instead of each loading the types. The
+agent uses this to get field specs, ai_hints, scan_mode, etc. at runtime
+instead of baking them into the plan.
 """
 
-import json
 import logging
 import uuid
-from typing import Optional
+from typing import Mapping, Optional
+
+from src.utils.type_registry import TypeSnapshot, get_types, type_registry
 
 logger = logging.getLogger(__name__)
 
 
 class TypeCache:
-    """Loads all doc/attr types for a workspace once, serves lookups by slug."""
+    """Serves the active doc/attr types of a workspace by slug (read-only mappings)."""
 
     def __init__(self, pool, workspace_id: uuid.UUID):
         self.pool = pool
         self.workspace_id = workspace_id
-        self._doc_types: dict[str, dict] = {}
-        self._attr_types: dict[str, dict] = {}
-        self._loaded = False
+        self._snapshot: Optional[TypeSnapshot] = None
 
     async def ensure_loaded(self):
-        if self._loaded:
-            return
-
-        from src.repositories.candidate_attribute_type_repo import CandidateAttributeTypeRepository
-        from src.repositories.document_type_repo import DocumentTypeRepository
-
-        attr_repo = CandidateAttributeTypeRepository(self.pool)
-        doc_repo = DocumentTypeRepository(self.pool)
-
-        attr_rows = await attr_repo.list_for_workspace(self.workspace_id)
-        for row in attr_rows:
-            fields = row["fields"]
-            if isinstance(fields, str):
-                fields = json.loads(fields)
-            self._attr_types[row["slug"]] = {
-                "id": row["id"],
-                "slug": row["slug"],
-                "name": row["name"],
-                "data_type": row["data_type"],
-                "fields": fields,
-                "ai_hint": row["ai_hint"],
-                "category": row["category"],
-            }
+        snapshot = await get_types(self.pool, self.workspace_id)
+        if self._snapshot is not snapshot:
+            self._snapshot = snapshot
+            logger.debug(f"TypeCache using type snapshot v{snapshot.version} for workspace {self.workspace_id}")
 
-        doc_rows = await doc_repo.list_for_workspace(self.workspace_id)
-        for row in doc_rows:
-            verification_config = row["verification_config"]
-            if isinstance(verification_config, str):
-                verification_config = json.loads(verification_config)
-            self._doc_types[row["slug"]] = {
-                "id": row["id"],
-                "slug": row["slug"],
-                "name": row["name"],
-                "requires_front_back": row["requires_front_back"],
-                "is_verifiable": row["is_verifiable"],
-                "scan_mode": row["scan_mode"],
-                "verification_config": verification_config,
-                "ai_hint": row["ai_hint"],
-                "category": row["category"],
-            }
+    def _types(self) -> Optional[TypeSnapshot]:
+        # A long-lived agent picks up snapshots reloaded after a type change
+        latest = type_registry.peek(self.workspace_id)
+        if latest is not None and (self._snapshot is None or latest.version >= self._snapshot.version):
+            self._snapshot = latest
+        return self._snapshot
 
-        self._loaded = True
-        logger.info(
-            f"TypeCache loaded: {len(self._attr_types)} attr types, "
-            f"{len(self._doc_types)} doc types for workspace {self.workspace_id}"
-        )
+    def get_doc_type(self, slug: str) -> Optional[Mapping]:
+        snapshot = self._types()
+        return snapshot.get_doc_type(slug) if snapshot else None
 
-    def get_doc_type(self, slug: str) -> Optional[dict]:
-        return self._doc_types.get(slug)
-
-    def get_attr_type(self, slug: str) -> Optional[dict]:
-        return self._attr_types.get(slug)
+    def get_attr_type(self, slug: str) -> Optional[Mapping]:
+        snapshot = self._types()
+        return snapshot.get_attr_type(slug) if snapshot else None
 
     def get_doc_types_summary(self, slugs: list[str]) -> list[dict]:
         """Return [{slug, name}] for the given slugs — used as classification hints."""
         result = []
         for slug in slugs:
-            dt = self._doc_types.get(slug)
+            dt = self.get_doc_type(slug)
             if dt:
                 result.append({"slug": dt["slug"], "name": dt["name"]})
         return result
@@ -6,6 +6,7 @@ Provides document verification capabilities with fraud detection.
 
 from .agent import (
     verify_document,
+    verify_document_pages,
     verify_document_base64,
     DocumentVerificationResult,
     FraudIndicator,
@@ -13,6 +14,7 @@ from .agent import (
 
 __all__ = [
     "verify_document",
+    "verify_document_pages",
     "verify_document_base64",
     "DocumentVerificationResult",
     "FraudIndicator",
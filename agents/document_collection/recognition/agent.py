@@ -8,19 +8,20 @@ Uses Gemini 2.5-Flash vision capabilities to:
 - Detect AI-generated or manipulated documents
 """
 
-from google import genai
 from google.genai import types
 from dataclasses import dataclass, field
 from typing import Optional, List
+import asyncio
 import base64
-import io
+import hashlib
 import logging
-import os
 import uuid
 
-logger = logging.getLogger(__name__)
+from src.config import VISION_IMAGE_MAX_SIZE
+from .image_pipeline import VisionImage, resize_for_vision, run_image_job
+from .verification_cache import get_verification_cache, verification_scope
 
-_client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Document type → fields to extract
@@ -68,6 +69,8 @@ class DocumentVerificationResult:
     extracted_fields: dict = field(default_factory=dict)  # document-type-specific fields
     feedback_message: Optional[str] = None  # Dutch feedback for candidate when quality is poor
     raw_response: Optional[str] = None
+    verification_id: Optional[str] = None  # agents.document_verifications row, if persisted
+    cached: bool = False  # served from the verification cache
 
 
 # =============================================================================
@@ -206,12 +209,12 @@ EXAMPLE_FIELDS_BY_TYPE = {
 }
 
 
-def _build_prompt(
+def _build_instruction(
     document_type_hint: Optional[str],
-    candidate_name: Optional[str],
     extract_fields: Optional[list[dict]] = None,
     available_types: Optional[list[dict]] = None,
 ) -> str:
+    """System instruction: static per document type / field set, so it is context-cached."""
     # Build extraction fields instruction
     if extract_fields:
         # Dynamic fields from verification_config
@@ -228,8 +231,31 @@ def _build_prompt(
     if available_types:
         type_list = "\n".join(f"- **{t['slug']}**: {t['name']}" for t in available_types)
         prompt += f"\n\n## AVAILABLE DOCUMENT TYPES\nClassify the document as one of:\n{type_list}\n- **unknown**: Document type not in the list above\n- **unreadable**: Image too poor quality to identify"
+    return prompt
+
 
-    parts = [prompt, "\nAnalyze this document image."]
+def _build_prompt(
+    document_type_hint: Optional[str],
+    candidate_name: Optional[str],
+    page_labels: Optional[list[str]] = None,
+    multi_page: bool = False,
+) -> str:
+    """Per-call prompt sent with the image(s), after the cached instruction."""
+    if page_labels and len(page_labels) > 1:
+        order = ", ".join(f"{i}. {label}" for i, label in enumerate(page_labels, 1))
+        parts = [(
+            f"You receive {len(page_labels)} images of ONE document, in this order: {order}.\n"
+            "Analyze them together as a single document: classify it once, extract every field from "
+            "whichever image shows it and merge them into one extracted_fields object. Base image_quality "
+            "on the worst image and prefix readability_issues with the image they apply to (e.g. \"back: glare\")."
+        )]
+    elif multi_page:
+        parts = [(
+            "Analyze this document. It may have several pages: treat them as one document, extract every "
+            "field from whichever page shows it and merge them into one extracted_fields object."
+        )]
+    else:
+        parts = ["Analyze this document image."]
     if document_type_hint:
         parts.append(f"Expected document type: {document_type_hint}")
     if candidate_name:
@@ -238,33 +264,115 @@ def _build_prompt(
     return "\n".join(parts)
 
 
+DOCUMENT_CATEGORIES = [
+    "id_card", "driver_license", "passport", "medical_certificate",
+    "work_permit", "certificate_diploma", "unknown", "unreadable",
+]
+
+
+def _build_response_schema(
+    document_type_hint: Optional[str],
+    extract_fields: Optional[list[dict]] = None,
+    available_types: Optional[list[dict]] = None,
+) -> dict:
+    """Gemini response schema matching the OUTPUT FORMAT of BASE_INSTRUCTION."""
+    if extract_fields:
+        field_names = [f["name"] for f in extract_fields]
+    elif document_type_hint in DOCUMENT_FIELDS:
+        field_names = DOCUMENT_FIELDS[document_type_hint]
+    else:
+        field_names = sorted({name for names in DOCUMENT_FIELDS.values() for name in names})
+
+    if available_types:
+        categories = [t["slug"] for t in available_types] + ["unknown", "unreadable"]
+    else:
+        categories = DOCUMENT_CATEGORIES
+
+    nullable_string = {"type": "STRING", "nullable": True}
+    nullable_number = {"type": "NUMBER", "nullable": True}
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "document_category": {"type": "STRING", "enum": categories},
+            "document_category_confidence": {"type": "NUMBER"},
+            "extracted_name": nullable_string,
+            "name_extraction_confidence": {"type": "NUMBER"},
+            "name_match_performed": {"type": "BOOLEAN"},
+            "name_match_result": {
+                "type": "STRING", "nullable": True,
+                "enum": ["exact_match", "partial_match", "no_match", "ambiguous"],
+            },
+            "name_match_confidence": nullable_number,
+            "name_match_details": nullable_string,
+            "extracted_fields": {
+                "type": "OBJECT",
+                "properties": {name: nullable_string for name in field_names},
+            },
+            "fraud_indicators": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "indicator_type": {"type": "STRING"},
+                        "description": {"type": "STRING"},
+                        "severity": {"type": "STRING", "enum": ["low", "medium", "high"]},
+                        "confidence": {"type": "NUMBER"},
+                    },
+                    "required": ["indicator_type", "description", "severity", "confidence"],
+                },
+            },
+            "fraud_risk_level": {"type": "STRING", "enum": ["low", "medium", "high"]},
+            "overall_fraud_confidence": {"type": "NUMBER"},
+            "image_quality": {
+                "type": "STRING",
+                "enum": ["excellent", "good", "acceptable", "poor", "unreadable"],
+            },
+            "readability_issues": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "feedback_message": nullable_string,
+            "verification_summary": {"type": "STRING"},
+        },
+        "required": [
+            "document_category", "document_category_confidence", "extracted_name",
+            "name_match_performed", "extracted_fields", "fraud_indicators", "fraud_risk_level",
+            "overall_fraud_confidence", "image_quality", "readability_issues", "verification_summary",
+        ],
+    }
+
+
 # =============================================================================
 # Image preprocessing
 # =============================================================================
 
-def _preprocess_image(image_data: bytes, max_size: int = 1024) -> tuple[bytes, str]:
-    """Resize image to max_size on longest side and re-encode as JPEG."""
+async def _prepare_vision_image(image_data: bytes, max_size: int = VISION_IMAGE_MAX_SIZE) -> VisionImage:
+    """Resize, re-encode and hash an image in the image pipeline (falls back to the original)."""
+    if image_data[:5] == b"%PDF-":
+        # Gemini reads PDFs (all pages) natively; only hash them
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(image_data).hexdigest())
+        return VisionImage(image_data, "application/pdf", content_hash=content_hash)
     try:
-        from PIL import Image
-        img = Image.open(io.BytesIO(image_data))
-        img.thumbnail((max_size, max_size), Image.LANCZOS)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=88, optimize=True)
-        result = buf.getvalue()
-        logger.info(f"Image resized: {len(image_data)/1024:.1f}KB → {len(result)/1024:.1f}KB ({img.size[0]}x{img.size[1]}px)")
-        return result, "image/jpeg"
+        image, timings = await run_image_job(resize_for_vision, image_data, max_size)
+        logger.info(
+            f"Image resized: {len(image_data)/1024:.1f}KB → {len(image.data)/1024:.1f}KB "
+            f"({image.size[0]}x{image.size[1]}px) | {timings}"
+        )
+        return image
     except Exception as e:
         logger.warning(f"Image preprocessing failed, using original: {e}")
         mime = "image/png" if image_data[:4] == b'\x89PNG' else "image/jpeg"
-        return image_data, mime
+        return VisionImage(image_data, mime)
+
+
+async def _preprocess_image(image_data: bytes, max_size: int = VISION_IMAGE_MAX_SIZE) -> tuple[bytes, str]:
+    """Resize image to max_size on longest side and re-encode as JPEG (in the image pipeline)."""
+    image = await _prepare_vision_image(image_data, max_size)
+    return image.data, image.mime_type
 
 
 # =============================================================================
 # Main verification function — direct Gemini API (no ADK runner overhead)
 # =============================================================================
 
+from src.utils.llm import VISION_TIMEOUT, generate
 from src.utils.text_utils import extract_json_from_response as parse_agent_response
 
 
@@ -304,59 +412,188 @@ def _generate_feedback(image_quality: str, readability_issues: list[str]) -> Opt
     return "De foto is niet duidelijk genoeg. Probeer opnieuw met meer licht en houd het document vlak."
 
 
+def _failed_result(
+    candidate_name: Optional[str],
+    details: str,
+    summary: str,
+    feedback: Optional[str],
+    raw_response: Optional[str] = None,
+) -> DocumentVerificationResult:
+    """Result for a verification that could not be completed (never cached)."""
+    return DocumentVerificationResult(
+        document_category="unreadable",
+        document_category_confidence=0.0,
+        extracted_name=None,
+        name_extraction_confidence=0.0,
+        name_match_performed=bool(candidate_name),
+        name_match_result=None,
+        name_match_confidence=None,
+        name_match_details=details,
+        fraud_risk_level="high",
+        fraud_indicators=[],
+        overall_fraud_confidence=1.0,
+        image_quality="unreadable",
+        readability_issues=["processing_error"],
+        verification_passed=False,
+        verification_summary=summary,
+        feedback_message=feedback,
+        raw_response=raw_response,
+    )
+
+
 async def verify_document(
     image_data: bytes,
     candidate_name: Optional[str] = None,
     document_type_hint: Optional[str] = None,
     extract_fields: Optional[list[dict]] = None,
     available_types: Optional[list[dict]] = None,
+    use_cache: bool = True,
+    persist: bool = False,
+    application_id: Optional[uuid.UUID] = None,
+    vacancy_id: Optional[uuid.UUID] = None,
+    workspace_id: Optional[uuid.UUID] = None,
 ) -> DocumentVerificationResult:
     """
     Verify a document image with fraud detection and field extraction.
 
+    Re-uploads of the same (or a near-identical) image in the same workspace
+    with the same hint, name and fields are answered from the verification
+    cache without a Gemini call (see verification_cache.py).
+
     Args:
-        image_data: Raw image bytes (JPG/PNG)
+        image_data: Raw image bytes (JPG/PNG) or a PDF (all pages are analyzed together)
         candidate_name: Expected name for verification
         document_type_hint: e.g. "id_card", "driver_license", "passport"
         extract_fields: Dynamic fields from verification_config [{name, description}]
         available_types: Document types to classify against [{slug, name}]
+        use_cache: Look up and store the result in the verification cache
+        persist: Save the result to agents.document_verifications (audit
+            trail), cache hits included; only for verifications that belong
+            to an application
+        application_id: Application the verification belongs to (persisted)
+        vacancy_id: Vacancy the verification belongs to (persisted)
+        workspace_id: Workspace the verification is for; cached results are
+            only shared within it
 
     Returns:
         DocumentVerificationResult with complete analysis
     """
-    import asyncio
+    return await verify_document_pages(
+        [image_data], candidate_name, document_type_hint, extract_fields, available_types,
+        use_cache=use_cache, persist=persist, application_id=application_id, vacancy_id=vacancy_id,
+        workspace_id=workspace_id,
+    )
+
+
+async def verify_document_pages(
+    pages: list[bytes],
+    candidate_name: Optional[str] = None,
+    document_type_hint: Optional[str] = None,
+    extract_fields: Optional[list[dict]] = None,
+    available_types: Optional[list[dict]] = None,
+    page_labels: Optional[list[str]] = None,
+    use_cache: bool = True,
+    persist: bool = False,
+    application_id: Optional[uuid.UUID] = None,
+    vacancy_id: Optional[uuid.UUID] = None,
+    workspace_id: Optional[uuid.UUID] = None,
+) -> DocumentVerificationResult:
+    """
+    Verify several images of one document (front/back, pages) in a single Gemini call.
+
+    All images go into one multimodal request with one prompt; the model
+    classifies the document once and returns a single, merged
+    extracted_fields object. Other args as in verify_document.
+
+    Args:
+        pages: Raw image bytes per side/page, in order
+        page_labels: What each image shows, e.g. ["front", "back"] (defaults to "page N")
+
+    Returns:
+        DocumentVerificationResult for the document as a whole
+    """
     import time
 
+    if not page_labels or len(page_labels) != len(pages):
+        page_labels = [f"page {i}" for i in range(1, len(pages) + 1)]
+
     logger.info("=" * 60)
     logger.info("DOCUMENT VERIFIER: Starting verification")
-    logger.info(f"Image size: {len(image_data)/1024:.1f} KB | type: {document_type_hint} | name: {candidate_name}")
+    logger.info(
+        f"Image size: {' + '.join(f'{len(p)/1024:.1f}' for p in pages)} KB | type: {document_type_hint} "
+        f"| name: {candidate_name}" + (f" | pages: {page_labels}" if len(pages) > 1 else "")
+    )
 
-    # Preprocess image
+    # Preprocess images (concurrently in the image pipeline)
     t0 = time.time()
-    processed_image, mime_type = _preprocess_image(image_data)
+    images = list(await asyncio.gather(*(_prepare_vision_image(p) for p in pages)))
+
+    # Serve re-uploads from the verification cache. Near-duplicate matching
+    # only applies to single images; a set of pages must match exactly.
+    cache = get_verification_cache()
+    content_hashes = [
+        image.content_hash or await asyncio.to_thread(lambda p=p: hashlib.sha256(p).hexdigest())
+        for image, p in zip(images, pages)
+    ]
+    if len(images) == 1:
+        scope = verification_scope(workspace_id, document_type_hint, candidate_name, extract_fields, available_types)
+        image_hash = content_hashes[0]
+        difference_hash, perceptual_hash = images[0].difference_hash, images[0].perceptual_hash
+    else:
+        scope = verification_scope(
+            workspace_id, document_type_hint, candidate_name, extract_fields, available_types, page_labels,
+        )
+        image_hash = hashlib.sha256("|".join(content_hashes).encode()).hexdigest()
+        difference_hash = perceptual_hash = None
+    if use_cache:
+        cached = await cache.lookup(scope, image_hash, difference_hash, perceptual_hash, workspace_id)
+        if cached is not None:
+            cached.cached = True
+            logger.info(
+                f"Verification cache hit ({time.time() - t0:.2f}s): {cached.document_category} "
+                f"passed={cached.verification_passed}"
+            )
+            if persist:
+                # The cached row belongs to another upload; this one gets its own audit row
+                await cache.store(
+                    scope, image_hash, difference_hash, perceptual_hash, cached,
+                    persist=True, application_id=application_id, vacancy_id=vacancy_id,
+                    candidate_name=candidate_name, workspace_id=workspace_id,
+                )
+            return cached
 
     # Build prompt
-    prompt = _build_prompt(document_type_hint, candidate_name, extract_fields, available_types)
+    prompt = _build_prompt(
+        document_type_hint, candidate_name,
+        page_labels=page_labels if len(images) > 1 else None,
+        multi_page=any(image.mime_type == "application/pdf" for image in images),
+    )
 
-    # Call Gemini directly (bypasses ADK runner overhead)
-    loop = asyncio.get_event_loop()
-    response = await loop.run_in_executor(
-        None,
-        lambda: _client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[
-                types.Part(inline_data=types.Blob(mime_type=mime_type, data=processed_image)),
+    # Call Gemini through the shared LLM layer: native async, vision
+    # concurrency limit, structured JSON output and a hard timeout
+    try:
+        response_text = await generate(
+            contents=[types.Content(role="user", parts=[
+                *(types.Part(inline_data=types.Blob(mime_type=image.mime_type, data=image.data)) for image in images),
                 types.Part(text=prompt),
-            ],
-            config=types.GenerateContentConfig(
-                temperature=0.1,
-                response_mime_type="application/json",
-            ),
+            ])],
+            model="gemini-2.0-flash",
+            system_instruction=_build_instruction(document_type_hint, extract_fields, available_types),
+            temperature=0.1,
+            response_schema=_build_response_schema(document_type_hint, extract_fields, available_types),
+            concurrency_group="vision",
+            timeout=VISION_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"Document verification timed out after {time.time() - t0:.1f}s")
+        return _failed_result(
+            candidate_name,
+            details="Verification timed out",
+            summary="Error: Document verification timed out",
+            feedback=_generate_feedback("poor", ["processing_error"]),
         )
-    )
 
     elapsed = time.time() - t0
-    response_text = response.text or ""
     logger.info(f"Gemini response in {elapsed:.2f}s")
 
     # Parse response
@@ -364,24 +601,12 @@ async def verify_document(
 
     if not parsed:
         logger.error("Failed to parse agent response")
-        return DocumentVerificationResult(
-            document_category="unreadable",
-            document_category_confidence=0.0,
-            extracted_name=None,
-            name_extraction_confidence=0.0,
-            name_match_performed=bool(candidate_name),
-            name_match_result=None,
-            name_match_confidence=None,
-            name_match_details="Failed to process document",
-            fraud_risk_level="high",
-            fraud_indicators=[],
-            overall_fraud_confidence=1.0,
-            image_quality="unreadable",
-            readability_issues=["processing_error"],
-            verification_passed=False,
-            verification_summary="Error: Could not process document",
-            feedback_message="Er ging iets mis bij het verwerken van de foto. Kan je het opnieuw proberen?",
-            raw_response=response_text
+        return _failed_result(
+            candidate_name,
+            details="Failed to process document",
+            summary="Error: Could not process document",
+            feedback="Er ging iets mis bij het verwerken van de foto. Kan je het opnieuw proberen?",
+            raw_response=response_text,
         )
 
     # Parse fraud indicators
@@ -470,6 +695,13 @@ async def verify_document(
     logger.info(f"Summary    : {result.verification_summary}")
     logger.info("=" * 80)
 
+    if use_cache or persist:
+        await cache.store(
+            scope, image_hash, difference_hash, perceptual_hash, result,
+            persist=persist, application_id=application_id, vacancy_id=vacancy_id,
+            candidate_name=candidate_name, workspace_id=workspace_id,
+        )
+
     return result
 
 
@@ -477,8 +709,9 @@ async def verify_document_base64(
     image_base64: str,
     candidate_name: Optional[str] = None,
     document_type_hint: Optional[str] = None,
+    **kwargs,
 ) -> DocumentVerificationResult:
-    """Convenience wrapper for base64-encoded images."""
+    """Convenience wrapper for base64-encoded images (kwargs are passed to verify_document)."""
     try:
         image_data = base64.b64decode(image_base64)
     except Exception as e:
@@ -501,4 +734,4 @@ async def verify_document_base64(
             verification_summary="Error: Invalid base64 image data",
             raw_response=None
         )
-    return await verify_document(image_data, candidate_name, document_type_hint)
+    return await verify_document(image_data, candidate_name, document_type_hint, **kwargs)
@@ -5,13 +5,13 @@ Uses Gemini Vision to detect document boundaries and orientation in images.
 Much more reliable than traditional edge detection for real-world photos.
 """
 
+import asyncio
 import logging
 from typing import Optional, Tuple
 from dataclasses import dataclass
-from google.adk.agents.llm_agent import Agent
 from google.genai import types
 
-from agents.common.runner import run_agent_once
+from src.utils.llm import VISION_TIMEOUT, generate
 
 logger = logging.getLogger(__name__)
 
@@ -128,13 +128,29 @@ Example 3 - No document visible:
 """
 
 
-# Create detection agent
-_detection_agent = Agent(
-    name="document_detector",
-    model="gemini-2.5-flash",
-    instruction=DETECTION_INSTRUCTION,
-    description="AI agent for detecting document boundaries in photos"
-)
+_POINT = {"type": "ARRAY", "items": {"type": "NUMBER"}}
+
+DETECTION_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "document_found": {"type": "BOOLEAN"},
+        "corners": {
+            "type": "OBJECT",
+            "nullable": True,
+            "properties": {
+                "top_left": _POINT,
+                "top_right": _POINT,
+                "bottom_right": _POINT,
+                "bottom_left": _POINT,
+            },
+            "required": ["top_left", "top_right", "bottom_right", "bottom_left"],
+        },
+        "rotation_degrees": {"type": "NUMBER"},
+        "confidence": {"type": "NUMBER"},
+        "notes": {"type": "STRING"},
+    },
+    "required": ["document_found", "confidence", "notes"],
+}
 
 from src.utils.text_utils import extract_json_from_response
 
@@ -177,12 +193,14 @@ async def detect_document_bounds(image_data: bytes) -> Optional[DocumentBounds]:
             ]
         )
 
-        # Run agent
-        response_text = await run_agent_once(
-            agent=_detection_agent,
-            app_name="document_detection",
-            content=content,
-            session_id_prefix="doc_detect",
+        # Call Gemini (vision concurrency limit, structured output, hard timeout)
+        response_text = await generate(
+            contents=[content],
+            model="gemini-2.5-flash",
+            system_instruction=DETECTION_INSTRUCTION,
+            response_schema=DETECTION_RESPONSE_SCHEMA,
+            concurrency_group="vision",
+            timeout=VISION_TIMEOUT,
         )
 
         # Parse response
@@ -216,6 +234,9 @@ async def detect_document_bounds(image_data: bytes) -> Optional[DocumentBounds]:
 
         return result
 
+    except asyncio.TimeoutError:
+        logger.warning("Document detection timed out")
+        return None
     except Exception as e:
         logger.error(f"Error detecting document bounds: {e}", exc_info=True)
         return None
@@ -0,0 +1,271 @@
+"""
+Off-loop image pipeline for document recognition.
+
+CPU-bound image work (PIL/OpenCV decode, resize, perspective crop, JPEG
+encode) runs in a dedicated ProcessPoolExecutor so a 12 MP phone photo never
+blocks the event loop. Jobs are module-level functions that receive the image
+as a read-only memoryview:
+
+- Large images are copied once into a shared-memory block and attached by
+  the worker, which decodes straight from it (no pickling of the payload).
+- Small images are passed as bytes.
+
+The number of queued + running jobs is bounded (IMAGE_PIPELINE_QUEUE_SIZE);
+callers beyond that wait for a slot. Every job reports per-stage timings
+(queue, transfer and the stages the job records with StageTimer).
+
+resize_for_vision also computes the SHA-256 of the upload and 64-bit
+difference/perceptual hashes of the resized image, used by the verification
+cache to recognise re-uploads.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import (
+    IMAGE_PIPELINE_WORKERS,
+    IMAGE_PIPELINE_QUEUE_SIZE,
+    IMAGE_PIPELINE_SHM_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+# =============================================================================
+# Worker-side helpers
+# =============================================================================
+
+class StageTimer:
+    """Collects per-stage durations (in ms) inside a job."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview, so PIL can open it without a copy."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = len(self._view) + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def _run_job(job: Callable, payload: tuple, args: tuple) -> tuple[Any, dict]:
+    """Worker entry point: expose the payload as a memoryview and run the job."""
+    shm = None
+    if payload[0] == "shm":
+        _, name, size = payload
+        shm = shared_memory.SharedMemory(name=name)
+        view = shm.buf[:size]
+    else:
+        view = memoryview(payload[1])
+
+    timer = StageTimer()
+    try:
+        result = job(view, timer, *args)
+    finally:
+        view.release()
+        if shm is not None:
+            shm.close()
+    return result, timer.timings
+
+
+@dataclass
+class VisionImage:
+    """An image prepared for a vision model call."""
+    data: bytes
+    mime_type: str
+    size: Optional[tuple[int, int]] = None
+    content_hash: Optional[str] = None  # SHA-256 of the original upload
+    difference_hash: Optional[int] = None  # dHash, unsigned 64-bit
+    perceptual_hash: Optional[int] = None  # pHash, unsigned 64-bit
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n).reshape(-1, 1)
+    return np.cos(np.pi * (2 * np.arange(n) + 1) * k / (2 * n))
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def difference_hash(gray) -> int:
+    """dHash: compare horizontally adjacent pixels of a 9x8 grayscale thumbnail."""
+    from PIL import Image
+
+    pixels = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def perceptual_hash(gray) -> int:
+    """pHash: sign of the low-frequency 8x8 DCT coefficients of a 32x32 thumbnail vs their median."""
+    from PIL import Image
+
+    pixels = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].flatten()
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def resize_for_vision(
+    view: memoryview, timer: StageTimer, max_size: int, content_hash: Optional[str] = None,
+) -> VisionImage:
+    """
+    Job: resize to max_size on the longest side, re-encode as JPEG and hash.
+
+    A JPEG that already fits is passed through as-is instead of being
+    re-encoded. content_hash skips hashing when the caller already has it.
+    """
+    from PIL import Image
+
+    if content_hash is None:
+        with timer.stage("sha256"):
+            content_hash = hashlib.sha256(view).hexdigest()
+    with timer.stage("open"):
+        img = Image.open(BufferReader(view))
+        passthrough = img.format == "JPEG" and img.mode in ("RGB", "L") and max(img.size) <= max_size
+    with timer.stage("decode_resize"):
+        # thumbnail() decodes JPEGs at a reduced DCT scale (draft) before resampling
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+    if passthrough:
+        data = bytes(view)
+    else:
+        with timer.stage("encode"):
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=88, optimize=True)
+            data = buf.getvalue()
+    with timer.stage("hash"):
+        gray = img.convert("L")
+        dhash, phash = difference_hash(gray), perceptual_hash(gray)
+    return VisionImage(data, "image/jpeg", img.size, content_hash, dhash, phash)
+
+
+# =============================================================================
+# Event-loop side
+# =============================================================================
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs asyncio + client threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, IMAGE_PIPELINE_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Image pipeline started ({IMAGE_PIPELINE_WORKERS} workers, queue={IMAGE_PIPELINE_QUEUE_SIZE})")
+    return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(1, IMAGE_PIPELINE_QUEUE_SIZE))
+    return _slots
+
+
+async def run_image_job(job: Callable, image_data: bytes, *args) -> tuple[Any, dict]:
+    """
+    Run an image job in the worker pool.
+
+    Args:
+        job: Module-level function (view, timer, *args) -> result.
+        image_data: Encoded image bytes.
+
+    Returns:
+        (result, timings) where timings holds queue_ms, transfer_ms, total_ms
+        and the job's own stage timings.
+    """
+    enqueued = time.perf_counter()
+    async with _get_slots():
+        started = time.perf_counter()
+        shm = None
+        if len(image_data) >= IMAGE_PIPELINE_SHM_THRESHOLD:
+            shm = shared_memory.SharedMemory(create=True, size=len(image_data))
+            shm.buf[:len(image_data)] = image_data
+            payload = ("shm", shm.name, len(image_data))
+        else:
+            payload = ("bytes", image_data)
+        transfer_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, timings = await loop.run_in_executor(_get_executor(), _run_job, job, payload, args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge image); start a fresh pool next time
+            await shutdown_image_pipeline()
+            raise
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    timings["queue_ms"] = round((started - enqueued) * 1000, 1)
+    timings["transfer_ms"] = round(transfer_ms, 1)
+    timings["total_ms"] = round((time.perf_counter() - enqueued) * 1000, 1)
+    return result, timings
+
+
+async def shutdown_image_pipeline():
+    """Stop the worker processes (called on application shutdown)."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+        )
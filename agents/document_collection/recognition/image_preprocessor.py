@@ -3,13 +3,20 @@ Image Preprocessing for Document Recognition
 
 Automatically detects, crops, and straightens identity documents from photos.
 Uses OpenCV for edge detection and perspective transformation.
+
+The async entry point runs all OpenCV work in the image pipeline worker
+pool (see image_pipeline.py); the *_job functions below are what the
+workers execute.
 """
 
 import cv2
+import heapq
 import numpy as np
 from typing import Tuple, Optional
 import logging
 
+from .image_pipeline import StageTimer, run_image_job
+
 logger = logging.getLogger(__name__)
 
 # Standard ID card aspect ratios (ISO 7810 ID-1: 85.6mm x 54mm = 1.586:1)
@@ -20,6 +27,9 @@ DRIVER_LICENSE_ASPECT_RATIO = 85.6 / 54.0  # Same as ID card
 OUTPUT_WIDTH = 856  # pixels (10x actual size in mm)
 OUTPUT_HEIGHT = 540  # pixels
 
+# Longest side of the downscaled copy used for contour detection
+DETECTION_MAX_DIM = 1000
+
 
 def order_points(pts: np.ndarray) -> np.ndarray:
     """
@@ -46,16 +56,8 @@ def order_points(pts: np.ndarray) -> np.ndarray:
     return rect
 
 
-def detect_document_contour(image: np.ndarray) -> Optional[np.ndarray]:
-    """
-    Detect document edges using contour detection.
-
-    Args:
-        image: Input image (BGR format)
-
-    Returns:
-        Array of 4 corner points, or None if not found
-    """
+def _find_quad(image: np.ndarray) -> Optional[np.ndarray]:
+    """Find the largest 4-sided contour covering at least 20% of the image."""
     # Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
@@ -76,27 +78,118 @@ def detect_document_contour(image: np.ndarray) -> Optional[np.ndarray]:
     # Find contours
     contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-    # Sort contours by area (largest first)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    # Only contours big enough to be the document, largest first (top 10)
+    min_area = 0.2 * image.shape[0] * image.shape[1]
+    candidates = [(area, c) for c in contours if (area := cv2.contourArea(c)) > min_area]
+    candidates = heapq.nlargest(10, candidates, key=lambda item: item[0])
 
     # Look for rectangular contour (4 corners)
-    for contour in contours[:10]:  # Check top 10 largest contours
+    for _, contour in candidates:
         # Approximate the contour to a polygon
         perimeter = cv2.arcLength(contour, True)
         approx = cv2.approxPolyDP(contour, 0.02 * perimeter, True)
 
-        # If we found a 4-sided polygon
-        if len(approx) == 4:
-            # Check if area is significant (at least 20% of image)
-            image_area = image.shape[0] * image.shape[1]
-            contour_area = cv2.contourArea(approx)
-
-            if contour_area > 0.2 * image_area:
-                return approx.reshape(4, 2)
+        # If we found a 4-sided polygon with a significant area
+        if len(approx) == 4 and cv2.contourArea(approx) > min_area:
+            return approx.reshape(4, 2).astype(np.float32)
 
     return None
 
 
+def _fit_edge(points: np.ndarray, origin: np.ndarray, direction: np.ndarray, tolerance: float):
+    """Fit a line to the edge pixels that leave origin along direction. Returns (point, unit vector) or None."""
+    offsets = points - origin
+    along = offsets @ direction
+    across = np.abs(offsets @ np.array([-direction[1], direction[0]]))
+    selected = points[(along > tolerance / 2) & (across < tolerance)]
+    if len(selected) < 8:
+        return None
+    vx, vy, x0, y0 = cv2.fitLine(selected, cv2.DIST_HUBER, 0, 0.01, 0.01).flatten()
+    return np.array([x0, y0]), np.array([vx, vy])
+
+
+def _refine_corners(image: np.ndarray, corners: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Refine corners on the full-resolution image.
+
+    Only a (2 * radius + 1)^2 window around each candidate corner is examined:
+    the two document edges meeting there are re-fitted on the full-resolution
+    edge pixels and intersected. A corner keeps its coarse position when an
+    edge can't be fitted or the intersection lands outside the window.
+    """
+    height, width = image.shape[:2]
+    refined = corners.copy()
+
+    for i, corner in enumerate(corners):
+        x0, y0 = max(0, int(corner[0]) - radius), max(0, int(corner[1]) - radius)
+        x1, y1 = min(width, int(corner[0]) + radius + 1), min(height, int(corner[1]) + radius + 1)
+        roi = cv2.cvtColor(image[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(cv2.GaussianBlur(roi, (5, 5), 0), 50, 150)
+        ys, xs = np.nonzero(edges)
+        points = np.column_stack((xs + x0, ys + y0)).astype(np.float32)
+
+        lines = []
+        for neighbour in (corners[i - 1], corners[(i + 1) % 4]):
+            direction = neighbour - corner
+            direction /= np.linalg.norm(direction) or 1.0
+            lines.append(_fit_edge(points, corner, direction, tolerance=radius / 2))
+        if None in lines:
+            continue
+
+        # Intersect p1 + t*v1 = p2 + s*v2
+        (p1, v1), (p2, v2) = lines
+        det = v1[0] * -v2[1] + v2[0] * v1[1]
+        if abs(det) < 1e-3:
+            continue  # Edges (nearly) parallel
+        t = ((p2[0] - p1[0]) * -v2[1] + v2[0] * (p2[1] - p1[1])) / det
+        point = p1 + t * v1
+        if np.abs(point - corner).max() <= radius:
+            refined[i] = point
+
+    return refined
+
+
+def detect_document_contour(
+    image: np.ndarray,
+    max_dim: Optional[int] = DETECTION_MAX_DIM,
+    refine: bool = True,
+) -> Optional[np.ndarray]:
+    """
+    Detect document edges using contour detection.
+
+    Pyramid approach: contours are found on a copy downscaled to max_dim on
+    the longest side, and the four corners are then refined on the
+    full-resolution image in small windows around each candidate.
+
+    Args:
+        image: Input image (BGR format)
+        max_dim: Longest side of the detection copy; None detects on the full image
+        refine: Refine the upscaled corners on the full-resolution image
+
+    Returns:
+        Array of 4 corner points (float32, full-resolution coordinates), or None if not found
+    """
+    height, width = image.shape[:2]
+    scale = 1.0
+    small = image
+    if max_dim and max(height, width) > max_dim:
+        scale = max_dim / max(height, width)
+        small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+    corners = _find_quad(small)
+    if corners is None:
+        return None
+
+    if scale == 1.0:
+        return corners
+
+    corners = corners / scale
+    if refine:
+        # Search radius covers the quantisation error of the downscaled copy
+        corners = _refine_corners(image, corners, radius=max(24, int(round(12 / scale))))
+    return corners
+
+
 def apply_perspective_transform(
     image: np.ndarray,
     corners: np.ndarray,
@@ -142,6 +235,76 @@ def apply_perspective_transform(
     return warped
 
 
+def _decode(view: memoryview, timer: StageTimer) -> Optional[np.ndarray]:
+    """Decode an encoded image straight from the worker's buffer."""
+    with timer.stage("decode"):
+        nparr = np.frombuffer(view, np.uint8)
+        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        del nparr  # release the buffer export before the pipeline closes the view
+    return image
+
+
+def _encode(image: np.ndarray, timer: StageTimer) -> bytes:
+    with timer.stage("encode"):
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        return buffer.tobytes()
+
+
+def crop_to_corners_job(
+    view: memoryview,
+    timer: StageTimer,
+    normalized_corners: list[tuple[float, float]],
+    output_width: int,
+) -> Optional[bytes]:
+    """
+    Job: straighten the document to the given corners.
+
+    Corners are normalized (0-1) and ordered top-left, top-right, bottom-right,
+    bottom-left. The output keeps the detected aspect ratio. Returns None if
+    the image can't be decoded.
+    """
+    image = _decode(view, timer)
+    if image is None:
+        return None
+
+    with timer.stage("transform"):
+        original_height, original_width = image.shape[:2]
+        corners = np.array(
+            [[x * original_width, y * original_height] for x, y in normalized_corners],
+            dtype=np.float32,
+        )
+
+        # Calculate actual detected document dimensions
+        # Width: average of top and bottom widths
+        top_width = np.sqrt((corners[1][0] - corners[0][0])**2 + (corners[1][1] - corners[0][1])**2)
+        bottom_width = np.sqrt((corners[2][0] - corners[3][0])**2 + (corners[2][1] - corners[3][1])**2)
+        detected_width = (top_width + bottom_width) / 2
+
+        # Height: average of left and right heights
+        left_height = np.sqrt((corners[3][0] - corners[0][0])**2 + (corners[3][1] - corners[0][1])**2)
+        right_height = np.sqrt((corners[2][0] - corners[1][0])**2 + (corners[2][1] - corners[1][1])**2)
+        detected_height = (left_height + right_height) / 2
+
+        # Use detected aspect ratio for output dimensions
+        output_height = int(output_width / (detected_width / detected_height))
+
+        # Apply perspective transformation (skip reordering since AI corners are already correct)
+        processed = apply_perspective_transform(image, corners, output_width, output_height, skip_ordering=True)
+
+    return _encode(processed, timer)
+
+
+def basic_preprocessing_job(
+    view: memoryview, timer: StageTimer, output_width: int, aspect_ratio: float,
+) -> Optional[Tuple[bytes, bool]]:
+    """Job: decode and apply _basic_preprocessing. Returns None if the image can't be decoded."""
+    image = _decode(view, timer)
+    if image is None:
+        return None
+    with timer.stage("transform"):
+        return _basic_preprocessing(image, output_width, aspect_ratio)
+
+
 async def preprocess_document_image_ai(
     image_bytes: bytes,
     aspect_ratio: float = ID_CARD_ASPECT_RATIO,
@@ -150,6 +313,9 @@ async def preprocess_document_image_ai(
     """
     Preprocess document image using AI-powered detection.
 
+    Decoding, cropping and encoding run in the image pipeline worker pool;
+    only the Gemini boundary detection is awaited on the event loop.
+
     Args:
         image_bytes: Raw image bytes (JPEG/PNG)
         aspect_ratio: Expected aspect ratio of document
@@ -161,70 +327,30 @@ async def preprocess_document_image_ai(
     try:
         from .document_detector import detect_document_bounds
 
-        # Decode image
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if image is None:
-            logger.warning("Failed to decode image")
-            return image_bytes, False
-
-        original_height, original_width = image.shape[:2]
-        logger.info(f"Original image size: {original_width}x{original_height}")
-
         # Use AI to detect document bounds
         bounds = await detect_document_bounds(image_bytes)
 
         if bounds and bounds.confidence > 0.7:
             logger.info(f"AI detection successful (confidence: {bounds.confidence:.2%})")
 
-            # Convert normalized coordinates to pixel coordinates
-            # AI returns correctly ordered corners: top-left, top-right, bottom-right, bottom-left
-            corners = np.array([
-                [bounds.top_left[0] * original_width, bounds.top_left[1] * original_height],
-                [bounds.top_right[0] * original_width, bounds.top_right[1] * original_height],
-                [bounds.bottom_right[0] * original_width, bounds.bottom_right[1] * original_height],
-                [bounds.bottom_left[0] * original_width, bounds.bottom_left[1] * original_height]
-            ], dtype=np.float32)
-
-            logger.info(f"Corner coordinates (pixels):")
-            logger.info(f"  Top-Left: ({corners[0][0]:.1f}, {corners[0][1]:.1f})")
-            logger.info(f"  Top-Right: ({corners[1][0]:.1f}, {corners[1][1]:.1f})")
-            logger.info(f"  Bottom-Right: ({corners[2][0]:.1f}, {corners[2][1]:.1f})")
-            logger.info(f"  Bottom-Left: ({corners[3][0]:.1f}, {corners[3][1]:.1f})")
-
-            # Calculate actual detected document dimensions
-            # Width: average of top and bottom widths
-            top_width = np.sqrt((corners[1][0] - corners[0][0])**2 + (corners[1][1] - corners[0][1])**2)
-            bottom_width = np.sqrt((corners[2][0] - corners[3][0])**2 + (corners[2][1] - corners[3][1])**2)
-            detected_width = (top_width + bottom_width) / 2
-
-            # Height: average of left and right heights
-            left_height = np.sqrt((corners[3][0] - corners[0][0])**2 + (corners[3][1] - corners[0][1])**2)
-            right_height = np.sqrt((corners[2][0] - corners[1][0])**2 + (corners[2][1] - corners[1][1])**2)
-            detected_height = (left_height + right_height) / 2
-
-            # Calculate detected aspect ratio
-            detected_aspect_ratio = detected_width / detected_height
-            logger.info(f"Detected document dimensions: {detected_width:.1f}x{detected_height:.1f} (aspect ratio: {detected_aspect_ratio:.3f})")
-
-            # Use detected aspect ratio for output dimensions
-            output_height = int(output_width / detected_aspect_ratio)
-            logger.info(f"Output dimensions: {output_width}x{output_height} (maintaining detected aspect ratio)")
-
-            # Apply perspective transformation (skip reordering since AI corners are already correct)
-            processed = apply_perspective_transform(image, corners, output_width, output_height, skip_ordering=True)
-
-            # Encode back to JPEG
-            _, buffer = cv2.imencode('.jpg', processed, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            processed_bytes = buffer.tobytes()
+            # AI returns correctly ordered, normalized corners: top-left, top-right, bottom-right, bottom-left
+            corners = [bounds.top_left, bounds.top_right, bounds.bottom_right, bounds.bottom_left]
+            processed_bytes, timings = await run_image_job(crop_to_corners_job, image_bytes, corners, output_width)
+            if processed_bytes is None:
+                logger.warning("Failed to decode image")
+                return image_bytes, False
 
-            logger.info(f"✅ AI-powered crop successful: {output_width}x{output_height}")
+            logger.info(f"✅ AI-powered crop successful ({timings})")
             return processed_bytes, True
 
         else:
             logger.info("⚠️ AI detection failed or low confidence, using basic processing")
-            return _basic_preprocessing(image, output_width, aspect_ratio)
+            result, timings = await run_image_job(basic_preprocessing_job, image_bytes, output_width, aspect_ratio)
+            if result is None:
+                logger.warning("Failed to decode image")
+                return image_bytes, False
+            logger.info(f"Basic preprocessing timings: {timings}")
+            return result
 
     except Exception as e:
         logger.error(f"Error in AI preprocessing: {e}", exc_info=True)
@@ -268,8 +394,8 @@ def preprocess_document_image(
     """
     DEPRECATED: Use preprocess_document_image_ai instead.
 
-    This synchronous version uses OpenCV edge detection which is less reliable.
-    Kept for backward compatibility.
+    This synchronous version uses OpenCV edge detection which is less reliable
+    and runs inline (not in the image pipeline). Kept for backward compatibility.
     """
     try:
         # Decode image from bytes
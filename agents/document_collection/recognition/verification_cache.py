@@ -0,0 +1,298 @@
+"""
+Content-addressed cache for document verification results.
+
+Candidates often resend the same photo, and the WhatsApp flow retries
+verification after a failed name check. Results are keyed by:
+
+- a scope: the workspace, document type hint, candidate name, requested
+  extract_fields, the classification options and, for multi-image
+  verifications, the page labels — anything that changes the prompt, and
+  the tenant the result may be shown to;
+- the SHA-256 of the original upload (exact re-sends);
+- a perceptual (pHash) and difference (dHash) hash of the preprocessed image
+  (re-encoded or re-compressed copies of the same photo).
+
+Near-duplicates only match within the same scope, so a similar-looking card
+of another candidate (different name) never hits. Lookups go to an in-process
+LRU first, then to agents.document_verifications when a pool is configured.
+Fresh results are persisted there (the audit trail) only when the caller
+asks for it, i.e. when there is an application to attach them to. Callers
+get a deep copy of a cached result, never the cached object itself, and
+without the verification_id of the row it came from.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from .agent import DocumentVerificationResult
+
+logger = logging.getLogger(__name__)
+
+# In-process entries and how long a verification may be reused
+CACHE_MAX_ENTRIES = 512
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Max Hamming distance (of 64 bits) for a near-identical image; both must match
+PHASH_MAX_DISTANCE = 4
+DHASH_MAX_DISTANCE = 6
+
+_db_pool: Optional[asyncpg.Pool] = None
+
+
+def set_db_pool(pool: asyncpg.Pool):
+    """Set the database pool used to look up and persist verifications."""
+    global _db_pool
+    _db_pool = pool
+
+
+def verification_scope(
+    workspace_id: Optional[uuid.UUID],
+    document_type_hint: Optional[str],
+    candidate_name: Optional[str],
+    extract_fields: Optional[list[dict]],
+    available_types: Optional[list[dict]],
+    page_labels: Optional[list[str]] = None,
+) -> str:
+    """Fingerprint of everything besides the image(s) that influences the verification."""
+    scope = {
+        "workspace": str(workspace_id or ""),
+        "hint": document_type_hint or "",
+        "name": " ".join((candidate_name or "").casefold().split()),
+        "fields": sorted(f.get("name", "") for f in extract_fields or []),
+        "types": sorted(t.get("slug", "") for t in available_types or []),
+    }
+    if page_labels:
+        scope["pages"] = list(page_labels)
+    canonical = json.dumps(scope, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def _hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _to_signed(value: Optional[int]) -> Optional[int]:
+    """Unsigned 64-bit hash → Postgres BIGINT."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: Optional[int]) -> Optional[int]:
+    if value is None:
+        return None
+    return value + (1 << 64) if value < 0 else value
+
+
+@dataclass
+class _Entry:
+    scope: str
+    image_hash: str
+    difference_hash: Optional[int]
+    perceptual_hash: Optional[int]
+    result: "DocumentVerificationResult"
+    stored_at: float
+
+    def near(self, difference_hash: Optional[int], perceptual_hash: Optional[int]) -> bool:
+        if None in (self.difference_hash, self.perceptual_hash, difference_hash, perceptual_hash):
+            return False
+        return (
+            _hamming(self.perceptual_hash, perceptual_hash) <= PHASH_MAX_DISTANCE
+            and _hamming(self.difference_hash, difference_hash) <= DHASH_MAX_DISTANCE
+        )
+
+
+class VerificationCache:
+    """Two-level (memory, database) verification result cache."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+
+    async def lookup(
+        self,
+        scope: str,
+        image_hash: str,
+        difference_hash: Optional[int],
+        perceptual_hash: Optional[int],
+        workspace_id: Optional[uuid.UUID] = None,
+    ) -> Optional["DocumentVerificationResult"]:
+        """
+        Return a copy of a cached result for this image, or None.
+
+        The copy has no verification_id: the row it came from belongs to
+        another upload (and possibly another application).
+        """
+        entry = self._lookup_memory(scope, image_hash, difference_hash, perceptual_hash)
+        if entry is not None:
+            return _detached(entry.result)
+
+        if _db_pool is None:
+            return None
+        try:
+            from src.repositories.document_verification_repo import DocumentVerificationRepository
+
+            row = await DocumentVerificationRepository(_db_pool).find_cached(
+                scope, image_hash,
+                _to_signed(perceptual_hash), _to_signed(difference_hash),
+                PHASH_MAX_DISTANCE, DHASH_MAX_DISTANCE, self.ttl_seconds,
+                workspace_id,
+            )
+        except Exception as e:
+            logger.warning(f"Verification cache lookup failed: {e}")
+            return None
+        if row is None:
+            return None
+
+        result = _result_from_row(row)
+        self._remember(_Entry(
+            scope, row["image_hash"],
+            _to_unsigned(row["difference_hash"]), _to_unsigned(row["perceptual_hash"]),
+            result, time.monotonic(),
+        ))
+        return _detached(result)
+
+    async def store(
+        self,
+        scope: str,
+        image_hash: str,
+        difference_hash: Optional[int],
+        perceptual_hash: Optional[int],
+        result: "DocumentVerificationResult",
+        persist: bool = False,
+        application_id: Optional[uuid.UUID] = None,
+        vacancy_id: Optional[uuid.UUID] = None,
+        candidate_name: Optional[str] = None,
+        workspace_id: Optional[uuid.UUID] = None,
+    ) -> Optional[uuid.UUID]:
+        """
+        Cache a result and (optionally) persist it. Returns the verification ID if persisted.
+
+        Also used for cache hits that belong to an application: they get
+        their own audit row.
+        """
+        if persist and _db_pool is not None:
+            try:
+                from src.repositories.document_verification_repo import DocumentVerificationRepository
+
+                result.verification_id = str(await DocumentVerificationRepository(_db_pool).create(
+                    workspace_id=workspace_id,
+                    application_id=application_id,
+                    vacancy_id=vacancy_id,
+                    document_category=result.document_category,
+                    document_category_confidence=result.document_category_confidence,
+                    extracted_name=result.extracted_name,
+                    name_extraction_confidence=result.name_extraction_confidence,
+                    expected_candidate_name=candidate_name,
+                    name_match_result=result.name_match_result,
+                    name_match_confidence=result.name_match_confidence,
+                    name_match_details=result.name_match_details,
+                    fraud_risk_level=result.fraud_risk_level,
+                    fraud_indicators=[vars(fi) for fi in result.fraud_indicators],
+                    overall_fraud_confidence=result.overall_fraud_confidence,
+                    image_quality=result.image_quality,
+                    readability_issues=result.readability_issues,
+                    verification_passed=result.verification_passed,
+                    verification_summary=result.verification_summary,
+                    image_hash=image_hash,
+                    raw_agent_response=result.raw_response,
+                    name_match_performed=result.name_match_performed,
+                    extracted_fields=result.extracted_fields,
+                    feedback_message=result.feedback_message,
+                    cache_scope=scope,
+                    perceptual_hash=_to_signed(perceptual_hash),
+                    difference_hash=_to_signed(difference_hash),
+                ))
+            except Exception as e:
+                logger.warning(f"Failed to persist document verification: {e}")
+
+        self._remember(_Entry(scope, image_hash, difference_hash, perceptual_hash, copy.deepcopy(result), time.monotonic()))
+        return uuid.UUID(result.verification_id) if result.verification_id else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def _lookup_memory(
+        self, scope: str, image_hash: str, difference_hash: Optional[int], perceptual_hash: Optional[int],
+    ) -> Optional[_Entry]:
+        now = time.monotonic()
+        entry = self._entries.get((scope, image_hash))
+        if entry is None:
+            entry = next(
+                (e for e in reversed(self._entries.values())
+                 if e.scope == scope and e.near(difference_hash, perceptual_hash)),
+                None,
+            )
+        if entry is None:
+            return None
+        key = (entry.scope, entry.image_hash)
+        if now - entry.stored_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remember(self, entry: _Entry):
+        key = (entry.scope, entry.image_hash)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _detached(result: "DocumentVerificationResult") -> "DocumentVerificationResult":
+    """Copy of a cached result, without the ID of the row it was persisted as."""
+    result = copy.deepcopy(result)
+    result.verification_id = None
+    return result
+
+
+def _result_from_row(row: asyncpg.Record) -> "DocumentVerificationResult":
+    """Rebuild a DocumentVerificationResult from an agents.document_verifications row."""
+    from .agent import DocumentVerificationResult, FraudIndicator
+
+    def _json(value, default):
+        if value is None:
+            return default
+        return json.loads(value) if isinstance(value, str) else value
+
+    return DocumentVerificationResult(
+        document_category=row["document_category"],
+        document_category_confidence=row["document_category_confidence"],
+        extracted_name=row["extracted_name"],
+        name_extraction_confidence=row["name_extraction_confidence"],
+        name_match_performed=bool(row["name_match_performed"]),
+        name_match_result=row["name_match_result"],
+        name_match_confidence=row["name_match_confidence"],
+        name_match_details=row["name_match_details"],
+        fraud_risk_level=row["fraud_risk_level"],
+        fraud_indicators=[FraudIndicator(**fi) for fi in _json(row["fraud_indicators"], [])],
+        overall_fraud_confidence=row["overall_fraud_confidence"],
+        image_quality=row["image_quality"],
+        readability_issues=_json(row["readability_issues"], []),
+        verification_passed=row["verification_passed"],
+        verification_summary=row["verification_summary"],
+        extracted_fields=_json(row["extracted_fields"], {}),
+        feedback_message=row["feedback_message"],
+        raw_response=row["raw_agent_response"],
+        verification_id=str(row["id"]),
+    )
+
+
+_cache = VerificationCache()
+
+
+def get_verification_cache() -> VerificationCache:
+    """Get the process-wide verification cache."""
+    return _cache
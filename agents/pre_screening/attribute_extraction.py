@@ -7,14 +7,14 @@ attribute values using Gemini, guided by the attribute type descriptions.
 import json
 import logging
 import uuid
-from typing import Optional
+from typing import Mapping, Optional
 
 from src.utils.json_parser import parse_json_response
 
 import asyncpg
 
 from src.repositories.candidate_attribute_repo import CandidateAttributeRepository
-from src.repositories.candidate_attribute_type_repo import CandidateAttributeTypeRepository
+from src.utils.type_registry import get_types
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +58,7 @@ Als je GEEN attributen kunt extraheren, antwoord met:
 """
 
 
-def _build_prompt(attribute_types: list[asyncpg.Record], text: str) -> str:
+def _build_prompt(attribute_types: list[Mapping], text: str) -> str:
     """Build the user prompt with attribute catalog and input text."""
     type_lines = []
     for t in attribute_types:
@@ -145,11 +145,9 @@ async def extract_and_save_attributes(
     Returns:
         List of extracted attributes: [{"slug": ..., "value": ..., "attribute_type_id": ...}]
     """
-    # 1. Fetch attribute types
-    type_repo = CandidateAttributeTypeRepository(pool)
-    attr_types = await type_repo.list_for_workspace(
-        workspace_id, category=category, collected_by=collected_by
-    )
+    # 1. Attribute types (from the workspace's type registry snapshot)
+    types = await get_types(pool, workspace_id)
+    attr_types = types.active_attr_types(category=category, collected_by=collected_by)
 
     if not attr_types:
         logger.warning(f"No attribute types found for workspace {workspace_id} (collected_by={collected_by}, category={category})")
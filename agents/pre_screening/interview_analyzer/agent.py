@@ -232,6 +232,7 @@ Geef je analyse als JSON."""
         app_name="interview_analysis_app",
         content=content,
         session_id_prefix="interview_analysis",
+        direct=True,
     )
 
     logger.info("[INTERVIEW ANALYSIS] Agent response received")
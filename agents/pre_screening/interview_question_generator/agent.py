@@ -371,15 +371,16 @@ Als je een [SYSTEEM:] bericht ziet met de huidige volgorde, respecteer deze EXAC
 """
 
 # Generator config: deterministic + medium thinking for vacancy analysis
+# (thought summaries are streamed to the recruiter as reasoning)
 generator_config = types.GenerateContentConfig(
     temperature=0,
-    thinking_config=types.ThinkingConfig(thinking_budget=8192),
+    thinking_config=types.ThinkingConfig(thinking_budget=8192, include_thoughts=True),
 )
 
 # Editor config: deterministic + minimal thinking for simple edits
 editor_config = types.GenerateContentConfig(
     temperature=0,
-    thinking_config=types.ThinkingConfig(thinking_budget=1024),
+    thinking_config=types.ThinkingConfig(thinking_budget=1024, include_thoughts=True),
 )
 
 # Generator agent: gemini-2.5-pro with thinking for vacancy analysis
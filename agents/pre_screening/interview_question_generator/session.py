@@ -4,7 +4,7 @@ Interview session management — handles generation, feedback, and question mani
 This module contains all business logic for the interview question generator agent.
 The router (src/routers/interviews.py) is a thin HTTP layer that delegates here.
 """
-import asyncio
+import copy
 import json
 import logging
 import time
@@ -17,6 +17,7 @@ from google.genai import types
 from sqlalchemy.exc import IntegrityError
 
 from src.config import SIMPLE_EDIT_KEYWORDS, SIMULATED_REASONING
+from src.utils.interview_session_cache import interview_session_cache
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +37,11 @@ def get_interview_from_session(session) -> dict:
     if not session:
         return {}
 
-    interview = session.state.get("interview", {})
+    return as_interview(session.state.get("interview", {}))
 
+
+def as_interview(interview) -> dict:
+    """Normalize a stored interview value (dict or JSON string) to a dict."""
     if isinstance(interview, str):
         try:
             interview = json.loads(interview)
@@ -77,12 +81,11 @@ def reset_change_statuses(interview: dict) -> dict:
     return interview
 
 
-def should_use_fast_agent(session, message: str) -> bool:
+def should_use_fast_agent(interview: dict, message: str) -> bool:
     """
     Determine if we should use the fast editor agent (no thinking)
     or the full generator agent (with thinking).
     """
-    interview = get_interview_from_session(session)
     if not interview.get("knockout_questions"):
         return False
 
@@ -181,17 +184,15 @@ class InterviewSessionHandler:
 
     Handles generation, feedback processing, question manipulation,
     and session state persistence.
+
+    Interview state is read and edited through interview_session_cache:
+    question edits are applied in memory and persisted as one event per
+    burst, and agent runs are bracketed with its agent_turn().
     """
 
     def __init__(self, session_manager, pool: asyncpg.Pool):
         self.session_manager = session_manager
         self.pool = pool
-        self._feedback_locks: dict[str, asyncio.Lock] = {}
-
-    def _get_feedback_lock(self, session_id: str) -> asyncio.Lock:
-        if session_id not in self._feedback_locks:
-            self._feedback_locks[session_id] = asyncio.Lock()
-        return self._feedback_locks[session_id]
 
     def _recreate_session_service(self):
         """Recreate the interview session service (e.g. after a connection error)."""
@@ -211,7 +212,7 @@ class InterviewSessionHandler:
         )
 
     async def _update_session_state(self, session, session_id: str, interview: dict, invocation_prefix: str):
-        """Persist interview state to the ADK session via an append_event."""
+        """Persist interview state to the ADK session via an append_event. Returns the session appended to."""
         state_delta = {"interview": interview}
         actions = EventActions(state_delta=state_delta)
         event = Event(
@@ -220,11 +221,50 @@ class InterviewSessionHandler:
             actions=actions,
             timestamp=time.time()
         )
-        await self.session_manager.safe_append_event(
+        return await self.session_manager.safe_append_event(
             self.session_manager.interview_session_service, session, event,
             app_name=APP_NAME, user_id=USER_ID, session_id=session_id
         )
 
+    def _session_loader(self, session_id: str):
+        """Loader for interview_session_cache: (session, interview), or None if the session doesn't exist."""
+        async def load():
+            session = await self._get_session(session_id)
+            if not session:
+                return None
+            return session, get_interview_from_session(session)
+        return load
+
+    def _session_persister(self, session_id: str):
+        """Persister for interview_session_cache (coalesced question edits)."""
+        async def persist(session, interview: dict, reason: str):
+            if session is None:
+                # Cached after an agent run, which appended to its own copy of the session
+                session = await self._get_session(session_id)
+            return await self._update_session_state(session, session_id, interview, reason)
+        return persist
+
+    async def _edit_interview(self, session_id: str, mutate, reason: str):
+        """
+        Apply a question edit through the session cache.
+        Returns (mutate's result, updated interview). Raises ValueError if
+        the session or its interview doesn't exist, mutate rejects the edit,
+        or an agent run on the session takes too long to finish.
+        """
+        def apply(interview: dict):
+            if not interview:
+                raise ValueError("No interview in session")
+            return mutate(interview)
+
+        try:
+            return await interview_session_cache.edit(
+                session_id, self._session_loader(session_id), apply, self._session_persister(session_id), reason
+            )
+        except LookupError:
+            raise ValueError("Session not found")
+        except TimeoutError:
+            raise ValueError("Interview is still being generated, try again in a moment")
+
     # -------------------------------------------------------------------------
     # Vacancy / config helpers
     # -------------------------------------------------------------------------
@@ -278,108 +318,94 @@ class InterviewSessionHandler:
     ) -> AsyncGenerator[str, None]:
         """Stream SSE events during interview generation."""
         from google.adk.errors.already_exists_error import AlreadyExistsError
-        from src.utils.sse_helpers import sse_done, sse_error, sse_status
+        from src.utils.sse_helpers import (
+            EventPump, event_state_value, event_text, event_thoughts,
+            sse_data, sse_done, sse_error, sse_status, sse_thinking,
+        )
 
         total_start = time.time()
         logger.info(f"[GENERATE] Started - vacancy length: {len(vacancy_text)} chars")
 
-        # Reset session for a fresh generation
-        async def reset_interview_session():
-            svc = self.session_manager.interview_session_service
-            try:
-                existing = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-                if existing:
-                    await svc.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-            except Exception as e:
-                logger.warning(f"Error checking/deleting existing session: {e}")
+        # Edits not persisted yet belong to the questions being replaced
+        async with interview_session_cache.agent_turn(session_id, keep_edits=False):
+            # Reset session for a fresh generation
+            async def reset_interview_session():
+                svc = self.session_manager.interview_session_service
+                try:
+                    existing = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+                    if existing:
+                        await svc.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+                except Exception as e:
+                    logger.warning(f"Error checking/deleting existing session: {e}")
 
-            try:
-                await svc.create_session(
-                    app_name=APP_NAME, user_id=USER_ID, session_id=session_id,
-                    state={"vacancy_id": vacancy_id},
-                )
-            except (IntegrityError, AlreadyExistsError):
-                logger.info(f"Session {session_id} already exists for generation")
-
-        await self.session_manager.with_session_retry(
-            reset_interview_session, self._recreate_session_service, "reset interview session"
-        )
+                try:
+                    await svc.create_session(
+                        app_name=APP_NAME, user_id=USER_ID, session_id=session_id,
+                        state={"vacancy_id": vacancy_id},
+                    )
+                except (IntegrityError, AlreadyExistsError):
+                    logger.info(f"Session {session_id} already exists for generation")
 
-        yield sse_status('thinking', 'Vacature analyseren...')
+            await self.session_manager.with_session_retry(
+                reset_interview_session, self._recreate_session_service, "reset interview session"
+            )
 
-        content = types.Content(role="user", parts=[types.Part(text=vacancy_text)])
+            yield sse_status('thinking', 'Vacature analyseren...')
 
-        # Run agent in background, interleave simulated reasoning messages
-        agent_start = time.time()
-        event_count = 0
-        agent_done = False
-        event_queue: asyncio.Queue = asyncio.Queue()
+            content = types.Content(role="user", parts=[types.Part(text=vacancy_text)])
 
-        async def run_agent():
-            nonlocal agent_done
-            try:
-                async for event in self.session_manager.interview_runner.run_async(
+            # Run the agent, interleaving simulated reasoning until its own thoughts arrive
+            pump = EventPump(
+                self.session_manager.interview_runner.run_async(
                     user_id=USER_ID, session_id=session_id, new_message=content
-                ):
-                    await event_queue.put(("event", event))
-            except Exception as e:
-                await event_queue.put(("error", e))
-            finally:
-                agent_done = True
-                await event_queue.put(("done", None))
-
-        agent_task = asyncio.create_task(run_agent())
-
-        reasoning_index = 0
-        reasoning_interval = 3.0
-        last_reasoning_time = time.time()
-
-        try:
-            while True:
-                current_time = time.time()
-                if (not agent_done
-                        and reasoning_index < len(SIMULATED_REASONING)
-                        and current_time - last_reasoning_time >= reasoning_interval):
-                    yield f"data: {json.dumps({'type': 'thinking', 'content': SIMULATED_REASONING[reasoning_index]})}\n\n"
-                    reasoning_index += 1
-                    last_reasoning_time = current_time
-
-                try:
-                    event_type, event_data = await asyncio.wait_for(event_queue.get(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    continue
-
-                if event_type == "done":
-                    break
-                if event_type == "error":
-                    raise event_data
-
-                event = event_data
-                event_count += 1
+                ),
+                ticks=SIMULATED_REASONING,
+                tick_interval=3.0,
+            )
+            event_count = 0
+            interview = None
 
-                if hasattr(event, 'tool_calls') and event.tool_calls:
-                    yield sse_status('tool_call', 'Vragen genereren...')
+            try:
+                async for kind, item in pump:
+                    if kind == EventPump.TICK:
+                        yield sse_thinking(item)
+                        continue
 
-                if event.is_final_response() and event.content and event.content.parts:
-                    response_text = event.content.parts[0].text
+                    event = item
+                    event_count += 1
 
-                    session = await self.session_manager.interview_session_service.get_session(
-                        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-                    )
-                    interview = get_interview_from_session(session)
+                    thoughts = event_thoughts(event)
+                    if thoughts:
+                        pump.stop_ticks()
+                        for thought in thoughts:
+                            yield sse_thinking(thought)
+
+                    if event.get_function_calls():
+                        yield sse_status('tool_call', 'Vragen genereren...')
+
+                    # The tool writes the interview to session state: send it as soon as it's saved
+                    tool_interview = event_state_value(event, "interview")
+                    if tool_interview is not None:
+                        interview = as_interview(tool_interview)
+                        yield sse_data({'type': 'interview', 'interview': interview, 'session_id': session_id})
+
+                    if event.is_final_response() and event.content and event.content.parts:
+                        response_text = event_text(event)
+                        if interview is None:
+                            # No tool call seen in this run: fall back to the session
+                            session = await self._get_session(session_id)
+                            interview = get_interview_from_session(session)
+                        await interview_session_cache.put(session_id, None, interview)
 
-                    total_time = time.time() - total_start
-                    logger.info(f"[GENERATE] Completed in {total_time:.2f}s ({event_count} events)")
+                        total_time = time.time() - total_start
+                        logger.info(f"[GENERATE] Completed in {total_time:.2f}s ({event_count} events)")
 
-                    yield f"data: {json.dumps({'type': 'complete', 'message': response_text, 'interview': interview, 'session_id': session_id})}\n\n"
-        except Exception as e:
-            logger.error(f"Error during interview generation: {e}")
-            yield sse_error(str(e))
-        finally:
-            if not agent_task.done():
-                agent_task.cancel()
+                        yield sse_data({'type': 'complete', 'message': response_text, 'interview': interview, 'session_id': session_id})
+            except Exception as e:
+                logger.error(f"Error during interview generation: {e}")
+                yield sse_error(str(e))
 
-        yield sse_done()
+            yield sse_done()
 
     # -------------------------------------------------------------------------
     # SSE streaming: feedback
@@ -387,27 +413,30 @@ class InterviewSessionHandler:
 
     async def stream_feedback(self, session_id: str, message: str) -> AsyncGenerator[str, None]:
         """Stream SSE events during feedback processing."""
-        from src.utils.sse_helpers import sse_done, sse_error, sse_status
+        from src.utils.sse_helpers import (
+            event_state_value, event_text, event_thoughts,
+            sse_data, sse_done, sse_error, sse_status, sse_thinking,
+        )
 
-        lock = self._get_feedback_lock(session_id)
-        if lock.locked():
+        if interview_session_cache.in_agent_turn(session_id):
             logger.info(f"[FEEDBACK] Session {session_id} already processing, rejecting duplicate")
             yield sse_error('Een verzoek wordt al verwerkt. Even geduld.')
             yield sse_done()
             return
 
-        async with lock:
+        # Pending question edits are persisted first; edits wait until the agent is done
+        async with interview_session_cache.agent_turn(session_id):
             total_start = time.time()
             logger.info(f"[FEEDBACK] Started - message: {message[:80]}...")
 
-            session = await self._get_session(session_id)
-            if not session:
+            current_interview = await interview_session_cache.get(session_id, self._session_loader(session_id))
+            if current_interview is None:
                 yield sse_error('Session not found. Please generate questions first.')
                 yield sse_done()
                 return
 
             # Select agent based on message complexity
-            use_fast = should_use_fast_agent(session, message)
+            use_fast = should_use_fast_agent(current_interview, message)
             active_runner = (
                 self.session_manager.interview_editor_runner if use_fast
                 else self.session_manager.interview_runner
@@ -418,14 +447,13 @@ class InterviewSessionHandler:
             yield sse_status('thinking', status_message)
 
             # Build context with current interview state
-            current_interview = get_interview_from_session(session)
             interview_snapshot_before = get_questions_snapshot(current_interview)
             state_context = _build_feedback_context(current_interview, message)
 
             content = types.Content(role="user", parts=[types.Part(text=state_context)])
 
-            agent_start = time.time()
             event_count = 0
+            interview = current_interview
 
             try:
                 async for event in active_runner.run_async(
@@ -433,31 +461,30 @@ class InterviewSessionHandler:
                 ):
                     event_count += 1
 
-                    if hasattr(event, 'tool_calls') and event.tool_calls:
+                    for thought in event_thoughts(event):
+                        yield sse_thinking(thought)
+
+                    if event.get_function_calls():
                         yield sse_status('tool_call', 'Vragen aanpassen...')
 
+                    # The editor tool writes the updated interview to session state
+                    tool_interview = event_state_value(event, "interview")
+                    if tool_interview is not None:
+                        interview = as_interview(tool_interview)
+
                     if event.is_final_response():
-                        response_text = ""
-                        if event.content and event.content.parts:
-                            response_text = event.content.parts[0].text if hasattr(event.content.parts[0], 'text') else str(event.content.parts[0])
-                        else:
-                            response_text = "Wijzigingen opgeslagen."
-
-                        # Re-fetch session to get updated interview
-                        session = await self.session_manager.interview_session_service.get_session(
-                            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-                        )
-                        interview = get_interview_from_session(session)
+                        response_text = event_text(event) or "Wijzigingen opgeslagen."
+                        await interview_session_cache.put(session_id, None, interview)
 
                         # Detect if agent actually changed questions
                         interview_snapshot_after = get_questions_snapshot(interview)
                         if interview_snapshot_before == interview_snapshot_after:
-                            interview = reset_change_statuses(interview)
+                            interview = reset_change_statuses(copy.deepcopy(interview))
 
                         total_time = time.time() - total_start
                         logger.info(f"[FEEDBACK] Completed in {total_time:.2f}s ({event_count} events)")
 
-                        yield f"data: {json.dumps({'type': 'complete', 'message': response_text, 'interview': interview})}\n\n"
+                        yield sse_data({'type': 'complete', 'message': response_text, 'interview': interview})
             except Exception as e:
                 logger.error(f"Error during feedback processing: {e}")
                 yield sse_error(str(e))
@@ -470,72 +497,58 @@ class InterviewSessionHandler:
 
     async def get_session_interview(self, session_id: str) -> dict:
         """Get the current interview state for a session. Raises ValueError if not found."""
-        session = await self._get_session(session_id)
-        if not session:
+        interview = await interview_session_cache.get(session_id, self._session_loader(session_id))
+        if interview is None:
             raise ValueError("Session not found")
-        return get_interview_from_session(session)
+        return interview
 
     async def reorder_questions(
         self, session_id: str, knockout_order: list[str] | None, qualification_order: list[str] | None
     ) -> dict:
         """Reorder questions in a session. Returns updated interview."""
-        session = await self._get_session(session_id)
-        if not session:
-            raise ValueError("Session not found")
-
-        interview = get_interview_from_session(session)
-        if not interview:
-            raise ValueError("No interview in session")
-
-        if knockout_order:
-            id_to_question = {q["id"]: q for q in interview.get("knockout_questions", [])}
-            for qid in knockout_order:
-                if qid not in id_to_question:
-                    raise ValueError(f"Unknown question ID: {qid}")
-            interview["knockout_questions"] = [id_to_question[qid] for qid in knockout_order]
-
-        if qualification_order:
-            id_to_question = {q["id"]: q for q in interview.get("qualification_questions", [])}
-            for qid in qualification_order:
-                if qid not in id_to_question:
-                    raise ValueError(f"Unknown question ID: {qid}")
-            interview["qualification_questions"] = [id_to_question[qid] for qid in qualification_order]
-
-        await self._update_session_state(session, session_id, interview, "reorder")
+        def reorder(interview: dict):
+            if knockout_order:
+                id_to_question = {q["id"]: q for q in interview.get("knockout_questions", [])}
+                for qid in knockout_order:
+                    if qid not in id_to_question:
+                        raise ValueError(f"Unknown question ID: {qid}")
+                interview["knockout_questions"] = [id_to_question[qid] for qid in knockout_order]
+
+            if qualification_order:
+                id_to_question = {q["id"]: q for q in interview.get("qualification_questions", [])}
+                for qid in qualification_order:
+                    if qid not in id_to_question:
+                        raise ValueError(f"Unknown question ID: {qid}")
+                interview["qualification_questions"] = [id_to_question[qid] for qid in qualification_order]
+
+        _, interview = await self._edit_interview(session_id, reorder, "reorder")
         return interview
 
     async def delete_question(self, session_id: str, question_id: str) -> dict:
         """Delete a question from a session. Returns updated interview."""
-        session = await self._get_session(session_id)
-        if not session:
-            raise ValueError("Session not found")
-
-        interview = get_interview_from_session(session)
-        if not interview:
-            raise ValueError("No interview in session")
-
-        deleted = False
-        if question_id.startswith("ko_"):
-            original_len = len(interview.get("knockout_questions", []))
-            interview["knockout_questions"] = [
-                q for q in interview.get("knockout_questions", []) if q["id"] != question_id
-            ]
-            deleted = len(interview["knockout_questions"]) < original_len
-        elif question_id.startswith("qual_"):
-            original_len = len(interview.get("qualification_questions", []))
-            interview["qualification_questions"] = [
-                q for q in interview.get("qualification_questions", []) if q["id"] != question_id
-            ]
-            deleted = len(interview["qualification_questions"]) < original_len
-
-        if not deleted:
-            raise ValueError(f"Question not found: {question_id}")
-
-        # Remove from approved_ids if present
-        if question_id in interview.get("approved_ids", []):
-            interview["approved_ids"] = [qid for qid in interview["approved_ids"] if qid != question_id]
-
-        await self._update_session_state(session, session_id, interview, f"delete_{question_id}")
+        def delete(interview: dict):
+            deleted = False
+            if question_id.startswith("ko_"):
+                original_len = len(interview.get("knockout_questions", []))
+                interview["knockout_questions"] = [
+                    q for q in interview.get("knockout_questions", []) if q["id"] != question_id
+                ]
+                deleted = len(interview["knockout_questions"]) < original_len
+            elif question_id.startswith("qual_"):
+                original_len = len(interview.get("qualification_questions", []))
+                interview["qualification_questions"] = [
+                    q for q in interview.get("qualification_questions", []) if q["id"] != question_id
+                ]
+                deleted = len(interview["qualification_questions"]) < original_len
+
+            if not deleted:
+                raise ValueError(f"Question not found: {question_id}")
+
+            # Remove from approved_ids if present
+            if question_id in interview.get("approved_ids", []):
+                interview["approved_ids"] = [qid for qid in interview["approved_ids"] if qid != question_id]
+
+        _, interview = await self._edit_interview(session_id, delete, f"delete_{question_id}")
         return interview
 
     async def add_question(
@@ -548,38 +561,32 @@ class InterviewSessionHandler:
         if question_type == "qualification" and not ideal_answer:
             raise ValueError("ideal_answer is required for qualification questions")
 
-        session = await self._get_session(session_id)
-        if not session:
-            raise ValueError("Session not found")
-
-        interview = get_interview_from_session(session)
-        if not interview:
-            raise ValueError("No interview in session")
-
-        if question_type == "knockout":
-            existing_ids = [q["id"] for q in interview.get("knockout_questions", [])]
-            n = 1
-            while f"ko_{n}" in existing_ids:
-                n += 1
-            new_id = f"ko_{n}"
-            new_question_obj = {
-                "id": new_id, "question": question,
-                "vacancy_snippet": vacancy_snippet, "change_status": "new"
-            }
-            interview.setdefault("knockout_questions", []).append(new_question_obj)
-        else:
-            existing_ids = [q["id"] for q in interview.get("qualification_questions", [])]
-            n = 1
-            while f"qual_{n}" in existing_ids:
-                n += 1
-            new_id = f"qual_{n}"
-            new_question_obj = {
-                "id": new_id, "question": question, "ideal_answer": ideal_answer,
-                "vacancy_snippet": vacancy_snippet, "change_status": "new"
-            }
-            interview.setdefault("qualification_questions", []).append(new_question_obj)
-
-        await self._update_session_state(session, session_id, interview, f"add_{new_id}")
+        def add(interview: dict) -> tuple[str, dict]:
+            if question_type == "knockout":
+                existing_ids = [q["id"] for q in interview.get("knockout_questions", [])]
+                n = 1
+                while f"ko_{n}" in existing_ids:
+                    n += 1
+                new_id = f"ko_{n}"
+                new_question_obj = {
+                    "id": new_id, "question": question,
+                    "vacancy_snippet": vacancy_snippet, "change_status": "new"
+                }
+                interview.setdefault("knockout_questions", []).append(new_question_obj)
+            else:
+                existing_ids = [q["id"] for q in interview.get("qualification_questions", [])]
+                n = 1
+                while f"qual_{n}" in existing_ids:
+                    n += 1
+                new_id = f"qual_{n}"
+                new_question_obj = {
+                    "id": new_id, "question": question, "ideal_answer": ideal_answer,
+                    "vacancy_snippet": vacancy_snippet, "change_status": "new"
+                }
+                interview.setdefault("qualification_questions", []).append(new_question_obj)
+            return new_id, dict(new_question_obj)
+
+        (new_id, new_question_obj), interview = await self._edit_interview(session_id, add, f"add_{question_type}")
         return new_id, new_question_obj, interview
 
     async def restore_session_from_db(self, vacancy_id: str) -> tuple[str, dict]:
@@ -611,15 +618,17 @@ class InterviewSessionHandler:
         interview = _build_interview_from_db_rows(ps_row, question_rows)
         session_id = vacancy_id
 
-        # Get or create session
-        svc = self.session_manager.interview_session_service
-        session = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-        if not session:
-            try:
-                session = await svc.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-            except (IntegrityError, AlreadyExistsError):
-                logger.info(f"Session {session_id} already exists, fetching it")
-                session = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        # Get or create session; edits not persisted yet are replaced by the saved data
+        async with interview_session_cache.agent_turn(session_id, keep_edits=False):
+            svc = self.session_manager.interview_session_service
+            session = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            if not session:
+                try:
+                    session = await svc.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+                except (IntegrityError, AlreadyExistsError):
+                    logger.info(f"Session {session_id} already exists, fetching it")
+                    session = await svc.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
 
-        await self._update_session_state(session, session_id, interview, "restore")
+            session = await self._update_session_state(session, session_id, interview, "restore")
+            await interview_session_cache.put(session_id, session, interview)
         return session_id, interview
@@ -360,6 +360,7 @@ Geef je evaluatie als JSON."""
         app_name="transcript_processor_app",
         content=content,
         session_id_prefix="transcript",
+        direct=True,
     )
     
     logger.info("Agent response received")
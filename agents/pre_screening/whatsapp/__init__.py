@@ -43,6 +43,11 @@ from .agent import (
     # Default config
     DEFAULT_CONFIG,
 )
+from .turn_planner import (
+    TURN_STRATEGIES,
+    TURN_STRATEGY_PLANNER,
+    TURN_STRATEGY_SPECULATIVE,
+)
 
 __all__ = [
     # Main classes
@@ -58,4 +63,8 @@ __all__ = [
     "get_conversation_outcome",
     # Default config
     "DEFAULT_CONFIG",
+    # Turn strategies (AgentConfig.turn_strategy)
+    "TURN_STRATEGIES",
+    "TURN_STRATEGY_PLANNER",
+    "TURN_STRATEGY_SPECULATIVE",
 ]
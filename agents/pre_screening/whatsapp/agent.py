@@ -25,6 +25,17 @@ from .calendar_helpers import (
     TimeSlot,
     SlotData,
 )
+from .turn_planner import (
+    TURN_STRATEGY_PLANNER,
+    TURN_STRATEGY_SPECULATIVE,
+    PASS,
+    FAIL,
+    UNRELATED,
+    QUESTION,
+    TurnBranch,
+    TurnPlan,
+    plan_turn,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +62,11 @@ Stijl:
 - Geen verkleinwoordjes, geen samenvattingen
 - GEEN begroetingen halverwege het gesprek"""
 
+    # How ambiguous answers in the hello/knockout/open phases are handled:
+    # "speculative" = parallel eval + unrelated check + speculative reply,
+    # "planner" = one structured call returning classification + reply (see turn_planner.py)
+    turn_strategy: str = TURN_STRATEGY_SPECULATIVE
+
     # Exit thresholds
     max_unrelated_answers: int = 2  # Exit after this many irrelevant answers
 
@@ -142,7 +158,7 @@ class Phase(str, Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     """Simple state tracking - managed by our code, not LLM."""
     phase: Phase = Phase.HELLO
@@ -597,6 +613,11 @@ class SimplePreScreeningAgent:
         # Check regex first - if it matches, we can skip the LLM calls entirely
         is_ready, regex_matched = self._evaluate_ready_regex(user_message)
 
+        if not regex_matched and self._use_planner():
+            planned = await self._plan_hello(user_message)
+            if planned is not None:
+                return planned
+
         if regex_matched:
             # Clear yes/no is obviously related, skip LLM checks
             is_unrelated = False
@@ -662,6 +683,11 @@ Geef EEN antwoord, geen alternatieven. Max 2 zinnen."""
         # Check regex first - if it matches, we can skip the LLM calls entirely
         eval_result, regex_matched = self._evaluate_knockout_regex(user_message)
 
+        if not regex_matched and self._use_planner():
+            planned = await self._plan_knockout(user_message, current_q)
+            if planned is not None:
+                return planned
+
         if regex_matched:
             # Clear yes/no is obviously related, skip LLM checks
             is_unrelated = False
@@ -748,6 +774,11 @@ Geef EEN antwoord, geen alternatieven. Max 2 zinnen."""
         """Handle open questions phase - record answer, move to next."""
         current_q = self.state.open_questions[self.state.open_index]
 
+        if self._use_planner():
+            planned = await self._plan_open(user_message, current_q)
+            if planned is not None:
+                return planned
+
         # Check for unrelated answer
         if await self._is_unrelated(current_q, user_message):
             self.state.unrelated_count += 1
@@ -1506,6 +1537,174 @@ Geen reactie op het vorige antwoord. Gewoon de vraag."""
         )
         return await self._generate(prompt)
 
+    # -------------------------------------------------------------------------
+    # Turn planner (turn_strategy="planner")
+    # -------------------------------------------------------------------------
+
+    def _use_planner(self) -> bool:
+        return self.config.turn_strategy == TURN_STRATEGY_PLANNER
+
+    async def _plan(self, context: str, user_message: str, branches: dict[str, TurnBranch]) -> Optional[TurnPlan]:
+        """Plan a turn in one call; None means: handle it with the speculative strategy."""
+        plan = await plan_turn(
+            context=context,
+            message=user_message,
+            branches=branches,
+            model=self.config.model_generate,
+            system_instruction=self.config.system_instruction,
+        )
+        if plan is None:
+            logger.warning(f"⚠️ {self.state.phase.value.upper()}: Turn planner failed, falling back to speculative strategy")
+        return plan
+
+    def _question_branch(self, repeat: str) -> TurnBranch:
+        return TurnBranch(
+            when="de kandidaat stelt een vraag in plaats van te antwoorden",
+            reply=f"Beantwoord de vraag kort als dat kan met de info hierboven, zeg anders dat de recruiter dat later kan toelichten. Daarna: {repeat}. Max 3 zinnen.",
+        )
+
+    def _unrelated_branch(self, repeat: str) -> TurnBranch:
+        """Unrelated branch; its reply ends the conversation when the answer would be one too many."""
+        when = "spam, willekeurige tekst of een compleet ander onderwerp. Bij twijfel: NIET unrelated"
+        if self.state.unrelated_count + 1 >= self.config.max_unrelated_answers:
+            return TurnBranch(
+                when=when,
+                reply="De kandidaat heeft meerdere keren irrelevant geantwoord. Bedank vriendelijk voor hun tijd en zeg dat ze later contact kunnen opnemen als ze serieus geïnteresseerd zijn. Max 2 zinnen. GEEN handtekening.",
+            )
+        return TurnBranch(when=when, reply=f"Vraag vriendelijk om bij het onderwerp te blijven. Daarna: {repeat}. Max 2 zinnen.")
+
+    def _record_unrelated(self):
+        """Count an unrelated answer, ending the conversation at the threshold (as _handle_unrelated_exit)."""
+        self.state.unrelated_count += 1
+        if self.state.unrelated_count >= self.config.max_unrelated_answers:
+            self.state.phase = Phase.FAILED
+            self.state.outcome = "Exited due to unrelated answers"
+
+    async def _plan_hello(self, user_message: str) -> Optional[str]:
+        """Hello phase with the turn planner: ready / not ready / question / unrelated."""
+        first_q = self.state.knockout_questions[self.state.knockout_index]
+        repeat = "vraag opnieuw of ze klaar zijn om te beginnen"
+        context = f"""Kandidaat: {self.state.candidate_name}
+Vacature: {self.state.vacancy_title}
+Je vroeg: "Ben je klaar om te beginnen met de screening voor {self.state.vacancy_title}?\""""
+        branches = {
+            PASS: TurnBranch(
+                when="de kandidaat stemt in, bevestigt, of geeft aan klaar te zijn (ja, ok, yes, sure, prima, etc.)",
+                reply=f'Stel de eerste vraag: "{first_q["question"]}". Je mag een korte overgang maken of direct de vraag stellen. Max 2 zinnen. Geen emojis.',
+            ),
+            FAIL: TurnBranch(
+                when="de kandidaat twijfelt of wil nog niet beginnen",
+                reply=f"Reageer kort en vriendelijk. Daarna: {repeat}. Max 2 zinnen.",
+            ),
+            QUESTION: self._question_branch(repeat),
+            UNRELATED: self._unrelated_branch(repeat),
+        }
+
+        plan = await self._plan(context, user_message, branches)
+        if plan is None:
+            return None
+
+        if plan.classification == PASS:
+            self.state.unrelated_count = 0
+            self.state.phase = Phase.KNOCKOUT
+        elif plan.classification == UNRELATED:
+            self._record_unrelated()
+        return plan.reply
+
+    async def _plan_knockout(self, user_message: str, current_q: dict) -> Optional[str]:
+        """Knockout phase with the turn planner: pass / fail / question / unrelated."""
+        next_index = self.state.knockout_index + 1
+        if next_index >= len(self.state.knockout_questions):
+            next_q = self.state.open_questions[self.state.open_index]
+        else:
+            next_q = self.state.knockout_questions[next_index]["question"]
+        repeat = f'herhaal de vraag "{current_q["question"]}"'
+        context = f"""Kandidaat: {self.state.candidate_name}
+Vacature: {self.state.vacancy_title}
+Je vroeg: "{current_q["question"]}"
+Vereiste: {current_q.get("requirement", current_q["question"])}"""
+        branches = {
+            PASS: TurnBranch(
+                when="de kandidaat antwoordt bevestigend of positief (in elke taal of stijl). Bij twijfel: pass",
+                reply=f'Stel ALLEEN de volgende vraag: "{next_q}". Geen reactie op het vorige antwoord. Geen "fijn", "oké", "mooi".',
+            ),
+            FAIL: TurnBranch(
+                when="de kandidaat ontkent expliciet of geeft aan NIET te voldoen aan de vereiste",
+                reply="Leg empathisch uit dat dit helaas een vereiste is voor DEZE functie. Vraag dan of ze interesse hebben in andere vacatures bij ons. 2-3 zinnen, eindig met de vraag over andere vacatures.",
+            ),
+            QUESTION: self._question_branch(repeat),
+            UNRELATED: self._unrelated_branch(repeat),
+        }
+
+        plan = await self._plan(context, user_message, branches)
+        if plan is None:
+            return None
+
+        if plan.classification == PASS:
+            self.state.unrelated_count = 0
+            self.state.knockout_results.append({
+                "question": current_q["question"],
+                "answer": plan.summary or user_message[:100],
+                "passed": True,
+            })
+            self.state.knockout_index += 1
+            if self.state.knockout_index >= len(self.state.knockout_questions):
+                self.state.phase = Phase.OPEN
+        elif plan.classification == FAIL:
+            self.state.phase = Phase.CONFIRM_FAIL
+            self.state.failed_requirement = current_q["requirement"]
+        elif plan.classification == UNRELATED:
+            self._record_unrelated()
+        return plan.reply
+
+    async def _plan_open(self, user_message: str, current_q: str) -> Optional[str]:
+        """Open phase with the turn planner: answer / question / unrelated."""
+        is_last = self.state.open_index + 1 >= len(self.state.open_questions)
+        slot_data = None
+        if is_last:
+            # The reply for an answer presents the slots, so they're needed up front
+            slot_data = await get_time_slots_for_whatsapp(
+                days_ahead=self.config.schedule_days_ahead,
+                start_offset_days=self.config.schedule_start_offset,
+                skip_calendar=False,
+            )
+            pass_reply = f"""Laatste vraag beantwoord. Bedank kort, zeg dat je een gesprek wilt inplannen, en toon deze tijdsloten:
+{slot_data.formatted_text}
+Kopieer de tijdsloten EXACT (met 📅 en **sterretjes** voor vetgedrukt). Geen andere emojis. Max 3 zinnen voor je intro."""
+        else:
+            next_q = self.state.open_questions[self.state.open_index + 1]
+            pass_reply = f'Stel ALLEEN de volgende vraag: "{next_q}". Geen reactie op het vorige antwoord.'
+        repeat = f'herhaal de vraag "{current_q}"'
+        context = f"""Kandidaat: {self.state.candidate_name}
+Vacature: {self.state.vacancy_title}
+Je vroeg: "{current_q}\""""
+        branches = {
+            PASS: TurnBranch(
+                when="het bericht probeert de vraag te beantwoorden (ook korte/informele antwoorden). Bij twijfel: pass",
+                reply=pass_reply,
+            ),
+            QUESTION: self._question_branch(repeat),
+            UNRELATED: self._unrelated_branch(repeat),
+        }
+
+        plan = await self._plan(context, user_message, branches)
+        if plan is None:
+            return None
+
+        if plan.classification == PASS:
+            self.state.unrelated_count = 0
+            self.state.open_results.append({
+                "question": current_q,
+                "answer": user_message,
+            })
+            self.state.open_index += 1
+            if is_last:
+                self.state.phase = Phase.SCHEDULE
+                self.state.available_slots = [s.model_dump() for s in slot_data.slots]
+        elif plan.classification == UNRELATED:
+            self._record_unrelated()
+        return plan.reply
+
     async def _generate_confirm(self, scheduled_time: str) -> str:
         """Generate scheduling confirmation."""
         # TODO: Refactor to inject recruiter name from context (vacancy/pre-screening settings)
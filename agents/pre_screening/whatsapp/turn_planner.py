@@ -0,0 +1,153 @@
+"""
+Combined turn planner for the WhatsApp pre-screening agent.
+
+With the default "speculative" strategy an ambiguous answer costs several
+model calls: the answer is classified, checked for being unrelated and the
+happy-path reply is generated speculatively, all in parallel, followed by
+another generation whenever the speculation was wrong (fail, unrelated,
+not ready). The classifications are parsed from free-form JSON, and parse
+failures quietly fall back to defaults.
+
+The "planner" strategy makes one call per turn instead. The prompt lists
+every branch of the current phase, each with the reply to write for it, and
+a strict response schema makes the model return the classification and the
+candidate-facing reply together. A response that doesn't match the schema is
+logged and the agent falls back to the speculative strategy for that turn.
+
+The strategy is selected per workspace with the agent config setting
+interview.whatsapp_turn_strategy (see fetch_turn_strategy).
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TURN_STRATEGY_SPECULATIVE = "speculative"
+TURN_STRATEGY_PLANNER = "planner"
+TURN_STRATEGIES = (TURN_STRATEGY_SPECULATIVE, TURN_STRATEGY_PLANNER)
+
+# Classifications a branch can be keyed by
+PASS = "pass"            # Answers the question (ready / meets requirement / usable answer)
+FAIL = "fail"            # Answers negatively (not ready / does not meet requirement)
+UNRELATED = "unrelated"  # Spam, random text or another subject
+QUESTION = "question"    # Asks something back instead of answering
+
+
+@dataclass
+class TurnBranch:
+    """One possible outcome of a turn: when it applies and what to reply."""
+    when: str
+    reply: str
+
+
+@dataclass
+class TurnPlan:
+    """Classification and reply for one candidate message."""
+    classification: str
+    reply: str
+    summary: str = ""
+
+
+TURN_PLANNER_PROMPT = """Beoordeel het bericht van de kandidaat en schrijf meteen je volgende WhatsApp bericht.
+
+{context}
+
+BERICHT VAN KANDIDAAT: "{message}"
+
+## CLASSIFICATIE
+Kies precies EEN classificatie:
+{classifications}
+
+## ANTWOORD
+Schrijf in "reply" het bericht voor de gekozen classificatie:
+{replies}
+
+Geef EEN antwoord, geen alternatieven.
+"summary": samenvatting van het antwoord van de kandidaat in max 1 zin."""
+
+
+def turn_plan_schema(classifications: list[str]) -> dict:
+    """Response schema restricted to the classifications of the current phase."""
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "classification": {"type": "STRING", "enum": list(classifications)},
+            "summary": {"type": "STRING"},
+            "reply": {"type": "STRING"},
+        },
+        "required": ["classification", "summary", "reply"],
+        "property_ordering": ["classification", "summary", "reply"],
+    }
+
+
+def build_turn_prompt(context: str, message: str, branches: dict[str, TurnBranch]) -> str:
+    return TURN_PLANNER_PROMPT.format(
+        context=context,
+        message=message,
+        classifications="\n".join(f"- {name}: {branch.when}" for name, branch in branches.items()),
+        replies="\n".join(f"- {name}: {branch.reply}" for name, branch in branches.items()),
+    )
+
+
+def parse_turn_plan(response: str, branches: dict[str, TurnBranch]) -> Optional[TurnPlan]:
+    """Validate a planner response; None if it doesn't match the schema."""
+    try:
+        data = json.loads(response)
+    except (TypeError, json.JSONDecodeError):
+        logger.warning(f"Turn planner returned invalid JSON: {str(response)[:200]}")
+        return None
+
+    if not isinstance(data, dict):
+        logger.warning(f"Turn planner returned {type(data).__name__} instead of an object")
+        return None
+    classification = data.get("classification")
+    reply = (data.get("reply") or "").strip()
+    if classification not in branches or not reply:
+        logger.warning(f"Turn planner returned unusable plan: classification={classification!r}, reply={reply[:50]!r}")
+        return None
+    return TurnPlan(classification=classification, reply=reply, summary=(data.get("summary") or "").strip())
+
+
+async def plan_turn(
+    context: str,
+    message: str,
+    branches: dict[str, TurnBranch],
+    model: str,
+    system_instruction: str,
+) -> Optional[TurnPlan]:
+    """
+    Classify a candidate message and write the reply in one model call.
+
+    Args:
+        context: What the candidate was asked, and anything the reply may use
+        message: The candidate's message
+        branches: Classification -> branch, the possible outcomes of this turn
+        model: Model to call
+        system_instruction: The agent's tone instruction
+
+    Returns:
+        The plan, or None if the call failed or the response was unusable
+    """
+    from src.utils.llm import generate
+
+    t0 = time.perf_counter()
+    try:
+        response = await generate(
+            prompt=build_turn_prompt(context, message, branches),
+            model=model,
+            system_instruction=system_instruction,
+            response_schema=turn_plan_schema(list(branches)),
+        )
+    except Exception as e:
+        logger.warning(f"Turn planner call failed: {e}")
+        return None
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    plan = parse_turn_plan(response, branches)
+    if plan is not None:
+        logger.info(f"⏱️ plan_turn ({model}): {elapsed:.0f}ms → {plan.classification}")
+    return plan
@@ -22,6 +22,8 @@ import time
 from agents.pre_screening.interview_question_generator.agent import generator_agent as interview_agent, editor_agent as interview_editor_agent
 from agents.candidate_simulator.agent import SimulationPersona, create_simulator_agent, run_simulation
 from agents.database_query.agent import set_db_pool as set_data_query_db_pool
+from agents.document_collection.recognition.verification_cache import set_db_pool as set_verification_cache_db_pool
+from agents.cv_analyzer import set_db_pool as set_cv_cache_db_pool
 from agents.recruiter_analyst.agent import root_agent as recruiter_analyst_agent
 from data.fixtures import load_vacancies, load_applications, load_pre_screenings
 from src.utils.random_candidate import generate_random_candidate
@@ -167,6 +169,9 @@ _health_monitor_task: Optional[asyncio.Task] = None
 # Background task for scheduled ATS sync
 _ats_sync_ticker_task: Optional[asyncio.Task] = None
 
+# Background task sweeping expired conversation/agent cache entries
+_cache_sweeper_task: Optional[asyncio.Task] = None
+
 
 # ============================================================================
 # Application Lifecycle
@@ -215,65 +220,10 @@ async def _workflow_ticker_loop():
             first_run = False  # Ensure we don't retry immediately on error
 
 
-# ATS sync interval in seconds (30 minutes)
-ATS_SYNC_INTERVAL = int(os.getenv("ATS_SYNC_INTERVAL", 30 * 60))
-
-
-async def _ats_sync_ticker_loop():
-    """Background task that syncs vacancies from ATS every 30 minutes.
-
-    For each workspace with an active ATS connection, triggers a vacancy
-    sync which imports new vacancies and auto-generates pre-screening
-    questions when enabled.
-    """
-    from src.services.vacancy_import_service import VacancyImportService, get_sync_progress
-
-    logger.info(f"🔄 ATS sync ticker started (syncing every {ATS_SYNC_INTERVAL}s)")
-
-    while True:
-        try:
-            await asyncio.sleep(ATS_SYNC_INTERVAL)
-
-            pool = await get_db_pool()
-
-            # Find all workspaces with active ATS connections
-            workspaces = await pool.fetch("""
-                SELECT DISTINCT ic.workspace_id
-                FROM system.integration_connections ic
-                JOIN system.integrations i ON i.id = ic.integration_id
-                WHERE ic.is_active = true
-                  AND i.slug != 'microsoft'
-            """)
-
-            if not workspaces:
-                continue
-
-            # Skip if a manual sync is already running
-            progress = get_sync_progress()
-            if progress and progress.get("status") == "syncing":
-                logger.info("🔄 ATS sync ticker: skipping — manual sync already in progress")
-                continue
-
-            for row in workspaces:
-                workspace_id = row["workspace_id"]
-                try:
-                    logger.info(f"🔄 ATS sync ticker: syncing workspace {workspace_id}")
-                    service = VacancyImportService(pool)
-                    await service.sync(workspace_id)
-                except Exception as e:
-                    logger.error(f"🔄 ATS sync ticker: failed for workspace {workspace_id}: {e}")
-
-        except asyncio.CancelledError:
-            logger.info("🔄 ATS sync ticker stopped")
-            break
-        except Exception as e:
-            logger.error(f"🔄 ATS sync ticker error: {e}")
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle - create session services on startup."""
-    global session_manager, _workflow_ticker_task, _health_monitor_task, _ats_sync_ticker_task
+    global session_manager, _workflow_ticker_task, _health_monitor_task, _ats_sync_ticker_task, _cache_sweeper_task
 
     # Initialize SessionManager
     session_manager = SessionManager(DATABASE_URL)
@@ -320,6 +270,26 @@ async def lifespan(app: FastAPI):
     # Set up data query agent with db pool (used by recruiter analyst sub-agent)
     set_data_query_db_pool(pool)
 
+    # Schema catalog for the data query agent, after the migrations changed the schema
+    from agents.database_query.schema_catalog import refresh_schema_catalog
+    try:
+        await refresh_schema_catalog(pool)
+    except Exception as e:
+        logger.warning(f"Schema catalog not loaded (agent falls back to discover tools): {e}")
+
+    # Document verification cache + audit trail
+    set_verification_cache_db_pool(pool)
+
+    # CV profile + analysis cache
+    set_cv_cache_db_pool(pool)
+
+    # Cluster-wide tier behind the conversation routing / agent caches,
+    # write-back of dirty agents on eviction and the expiry sweeper
+    from src.utils.conversation_cache import configure_shared_tier, cache_sweeper_loop, set_db_pool as set_agent_cache_db_pool
+    await configure_shared_tier(pool, DATABASE_URL)
+    set_agent_cache_db_pool(pool)
+    _cache_sweeper_task = asyncio.create_task(cache_sweeper_loop())
+
     # Set global session_manager for dependency injection
     set_global_session_manager(session_manager)
 
@@ -330,8 +300,9 @@ async def lifespan(app: FastAPI):
     from src.services.health_monitor import health_monitor_loop
     _health_monitor_task = asyncio.create_task(health_monitor_loop())
 
-    # Start background ATS sync ticker (every 30 minutes)
-    _ats_sync_ticker_task = asyncio.create_task(_ats_sync_ticker_loop())
+    # Start background ATS sync scheduler (concurrent, leased per workspace)
+    from src.services.ats_sync_scheduler import ats_sync_scheduler_loop
+    _ats_sync_ticker_task = asyncio.create_task(ats_sync_scheduler_loop())
 
     yield
 
@@ -357,6 +328,34 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    from agents.document_collection.recognition.image_pipeline import shutdown_image_pipeline
+    await shutdown_image_pipeline()
+
+    from src.services.media_fetcher import close_media_fetcher
+    await close_media_fetcher()
+
+    from src.services.document_storage import wait_for_background_saves
+    await wait_for_background_saves()
+
+    from src.utils.llm import close_context_caches
+    await close_context_caches()
+
+    if _cache_sweeper_task:
+        _cache_sweeper_task.cancel()
+        try:
+            await _cache_sweeper_task
+        except asyncio.CancelledError:
+            pass
+
+    from src.utils.conversation_cache import agent_cache, close_shared_tier
+    from src.utils.interview_session_cache import interview_session_cache
+    await agent_cache.flush()
+    await interview_session_cache.flush_all()
+    await close_shared_tier()
+    await session_manager.close()
+
+    from agents.database_query.analytics_pool import close_analytics_pool
+    await close_analytics_pool()
     await close_db_pool()
 
 
@@ -0,0 +1,153 @@
+"""
+Memory per cached agent state and restore latency, per representation.
+
+Builds realistic final states for the WhatsApp pre-screening agent
+(ConversationState) and the document collection agent (CollectionState),
+and for each measures:
+
+- memory per state (tracemalloc) as a plain dataclass (instance __dict__),
+  as the slotted dataclass used now, and packed (state_codec) as idle
+  agents are held in the agent cache
+- restore latency: agent_state JSON -> state (cache miss) for both
+  dataclass variants, packed bytes -> state (get of an idle agent), and the
+  cost of packing
+
+Needs no database or API keys.
+
+Run:
+    python scripts/benchmark_agent_memory.py
+    python scripts/benchmark_agent_memory.py --agents 2000 --documents 20
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.document_collection.collection.state import CollectionState  # noqa: E402
+from agents.pre_screening.whatsapp.agent import ConversationState, Phase  # noqa: E402
+from src.utils.state_codec import decode_state, encode_state  # noqa: E402
+
+
+def without_slots(cls):
+    """The same dataclass without __slots__ (how the states were declared before)."""
+    namespace = {"__annotations__": {f.name: f.type for f in dataclasses.fields(cls)}}
+    for f in dataclasses.fields(cls):
+        namespace[f.name] = dataclasses.field(default=f.default, default_factory=f.default_factory)
+    namespace["from_dict"] = classmethod(cls.from_dict.__func__)
+    namespace["to_dict"] = cls.to_dict
+    return dataclasses.dataclass(type(f"{cls.__name__}Dict", (), namespace))
+
+
+def pre_screening_state(i: int) -> dict:
+    return ConversationState(
+        phase=Phase.SCHEDULE,
+        conversation_id=str(uuid.uuid4()),
+        candidate_name=f"Kandidaat {i}",
+        vacancy_title="Magazijnmedewerker",
+        company_name="Taloo",
+        knockout_questions=[
+            {"id": f"ko_{q}", "question": f"Heb je ervaring met heftrucks en ben je beschikbaar in ploegen? ({q})", "requirement": "Ja"}
+            for q in range(5)
+        ],
+        knockout_index=5,
+        knockout_results=[
+            {"question_id": f"ko_{q}", "answer": "Ja, ik heb 3 jaar ervaring en werk graag in ploegen.", "passed": True, "summary": "Ervaren"}
+            for q in range(5)
+        ],
+        open_questions=[f"Vertel eens over je vorige werkgever en waarom je daar vertrok? ({q})" for q in range(3)],
+        open_index=3,
+        open_results=[{"question": f"Vraag {q}", "answer": "Ik werkte bij een logistiek bedrijf in Gent, vooral nachtploegen." * 2} for q in range(3)],
+        available_slots=[{"date": f"2026-11-0{d}", "dutch_date": f"maandag {d} november", "morning": ["9u", "10u"], "afternoon": ["14u"]} for d in range(1, 7)],
+    ).to_dict()
+
+
+def collection_state(documents: int, attributes: int) -> dict:
+    return CollectionState(
+        collection_id=str(uuid.uuid4()),
+        conversation_flow=[
+            {"step": f"step_{s}", "items": [{"slug": f"item_{s}_{j}", "reason": "Nodig voor het contract."} for j in range(4)]}
+            for s in range(8)
+        ],
+        context={"candidate": "Jan Peeters", "vacancy": "Magazijnmedewerker", "company": "Taloo"},
+        collected_documents={
+            f"doc_{d}": {
+                "status": "verified",
+                "extracted_fields": {"document_number": f"59{d:07d}", "expiry_date": "2031-04-30"},
+                "verification": {"confidence": 0.94, "notes": "Document is leesbaar en geldig. " * 3},
+            }
+            for d in range(documents)
+        },
+        collected_attributes={
+            f"attr_{a}": {"value": {"street": "Kerkstraat", "number": str(a), "stad": "Gent", "postcode": "9000"}}
+            for a in range(attributes)
+        },
+        last_agent_message="Top, dat is alles wat we nodig hebben.",
+        message_count=documents + attributes,
+    ).to_dict()
+
+
+def bytes_per_item(build, count: int) -> float:
+    """Mean bytes allocated (and kept) per item built."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def mean_us(fn, payloads: list) -> float:
+    timings = []
+    for payload in payloads:
+        t0 = time.perf_counter()
+        fn(payload)
+        timings.append((time.perf_counter() - t0) * 1e6)
+    return statistics.mean(timings)
+
+
+def report(name: str, state_cls, states: list[dict]):
+    dict_cls = without_slots(state_cls)
+    stored = [json.dumps(s, ensure_ascii=False) for s in states]
+    packed = [encode_state(s) for s in states]
+
+    print(f"\n{name}: {len(states)} states, {statistics.mean(len(s.encode()) for s in stored):.0f} bytes agent_state JSON each")
+    print("  memory per state")
+    dict_kb = bytes_per_item(lambda i: dict_cls.from_dict(json.loads(stored[i])), len(states)) / 1024
+    slot_kb = bytes_per_item(lambda i: state_cls.from_dict(json.loads(stored[i])), len(states)) / 1024
+    packed_kb = bytes_per_item(lambda i: encode_state(states[i]), len(states)) / 1024
+    print(f"    dataclass (__dict__)  {dict_kb:8.2f} KB")
+    print(f"    slotted dataclass     {slot_kb:8.2f} KB")
+    print(f"    packed (idle)         {packed_kb:8.2f} KB  ({1 - packed_kb / dict_kb:.0%} less than before)")
+
+    print("  restore latency")
+    print(f"    JSON -> dataclass     {mean_us(lambda s: dict_cls.from_dict(json.loads(s)), stored):8.1f} µs")
+    print(f"    JSON -> slotted       {mean_us(lambda s: state_cls.from_dict(json.loads(s)), stored):8.1f} µs")
+    print(f"    packed -> slotted     {mean_us(lambda p: state_cls.from_dict(decode_state(p)), packed):8.1f} µs")
+    live = [state_cls.from_dict(s) for s in states]
+    print(f"    pack (to_dict+encode) {mean_us(lambda state: encode_state(state.to_dict()), live):8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=500, help="States per agent type")
+    parser.add_argument("--documents", type=int, default=12, help="Collected documents per collection state")
+    parser.add_argument("--attributes", type=int, default=20, help="Collected attributes per collection state")
+    args = parser.parse_args()
+
+    report("ConversationState", ConversationState, [pre_screening_state(i) for i in range(args.agents)])
+    report("CollectionState", CollectionState, [collection_state(args.documents, args.attributes) for _ in range(args.agents)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark per-call overhead of single-shot agent execution.
+
+The model is replaced by an instant stub, so the numbers are pure framework
+overhead (runner/session setup, event handling, cleanup):
+
+- fresh:  a new InMemorySessionService, Runner and session per call, never
+          deleted (how run_agent_once used to work)
+- pooled: run_agent_once with a pooled Runner and a session deleted after use
+- direct: run_agent_once(direct=True), which skips ADK and calls generate()
+          (stubbed here as well)
+
+For every mode it reports mean / p95 latency per call and the number of
+sessions left in memory afterwards.
+
+Run:
+    python scripts/benchmark_agent_runner.py
+    python scripts/benchmark_agent_runner.py --calls 2000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncGenerator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.agents.llm_agent import Agent  # noqa: E402
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.models.llm_response import LlmResponse  # noqa: E402
+from google.adk.runners import Runner  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+import src.utils.llm as llm  # noqa: E402
+from agents.common import runner as agent_runner  # noqa: E402
+
+RESPONSE = '{"ok": true}'
+
+
+class StubLlm(BaseLlm):
+    """Answers every request instantly with RESPONSE."""
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=RESPONSE)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1, candidates_token_count=1, total_token_count=2,
+            ),
+        )
+
+
+async def stub_generate(*args, **kwargs) -> str:
+    return RESPONSE
+
+
+async def run_fresh(agent, app_name: str, content: types.Content, services: list) -> str:
+    """The pre-pool run_agent_once: everything created per call, nothing cleaned up."""
+    session_service = InMemorySessionService()
+    services.append(session_service)
+    runner = Runner(agent=agent, app_name=app_name, session_service=session_service)
+    session_id = f"bench_{uuid.uuid4().hex[:8]}"
+    await session_service.create_session(app_name=app_name, user_id="system", session_id=session_id)
+    text = ""
+    async for event in runner.run_async(user_id="system", session_id=session_id, new_message=content):
+        if event.is_final_response() and event.content:
+            text += "".join(p.text for p in event.content.parts if p.text)
+    return text
+
+
+def count_sessions(service: InMemorySessionService) -> int:
+    return sum(len(users) for apps in service.sessions.values() for users in apps.values())
+
+
+async def measure(call, calls: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            assert await call() == RESPONSE
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+def report(name: str, latencies: list[float], sessions_left: int):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    print(
+        f"  {name:<7} mean {statistics.mean(latencies):7.3f} ms  p95 {p95:7.3f} ms  "
+        f"sessions left {sessions_left}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    agent = Agent(name="bench_agent", model=StubLlm(model="stub"), instruction="Antwoord met JSON.")
+    direct_agent = Agent(name="bench_direct_agent", model="gemini-2.5-flash", instruction="Antwoord met JSON.")
+    content = types.Content(role="user", parts=[types.Part(text="ping")])
+    llm.generate = stub_generate
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}")
+
+    # Warm-up (imports, first runner)
+    await agent_runner.run_agent_once(agent, "bench_app", content)
+
+    services: list[InMemorySessionService] = []
+    latencies = await measure(lambda: run_fresh(agent, "bench_app", content, services), args.calls, args.concurrency)
+    report("fresh", latencies, sum(count_sessions(s) for s in services))
+
+    latencies = await measure(lambda: agent_runner.run_agent_once(agent, "bench_app", content), args.calls, args.concurrency)
+    pooled = agent_runner._get_runner(agent, "bench_app")
+    report("pooled", latencies, count_sessions(pooled.session_service))
+
+    latencies = await measure(
+        lambda: agent_runner.run_agent_once(direct_agent, "bench_app", content, direct=True),
+        args.calls, args.concurrency,
+    )
+    report("direct", latencies, 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
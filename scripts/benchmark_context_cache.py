@@ -0,0 +1,118 @@
+"""
+Benchmark Gemini context caching of the agents' static instructions.
+
+For every agent prompt below, sends the same short user message N times with
+the instruction inline and N times referencing a cached content created by
+the LLM layer's registry, streaming the response to measure time to first
+token. Reports per agent the input tokens per call, the share of them served
+from the cache, mean time to first token and mean total latency.
+
+Agents whose instruction is below the model's minimum cache size are listed
+as skipped (they are always sent inline).
+
+Needs a real GOOGLE_API_KEY; the cached contents are deleted afterwards.
+
+Run:
+    python scripts/benchmark_context_cache.py
+    python scripts/benchmark_context_cache.py --calls 10 --agents document_recognition cv_analyzer
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from google import genai  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from src.utils.llm import _context_caches  # noqa: E402
+
+
+def agent_prompts() -> dict[str, tuple[str, str, str]]:
+    """Agent label -> (model, system instruction, user message)."""
+    from agents.cv_analyzer.agent import INSTRUCTION as CV_INSTRUCTION, MODEL as CV_MODEL
+    from agents.document_collection.collection.agent import DEFAULT_MODEL as COLLECTION_MODEL
+    from agents.document_collection.collection.prompts import SYSTEM_INSTRUCTION as COLLECTION_INSTRUCTION
+    from agents.document_collection.recognition.agent import _build_instruction
+    from agents.pre_screening.interview_analyzer.agent import interview_analysis_agent
+    from agents.pre_screening.transcript_processor.agent import transcript_processor_agent
+    from agents.pre_screening.whatsapp.agent import AgentConfig
+
+    whatsapp = AgentConfig()
+    return {
+        "document_recognition": ("gemini-2.0-flash", _build_instruction("id_card"), "Analyze this document image."),
+        "document_collection": (COLLECTION_MODEL, COLLECTION_INSTRUCTION, "Vraag vriendelijk naar de achterkant van de ID-kaart."),
+        "prescreening_whatsapp": (whatsapp.model_generate, whatsapp.system_instruction, "Bedank de kandidaat kort."),
+        "interview_analysis": (interview_analysis_agent.model, interview_analysis_agent.instruction, "Geef een lege analyse als JSON."),
+        "transcript_processor": (transcript_processor_agent.model, transcript_processor_agent.instruction, "Geef een lege analyse als JSON."),
+        "cv_analyzer": (CV_MODEL, CV_INSTRUCTION, "Geef een lege analyse als JSON."),
+    }
+
+
+async def stream_once(client, model: str, message: str, config: types.GenerateContentConfig) -> dict:
+    start = time.perf_counter()
+    first_token_ms = None
+    usage = None
+    async for chunk in await client.aio.models.generate_content_stream(model=model, contents=message, config=config):
+        if first_token_ms is None and chunk.text:
+            first_token_ms = (time.perf_counter() - start) * 1000
+        usage = chunk.usage_metadata or usage
+    return {
+        "ttft_ms": first_token_ms or (time.perf_counter() - start) * 1000,
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+    }
+
+
+def summarize(name: str, runs: list[dict]) -> str:
+    prompt = statistics.mean(r["prompt_tokens"] for r in runs)
+    cached = statistics.mean(r["cached_tokens"] for r in runs)
+    return (
+        f"    {name:<7} input {prompt:7.0f} tok  cached {cached:7.0f} tok  "
+        f"TTFT {statistics.mean(r['ttft_ms'] for r in runs):7.0f} ms  "
+        f"total {statistics.mean(r['total_ms'] for r in runs):7.0f} ms"
+    )
+
+
+async def main():
+    prompts = agent_prompts()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5, help="Calls per agent and mode")
+    parser.add_argument("--agents", nargs="+", default=list(prompts), choices=list(prompts))
+    args = parser.parse_args()
+
+    client = genai.Client()
+    try:
+        for label in args.agents:
+            model, instruction, message = prompts[label]
+            print(f"\n{label} ({model}, ~{len(instruction) // 4} instruction tokens)")
+            cache_name = await _context_caches.get(model, instruction, label)
+            if cache_name is None:
+                print("    skipped: instruction not cacheable for this model (sent inline)")
+                continue
+
+            inline_config = types.GenerateContentConfig(system_instruction=instruction, max_output_tokens=64)
+            cached_config = types.GenerateContentConfig(cached_content=cache_name, max_output_tokens=64)
+            inline = [await stream_once(client, model, message, inline_config) for _ in range(args.calls)]
+            cached = [await stream_once(client, model, message, cached_config) for _ in range(args.calls)]
+            print(summarize("inline", inline))
+            print(summarize("cached", cached))
+
+            saved = statistics.mean(r["cached_tokens"] for r in cached) / max(1, statistics.mean(r["prompt_tokens"] for r in cached))
+            ttft_delta = statistics.mean(r["ttft_ms"] for r in inline) - statistics.mean(r["ttft_ms"] for r in cached)
+            print(f"    → {saved:.0%} of input tokens from cache, TTFT {ttft_delta:+.0f} ms faster")
+    finally:
+        await _context_caches.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""
+Benchmark document contour detection: full-resolution vs pyramid.
+
+The demo documents are flat renders, so there is no ground truth for a real
+photo. Each document in data/demo_documents/valid and invalid is therefore
+placed on a cluttered background (4000x3000 by default) with a random but
+known perspective warp, JPEG-compressed like a phone upload, and handed to
+detect_document_contour:
+
+- full:    contours on the full-resolution image (max_dim=None)
+- pyramid: contours on a downscaled copy, corners refined on the full image
+
+For every image it reports latency, the IoU of the detected quad with the true
+quad and the largest corner error in pixels; per folder it reports detection
+rate, mean / p95 latency and mean IoU. The scenes are seeded, so runs compare.
+
+Run:
+    python scripts/benchmark_document_contours.py
+    python scripts/benchmark_document_contours.py --size 3000x2000 --max-dim 800 --quiet
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.document_collection.recognition.image_preprocessor import (  # noqa: E402
+    DETECTION_MAX_DIM,
+    detect_document_contour,
+    order_points,
+)
+
+DOCUMENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "demo_documents"
+
+
+def make_scene(document: np.ndarray, size: tuple[int, int], rng: random.Random) -> tuple[np.ndarray, np.ndarray]:
+    """Warp a document onto a textured background. Returns (BGR scene, true corners)."""
+    width, height = size
+    np_rng = np.random.default_rng(rng.randrange(2**32))
+
+    # Table-like background: dark base colour, low-frequency blotches and noise
+    base = np.array([rng.randint(30, 90) for _ in range(3)], dtype=np.float32)
+    blotches = cv2.resize(np_rng.normal(0, 18, (12, 16, 3)).astype(np.float32), (width, height))
+    noise = np_rng.normal(0, 6, (height, width, 3)).astype(np.float32)
+    scene = np.clip(base + blotches + noise, 0, 255).astype(np.uint8)
+
+    # Document covers 35-65% of the frame width, jittered corners for perspective
+    doc_h, doc_w = document.shape[:2]
+    target_w = width * rng.uniform(0.35, 0.65)
+    target_h = target_w * doc_h / doc_w
+    cx = width / 2 + rng.uniform(-0.1, 0.1) * width
+    cy = height / 2 + rng.uniform(-0.1, 0.1) * height
+    jitter = 0.08 * target_w
+    dst = np.array([
+        [cx - target_w / 2, cy - target_h / 2],
+        [cx + target_w / 2, cy - target_h / 2],
+        [cx + target_w / 2, cy + target_h / 2],
+        [cx - target_w / 2, cy + target_h / 2],
+    ], dtype=np.float32)
+    dst += np.array([[rng.uniform(-jitter, jitter), rng.uniform(-jitter, jitter)] for _ in range(4)], dtype=np.float32)
+    dst[:, 0] = dst[:, 0].clip(10, width - 10)
+    dst[:, 1] = dst[:, 1].clip(10, height - 10)
+
+    src = np.array([[0, 0], [doc_w, 0], [doc_w, doc_h], [0, doc_h]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(src, dst)
+    warped = cv2.warpPerspective(document, matrix, (width, height))
+    mask = cv2.warpPerspective(np.full((doc_h, doc_w), 255, np.uint8), matrix, (width, height))
+    scene[mask > 0] = warped[mask > 0]
+
+    # Phone-style JPEG round trip
+    _, encoded = cv2.imencode(".jpg", scene, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR), dst
+
+
+def quad_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """Intersection over union of two convex quadrilaterals."""
+    a, b = order_points(a), order_points(b)
+    inter, _ = cv2.intersectConvexConvex(a, b)
+    union = cv2.contourArea(a) + cv2.contourArea(b) - inter
+    return float(inter / union) if union > 0 else 0.0
+
+
+def corner_error(detected: np.ndarray, truth: np.ndarray) -> float:
+    """Largest distance (px) between matching corners."""
+    return float(np.linalg.norm(order_points(detected) - order_points(truth), axis=1).max())
+
+
+def measure(scene: np.ndarray, truth: np.ndarray, max_dim) -> dict:
+    start = time.perf_counter()
+    corners = detect_document_contour(scene, max_dim=max_dim)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if corners is None:
+        return {"latency_ms": latency_ms, "iou": 0.0, "error_px": None}
+    return {"latency_ms": latency_ms, "iou": quad_iou(corners, truth), "error_px": corner_error(corners, truth)}
+
+
+def summarize(name: str, results: list[dict]):
+    if not results:
+        return
+    latencies = sorted(r["latency_ms"] for r in results)
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    detected = [r for r in results if r["error_px"] is not None]
+    errors = [r["error_px"] for r in detected]
+    print(
+        f"  {name:<8} detected {len(detected):>3}/{len(results):<3} "
+        f"latency mean {statistics.mean(latencies):7.1f} ms  p95 {p95:7.1f} ms  "
+        f"IoU mean {statistics.mean(r['iou'] for r in results):.4f}  "
+        f"corner err median {statistics.median(errors) if errors else float('nan'):6.1f} px"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="4000x3000", help="Scene size WIDTHxHEIGHT")
+    parser.add_argument("--max-dim", type=int, default=DETECTION_MAX_DIM, help="Pyramid detection size")
+    parser.add_argument("--folders", nargs="+", default=["valid", "invalid"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quiet", action="store_true", help="Only print per-folder summaries")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    modes = {"full": None, "pyramid": args.max_dim}
+
+    for folder in args.folders:
+        paths = sorted((DOCUMENTS_DIR / folder).glob("*.png"))
+        rng = random.Random(f"{args.seed}:{folder}")
+        results = {mode: [] for mode in modes}
+
+        print(f"\n{folder} ({len(paths)} documents, scene {size[0]}x{size[1]})")
+        if not args.quiet:
+            print(f"  {'document':<50}" + "".join(f"{mode + ' ms':>12}{'IoU':>8}" for mode in modes))
+
+        for path in paths:
+            document = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if document is None:
+                continue
+            scene, truth = make_scene(document, size, rng)
+            row = f"  {path.stem[:48]:<50}"
+            for mode, max_dim in modes.items():
+                result = measure(scene, truth, max_dim)
+                results[mode].append(result)
+                row += f"{result['latency_ms']:>12.1f}{result['iou']:>8.3f}"
+            if not args.quiet:
+                print(row)
+
+        for mode in modes:
+            summarize(mode, results[mode])
+
+
+if __name__ == "__main__":
+    main()
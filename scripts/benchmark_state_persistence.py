@@ -0,0 +1,254 @@
+"""
+Compare full and delta persistence of agent state, per turn.
+
+Takes final agent states (document collections or pre-screening sessions
+from the database, or a synthetic long document collection) and rebuilds the
+conversation that led to them: the growing keys (collected documents and
+attributes, results, flags, completed steps) start empty and gain one item
+per turn, and the per-turn keys (last message, message count) change every
+turn. Every turn is then persisted twice:
+
+- full:  the whole state serialized and sent, as the agents used to do
+- delta: through AgentStateStore (changed top-level keys only, periodic
+         compaction, no write when nothing changed)
+
+Reports the bytes sent per turn (mean, p95, last turn) and the number of
+full / delta / skipped writes. With --wal, both variants also write to a
+scratch table (created and dropped by the script) and the WAL generated per
+turn is measured with pg_current_wal_insert_lsn(); other traffic on the database
+adds noise to that number, so use a quiet (local) database.
+
+Run:
+    python scripts/benchmark_state_persistence.py
+    python scripts/benchmark_state_persistence.py --synthetic-documents 20 --synthetic-attributes 30
+    python scripts/benchmark_state_persistence.py --source collections --limit 20 --wal
+"""
+
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import statistics
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from agents.document_collection.collection.state import CollectionState  # noqa: E402
+from src.utils.agent_state_store import DELTA, FULL, SKIP, AgentStateStore  # noqa: E402
+
+SCRATCH_TABLE = "agents.state_persistence_benchmark"
+
+# Keys that grow during a conversation (rebuilt one item per turn)
+GROWING_KEYS = (
+    "collected_documents", "collected_attributes", "partial_attributes", "skipped_items",
+    "completed_steps", "review_flags", "retry_counts",
+    "knockout_results", "open_results", "alternate_results",
+)
+
+
+def synthetic_collection(documents: int, attributes: int) -> dict:
+    """Final state of a long document collection."""
+    flow = [
+        {
+            "step": f"step_{i}",
+            "type": "documents" if i % 2 else "attributes",
+            "items": [{"slug": f"item_{i}_{j}", "reason": "Nodig voor het contract en de Dimona-aangifte."} for j in range(4)],
+            "message": "Kan je me een duidelijke foto sturen van dit document? Zorg dat alle hoeken zichtbaar zijn.",
+        }
+        for i in range(8)
+    ]
+    state = CollectionState(
+        collection_id=str(uuid.uuid4()),
+        conversation_flow=flow,
+        context={"candidate": "Jan Peeters", "vacancy": "Magazijnmedewerker", "company": "Taloo", "start_date": "2026-11-02"},
+        summary="Identiteit, werkvergunning, adres en bankgegevens verzamelen voor de start.",
+        collected_documents={
+            f"doc_{i}": {
+                "status": "verified",
+                "extracted_fields": {"document_number": f"59{i:07d}", "expiry_date": "2031-04-30", "name": "Jan Peeters"},
+                "verification": {"confidence": 0.94, "fraud_risk": "low", "notes": "Document is leesbaar en geldig. " * 3},
+                "storage_path": f"collections/{uuid.uuid4()}/doc_{i}_front.jpg",
+            }
+            for i in range(documents)
+        },
+        collected_attributes={
+            f"attr_{i}": {"value": {"street": "Kerkstraat", "number": str(i), "stad": "Gent", "postcode": "9000"}, "source": "chat"}
+            for i in range(attributes)
+        },
+        review_flags=[{"type": "low_confidence", "slug": f"doc_{i}", "note": "Controleer de vervaldatum."} for i in range(documents // 4)],
+        completed_steps=[f"step_{i}" for i in range(8)],
+        retry_counts={f"doc_{i}": 1 for i in range(documents // 3)},
+        last_agent_message="Top, dat is alles wat we nodig hebben. Je recruiter neemt contact met je op.",
+        message_count=documents + attributes,
+    )
+    return state.to_dict()
+
+
+async def load_states(source: str, limit: int) -> list[dict]:
+    from src.database import get_db_pool
+
+    pool = await get_db_pool()
+    table = "agents.document_collections" if source == "collections" else "agents.pre_screening_sessions"
+    rows = await pool.fetch(
+        f"SELECT agent_state FROM {table} WHERE agent_state IS NOT NULL ORDER BY updated_at DESC NULLS LAST LIMIT $1",
+        limit,
+    )
+    states = []
+    for row in rows:
+        state = row["agent_state"]
+        while isinstance(state, str):
+            state = json.loads(state)
+        if isinstance(state, dict) and state:
+            states.append(state)
+    return states
+
+
+def rebuild_turns(final: dict) -> list[dict]:
+    """States after every turn of a conversation ending in `final`."""
+    state = copy.deepcopy(final)
+    pending = []
+    for key in GROWING_KEYS:
+        value = final.get(key)
+        if isinstance(value, dict) and value:
+            state[key] = {}
+            pending.extend((key, k, v) for k, v in value.items())
+        elif isinstance(value, list) and value:
+            state[key] = []
+            pending.extend((key, None, v) for v in value)
+    # Interleave the keys, as a conversation alternates between them
+    by_key = [list(group) for _, group in itertools.groupby(pending, key=lambda p: p[0])]
+    pending = [p for batch in itertools.zip_longest(*by_key) for p in batch if p is not None]
+
+    turns = []
+    messages = itertools.count(1)
+
+    def next_turn():
+        n = next(messages)
+        if "message_count" in state:
+            state["message_count"] = n
+        if "last_agent_message" in state:
+            state["last_agent_message"] = f"Bericht {n}: {final.get('last_agent_message', '')}"
+        turns.append(copy.deepcopy(state))
+
+    for n, (key, item_key, item) in enumerate(pending, 1):
+        if item_key is None:
+            state[key].append(item)
+        else:
+            state[key][item_key] = item
+        next_turn()
+        # Every third turn the candidate asks something: only the per-turn keys change
+        if n % 3 == 0:
+            next_turn()
+    return turns
+
+
+class RecordingPool:
+    """Stands in for the database when only bytes sent are measured (the row never changes elsewhere)."""
+
+    async def execute(self, sql: str, *args) -> str:
+        return "UPDATE 1"
+
+    async def fetchval(self, sql: str, *args) -> str:
+        return "row-hash"
+
+
+async def with_wal(conn, coro):
+    """Run a write; returns (its result, WAL bytes generated meanwhile)."""
+    before = await conn.fetchval("SELECT pg_current_wal_insert_lsn()")
+    result = await coro
+    return result, int(await conn.fetchval("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), $1)", before))
+
+
+async def replay(turns: list[dict], store: AgentStateStore, conn=None) -> dict:
+    full_id, delta_id = uuid.uuid4(), uuid.uuid4()
+    if conn is not None:
+        for row_id in (full_id, delta_id):
+            await conn.execute(f"INSERT INTO {SCRATCH_TABLE} (id, agent_state) VALUES ($1, '{{}}'::jsonb)", row_id)
+
+    result = {"full_bytes": [], "delta_bytes": [], "full_wal": [], "delta_wal": [], "modes": {FULL: 0, DELTA: 0, SKIP: 0}}
+    for state in turns:
+        payload = json.dumps(state, ensure_ascii=False)
+        result["full_bytes"].append(len(payload.encode()))
+        if conn is None:
+            write = await store.save(RecordingPool(), SCRATCH_TABLE, delta_id, state)
+        else:
+            _, wal = await with_wal(conn, conn.execute(
+                f"UPDATE {SCRATCH_TABLE} SET agent_state = $1::jsonb, updated_at = NOW() WHERE id = $2", payload, full_id,
+            ))
+            result["full_wal"].append(wal)
+            write, wal = await with_wal(conn, store.save(conn, SCRATCH_TABLE, delta_id, state))
+            result["delta_wal"].append(wal)
+        result["delta_bytes"].append(write.bytes)
+        result["modes"][write.mode] += 1
+    return result
+
+
+def describe(name: str, values: list[int]) -> str:
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"  {name:<12} mean {statistics.mean(values):9.0f}  p95 {p95:9.0f}  last {values[-1]:9.0f}  total {sum(values):11.0f}"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["synthetic", "collections", "sessions"], default="synthetic")
+    parser.add_argument("--limit", type=int, default=10, help="Number of recorded states to replay")
+    parser.add_argument("--synthetic-documents", type=int, default=12)
+    parser.add_argument("--synthetic-attributes", type=int, default=20)
+    parser.add_argument("--compact-every", type=int, default=25, help="Full write after this many delta saves")
+    parser.add_argument("--wal", action="store_true", help="Also measure WAL bytes on a scratch table")
+    args = parser.parse_args()
+
+    if args.source == "synthetic":
+        finals = [synthetic_collection(args.synthetic_documents, args.synthetic_attributes)]
+    else:
+        finals = await load_states(args.source, args.limit)
+    conversations = [t for t in (rebuild_turns(f) for f in finals) if t]
+    print(f"{len(conversations)} conversations, {sum(len(t) for t in conversations)} turns")
+
+    store = AgentStateStore(compact_every=args.compact_every, tables=(SCRATCH_TABLE,))
+    conn = None
+    if args.wal:
+        from src.database import get_db_pool
+
+        pool = await get_db_pool()
+        conn = await pool.acquire()
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} "
+            "(id UUID PRIMARY KEY, agent_state JSONB, updated_at TIMESTAMPTZ)"
+        )
+
+    totals = {"full_bytes": [], "delta_bytes": [], "full_wal": [], "delta_wal": [], "modes": {FULL: 0, DELTA: 0, SKIP: 0}}
+    try:
+        for turns in conversations:
+            result = await replay(turns, store, conn)
+            for key in ("full_bytes", "delta_bytes", "full_wal", "delta_wal"):
+                totals[key].extend(result[key])
+            for mode, count in result["modes"].items():
+                totals["modes"][mode] += count
+    finally:
+        if conn is not None:
+            await conn.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+            await pool.release(conn)
+
+    print("\nBytes sent per turn")
+    print(describe("full", totals["full_bytes"]))
+    print(describe("delta", totals["delta_bytes"]))
+    print(f"  → {1 - sum(totals['delta_bytes']) / max(1, sum(totals['full_bytes'])):.0%} fewer bytes; "
+          f"writes: {totals['modes'][FULL]} full, {totals['modes'][DELTA]} delta, {totals['modes'][SKIP]} skipped")
+    if args.wal:
+        print("\nWAL bytes per turn")
+        print(describe("full", totals["full_wal"]))
+        print(describe("delta", totals["delta_wal"]))
+        print(f"  → {1 - sum(totals['delta_wal']) / max(1, sum(totals['full_wal'])):.0%} less WAL")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""
+Compare the WhatsApp pre-screening agent's turn strategies on recorded conversations.
+
+Replays the candidate messages of recorded WhatsApp screenings through the
+hello, knockout and open phases. Every turn is run twice from the same
+state: once with the "speculative" strategy (parallel evaluation, unrelated
+check and speculative reply) and once with the "planner" strategy (one
+structured call returning classification and reply). The conversation then
+continues from the speculative state, so both strategies always see the same
+history.
+
+Per strategy it reports the mean / p95 latency per turn and the LLM calls per
+turn, for all turns and for turns the regex fast path didn't settle. It also
+reports how often both strategies reach the same outcome (pass, fail,
+unrelated or stay in place), with the disagreements listed.
+
+Conversations come from the database (most recent WhatsApp sessions with
+candidate messages) or from a JSON file written earlier with --export.
+Calendar lookups use the default slots; the LLM calls are real.
+
+Run:
+    python scripts/benchmark_turn_strategies.py --conversations 20
+    python scripts/benchmark_turn_strategies.py --conversations 50 --export recorded.json
+    python scripts/benchmark_turn_strategies.py --file recorded.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import src.utils.llm as llm  # noqa: E402
+from agents.pre_screening.whatsapp import agent as whatsapp_agent  # noqa: E402
+from agents.pre_screening.whatsapp import (  # noqa: E402
+    AgentConfig,
+    ConversationState,
+    Phase,
+    SimplePreScreeningAgent,
+    TURN_STRATEGIES,
+)
+
+REPLAYED_PHASES = (Phase.HELLO, Phase.KNOCKOUT, Phase.OPEN)
+
+_llm_calls = 0
+_original_generate = llm.generate
+_original_get_slots = whatsapp_agent.get_time_slots_for_whatsapp
+
+
+async def counting_generate(*args, **kwargs) -> str:
+    global _llm_calls
+    _llm_calls += 1
+    return await _original_generate(*args, **kwargs)
+
+
+async def default_slots(days_ahead: int = 3, start_offset_days: int = 3, skip_calendar: bool = False):
+    return await _original_get_slots(days_ahead=days_ahead, start_offset_days=start_offset_days, skip_calendar=True)
+
+
+async def load_conversations(limit: int) -> list[dict]:
+    """Most recent WhatsApp sessions: their questions and the candidate's messages."""
+    from src.database import get_db_pool
+
+    pool = await get_db_pool()
+    rows = await pool.fetch(
+        """
+        SELECT s.id, s.agent_state
+        FROM agents.pre_screening_sessions s
+        WHERE s.channel = 'whatsapp' AND s.agent_state IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM agents.pre_screening_session_turns t
+              WHERE t.conversation_id = s.id AND t.role = 'user'
+          )
+        ORDER BY s.started_at DESC
+        LIMIT $1
+        """,
+        limit,
+    )
+    conversations = []
+    for row in rows:
+        state = row["agent_state"]
+        while isinstance(state, str):
+            state = json.loads(state)
+        if not state.get("knockout_questions") or not state.get("open_questions"):
+            continue
+        turns = await pool.fetch(
+            """
+            SELECT message FROM agents.pre_screening_session_turns
+            WHERE conversation_id = $1 AND role = 'user'
+            ORDER BY created_at
+            """,
+            row["id"],
+        )
+        conversations.append({
+            "id": str(row["id"]),
+            "candidate_name": state.get("candidate_name", "kandidaat"),
+            "vacancy_title": state.get("vacancy_title", ""),
+            "knockout_questions": state["knockout_questions"],
+            "open_questions": state["open_questions"],
+            "messages": [t["message"] for t in turns],
+        })
+    return conversations
+
+
+def outcome(before: ConversationState, after: ConversationState) -> str:
+    """What a turn did to the conversation, comparable across strategies."""
+    if after.phase == Phase.FAILED or after.unrelated_count > before.unrelated_count:
+        return "unrelated"
+    if after.phase == Phase.CONFIRM_FAIL:
+        return "fail"
+    if (
+        after.knockout_index > before.knockout_index
+        or after.open_index > before.open_index
+        or (before.phase == Phase.HELLO and after.phase == Phase.KNOCKOUT)
+    ):
+        return "pass"
+    return "stay"
+
+
+def settled_by_regex(state_dict: dict, message: str) -> bool:
+    """Whether the regex fast path handles this message (identical for both strategies)."""
+    agent = SimplePreScreeningAgent(ConversationState.from_dict(state_dict))
+    if agent.state.phase == Phase.HELLO:
+        return agent._evaluate_ready_regex(message)[1]
+    if agent.state.phase == Phase.KNOCKOUT:
+        return agent._evaluate_knockout_regex(message)[1]
+    return False
+
+
+async def run_turn(state_dict: dict, message: str, strategy: str) -> dict:
+    global _llm_calls
+    agent = SimplePreScreeningAgent(ConversationState.from_dict(state_dict), AgentConfig(turn_strategy=strategy))
+    before = ConversationState.from_dict(state_dict)
+    _llm_calls = 0
+    start = time.perf_counter()
+    reply = await agent.process_message(message)
+    return {
+        "ms": (time.perf_counter() - start) * 1000,
+        "calls": _llm_calls,
+        "outcome": outcome(before, agent.state),
+        "reply": reply,
+        "state": agent.state.to_dict(),
+    }
+
+
+async def replay(conversation: dict) -> list[dict]:
+    state = ConversationState(
+        candidate_name=conversation["candidate_name"],
+        vacancy_title=conversation["vacancy_title"],
+        knockout_questions=conversation["knockout_questions"],
+        open_questions=conversation["open_questions"],
+    ).to_dict()
+
+    turns = []
+    for message in conversation["messages"]:
+        if Phase(state["phase"]) not in REPLAYED_PHASES:
+            break
+        results = {strategy: await run_turn(state, message, strategy) for strategy in TURN_STRATEGIES}
+        turns.append({"phase": state["phase"], "message": message, "regex": settled_by_regex(state, message), **results})
+        state = results["speculative"]["state"]
+    return turns
+
+
+def report(turns: list[dict]):
+    def line(name: str, subset: list[dict], strategy: str) -> str:
+        if not subset:
+            return f"  {strategy:<12} {name:<9} (no turns)"
+        ms = sorted(t[strategy]["ms"] for t in subset)
+        p95 = ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))]
+        calls = statistics.mean(t[strategy]["calls"] for t in subset)
+        return f"  {strategy:<12} {name:<9} mean {statistics.mean(ms):6.0f} ms  p95 {p95:6.0f} ms  {calls:4.2f} LLM calls/turn"
+
+    ambiguous = [t for t in turns if not t["regex"]]
+    print(f"\n{len(turns)} turns replayed, {len(ambiguous)} not settled by regex")
+    for strategy in TURN_STRATEGIES:
+        print(line("all", turns, strategy))
+        print(line("ambiguous", ambiguous, strategy))
+
+    disagreements = [t for t in ambiguous if t["speculative"]["outcome"] != t["planner"]["outcome"]]
+    if ambiguous:
+        print(f"\n  outcome agreement on ambiguous turns: {1 - len(disagreements) / len(ambiguous):.0%}")
+    for t in disagreements:
+        print(
+            f"    [{t['phase']}] \"{t['message'][:60]}\": "
+            f"speculative={t['speculative']['outcome']} planner={t['planner']['outcome']}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--conversations", type=int, help="Load the N most recent WhatsApp sessions from the database")
+    source.add_argument("--file", type=Path, help="Load conversations from a JSON file written with --export")
+    parser.add_argument("--export", type=Path, help="Write the loaded conversations to this JSON file")
+    args = parser.parse_args()
+
+    if args.file:
+        conversations = json.loads(args.file.read_text())
+    else:
+        conversations = await load_conversations(args.conversations)
+    if args.export:
+        args.export.write_text(json.dumps(conversations, ensure_ascii=False, indent=2))
+        print(f"Exported {len(conversations)} conversations to {args.export}")
+
+    llm.generate = counting_generate
+    whatsapp_agent.get_time_slots_for_whatsapp = default_slots
+
+    turns = []
+    for i, conversation in enumerate(conversations, 1):
+        print(f"[{i}/{len(conversations)}] {conversation.get('id', '')} ({len(conversation['messages'])} messages)")
+        turns.extend(await replay(conversation))
+    report(turns)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
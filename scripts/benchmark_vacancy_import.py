@@ -0,0 +1,185 @@
+"""
+Benchmark the ATS vacancy import: per-record vs set-based bulk upserts.
+
+Generates a synthetic Connexys payload (5,000 records by default, spread over
+a realistic number of recruiters, clients and offices) and imports it page by
+page through VacancyImportService with both strategies.
+
+By default it runs against a simulated connection that counts round trips and
+adds a fixed latency per statement, so the numbers reflect what the import
+costs over a network without touching a database. Pass --database-url and
+--workspace-id to run against a real Postgres instead; everything then runs
+inside a transaction that is rolled back at the end.
+
+Run:
+    python scripts/benchmark_vacancy_import.py
+    python scripts/benchmark_vacancy_import.py --records 5000 --rtt-ms 2
+    python scripts/benchmark_vacancy_import.py --database-url postgresql://... --workspace-id <uuid>
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.integration_service import CONNEXYS_DEFAULT_MAPPING  # noqa: E402
+from src.services.vacancy_import_service import VacancyImportService  # noqa: E402
+
+# Salesforce returns up to 2,000 records per query page
+PAGE_SIZE = 2000
+
+
+def generate_connexys_records(count: int, seed: int = 42) -> list[dict]:
+    """Build synthetic Connexys position records shaped like the REST API output."""
+    rng = random.Random(seed)
+    recruiters = [
+        {"Email": f"recruiter{i}@example.com", "Name": f"Recruiter {i}", "Phone": f"+3247000{i:04d}", "Title": "Consultant"}
+        for i in range(max(1, count // 100))
+    ]
+    clients = [f"Klant {i} BV" for i in range(max(1, count // 25))]
+    offices = [
+        {
+            "Id": f"a0O{i:012d}",
+            "Name": f"Kantoor {i}",
+            "office_email__c": f"kantoor{i}@example.com",
+            "office_phone__c": f"+3290000{i:04d}",
+            "office_street__c": "Kerkstraat",
+            "office_number__c": str(i + 1),
+            "office_postalcode__c": "9000",
+            "office_city__c": "Gent",
+        }
+        for i in range(max(1, count // 250))
+    ]
+
+    records = []
+    for i in range(count):
+        records.append({
+            "attributes": {"type": "cxsrec__cxsPosition__c"},
+            "Id": f"a0P{i:012d}",
+            "Name": f"Productieoperator {i}",
+            "cxsrec__Status__c": "Nieuwe",
+            "cxsrec__Account_name__c": rng.choice(clients),
+            "job_vdab_worklocation__c": "9000 Gent",
+            "cxsrec__Job_description__c": "<p>Je bedient machines in een ploegensysteem.</p>" * 5,
+            "cxsrec__Job_requirements__c": "<ul><li>Ervaring in productie</li></ul>",
+            "cxsrec__Compensation_benefits__c": "<p>Marktconform loon &amp; maaltijdcheques</p>",
+            "cxsrec__Job_start_date__c": "2026-11-01",
+            "job_url_website__c": f"https://example.com/vacatures/{i}",
+            "sync_to_taloo__c": True,
+            "cbx_itzu_website__c": True,
+            "LastModifiedDate": "2026-10-01T08:00:00.000+0000",
+            "Owner": rng.choice(recruiters),
+            "job_office__r": rng.choice(offices),
+        })
+    return records
+
+
+class _NullTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class SimulatedConnection:
+    """asyncpg.Connection stand-in that counts round trips and adds a fixed latency.
+
+    Lookups find nothing, so every record takes the insert path — the worst case
+    for the per-record importer and the common case for a first full sync.
+    """
+
+    def __init__(self, rtt_ms: float):
+        self.rtt = rtt_ms / 1000
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    async def execute(self, sql: str, *args):
+        await self._round_trip()
+        return "OK"
+
+    async def fetchrow(self, sql: str, *args):
+        await self._round_trip()
+        if sql.lstrip().upper().startswith("SELECT"):
+            return None
+        return {"id": uuid4()}
+
+    async def fetch(self, sql: str, *args):
+        await self._round_trip()
+        if "ats.recruiters" in sql:
+            return [{"id": uuid4(), "email": e} for e in args[0]]
+        if "ats.clients" in sql:
+            return [{"id": uuid4(), "name": n} for n in args[1]]
+        if "INSERT INTO ats.office_locations" in sql:
+            return [{"id": uuid4(), "source_id": s} for s in args[2]]
+        if "WITH input AS" in sql:
+            return [{"id": uuid4(), "source_id": s, "previous_status": None} for s in args[2]]
+        return []
+
+    def transaction(self):
+        return _NullTransaction()
+
+
+async def run_import(service: VacancyImportService, conn, workspace_id: UUID, records: list[dict], bulk: bool) -> float:
+    """Import all records page by page and return elapsed seconds."""
+    plan = service._compile_mapping(dict(CONNEXYS_DEFAULT_MAPPING), "connexys")
+    newly_inserted: list[dict] = []
+    start = time.perf_counter()
+    for offset in range(0, len(records), PAGE_SIZE):
+        page = records[offset:offset + PAGE_SIZE]
+        if bulk:
+            await service._import_page_bulk(conn, workspace_id, "connexys", page, plan, None, newly_inserted)
+        else:
+            await service._import_records(conn, workspace_id, "connexys", page, plan, None, newly_inserted)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Simulated latency per statement")
+    parser.add_argument("--database-url", help="Run against a real database (rolled back)")
+    parser.add_argument("--workspace-id", help="Workspace to import into (required with --database-url)")
+    args = parser.parse_args()
+
+    records = generate_connexys_records(args.records)
+    service = VacancyImportService(pool=None)
+
+    print(f"Synthetic Connexys payload: {len(records)} records, page size {PAGE_SIZE}")
+    print(f"{'mode':<12}{'seconds':>10}{'records/s':>12}{'round trips':>14}")
+
+    for bulk in (False, True):
+        mode = "bulk" if bulk else "per-record"
+        if args.database_url:
+            import asyncpg
+
+            if not args.workspace_id:
+                parser.error("--workspace-id is required with --database-url")
+            conn = await asyncpg.connect(args.database_url.replace("postgresql+asyncpg://", "postgresql://"))
+            tx = conn.transaction()
+            await tx.start()
+            try:
+                elapsed = await run_import(service, conn, UUID(args.workspace_id), records, bulk)
+            finally:
+                await tx.rollback()
+                await conn.close()
+            round_trips = "-"
+        else:
+            conn = SimulatedConnection(args.rtt_ms)
+            elapsed = await run_import(service, conn, uuid4(), records, bulk)
+            round_trips = conn.round_trips
+
+        print(f"{mode:<12}{elapsed:>10.2f}{len(records) / elapsed:>12.0f}{round_trips:>14}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
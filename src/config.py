@@ -98,6 +98,44 @@ ALERT_WHATSAPP_NUMBER = os.environ.get("ALERT_WHATSAPP_NUMBER")
 HEALTH_CHECK_INTERVAL = int(os.environ.get("HEALTH_CHECK_INTERVAL", "300"))
 ALERT_COOLDOWN = int(os.environ.get("ALERT_COOLDOWN", "3600"))
 
+# ============================================================================
+# ATS Sync Scheduler Configuration
+# ============================================================================
+
+# Base interval between syncs per workspace; adapts between MIN and MAX
+# depending on how many vacancies changed in the previous sync.
+ATS_SYNC_INTERVAL = int(os.environ.get("ATS_SYNC_INTERVAL", 30 * 60))
+ATS_SYNC_MIN_INTERVAL = int(os.environ.get("ATS_SYNC_MIN_INTERVAL", 10 * 60))
+ATS_SYNC_MAX_INTERVAL = int(os.environ.get("ATS_SYNC_MAX_INTERVAL", 2 * 60 * 60))
+ATS_SYNC_CONCURRENCY = int(os.environ.get("ATS_SYNC_CONCURRENCY", "3"))  # Workspaces synced in parallel per instance
+ATS_SYNC_LEASE_SECONDS = int(os.environ.get("ATS_SYNC_LEASE_SECONDS", "300"))  # Extended after every page
+ATS_SYNC_POLL_INTERVAL = int(os.environ.get("ATS_SYNC_POLL_INTERVAL", "60"))  # How often due workspaces are checked
+
+# ============================================================================
+# Image Pipeline Configuration (document recognition)
+# ============================================================================
+
+# Worker processes for CPU-bound image work (decode, resize, crop, encode)
+IMAGE_PIPELINE_WORKERS = int(os.environ.get("IMAGE_PIPELINE_WORKERS", min(4, os.cpu_count() or 1)))
+# Max image jobs queued or running at once; further callers wait for a slot
+IMAGE_PIPELINE_QUEUE_SIZE = int(os.environ.get("IMAGE_PIPELINE_QUEUE_SIZE", "32"))
+# Images at least this large are handed to workers via shared memory instead of pickling
+IMAGE_PIPELINE_SHM_THRESHOLD = int(os.environ.get("IMAGE_PIPELINE_SHM_THRESHOLD", 256 * 1024))
+# Longest side of images sent to vision models; uploads are downscaled to this on arrival
+VISION_IMAGE_MAX_SIZE = int(os.environ.get("VISION_IMAGE_MAX_SIZE", "1024"))
+
+# ============================================================================
+# Document Media Configuration (WhatsApp uploads)
+# ============================================================================
+
+# Hard cap on a downloaded media body; larger uploads are rejected while streaming
+MEDIA_MAX_BYTES = int(os.environ.get("MEDIA_MAX_BYTES", 16 * 1024 * 1024))
+MEDIA_FETCH_TIMEOUT = float(os.environ.get("MEDIA_FETCH_TIMEOUT", "30"))
+# Pooled connections shared by all media downloads
+MEDIA_FETCH_MAX_CONNECTIONS = int(os.environ.get("MEDIA_FETCH_MAX_CONNECTIONS", "20"))
+# Root of the local stand-in for object storage of original uploads
+DOCUMENT_STORAGE_DIR = os.environ.get("DOCUMENT_STORAGE_DIR", "./document_uploads")
+
 # ============================================================================
 # ATS Simulator Configuration
 # ============================================================================
@@ -3,11 +3,19 @@ Database connection management and migrations.
 """
 import asyncpg
 import logging
+import os
 from typing import Optional
 from src.config import DATABASE_URL
 
 logger = logging.getLogger(__name__)
 
+# The pool every database user shares (ADK sessions too with
+# ADK_SESSION_BACKEND=postgres, see PgSessionService)
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+# SELECT 1 on every acquire (opt-in: a round trip per acquire)
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "false").lower() == "true"
+
 # Global connection pool
 _db_pool: Optional[asyncpg.Pool] = None
 
@@ -16,9 +24,10 @@ async def get_db_pool() -> asyncpg.Pool:
     """Get or create the database connection pool.
 
     Pool configuration optimized for Supabase Session Mode Pooler:
-    - setup callback validates connections on acquire (like SQLAlchemy pool_pre_ping)
+    - with DB_POOL_PRE_PING, a setup callback validates connections on acquire (like SQLAlchemy pool_pre_ping)
     - max_inactive_connection_lifetime matches Supabase pooler timeout (~5 min)
-    - min_size=2 pre-warms connections to avoid cold start latency
+    - min_size (DB_POOL_MIN_SIZE) pre-warms connections to avoid cold start latency
+    - max_size (DB_POOL_MAX_SIZE) is the connection budget against the Supabase pooler
     """
     global _db_pool
     if _db_pool is None:
@@ -35,13 +44,16 @@ async def get_db_pool() -> asyncpg.Pool:
 
         _db_pool = await asyncpg.create_pool(
             raw_url,
-            min_size=2,                              # Pre-warm connections
-            max_size=10,                             # Reduced to stay within Supabase Session pooler limits
+            min_size=DB_POOL_MIN_SIZE,               # Pre-warm connections
+            max_size=DB_POOL_MAX_SIZE,               # Stay within Supabase Session pooler limits
             command_timeout=60,                      # Query timeout (seconds)
             max_inactive_connection_lifetime=300.0,  # Match Supabase pooler timeout (~5 min)
-            setup=setup_connection,                  # Validate on each acquire
+            setup=setup_connection if DB_POOL_PRE_PING else None,  # Validate on each acquire
+        )
+        logger.info(
+            f"Database connection pool created (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE}, "
+            f"pre_ping={DB_POOL_PRE_PING}, idle_lifetime=300s)"
         )
-        logger.info("Database connection pool created (min=2, max=10, idle_lifetime=300s)")
     return _db_pool
 
 
@@ -117,6 +129,46 @@ async def run_schema_migrations(pool: asyncpg.Pool):
 
         logger.info("ADK session tables initialized")
 
+        # ADK sessions on the shared asyncpg pool (PgSessionService)
+        # update_time (epoch seconds) doubles as the session's revision
+        await pool.execute("""
+            CREATE TABLE IF NOT EXISTS adk.agent_sessions (
+                app_name     VARCHAR(128) NOT NULL,
+                user_id      VARCHAR(128) NOT NULL,
+                id           VARCHAR(128) NOT NULL,
+                state        JSONB NOT NULL DEFAULT '{}',
+                create_time  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                update_time  DOUBLE PRECISION NOT NULL,
+                PRIMARY KEY (app_name, user_id, id)
+            );
+            CREATE TABLE IF NOT EXISTS adk.agent_events (
+                id             VARCHAR(128) NOT NULL,
+                app_name       VARCHAR(128) NOT NULL,
+                user_id        VARCHAR(128) NOT NULL,
+                session_id     VARCHAR(128) NOT NULL,
+                invocation_id  VARCHAR(256) NOT NULL,
+                author         VARCHAR(256) NOT NULL,
+                timestamp      DOUBLE PRECISION NOT NULL,
+                event_data     JSONB NOT NULL,
+                PRIMARY KEY (app_name, user_id, session_id, id),
+                FOREIGN KEY (app_name, user_id, session_id)
+                    REFERENCES adk.agent_sessions(app_name, user_id, id) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS idx_agent_events_session_time
+            ON adk.agent_events(app_name, user_id, session_id, timestamp);
+            CREATE TABLE IF NOT EXISTS adk.agent_app_states (
+                app_name     VARCHAR(128) PRIMARY KEY,
+                state        JSONB NOT NULL DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS adk.agent_user_states (
+                app_name     VARCHAR(128) NOT NULL,
+                user_id      VARCHAR(128) NOT NULL,
+                state        JSONB NOT NULL DEFAULT '{}',
+                PRIMARY KEY (app_name, user_id)
+            );
+        """)
+        logger.info("ADK agent session tables initialized")
+
         # Rename pre-screening tables to consistent prefix
         # screening_conversations → pre_screening_conversations
         # conversation_messages → pre_screening_messages
@@ -553,6 +605,123 @@ async def run_schema_migrations(pool: asyncpg.Pool):
 
         logger.info("Attribute types and candidate attributes tables initialized")
 
+        # =====================================================================
+        # ATS import conflict targets (bulk vacancy upserts use ON CONFLICT)
+        # =====================================================================
+        # Existing duplicate rows only skip their index (reported below); the
+        # importer imports per record while any of them is missing.
+        for index_sql in (
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_recruiters_email ON ats.recruiters(email)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_workspace_name ON ats.clients(workspace_id, name)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_office_locations_source "
+            "ON ats.office_locations(workspace_id, source, source_id) WHERE source_id IS NOT NULL",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_vacancies_source "
+            "ON ats.vacancies(workspace_id, source, source_id)",
+        ):
+            try:
+                await pool.execute(index_sql)
+            except asyncpg.UniqueViolationError as e:
+                logger.error(
+                    f"❌ {index_sql.split()[6]} not created, duplicate rows must be merged first "
+                    f"({e.detail}); vacancy imports run per record until then"
+                )
+
+        logger.info("ATS import unique indexes ensured")
+
+        # =====================================================================
+        # ATS sync state (per-workspace lease, progress and schedule)
+        # =====================================================================
+        await pool.execute("""
+            CREATE TABLE IF NOT EXISTS system.ats_sync_state (
+                workspace_id            UUID PRIMARY KEY REFERENCES system.workspaces(id) ON DELETE CASCADE,
+                status                  VARCHAR(20) NOT NULL DEFAULT 'idle',
+                message                 TEXT NOT NULL DEFAULT '',
+                progress                JSONB NOT NULL DEFAULT '{}',
+                lease_owner             VARCHAR(200),
+                lease_expires_at        TIMESTAMPTZ,
+                last_started_at         TIMESTAMPTZ,
+                last_finished_at        TIMESTAMPTZ,
+                last_change_count       INTEGER NOT NULL DEFAULT 0,
+                sync_interval_seconds   INTEGER,
+                next_sync_at            TIMESTAMPTZ,
+                updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+        """)
+        await pool.execute("""
+            CREATE INDEX IF NOT EXISTS idx_ats_sync_state_next
+            ON system.ats_sync_state(next_sync_at);
+        """)
+
+        logger.info("ATS sync state table initialized")
+
+        # =====================================================================
+        # Document verification cache columns (content + perceptual hashes)
+        # =====================================================================
+        await pool.execute("""
+            DO $$
+            BEGIN
+                IF to_regclass('agents.document_verifications') IS NOT NULL THEN
+                    ALTER TABLE agents.document_verifications
+                        ADD COLUMN IF NOT EXISTS cache_scope VARCHAR(64),
+                        ADD COLUMN IF NOT EXISTS perceptual_hash BIGINT,
+                        ADD COLUMN IF NOT EXISTS difference_hash BIGINT,
+                        ADD COLUMN IF NOT EXISTS extracted_fields JSONB,
+                        ADD COLUMN IF NOT EXISTS feedback_message TEXT,
+                        ADD COLUMN IF NOT EXISTS name_match_performed BOOLEAN,
+                        ADD COLUMN IF NOT EXISTS workspace_id UUID;
+                    CREATE INDEX IF NOT EXISTS idx_document_verifications_cache
+                        ON agents.document_verifications(cache_scope, verified_at DESC);
+                END IF;
+            END $$;
+        """)
+
+        # =====================================================================
+        # CV analysis cache (profile per PDF, analyses per question set)
+        # =====================================================================
+        await pool.execute("""
+            CREATE TABLE IF NOT EXISTS agents.cv_profiles (
+                workspace_id    UUID NOT NULL,
+                content_hash    VARCHAR(64) NOT NULL,
+                cv_text         TEXT NOT NULL,
+                profile         JSONB NOT NULL DEFAULT '{}',
+                summary         TEXT NOT NULL DEFAULT '',
+                created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (workspace_id, content_hash)
+            );
+        """)
+        await pool.execute("""
+            CREATE TABLE IF NOT EXISTS agents.cv_question_analyses (
+                workspace_id        UUID NOT NULL,
+                content_hash        VARCHAR(64) NOT NULL,
+                question_set_hash   VARCHAR(64) NOT NULL,
+                result              JSONB NOT NULL,
+                created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (workspace_id, content_hash, question_set_hash)
+            );
+        """)
+
+        logger.info("CV analysis cache tables initialized")
+
+        # =====================================================================
+        # Shared cache tier for conversation routing / agent state
+        # UNLOGGED: no WAL writes, emptied after a crash (fine for a cache)
+        # =====================================================================
+        await pool.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS agents.shared_cache (
+                namespace   VARCHAR(32) NOT NULL,
+                key         TEXT NOT NULL,
+                value       JSONB NOT NULL,
+                owner       VARCHAR(100) NOT NULL,
+                expires_at  TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_shared_cache_expires
+            ON agents.shared_cache(expires_at);
+        """)
+
+        logger.info("Shared cache table initialized")
+
         logger.info("Schema migrations completed")
     except Exception as e:
         logger.warning(f"Schema migration warning (may be ok if already done): {e}")
@@ -30,6 +30,7 @@ from .application import (
     QuestionAnswerResponse,
     ApplicationResponse,
     CVApplicationRequest,
+    CVBatchApplicationRequest,
 )
 
 # Pre-screening models
@@ -193,6 +194,7 @@ __all__ = [
     "QuestionAnswerResponse",
     "ApplicationResponse",
     "CVApplicationRequest",
+    "CVBatchApplicationRequest",
     # Pre-screening
     "PreScreeningQuestionRequest",
     "PreScreeningQuestionResponse",
@@ -46,3 +46,8 @@ class CVApplicationRequest(BaseModel):
     candidate_name: str
     candidate_phone: Optional[str] = None
     candidate_email: Optional[str] = None
+
+
+class CVBatchApplicationRequest(CVApplicationRequest):
+    """Request model for creating applications for several vacancies from one CV."""
+    vacancy_ids: list[str]
@@ -139,3 +139,4 @@ class SyncProgressResponse(BaseModel):
     updated: int = 0
     skipped: int = 0
     failed: int = 0
+    records_per_second: float = Field(default=0.0, description="Import throughput since the sync started")
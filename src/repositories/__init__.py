@@ -6,6 +6,7 @@ from .application_repo import ApplicationRepository
 from .pre_screening_repo import PreScreeningRepository
 from .conversation_repo import ConversationRepository
 from .document_verification_repo import DocumentVerificationRepository
+from .cv_analysis_repo import CVAnalysisRepository
 from .scheduled_interview_repo import ScheduledInterviewRepository
 from .candidate_repo import CandidateRepository
 from .activity_repo import ActivityRepository
@@ -21,6 +22,7 @@ from .candidate_attribute_type_repo import CandidateAttributeTypeRepository
 from .candidate_attribute_repo import CandidateAttributeRepository
 from .placement_repo import PlacementRepository
 from .workspace_agent_availability_repo import WorkspaceAgentAvailabilityRepository
+from .ats_sync_state_repo import AtsSyncStateRepository
 
 __all__ = [
     "VacancyRepository",
@@ -28,6 +30,7 @@ __all__ = [
     "PreScreeningRepository",
     "ConversationRepository",
     "DocumentVerificationRepository",
+    "CVAnalysisRepository",
     "ScheduledInterviewRepository",
     "CandidateRepository",
     "ActivityRepository",
@@ -43,4 +46,5 @@ __all__ = [
     "CandidateAttributeRepository",
     "PlacementRepository",
     "WorkspaceAgentAvailabilityRepository",
+    "AtsSyncStateRepository",
 ]
@@ -133,6 +133,64 @@ class ApplicationRepository:
             application_id
         )
 
+    async def list_unsynced_completed(
+        self, vacancy_id: uuid.UUID, workspace_id: uuid.UUID
+    ) -> list[asyncpg.Record]:
+        """Get all completed, non-test applications for a vacancy that are not yet synced to the ATS."""
+        return await self.pool.fetch(
+            """
+            SELECT a.id, a.vacancy_id, a.candidate_id,
+                   COALESCE(c.first_name || ' ' || c.last_name, a.candidate_name) as candidate_name,
+                   COALESCE(c.phone, a.candidate_phone) as candidate_phone,
+                   c.email as candidate_email,
+                   a.channel, a.status, a.qualified,
+                   a.started_at, a.completed_at, a.interaction_seconds,
+                   a.synced, a.synced_at, a.summary, a.interview_slot, a.is_test,
+                   v.source_id as vacancy_source_id
+            FROM ats.applications a
+            LEFT JOIN ats.candidates c ON c.id = a.candidate_id
+            JOIN ats.vacancies v ON v.id = a.vacancy_id
+            WHERE a.vacancy_id = $1
+              AND v.workspace_id = $2
+              AND a.status = 'completed'
+              AND a.synced = false
+              AND a.is_test = false
+            ORDER BY a.completed_at
+            """,
+            vacancy_id, workspace_id
+        )
+
+    async def get_answers_for_applications(
+        self, application_ids: list[uuid.UUID]
+    ) -> dict[uuid.UUID, list[asyncpg.Record]]:
+        """Get the answers for many applications in one query, grouped by application ID."""
+        rows = await self.pool.fetch(
+            """
+            SELECT application_id, question_id, question_text, answer, passed, score, rating, motivation
+            FROM agents.pre_screening_answers
+            WHERE application_id = ANY($1::uuid[])
+            ORDER BY application_id, id
+            """,
+            application_ids
+        )
+        grouped: dict[uuid.UUID, list[asyncpg.Record]] = {app_id: [] for app_id in application_ids}
+        for row in rows:
+            grouped[row["application_id"]].append(row)
+        return grouped
+
+    async def mark_synced(self, application_ids: list[uuid.UUID]):
+        """Mark applications as synced to the external ATS in one statement."""
+        if not application_ids:
+            return
+        await self.pool.execute(
+            """
+            UPDATE ats.applications
+            SET synced = true, synced_at = NOW()
+            WHERE id = ANY($1::uuid[])
+            """,
+            application_ids
+        )
+
     async def get_questions_for_vacancy(self, vacancy_id: uuid.UUID) -> list[asyncpg.Record]:
         """Get all pre-screening questions for a vacancy."""
         return await self.pool.fetch(
@@ -0,0 +1,106 @@
+"""
+Repository for per-workspace ATS sync state.
+
+One row per workspace in system.ats_sync_state holds the sync lease (so only
+one instance syncs a tenant at a time), the latest progress snapshot shown by
+GET /integrations/sync/status, and the adaptive schedule (next_sync_at).
+"""
+import json
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+
+
+class AtsSyncStateRepository:
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+
+    async def try_acquire_lease(self, workspace_id: UUID, owner: str, lease_seconds: int) -> bool:
+        """Take the workspace sync lease if it is free or expired. Returns True when acquired."""
+        row = await self.pool.fetchrow("""
+            INSERT INTO system.ats_sync_state AS s
+                (workspace_id, lease_owner, lease_expires_at, status, message, progress,
+                 last_started_at, updated_at)
+            VALUES ($1, $2, now() + make_interval(secs => $3), 'syncing', '', '{}'::jsonb, now(), now())
+            ON CONFLICT (workspace_id) DO UPDATE SET
+                lease_owner = EXCLUDED.lease_owner,
+                lease_expires_at = EXCLUDED.lease_expires_at,
+                status = 'syncing',
+                message = '',
+                progress = '{}'::jsonb,
+                last_started_at = now(),
+                updated_at = now()
+            WHERE s.lease_expires_at IS NULL OR s.lease_expires_at < now()
+            RETURNING workspace_id
+        """, workspace_id, owner, float(lease_seconds))
+        return row is not None
+
+    async def save_progress(
+        self, workspace_id: UUID, owner: str, progress: dict, lease_seconds: int,
+    ) -> bool:
+        """Store a progress snapshot and extend the lease. Returns False if the lease was lost."""
+        row = await self.pool.fetchrow("""
+            UPDATE system.ats_sync_state
+            SET status = $3, message = $4, progress = $5::jsonb,
+                lease_expires_at = now() + make_interval(secs => $6),
+                updated_at = now()
+            WHERE workspace_id = $1 AND lease_owner = $2
+            RETURNING workspace_id
+        """,
+            workspace_id, owner,
+            progress.get("status", "syncing"), progress.get("message", ""),
+            json.dumps(progress, default=str), float(lease_seconds),
+        )
+        return row is not None
+
+    async def release_lease(
+        self,
+        workspace_id: UUID,
+        owner: str,
+        progress: dict,
+        change_count: int,
+        interval_seconds: int,
+    ) -> None:
+        """Store the final progress, schedule the next sync and free the lease."""
+        await self.pool.execute("""
+            UPDATE system.ats_sync_state
+            SET status = $3, message = $4, progress = $5::jsonb,
+                lease_owner = NULL, lease_expires_at = NULL,
+                last_finished_at = now(),
+                last_change_count = $6,
+                sync_interval_seconds = $7,
+                next_sync_at = now() + make_interval(secs => $7),
+                updated_at = now()
+            WHERE workspace_id = $1 AND lease_owner = $2
+        """,
+            workspace_id, owner,
+            progress.get("status", "complete"), progress.get("message", ""),
+            json.dumps(progress, default=str), change_count, interval_seconds,
+        )
+
+    async def get_state(self, workspace_id: UUID) -> Optional[asyncpg.Record]:
+        """Get the sync state for a workspace, including whether the lease is still live."""
+        return await self.pool.fetchrow("""
+            SELECT workspace_id, status, message, progress, lease_owner,
+                   lease_expires_at, (lease_expires_at IS NOT NULL AND lease_expires_at >= now()) AS lease_active,
+                   last_started_at, last_finished_at, last_change_count,
+                   sync_interval_seconds, next_sync_at
+            FROM system.ats_sync_state
+            WHERE workspace_id = $1
+        """, workspace_id)
+
+    async def list_due_workspaces(self) -> list[asyncpg.Record]:
+        """List workspaces with an active ATS connection whose next sync is due and not leased."""
+        return await self.pool.fetch("""
+            SELECT ic.workspace_id, MIN(s.next_sync_at) AS next_sync_at
+            FROM system.integration_connections ic
+            JOIN system.integrations i ON i.id = ic.integration_id
+            LEFT JOIN system.ats_sync_state s ON s.workspace_id = ic.workspace_id
+            WHERE ic.is_active = true
+              AND i.slug != 'microsoft'
+              AND (s.next_sync_at IS NULL OR s.next_sync_at <= now())
+              AND (s.lease_expires_at IS NULL OR s.lease_expires_at < now())
+            GROUP BY ic.workspace_id
+            ORDER BY MIN(s.next_sync_at) NULLS FIRST
+        """)
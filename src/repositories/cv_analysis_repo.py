@@ -0,0 +1,82 @@
+"""
+CV Analysis repository - cached CV profiles and question analyses.
+"""
+import json
+import asyncpg
+import uuid
+from typing import Optional
+
+
+class CVAnalysisRepository:
+    """Repository for the CV profile / analysis cache tables."""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+
+    async def get_profile(self, workspace_id: uuid.UUID, content_hash: str) -> Optional[asyncpg.Record]:
+        """Get the extracted profile of a CV (by SHA-256 of the PDF) and mark it used."""
+        return await self.pool.fetchrow(
+            """
+            UPDATE agents.cv_profiles
+            SET last_used_at = NOW()
+            WHERE workspace_id = $1 AND content_hash = $2
+            RETURNING content_hash, cv_text, profile, summary
+            """,
+            workspace_id, content_hash,
+        )
+
+    async def save_profile(
+        self,
+        workspace_id: uuid.UUID,
+        content_hash: str,
+        cv_text: str,
+        profile: dict,
+        summary: str,
+    ):
+        """Store the extracted profile of a CV (overwrites)."""
+        await self.pool.execute(
+            """
+            INSERT INTO agents.cv_profiles (workspace_id, content_hash, cv_text, profile, summary)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (workspace_id, content_hash) DO UPDATE
+            SET cv_text = EXCLUDED.cv_text,
+                profile = EXCLUDED.profile,
+                summary = EXCLUDED.summary,
+                last_used_at = NOW()
+            """,
+            workspace_id, content_hash, cv_text, json.dumps(profile), summary,
+        )
+
+    async def get_analyses(
+        self,
+        workspace_id: uuid.UUID,
+        content_hash: str,
+        question_set_hashes: list[str],
+    ) -> dict[str, dict]:
+        """Get persisted analyses of a CV, keyed by question set hash."""
+        rows = await self.pool.fetch(
+            """
+            SELECT question_set_hash, result
+            FROM agents.cv_question_analyses
+            WHERE workspace_id = $1 AND content_hash = $2 AND question_set_hash = ANY($3::text[])
+            """,
+            workspace_id, content_hash, question_set_hashes,
+        )
+        return {
+            row["question_set_hash"]: json.loads(row["result"]) if isinstance(row["result"], str) else row["result"]
+            for row in rows
+        }
+
+    async def save_analyses(self, workspace_id: uuid.UUID, content_hash: str, analyses: dict[str, dict]):
+        """Store analyses of a CV, keyed by question set hash (overwrites)."""
+        if not analyses:
+            return
+        await self.pool.executemany(
+            """
+            INSERT INTO agents.cv_question_analyses (workspace_id, content_hash, question_set_hash, result)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (workspace_id, content_hash, question_set_hash) DO UPDATE
+            SET result = EXCLUDED.result, created_at = NOW()
+            """,
+            [(workspace_id, content_hash, qhash, json.dumps(result)) for qhash, result in analyses.items()],
+        )
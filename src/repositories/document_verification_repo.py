@@ -1,6 +1,7 @@
 """
 Document Verification repository - handles document verification audit trail operations.
 """
+import json
 import asyncpg
 import uuid
 from typing import Optional, List
@@ -34,10 +35,21 @@ class DocumentVerificationRepository:
         verification_summary: str,
         image_hash: str,
         raw_agent_response: Optional[str] = None,
+        name_match_performed: Optional[bool] = None,
+        extracted_fields: Optional[dict] = None,
+        feedback_message: Optional[str] = None,
+        cache_scope: Optional[str] = None,
+        perceptual_hash: Optional[int] = None,
+        difference_hash: Optional[int] = None,
+        workspace_id: Optional[uuid.UUID] = None,
     ) -> uuid.UUID:
         """
         Create a new document verification record.
 
+        cache_scope and the perceptual/difference hashes (signed 64-bit) make
+        the record reusable by the verification cache within its workspace
+        (see find_cached).
+
         Returns:
             UUID of the created verification record
         """
@@ -63,9 +75,17 @@ class DocumentVerificationRepository:
                     verification_passed,
                     verification_summary,
                     image_hash,
-                    raw_agent_response
+                    raw_agent_response,
+                    name_match_performed,
+                    extracted_fields,
+                    feedback_message,
+                    cache_scope,
+                    perceptual_hash,
+                    difference_hash,
+                    workspace_id
                 )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12::jsonb, $13, $14, $15::jsonb, $16, $17, $18, $19)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12::jsonb, $13, $14, $15::jsonb, $16, $17, $18, $19,
+                        $20, $21::jsonb, $22, $23, $24, $25, $26)
                 RETURNING id
                 """,
                 application_id,
@@ -79,14 +99,21 @@ class DocumentVerificationRepository:
                 name_match_confidence,
                 name_match_details,
                 fraud_risk_level,
-                fraud_indicators,
+                json.dumps(fraud_indicators),
                 overall_fraud_confidence,
                 image_quality,
-                readability_issues,
+                json.dumps(readability_issues),
                 verification_passed,
                 verification_summary,
                 image_hash,
                 raw_agent_response,
+                name_match_performed,
+                json.dumps(extracted_fields) if extracted_fields is not None else None,
+                feedback_message,
+                cache_scope,
+                perceptual_hash,
+                difference_hash,
+                workspace_id,
             )
             return result["id"]
 
@@ -139,3 +166,51 @@ class DocumentVerificationRepository:
                 limit,
                 offset
             )
+
+    async def find_cached(
+        self,
+        cache_scope: str,
+        image_hash: str,
+        perceptual_hash: Optional[int],
+        difference_hash: Optional[int],
+        max_perceptual_distance: int,
+        max_difference_distance: int,
+        max_age_seconds: int,
+        workspace_id: Optional[uuid.UUID] = None,
+    ) -> Optional[asyncpg.Record]:
+        """
+        Find a recent verification of the same (or a near-identical) image in a
+        cache scope, never one of another workspace.
+
+        Matches on the exact SHA-256 first, otherwise on both perceptual hashes
+        being within the given Hamming distances (bits counted as '1's of the
+        bit string: bit_count() needs PostgreSQL 14).
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetchrow(
+                """
+                SELECT *
+                FROM agents.document_verifications
+                WHERE cache_scope = $1
+                  AND workspace_id IS NOT DISTINCT FROM $8
+                  AND verified_at > NOW() - make_interval(secs => $7)
+                  AND (
+                      image_hash = $2
+                      OR (
+                          perceptual_hash IS NOT NULL AND difference_hash IS NOT NULL
+                          AND length(replace((perceptual_hash # $3::bigint)::bit(64)::text, '0', '')) <= $5
+                          AND length(replace((difference_hash # $4::bigint)::bit(64)::text, '0', '')) <= $6
+                      )
+                  )
+                ORDER BY (image_hash = $2) DESC, verified_at DESC
+                LIMIT 1
+                """,
+                cache_scope,
+                image_hash,
+                perceptual_hash,
+                difference_hash,
+                max_perceptual_distance,
+                max_difference_distance,
+                float(max_age_seconds),
+                workspace_id,
+            )
@@ -20,6 +20,7 @@ from src.repositories.candidate_attribute_type_repo import CandidateAttributeTyp
 from src.repositories.candidate_attribute_repo import CandidateAttributeRepository
 from src.repositories.candidate_repo import CandidateRepository
 from src.repositories.sync_with_repo import SyncWithRepository
+from src.utils.type_registry import invalidate_types
 from src.models.candidate_attribute import (
     AttributeTypeCreate,
     AttributeTypeUpdate,
@@ -199,6 +200,7 @@ async def create_attribute_type(
         sort_order=data.sort_order,
         collected_by=data.collected_by,
     )
+    await invalidate_types(ws_uuid)
     return _build_type_response(record)
 
 
@@ -232,6 +234,7 @@ async def update_attribute_type(
         update_data["fields"] = [f if isinstance(f, dict) else f.model_dump() for f in update_data["fields"]]
 
     record = await repo.update(type_uuid, **update_data)
+    await invalidate_types(existing["workspace_id"])
 
     # Load sync_with
     sync_rows = await sync_repo.list_for_record("types_attributes", type_uuid)
@@ -250,7 +253,7 @@ async def delete_attribute_type(
     user: UserProfile = Depends(get_current_user),
 ):
     """Soft-delete a candidate attribute type."""
-    parse_uuid(workspace_id, field="workspace_id")
+    ws_uuid = parse_uuid(workspace_id, field="workspace_id")
     type_uuid = parse_uuid(attr_type_id, field="attr_type_id")
     pool = await get_db_pool()
     repo = CandidateAttributeTypeRepository(pool)
@@ -258,6 +261,7 @@ async def delete_attribute_type(
     deleted = await repo.soft_delete(type_uuid)
     if not deleted:
         raise HTTPException(status_code=404, detail="Attribute type not found")
+    await invalidate_types(ws_uuid)
 
 
 # =============================================================================
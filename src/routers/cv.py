@@ -50,6 +50,7 @@ async def analyze_cv_endpoint(request: CVAnalyzeRequest, ctx: AuthContext = Depe
         pdf_base64=request.pdf_base64,
         knockout_questions=knockout_questions,
         qualification_questions=qualification_questions,
+        workspace_id=ctx.workspace_id,
     )
 
     # Convert to response format
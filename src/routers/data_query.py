@@ -6,17 +6,21 @@ import uuid
 import logging
 from typing import AsyncGenerator
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from google.genai import types
 from sqlalchemy.exc import InterfaceError, OperationalError, IntegrityError
 from google.adk.errors.already_exists_error import AlreadyExistsError
 
 from src.models.data_query import DataQueryRequest
-from agents.database_query.agent import set_db_pool as set_data_query_db_pool
+from agents.database_query.agent import set_db_pool as set_data_query_db_pool, row_to_dict
+from agents.database_query.analytics_pool import run_query
+from agents.database_query.schema_catalog import peek_schema_catalog
 from agents.recruiter_analyst.agent import root_agent as recruiter_analyst_agent
 
+from src.auth.dependencies import AuthContext, require_workspace
 from src.dependencies import get_session_manager
+from src.utils.nl_sql_cache import nl_sql_cache
 from src.utils.sse_helpers import sse_done, sse_error, sse_status
 
 logger = logging.getLogger(__name__)
@@ -24,16 +28,37 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Data Query"])
 
 
-async def stream_analyst_query(question: str, session_id: str) -> AsyncGenerator[str, None]:
+async def _answer_from_cached_sql(question: str, sql: str) -> types.Content | None:
+    """Run SQL cached for this question; the analyst's message with the result, or None if it failed."""
+    try:
+        result = await run_query(sql, row_to_dict)
+    except Exception as e:
+        logger.warning(f"Cached analyst SQL failed, generating instead: {e}")
+        return None
+    text = (
+        f"{question}\n\n"
+        f"[Resultaat van een eerder gevalideerde query voor deze vraag. Beantwoord de vraag "
+        f"rechtstreeks op basis van dit resultaat, zonder de data analist in te schakelen.]\n"
+        f"SQL: {sql}\n"
+        f"Resultaat ({len(result['rows'])} rijen{', afgekapt' if result['truncated'] else ''}): "
+        f"{json.dumps(result['rows'], ensure_ascii=False, default=str)}"
+    )
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+async def stream_analyst_query(question: str, session_id: str, workspace_id: str | None = None) -> AsyncGenerator[str, None]:
     """Stream SSE events during analyst query processing."""
     session_manager = get_session_manager()
+    first_question = True
 
     async def get_or_create_analyst_session():
         """Helper to get existing session or create new one, handling race conditions."""
+        nonlocal first_question
         existing = await session_manager.analyst_session_service.get_session(
             app_name="recruiter_analyst", user_id="web", session_id=session_id
         )
         if existing:
+            first_question = not existing.events
             return
         try:
             await session_manager.analyst_session_service.create_session(
@@ -54,8 +79,26 @@ async def stream_analyst_query(question: str, session_id: str) -> AsyncGenerator
     # Send initial status
     yield sse_status("thinking", "Vraag analyseren...")
 
+    # A question answered before (same workspace and schema): run its SQL, skip generation
+    catalog = peek_schema_catalog()
+    fingerprint = catalog.fingerprint if catalog else None
+    content = None
+    if fingerprint:
+        cached_sql = await nl_sql_cache.get(workspace_id, fingerprint, question)
+        if cached_sql:
+            yield sse_status("tool_call", "Data ophalen...")
+            content = await _answer_from_cached_sql(question, cached_sql)
+            if content is None:
+                await nl_sql_cache.discard(workspace_id, fingerprint, question)
+
     # Run the agent
-    content = types.Content(role="user", parts=[types.Part(text=question)])
+    cache_hit = content is not None
+    if content is None:
+        content = types.Content(role="user", parts=[types.Part(text=question)])
+
+    # execute_sql calls of this run: call id -> SQL, and the ones that succeeded
+    sql_calls: dict[str, str] = {}
+    successful_sql: list[str] = []
 
     try:
         async for event in session_manager.analyst_runner.run_async(
@@ -64,8 +107,15 @@ async def stream_analyst_query(question: str, session_id: str) -> AsyncGenerator
             new_message=content
         ):
             # Check for tool calls or sub-agent delegation
-            if hasattr(event, 'tool_calls') and event.tool_calls:
+            function_calls = event.get_function_calls()
+            if function_calls:
                 yield sse_status("tool_call", "Data ophalen...")
+            for call in function_calls:
+                if call.name == "execute_sql" and call.args:
+                    sql_calls[call.id] = call.args.get("query", "")
+            for response in event.get_function_responses():
+                if response.id in sql_calls and "error" not in (response.response or {}):
+                    successful_sql.append(sql_calls[response.id])
 
             # Check for thinking/reasoning content
             if hasattr(event, 'content') and event.content and event.content.parts:
@@ -77,6 +127,10 @@ async def stream_analyst_query(question: str, session_id: str) -> AsyncGenerator
             if event.is_final_response() and event.content and event.content.parts:
                 response_text = event.content.parts[0].text
                 yield f"data: {json.dumps({'type': 'complete', 'message': response_text, 'session_id': session_id})}\n\n"
+
+        # A conversation's opening question answered by one query: remember its SQL
+        if fingerprint and first_question and not cache_hit and len(successful_sql) == 1 and len(sql_calls) == 1:
+            await nl_sql_cache.put(workspace_id, fingerprint, question, successful_sql[0])
     except Exception as e:
         logger.error(f"Error during analyst query: {e}")
         yield sse_error(str(e))
@@ -85,12 +139,15 @@ async def stream_analyst_query(question: str, session_id: str) -> AsyncGenerator
 
 
 @router.post("/data-query")
-async def analyst_query(request: DataQueryRequest):
+async def analyst_query(
+    request: DataQueryRequest,
+    ctx: AuthContext = Depends(require_workspace),
+):
     """Query the recruiter analyst using natural language with SSE streaming."""
     session_id = request.session_id or str(uuid.uuid4())
 
     return StreamingResponse(
-        stream_analyst_query(request.question, session_id),
+        stream_analyst_query(request.question, session_id, str(ctx.workspace_id)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
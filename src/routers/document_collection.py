@@ -13,7 +13,7 @@ import base64
 import hashlib
 import asyncio
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Request
 from fastapi.responses import PlainTextResponse
 from twilio.twiml.messaging_response import MessagingResponse
 
@@ -26,13 +26,12 @@ from src.auth.dependencies import AuthContext, require_workspace
 from src.agents import AgentType, AgentRegistry
 from src.database import get_db_pool
 from src.repositories import ApplicationRepository
-from src.config import (
-    TWILIO_ACCOUNT_SID,
-    TWILIO_AUTH_TOKEN,
-    TWILIO_WHATSAPP_NUMBER
-)
+from src.config import TWILIO_WHATSAPP_NUMBER
 from src.utils.conversation_cache import conversation_cache
+from src.utils.agent_state_store import save_agent_state
 from src.services.whatsapp_service import send_whatsapp_message
+from src.services.media_fetcher import FetchedMedia, fetch_twilio_media
+from src.services.document_storage import save_in_background
 from src.dependencies import get_session_manager
 
 logger = logging.getLogger(__name__)
@@ -44,51 +43,33 @@ router = APIRouter(tags=["Document Collection"])
 # Helper Functions
 # =============================================================================
 
-async def download_twilio_media(media_url: str) -> bytes:
-    """Download media from Twilio's secure URL."""
-    import aiohttp
-    async with aiohttp.ClientSession() as session:
-        # Twilio requires Basic Auth
-        auth = aiohttp.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        async with session.get(media_url, auth=auth) as resp:
-            if resp.status != 200:
-                raise HTTPException(500, f"Failed to download media: HTTP {resp.status}")
-            return await resp.read()
-
-
-async def save_original_document(
-    image_bytes: bytes,
-    conversation_id: uuid.UUID,
-    upload_id: uuid.UUID,
-    document_side: str
-):
-    """
-    Background task: Save original document image for records.
+async def download_twilio_media(media_url: str) -> FetchedMedia:
+    """Download media from Twilio's secure URL (streamed, size-capped, images downscaled)."""
+    return await fetch_twilio_media(media_url)
 
-    Saves images to: ./document_uploads/{conversation_id}/{document_side}_{upload_id}.jpg
-    """
-    try:
-        from pathlib import Path
 
-        logger.info(f"💾 Background: Saving original document {upload_id}...")
+async def _download_all_media(media_urls: list[str]) -> list[FetchedMedia]:
+    """Download all media of a message concurrently; failed downloads are logged and left out."""
+    results = await asyncio.gather(*(download_twilio_media(url) for url in media_urls), return_exceptions=True)
+    media_items = []
+    for url, result in zip(media_urls, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to download media {url}: {result}")
+        else:
+            media_items.append(result)
+    return media_items
 
-        # Create directory structure
-        base_dir = Path("./document_uploads")
-        conversation_dir = base_dir / str(conversation_id)
-        conversation_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save original image to file
-        filename = f"{document_side}_{upload_id}.jpg"
-        file_path = conversation_dir / filename
-
-        with open(file_path, 'wb') as f:
-            f.write(image_bytes)
-
-        logger.info(f"✅ Saved document: {file_path}")
+def save_original_document(media: FetchedMedia, conversation_id: uuid.UUID):
+    """
+    Save the original upload for records, in the background.
 
-    except Exception as e:
-        logger.error(f"Failed to save document {upload_id}: {e}", exc_info=True)
-        # Don't raise - this is a background task, failure shouldn't affect the main flow
+    Stored in document storage under {conversation_id}/{sha256}{ext}, so a
+    re-sent photo is stored once. The original is handed over to the save:
+    media keeps only the (downscaled) data the agent works with.
+    """
+    key = f"{conversation_id}/{media.content_hash}{media.extension}"
+    save_in_background(key, media.release_original(), media.original_content_type)
 
 
 def determine_document_side(documents_collected: list, documents_required: list) -> str:
@@ -130,18 +111,18 @@ async def _persist_collected_attributes(
         return
 
     from src.repositories.candidate_attribute_repo import CandidateAttributeRepository
-    from src.repositories.candidate_attribute_type_repo import CandidateAttributeTypeRepository
     from src.services.activity_service import ActivityService
     from src.models.activity import ActivityEventType, ActorType
+    from src.utils.type_registry import get_types
 
     attr_repo = CandidateAttributeRepository(pool)
-    type_repo = CandidateAttributeTypeRepository(pool)
+    types = await get_types(pool, workspace_id)
     activity_service = ActivityService(pool)
 
     saved_count = 0
     for slug, attr_data in collected_attributes.items():
         try:
-            attr_type = await type_repo.get_by_slug(workspace_id, slug)
+            attr_type = types.get_attr_type(slug, active_only=False)
             if not attr_type:
                 logger.warning(f"[PERSIST] Unknown attribute slug: {slug}, skipping")
                 continue
@@ -615,11 +596,12 @@ async def debug_active_conversations(phone_number: str):
 
 @router.post("/webhook/documents")
 async def document_webhook(
+    request: Request,
     Body: str = Form(""),
     From: str = Form(""),
     NumMedia: int = Form(0),
     MediaUrl0: Optional[str] = Form(None),
-    MediaContentType0: Optional[str] = Form(None)
+    MediaContentType0: Optional[str] = Form(None),
 ):
     """
     Handle incoming WhatsApp messages and media for document collection.
@@ -634,12 +616,17 @@ async def document_webhook(
     4. Persist updated state to DB
     5. Check for completion
     6. Return TwiML response
+
+    An image arriving while a front side is being verified for the same
+    collection is pre-verified as the back by that turn (speculation.py);
+    this webhook then returns an empty response.
     """
     from agents.document_collection.collection.agent import (
         create_collection_agent,
         restore_collection_agent,
         is_collection_complete,
     )
+    from agents.document_collection.collection.speculation import claim_back_image, take_released_image
     from agents.document_collection.collection.type_cache import TypeCache
 
     pool = await get_db_pool()
@@ -665,6 +652,13 @@ async def document_webhook(
     candidate_name = conv_row["candidate_name"]
     agent_state_json = conv_row["agent_state"]
 
+    # Download media while the turn is stored and the type cache loads
+    media_urls = [MediaUrl0] if MediaUrl0 else []
+    if NumMedia > 1:
+        form = await request.form()
+        media_urls += [form[f"MediaUrl{i}"] for i in range(1, NumMedia) if form.get(f"MediaUrl{i}")]
+    media_task = asyncio.create_task(_download_all_media(media_urls)) if media_urls else None
+
     # Store user message
     user_message_text = Body or "[IMAGE UPLOADED]"
     await pool.execute(
@@ -679,6 +673,14 @@ async def document_webhook(
     type_cache = TypeCache(pool, conv_row["workspace_id"])
     await type_cache.ensure_loaded()
 
+    media_items = await media_task if media_task else []
+    for media in media_items:
+        save_original_document(media, conversation_id)
+
+    # Back side sent while the front is still being verified: that turn answers for both
+    if len(media_items) == 1 and claim_back_image(str(conversation_id), media_items[0].data):
+        return PlainTextResponse(str(MessagingResponse()), media_type="application/xml")
+
     # Ensure candidate_phone is available (E.164 format)
     candidate_phone_e164 = f"+{phone_normalized}" if not phone_normalized.startswith("+") else phone_normalized
 
@@ -737,11 +739,9 @@ async def document_webhook(
                 (conversation_id, role, message) VALUES ($1, 'agent', $2)""",
                 conversation_id, msg
             )
-        await pool.execute(
-            """UPDATE agents.document_collections
-            SET agent_state = $1::jsonb, message_count = COALESCE(message_count, 0) + $2, updated_at = NOW()
-            WHERE id = $3""",
-            agent.state.to_json(), len(intro_messages), conversation_id
+        await save_agent_state(
+            pool, "agents.document_collections", conversation_id, agent.state.to_dict(),
+            extra_set=f"message_count = COALESCE(message_count, 0) + {len(intro_messages)}",
         )
 
         # Send each as a separate WhatsApp message via TwiML
@@ -752,31 +752,36 @@ async def document_webhook(
 
     # Process message through agent
     has_image = NumMedia > 0
-    if has_image and MediaUrl0:
-        try:
-            agent.pending_image_data = await download_twilio_media(MediaUrl0)
-            logger.info(f"Downloaded image: {len(agent.pending_image_data) / 1024:.1f} KB")
-        except Exception as e:
-            logger.error(f"Failed to download media: {e}")
-            agent.pending_image_data = None
+    if media_items:
+        agent.pending_image_data = media_items[0].data
+        if len(media_items) > 1:
+            agent.pending_images = [media.data for media in media_items]
 
-    response_text = await agent.process_message(Body, has_image=has_image)
+    response_texts = [await agent.process_message(Body, has_image=has_image)]
     agent.pending_image_data = None  # Clear after processing
+    agent.pending_images = []
+
+    # A photo claimed as the back side during this turn but not used as one
+    # (the front failed, or was single-sided): its webhook didn't answer, so answer it here
+    released_image = take_released_image(str(conversation_id))
+    if released_image is not None and not is_collection_complete(agent):
+        agent.pending_image_data = released_image
+        response_texts.append(await agent.process_message("", has_image=True))
+        agent.pending_image_data = None
 
     # Persist updated state
-    await pool.execute(
-        """UPDATE agents.document_collections
-        SET agent_state = $1::jsonb, message_count = COALESCE(message_count, 0) + 1, updated_at = NOW()
-        WHERE id = $2""",
-        agent.state.to_json(), conversation_id
+    await save_agent_state(
+        pool, "agents.document_collections", conversation_id, agent.state.to_dict(),
+        extra_set=f"message_count = COALESCE(message_count, 0) + {len(response_texts)}",
     )
 
-    # Store agent response
-    await pool.execute(
-        """INSERT INTO agents.document_collection_session_turns
-        (conversation_id, role, message) VALUES ($1, 'agent', $2)""",
-        conversation_id, response_text
-    )
+    # Store agent responses
+    for response_text in response_texts:
+        await pool.execute(
+            """INSERT INTO agents.document_collection_session_turns
+            (conversation_id, role, message) VALUES ($1, 'agent', $2)""",
+            conversation_id, response_text
+        )
 
     # Handle completion
     if is_collection_complete(agent):
@@ -818,5 +823,6 @@ async def document_webhook(
 
     # Send TwiML response
     resp = MessagingResponse()
-    resp.message((response_text or "Bedankt voor je bericht!").replace("**", "*"))
+    for response_text in response_texts:
+        resp.message((response_text or "Bedankt voor je bericht!").replace("**", "*"))
     return PlainTextResponse(str(resp), media_type="application/xml")
@@ -6,7 +6,6 @@ qualification certificates with fraud detection.
 """
 import uuid
 import logging
-import hashlib
 from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends
@@ -57,7 +56,7 @@ async def verify_document_endpoint(
                 raise HTTPException(status_code=404, detail="Application not found")
 
             candidate_name = app["candidate_name"]
-            vacancy_id = str(app["vacancy_id"]) if app.get("vacancy_id") else None
+            vacancy_id = app.get("vacancy_id")
 
             logger.info(f"Verifying document for application {request.application_id}, candidate: {candidate_name}")
 
@@ -67,12 +66,17 @@ async def verify_document_endpoint(
             logger.error(f"Error fetching application: {e}")
             raise HTTPException(status_code=500, detail=f"Error fetching application: {str(e)}")
 
-    # Verify document
+    # Verify document (re-uploads are served from the verification cache;
+    # fresh results are persisted when save_verification is set)
     try:
         result = await verify_document_base64(
             image_base64=request.image_base64,
             candidate_name=candidate_name,
             document_type_hint=request.document_type_hint if request.document_type_hint != "unknown" else None,
+            persist=request.save_verification,
+            application_id=uuid.UUID(request.application_id) if request.application_id else None,
+            vacancy_id=vacancy_id,
+            workspace_id=ctx.workspace_id,
         )
     except Exception as e:
         logger.error(f"Error during document verification: {e}")
@@ -106,19 +110,11 @@ async def verify_document_endpoint(
         readability_issues=result.readability_issues,
         verification_passed=result.verification_passed,
         verification_summary=result.verification_summary,
+        verification_id=result.verification_id if request.save_verification else None,
         processed_at=datetime.utcnow().isoformat() + "Z",
         raw_agent_response=result.raw_response if logger.level == logging.DEBUG else None
     )
 
-    # TODO: If save_verification is True, implement database persistence
-    # For POC, we skip database persistence and just return the response
-    if request.save_verification:
-        logger.info("Note: save_verification=true but database persistence not yet implemented for POC")
-        # Future: Calculate image hash and save to document_verifications table
-        # image_hash = hashlib.sha256(base64.b64decode(request.image_base64)).hexdigest()
-        # verification_id = await doc_repo.create(...)
-        # response.verification_id = str(verification_id)
-
     logger.info(f"Document verification complete: {result.document_category} - {result.fraud_risk_level} fraud risk")
 
     return response
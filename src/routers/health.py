@@ -12,7 +12,7 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from src.dependencies import get_pool
+from src.dependencies import get_pool, get_session_manager
 from src.auth.dependencies import AuthContext, require_workspace
 from src.config import (
     TWILIO_ACCOUNT_SID,
@@ -155,12 +155,18 @@ async def pool_status(pool: asyncpg.Pool = Depends(get_pool)):
     - free_size: Number of idle connections available
     - min_size: Minimum pool size configured
     - max_size: Maximum pool size configured
+    - adk_sessions: ADK session backend (shares this pool when "postgres")
+    - analytics: the data query agent's read-only pool and recent query costs
     """
+    from agents.database_query.analytics_pool import query_stats
+
     return {
         "size": pool.get_size(),
         "free_size": pool.get_idle_size(),
         "min_size": pool.get_min_size(),
         "max_size": pool.get_max_size(),
+        "adk_sessions": get_session_manager().health(),
+        "analytics": query_stats(),
     }
 
 
@@ -199,8 +199,8 @@ async def start_sync(
     Args:
         full: If true, ignore last_synced_at and fetch all records.
     """
-    # Check if a sync is already running
-    progress = get_sync_progress()
+    # Check if a sync is already running for this workspace (on any instance)
+    progress = await get_sync_progress(pool, ctx.workspace_id)
     if progress and progress.get("status") == "syncing":
         raise HTTPException(status_code=409, detail="Een sync is al bezig")
 
@@ -212,9 +212,10 @@ async def start_sync(
 @router.get("/sync/status", response_model=SyncProgressResponse)
 async def get_sync_status(
     ctx: AuthContext = Depends(require_workspace),
+    pool=Depends(get_pool),
 ):
-    """Poll for the current sync progress."""
-    progress = get_sync_progress()
+    """Poll for the current sync progress of the workspace."""
+    progress = await get_sync_progress(pool, ctx.workspace_id)
     if not progress:
         return SyncProgressResponse(status="idle", message="Geen sync actief")
     return SyncProgressResponse(**progress)
@@ -35,6 +35,7 @@ from src.models.ontology import (
 from src.repositories.document_type_repo import DocumentTypeRepository
 from src.repositories.sync_with_repo import SyncWithRepository
 from src.dependencies import get_pool
+from src.utils.type_registry import invalidate_types
 
 logger = logging.getLogger(__name__)
 
@@ -446,6 +447,7 @@ async def create_entity(
         scan_mode=body.scan_mode.value,
         verification_config=body.verification_config,
     )
+    await invalidate_types(workspace_id)
     return _doc_record_to_entity(record)
 
 
@@ -465,6 +467,7 @@ async def update_entity(
         raise HTTPException(status_code=404, detail="Entity not found")
 
     updated = await repo.update(entity_id, **body.model_dump(exclude_unset=True))
+    await invalidate_types(record["workspace_id"])
     entity = _doc_record_to_entity(updated)
 
     children = await repo.list_children(entity_id)
@@ -485,6 +488,7 @@ async def delete_entity(
         raise HTTPException(status_code=404, detail="Entity not found")
 
     await repo.soft_delete(entity_id)
+    await invalidate_types(record["workspace_id"])
 
 
 # ─── Integrations ─────────────────────────────────────────────────────────────
@@ -15,7 +15,8 @@ from src.agents import AgentType, AgentRegistry
 from src.database import get_db_pool
 from src.config import TWILIO_WHATSAPP_NUMBER, LIVEKIT_URL, TWILIO_TEMPLATE_INITIATE_PRE_SCREENING, logger
 from src.services.whatsapp_service import send_whatsapp_message, send_whatsapp_template
-from src.services.livekit_service import get_livekit_service, fetch_scheduling_config
+from src.services.livekit_service import get_livekit_service, fetch_scheduling_config, fetch_turn_strategy
+from src.utils.agent_state_store import save_agent_state
 from src.workflows import get_orchestrator
 from agents.pre_screening.whatsapp import create_simple_agent, AgentConfig
 
@@ -489,6 +490,7 @@ async def _initiate_whatsapp_screening(
         config = AgentConfig(
             schedule_days_ahead=sched_cfg["schedule_days_ahead"],
             schedule_start_offset=sched_cfg["schedule_start_offset"],
+            turn_strategy=await fetch_turn_strategy(workspace_id),
         )
 
         # Create the agent
@@ -559,15 +561,7 @@ async def _initiate_whatsapp_screening(
 
         # Update agent state with the conversation_id for scheduling linkage
         agent.state.conversation_id = str(conversation_id)
-        await pool.execute(
-            """
-            UPDATE agents.pre_screening_sessions
-            SET agent_state = $1
-            WHERE id = $2
-            """,
-            json.dumps(agent.state.to_dict()),
-            conversation_id
-        )
+        await save_agent_state(pool, "agents.pre_screening_sessions", conversation_id, agent.state.to_dict())
 
         # Store the opening message in conversation_messages table
         await pool.execute(
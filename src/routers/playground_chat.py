@@ -20,6 +20,7 @@ from fastapi.responses import StreamingResponse
 from src.database import get_db_pool
 from src.models.playground import PlaygroundChatRequest
 from src.utils.random_candidate import generate_random_candidate
+from src.utils.agent_state_store import save_agent_state
 from src.utils.sse_helpers import sse_done, sse_error, sse_status
 
 logger = logging.getLogger(__name__)
@@ -264,7 +265,7 @@ class PlaygroundAgent:
 async def _bootstrap_pre_screening(pool, vacancy_id: str, candidate_name: str) -> PlaygroundAgent:
     """Create a pre-screening agent from vacancy data."""
     from agents.pre_screening.whatsapp import create_simple_agent, AgentConfig
-    from src.services.livekit_service import fetch_scheduling_config
+    from src.services.livekit_service import fetch_scheduling_config, fetch_turn_strategy
 
     vacancy_uuid = uuid.UUID(vacancy_id)
 
@@ -321,6 +322,7 @@ async def _bootstrap_pre_screening(pool, vacancy_id: str, candidate_name: str) -
     config = AgentConfig(
         schedule_days_ahead=sched_cfg["schedule_days_ahead"],
         schedule_start_offset=sched_cfg["schedule_start_offset"],
+        turn_strategy=await fetch_turn_strategy(vacancy["workspace_id"]),
     )
 
     agent = create_simple_agent(
@@ -632,12 +634,8 @@ async def stream_playground_chat(
         if wrapper.agent_type == "document_collection" and wrapper.context_id:
             try:
                 pool = await get_db_pool()
-                await pool.execute(
-                    """UPDATE agents.document_collections
-                    SET agent_state = $1::jsonb, updated_at = NOW()
-                    WHERE id = $2""",
-                    wrapper.agent.state.to_json(),
-                    uuid.UUID(wrapper.context_id),
+                await save_agent_state(
+                    pool, "agents.document_collections", wrapper.context_id, wrapper.agent.state.to_dict(),
                 )
             except Exception as e:
                 logger.warning(f"Failed to persist playground agent state: {e}")
@@ -32,6 +32,7 @@ from src.models.pre_screening import (
 from src.repositories import PreScreeningRepository, AgentConfigRepository, VacancyRepository
 from src.database import get_db_pool
 from src.dependencies import get_session_manager
+from src.utils.interview_session_cache import interview_session_cache
 
 logger = logging.getLogger(__name__)
 
@@ -342,27 +343,30 @@ async def get_pre_screening(vacancy_id: str, ctx: AuthContext = Depends(require_
                 app_name="interview_question_generator", user_id="web", session_id=session_id
             )
 
-    try:
-        session = await get_or_create_session()
-    except (InterfaceError, OperationalError) as e:
-        logger.warning(f"Database connection error, recreating interview session service: {e}")
-        # Note: We would need interview_agent and interview_editor_agent here
-        # This might need to be handled differently in the final architecture
-        session = await get_or_create_session()
-
-    # Update session with current interview data (overwrites any stale state)
-    state_delta = {"interview": interview}
-    actions = EventActions(state_delta=state_delta)
-    event = Event(
-        invocation_id=f"restore_{int(time.time())}",
-        author="system",
-        actions=actions,
-        timestamp=time.time()
-    )
-    await session_manager.safe_append_event(
-        session_manager.interview_session_service, session, event,
-        app_name="interview_question_generator", user_id="web", session_id=session_id
-    )
+    # Edits still in the interview session cache are replaced by the saved data
+    async with interview_session_cache.agent_turn(session_id, keep_edits=False):
+        try:
+            session = await get_or_create_session()
+        except (InterfaceError, OperationalError) as e:
+            logger.warning(f"Database connection error, recreating interview session service: {e}")
+            # Note: We would need interview_agent and interview_editor_agent here
+            # This might need to be handled differently in the final architecture
+            session = await get_or_create_session()
+
+        # Update session with current interview data (overwrites any stale state)
+        state_delta = {"interview": interview}
+        actions = EventActions(state_delta=state_delta)
+        event = Event(
+            invocation_id=f"restore_{int(time.time())}",
+            author="system",
+            actions=actions,
+            timestamp=time.time()
+        )
+        session = await session_manager.safe_append_event(
+            session_manager.interview_session_service, session, event,
+            app_name="interview_question_generator", user_id="web", session_id=session_id
+        )
+        await interview_session_cache.put(session_id, session, interview)
 
     # Return response with session info
     return {
@@ -21,7 +21,7 @@ from src.auth.dependencies import AuthContext, require_workspace
 from src.repositories import ConversationRepository, CandidateRepository, ApplicationRepository, CandidacyRepository
 from src.agents import AgentType, AgentRegistry
 from src.database import get_db_pool
-from src.services.livekit_service import fetch_scheduling_config
+from src.services.livekit_service import fetch_scheduling_config, fetch_turn_strategy
 from src.config import logger
 from src.utils.sse_helpers import sse_done, sse_error, sse_status
 
@@ -155,6 +155,7 @@ async def stream_screening_chat(
         config = AgentConfig(
             schedule_days_ahead=sched_cfg["schedule_days_ahead"],
             schedule_start_offset=sched_cfg["schedule_start_offset"],
+            turn_strategy=await fetch_turn_strategy(vacancy["workspace_id"]),
         )
 
         # Create new agent
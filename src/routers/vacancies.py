@@ -6,7 +6,7 @@ import logging
 from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, Depends
-from agents.cv_analyzer import analyze_cv_base64
+from agents.cv_analyzer import CVAnalysisResult, analyze_cv_base64, analyze_cv_batch, decode_cv_base64
 from src.utils.dutch_dates import get_next_business_days, get_dutch_date
 
 from pydantic import BaseModel
@@ -14,7 +14,7 @@ from pydantic import BaseModel
 from src.auth.dependencies import AuthContext, require_workspace
 from src.models.common import PaginatedResponse
 from src.models.vacancy import VacancyResponse, VacancyStatsResponse, DashboardStatsResponse, VacancyDetailResponse, VacancyUpdateRequest
-from src.models.application import ApplicationResponse, QuestionAnswerResponse, CVApplicationRequest
+from src.models.application import ApplicationResponse, QuestionAnswerResponse, CVApplicationRequest, CVBatchApplicationRequest
 from src.repositories import VacancyRepository, ApplicationRepository
 from src.services import VacancyService, ActivityService
 from src.database import get_db_pool
@@ -114,29 +114,19 @@ async def update_vacancy(
     return {"id": str(row["id"]), "start_date": row["start_date"].isoformat() if row["start_date"] else None}
 
 
-@router.post("/vacancies/{vacancy_id}/cv-application")
-async def create_cv_application(vacancy_id: str, request: CVApplicationRequest, ctx: AuthContext = Depends(require_workspace)):
+async def _load_cv_questions(pool, vacancy_uuid: uuid.UUID, workspace_id: uuid.UUID):
     """
-    Create an application from a CV PDF.
+    Load a vacancy and its pre-screening questions in CV analyzer format.
 
-    Analyzes the CV against the vacancy's pre-screening questions,
-    creates an application with pre-filled answers from the CV,
-    and identifies which questions still need clarification.
+    Returns:
+        (vacancy_row, knockout_questions, qualification_questions)
     """
-    pool = await get_db_pool()
-
-    # Validate UUID format
-    try:
-        vacancy_uuid = uuid.UUID(vacancy_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail=f"Invalid vacancy ID format: {vacancy_id}")
-
     # Verify vacancy exists and belongs to workspace
     vacancy_row = await pool.fetchrow(
         "SELECT id, title, workspace_id FROM ats.vacancies WHERE id = $1",
         vacancy_uuid
     )
-    if not vacancy_row or vacancy_row["workspace_id"] != ctx.workspace_id:
+    if not vacancy_row or vacancy_row["workspace_id"] != workspace_id:
         raise HTTPException(status_code=404, detail="Vacancy not found")
 
     # Get pre-screening
@@ -189,18 +179,13 @@ async def create_cv_application(vacancy_id: str, request: CVApplicationRequest,
             })
             qual_idx += 1
 
-    # Analyze CV
-    logger.info(f"Analyzing CV for vacancy {vacancy_id} ({vacancy_row['title']})")
-    try:
-        result = await analyze_cv_base64(
-            pdf_base64=request.pdf_base64,
-            knockout_questions=knockout_questions,
-            qualification_questions=qualification_questions,
-        )
-    except Exception as e:
-        logger.error(f"CV analysis failed: {e}")
-        raise HTTPException(status_code=500, detail=f"CV analysis failed: {str(e)}")
+    return vacancy_row, knockout_questions, qualification_questions
 
+
+async def _create_cv_application(
+    pool, vacancy_uuid: uuid.UUID, request: CVApplicationRequest, result: CVAnalysisResult,
+) -> ApplicationResponse:
+    """Create an application with pre-filled answers from a CV analysis."""
     # Determine if all knockout questions passed (have CV evidence)
     knockout_all_passed = all(ka.is_answered for ka in result.knockout_analysis)
 
@@ -299,7 +284,7 @@ async def create_cv_application(vacancy_id: str, request: CVApplicationRequest,
 
     return ApplicationResponse(
         id=str(application_id),
-        vacancy_id=vacancy_id,
+        vacancy_id=str(vacancy_uuid),
         candidate_name=request.candidate_name,
         channel="cv",
         status=application_status,
@@ -316,6 +301,82 @@ async def create_cv_application(vacancy_id: str, request: CVApplicationRequest,
     )
 
 
+@router.post("/vacancies/{vacancy_id}/cv-application")
+async def create_cv_application(vacancy_id: str, request: CVApplicationRequest, ctx: AuthContext = Depends(require_workspace)):
+    """
+    Create an application from a CV PDF.
+
+    Analyzes the CV against the vacancy's pre-screening questions,
+    creates an application with pre-filled answers from the CV,
+    and identifies which questions still need clarification.
+    """
+    pool = await get_db_pool()
+
+    # Validate UUID format
+    try:
+        vacancy_uuid = uuid.UUID(vacancy_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid vacancy ID format: {vacancy_id}")
+
+    vacancy_row, knockout_questions, qualification_questions = await _load_cv_questions(
+        pool, vacancy_uuid, ctx.workspace_id
+    )
+
+    # Analyze CV
+    logger.info(f"Analyzing CV for vacancy {vacancy_id} ({vacancy_row['title']})")
+    try:
+        result = await analyze_cv_base64(
+            pdf_base64=request.pdf_base64,
+            knockout_questions=knockout_questions,
+            qualification_questions=qualification_questions,
+            workspace_id=ctx.workspace_id,
+        )
+    except Exception as e:
+        logger.error(f"CV analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"CV analysis failed: {str(e)}")
+
+    return await _create_cv_application(pool, vacancy_uuid, request, result)
+
+
+@router.post("/vacancies/cv-applications", response_model=list[ApplicationResponse])
+async def create_cv_applications(request: CVBatchApplicationRequest, ctx: AuthContext = Depends(require_workspace)):
+    """
+    Create applications for several vacancies from one CV PDF.
+
+    The CV is read once and analyzed against the pre-screening questions of
+    all vacancies in a single call; vacancies whose questions were already
+    analyzed for this CV reuse the stored analysis.
+    """
+    pool = await get_db_pool()
+
+    vacancy_uuids = list(dict.fromkeys(parse_uuid(vid, field="vacancy_id") for vid in request.vacancy_ids))
+    if not vacancy_uuids:
+        raise HTTPException(status_code=400, detail="No vacancies given")
+
+    question_sets = {}
+    for vacancy_uuid in vacancy_uuids:
+        _, knockout_questions, qualification_questions = await _load_cv_questions(
+            pool, vacancy_uuid, ctx.workspace_id
+        )
+        question_sets[str(vacancy_uuid)] = (knockout_questions, qualification_questions)
+
+    pdf_data = decode_cv_base64(request.pdf_base64)
+    if pdf_data is None:
+        raise HTTPException(status_code=400, detail="Invalid base64 PDF")
+
+    logger.info(f"Analyzing CV for {len(vacancy_uuids)} vacancies")
+    try:
+        results = await analyze_cv_batch(pdf_data, question_sets, workspace_id=ctx.workspace_id)
+    except Exception as e:
+        logger.error(f"CV analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"CV analysis failed: {str(e)}")
+
+    return [
+        await _create_cv_application(pool, vacancy_uuid, request, results[str(vacancy_uuid)])
+        for vacancy_uuid in vacancy_uuids
+    ]
+
+
 @router.get("/vacancies/{vacancy_id}/stats")
 async def get_vacancy_stats(vacancy_id: str, ctx: AuthContext = Depends(require_workspace)):
     """Get aggregated statistics for a vacancy."""
@@ -31,8 +31,9 @@ from src.services import ActivityService
 from agents.pre_screening.call_result_processor import process_call_results
 from src.repositories import ApplicationRepository, CandidacyRepository
 from src.database import get_db_pool
-from src.services.livekit_service import fetch_scheduling_config
+from src.services.livekit_service import fetch_scheduling_config, fetch_turn_strategy
 from src.utils.conversation_cache import conversation_cache, agent_cache, ConversationType, CachedConversation
+from src.utils.agent_state_store import save_agent_state
 from src.services.whatsapp_service import send_whatsapp_message
 from agents.pre_screening.screening_notes_integration import trigger_screening_notes_integration
 from src.workflows import get_orchestrator
@@ -428,18 +429,13 @@ async def _save_agent_state_background(
     pool,
     conversation_id: uuid.UUID,
     agent_state_dict: dict,
+    cache_version: Optional[int] = None,
 ):
-    """Background task to save agent state to DB."""
+    """Background task to save agent state to DB (and mark the cached agent clean)."""
     try:
-        await pool.execute(
-            """
-            UPDATE agents.pre_screening_sessions
-            SET agent_state = $1, updated_at = NOW()
-            WHERE id = $2
-            """,
-            json.dumps(agent_state_dict),
-            conversation_id
-        )
+        await save_agent_state(pool, "agents.pre_screening_sessions", conversation_id, agent_state_dict)
+        if cache_version is not None:
+            agent_cache.mark_clean(str(conversation_id), cache_version)
         logger.debug(f"💾 Agent state saved for {conversation_id}")
     except Exception as e:
         logger.error(f"❌ Failed to save agent state for {conversation_id}: {e}")
@@ -515,24 +511,31 @@ async def _webhook_impl_vacancy_specific(
             timings["cache_hit"] = True
         else:
             timings["cache_hit"] = False
-            # Cache miss - load from database
+            # Cache miss - load from database, and the shared cache tier's state snapshot
+            # (newer than agent_state if another instance handled the previous message)
             logger.info(f"💾 Agent cache MISS for conversation {conversation_id} - loading from DB...")
             t0 = time_module.perf_counter()
-            row = await pool.fetchrow(
-                """
-                SELECT agent_state FROM agents.pre_screening_sessions WHERE id = $1
-                """,
-                conversation_id
+            row, shared_state = await asyncio.gather(
+                pool.fetchrow(
+                    """
+                    SELECT s.agent_state, v.workspace_id
+                    FROM agents.pre_screening_sessions s
+                    LEFT JOIN ats.vacancies v ON v.id = s.vacancy_id
+                    WHERE s.id = $1
+                    """,
+                    conversation_id
+                ),
+                agent_cache.get_state(conv_id_str),
             )
             timings["db_load"] = (time_module.perf_counter() - t0) * 1000
 
-            if not row or not row["agent_state"]:
+            if not row or not (shared_state or row["agent_state"]):
                 logger.error(f"No agent state found for conversation {conversation_id}")
                 return "Er is een fout opgetreden. Probeer het later opnieuw.", False, None
 
             # Restore agent from saved state
             # Handle multiple levels of JSON encoding from legacy data
-            agent_state = row["agent_state"]
+            agent_state = shared_state or row["agent_state"]
 
             # Unwrap any string encoding until we get a dict
             t0 = time_module.perf_counter()
@@ -556,6 +559,7 @@ async def _webhook_impl_vacancy_specific(
             config = AgentConfig(
                 schedule_days_ahead=sched_cfg["schedule_days_ahead"],
                 schedule_start_offset=sched_cfg["schedule_start_offset"],
+                turn_strategy=await fetch_turn_strategy(row["workspace_id"]),
             )
             state_json = json.dumps(agent_state)
             agent = restore_agent_from_state(state_json, config=config)
@@ -575,12 +579,12 @@ async def _webhook_impl_vacancy_specific(
         logger.info(f"⏱️ TIMINGS: {timings}")
         logger.info(f"📱 Agent response: phase={agent.state.phase.value}, response={response_text[:100]}...")
 
-        # Update cache with new state
-        await agent_cache.set(conv_id_str, agent)
+        # Update cache with new state (dirty until the background save lands)
+        cache_version = await agent_cache.set(conv_id_str, agent, dirty=True)
 
         # Save state to DB in background (don't wait)
         updated_state = agent.state.to_dict()
-        asyncio.create_task(_save_agent_state_background(pool, conversation_id, updated_state))
+        asyncio.create_task(_save_agent_state_background(pool, conversation_id, updated_state, cache_version))
 
         # Save scheduled interview if agent has scheduling info (in background)
         if agent.state.selected_date and agent.state.selected_time:
@@ -785,6 +789,7 @@ async def verify_elevenlabs_signature(request_body: bytes, signature_header: str
 
 @router.post("/webhook")
 async def webhook(
+    request: Request,
     Body: str = Form(""),
     From: str = Form(""),
     NumMedia: int = Form(0),
@@ -866,7 +871,7 @@ async def webhook(
             logger.info(f"📄 SMART ROUTING → Document collection (cached)")
             from src.routers import document_collection as doc_module
             return await doc_module.document_webhook(
-                Body=Body, From=From, NumMedia=NumMedia,
+                request=request, Body=Body, From=From, NumMedia=NumMedia,
                 MediaUrl0=MediaUrl0, MediaContentType0=MediaContentType0
             )
         elif cached.conversation_type == ConversationType.PRE_SCREENING:
@@ -923,7 +928,7 @@ async def webhook(
             logger.info(f"📄 SMART ROUTING → Document collection")
             from src.routers import document_collection as doc_module
             return await doc_module.document_webhook(
-                Body=Body, From=From, NumMedia=NumMedia,
+                request=request, Body=Body, From=From, NumMedia=NumMedia,
                 MediaUrl0=MediaUrl0, MediaContentType0=MediaContentType0
             )
         elif conv_row:
@@ -1430,9 +1435,10 @@ async def elevenlabs_webhook(request: Request):
 @router.delete("/webhook/cache")
 async def clear_conversation_cache():
     """
-    Clear all in-memory conversation and agent caches.
+    Clear all conversation and agent caches.
 
-    Use this to reset cached conversations when testing.
+    With a shared cache tier this clears every instance, not just the one
+    receiving the request. Use this to reset cached conversations when testing.
     """
     from src.utils.conversation_cache import clear_all_caches
     result = await clear_all_caches()
@@ -0,0 +1,91 @@
+"""
+ATS Sync Scheduler - Background service that syncs vacancies for every
+workspace with an active ATS connection.
+
+Workspaces are synced concurrently (bounded by ATS_SYNC_CONCURRENCY) instead
+of one after the other, so a slow tenant no longer delays the rest. Each sync
+takes a per-workspace lease in system.ats_sync_state, which keeps multiple
+instances from syncing the same tenant; the lease row also holds the tenant's
+adaptive interval (next_sync_at), so busy tenants are picked up more often
+than quiet ones.
+"""
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+
+from src.config import ATS_SYNC_CONCURRENCY, ATS_SYNC_POLL_INTERVAL
+from src.repositories.ats_sync_state_repo import AtsSyncStateRepository
+from src.services.vacancy_import_service import VacancyImportService
+
+logger = logging.getLogger(__name__)
+
+
+class AtsSyncScheduler:
+    """Polls for due workspaces and runs their syncs with bounded concurrency."""
+
+    def __init__(self, pool: asyncpg.Pool, concurrency: int = ATS_SYNC_CONCURRENCY):
+        self.pool = pool
+        self.repo = AtsSyncStateRepository(pool)
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._running: dict[UUID, asyncio.Task] = {}
+
+    async def tick(self) -> int:
+        """Start a sync for every due workspace not already syncing here. Returns the number started."""
+        due = await self.repo.list_due_workspaces()
+        started = 0
+        for row in due:
+            workspace_id = row["workspace_id"]
+            if workspace_id in self._running:
+                continue
+            task = asyncio.create_task(self._sync_workspace(workspace_id))
+            self._running[workspace_id] = task
+            task.add_done_callback(lambda _t, ws=workspace_id: self._running.pop(ws, None))
+            started += 1
+        return started
+
+    async def _sync_workspace(self, workspace_id: UUID):
+        async with self._semaphore:
+            try:
+                logger.info(f"🔄 ATS sync scheduler: syncing workspace {workspace_id}")
+                progress = await VacancyImportService(self.pool).sync(workspace_id)
+                if progress is None:
+                    logger.info(f"🔄 ATS sync scheduler: workspace {workspace_id} already syncing elsewhere")
+            except Exception as e:
+                logger.error(f"🔄 ATS sync scheduler: failed for workspace {workspace_id}: {e}")
+
+    async def shutdown(self):
+        """Cancel in-flight syncs; their leases expire and are reported as interrupted."""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def ats_sync_scheduler_loop(pool: Optional[asyncpg.Pool] = None):
+    """Background loop that checks for due workspace syncs every ATS_SYNC_POLL_INTERVAL seconds."""
+    from src.database import get_db_pool
+
+    logger.info(
+        f"🔄 ATS sync scheduler started (poll={ATS_SYNC_POLL_INTERVAL}s, "
+        f"concurrency={ATS_SYNC_CONCURRENCY})"
+    )
+    scheduler: Optional[AtsSyncScheduler] = None
+
+    while True:
+        try:
+            await asyncio.sleep(ATS_SYNC_POLL_INTERVAL)
+            if scheduler is None:
+                scheduler = AtsSyncScheduler(pool or await get_db_pool())
+            started = await scheduler.tick()
+            if started:
+                logger.info(f"🔄 ATS sync scheduler: started {started} workspace sync(s)")
+        except asyncio.CancelledError:
+            if scheduler is not None:
+                await scheduler.shutdown()
+            logger.info("🔄 ATS sync scheduler stopped")
+            break
+        except Exception as e:
+            logger.error(f"🔄 ATS sync scheduler error: {e}")
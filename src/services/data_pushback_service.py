@@ -9,7 +9,6 @@ Mirrors the VacancyImportService pattern but reverses the data flow:
 """
 import json
 import logging
-import re
 from typing import Optional
 from uuid import UUID
 
@@ -20,12 +19,10 @@ from src.models.application import QuestionAnswerResponse
 from src.repositories.application_repo import ApplicationRepository
 from src.services.providers import ATSProvider, get_provider
 from src.services.integration_service import PROVIDER_EXPORT_CONFIG
+from src.utils.template_engine import CompiledMapping, get_compiled_mapping
 
 logger = logging.getLogger(__name__)
 
-# Regex to extract {{field}} placeholders from mapping templates
-TEMPLATE_PATTERN = re.compile(r"\{\{(\w+(?:\.\w+)*)\}\}")
-
 
 class DataPushbackService:
     """Pushes screening results back to the external ATS."""
@@ -56,39 +53,15 @@ class DataPushbackService:
             answer_rows = await self.app_repo.get_answers(application_id)
 
             # 2. Load connection + mapping
-            connection = await self._get_active_connection(workspace_id)
-            if not connection:
+            target, unavailable = await self._load_pushback_target(workspace_id)
+            if unavailable:
+                status, message = unavailable
                 return PushbackResultResponse(
                     application_id=str(application_id),
-                    status="error",
-                    message="Geen actieve ATS-integratie gevonden",
+                    status=status,
+                    message=message,
                 )
 
-            provider_slug = connection["slug"]
-            credentials = json.loads(connection["credentials"]) if isinstance(connection["credentials"], str) else connection["credentials"]
-            settings = json.loads(connection["settings"]) if isinstance(connection["settings"], str) else (connection["settings"] or {})
-
-            pushback_settings = settings.get("data_pushback", {})
-            if not pushback_settings.get("enabled"):
-                return PushbackResultResponse(
-                    application_id=str(application_id),
-                    status="skipped",
-                    message="Data terugkoppeling is niet ingeschakeld",
-                )
-
-            mapping = pushback_settings.get("mappings", {})
-            if not mapping:
-                return PushbackResultResponse(
-                    application_id=str(application_id),
-                    status="error",
-                    message="Geen veldmapping geconfigureerd voor data terugkoppeling",
-                )
-
-            sf_object = pushback_settings.get("sf_object")
-            if not sf_object:
-                config = PROVIDER_EXPORT_CONFIG.get(provider_slug, {})
-                sf_object = config.get("default_sf_object", "cxsrec__cxsCandidate__c")
-
             # 3. Load vacancy for source_id
             vacancy_row = await self.pool.fetchrow(
                 "SELECT source_id FROM ats.vacancies WHERE id = $1",
@@ -97,7 +70,7 @@ class DataPushbackService:
 
             # 4. Build export record and resolve mapping
             export_record = self._build_export_record(app_row, answer_rows, vacancy_row)
-            sf_payload = self._resolve_mapping(mapping, export_record)
+            sf_payload = target["plan"].apply(export_record)
 
             if not sf_payload:
                 return PushbackResultResponse(
@@ -107,11 +80,11 @@ class DataPushbackService:
                 )
 
             # 5. Push to ATS
-            provider: ATSProvider = get_provider(provider_slug)
-            record_id = await provider.create_record(credentials, sf_object, sf_payload)
+            sf_object = target["sf_object"]
+            record_id = await target["provider"].create_record(target["credentials"], sf_object, sf_payload)
 
             # 6. Mark as synced
-            await self._mark_synced(application_id)
+            await self.app_repo.mark_synced([application_id])
 
             return PushbackResultResponse(
                 application_id=str(application_id),
@@ -129,27 +102,121 @@ class DataPushbackService:
             )
 
     async def push_batch(self, vacancy_id: UUID, workspace_id: UUID) -> list[PushbackResultResponse]:
-        """Push all unsynced completed applications for a vacancy."""
-        rows = await self.pool.fetch(
-            """
-            SELECT a.id FROM ats.applications a
-            JOIN ats.vacancies v ON v.id = a.vacancy_id
-            WHERE a.vacancy_id = $1
-              AND v.workspace_id = $2
-              AND a.status = 'completed'
-              AND a.synced = false
-              AND a.is_test = false
-            ORDER BY a.completed_at
-            """,
-            vacancy_id, workspace_id,
-        )
-
-        results = []
-        for row in rows:
-            result = await self.push_application(row["id"], workspace_id)
-            results.append(result)
-
-        return results
+        """
+        Push all unsynced completed applications for a vacancy.
+
+        Loads the applications and all their answers in two queries, builds the
+        payloads with one compiled mapping, creates the records in bulk (sObject
+        Collections for Connexys) and marks the successful ones synced in a
+        single UPDATE. Returns one result per application.
+        """
+        app_rows = await self.app_repo.list_unsynced_completed(vacancy_id, workspace_id)
+        if not app_rows:
+            return []
+
+        target, unavailable = await self._load_pushback_target(workspace_id)
+        if unavailable:
+            status, message = unavailable
+            return [
+                PushbackResultResponse(application_id=str(row["id"]), status=status, message=message)
+                for row in app_rows
+            ]
+
+        answers_by_app = await self.app_repo.get_answers_for_applications([row["id"] for row in app_rows])
+
+        results: dict[UUID, PushbackResultResponse] = {}
+        to_send: list[tuple[UUID, dict]] = []
+        for row in app_rows:
+            application_id = row["id"]
+            try:
+                export_record = self._build_export_record(
+                    row, answers_by_app.get(application_id, []), {"source_id": row["vacancy_source_id"]},
+                )
+                sf_payload = target["plan"].apply(export_record)
+            except Exception as e:
+                logger.error(f"Push-back payload failed for application {application_id}: {e}")
+                results[application_id] = PushbackResultResponse(
+                    application_id=str(application_id),
+                    status="error",
+                    message=f"Fout bij versturen: {str(e)}",
+                )
+                continue
+            if not sf_payload:
+                results[application_id] = PushbackResultResponse(
+                    application_id=str(application_id),
+                    status="error",
+                    message="Veldmapping leverde geen data op om te versturen",
+                )
+                continue
+            to_send.append((application_id, sf_payload))
+
+        sf_object = target["sf_object"]
+        if to_send:
+            try:
+                created = await target["provider"].create_records(
+                    target["credentials"], sf_object, [payload for _, payload in to_send],
+                )
+            except Exception as e:
+                logger.error(f"Batch push-back failed for vacancy {vacancy_id}: {e}", exc_info=True)
+                created = [{"success": False, "id": None, "error": str(e)}] * len(to_send)
+
+            synced_ids = []
+            for (application_id, _), outcome in zip(to_send, created):
+                if outcome["success"]:
+                    synced_ids.append(application_id)
+                    results[application_id] = PushbackResultResponse(
+                        application_id=str(application_id),
+                        status="success",
+                        message=f"Data succesvol verstuurd naar {sf_object}",
+                        sf_record_id=outcome["id"],
+                    )
+                else:
+                    results[application_id] = PushbackResultResponse(
+                        application_id=str(application_id),
+                        status="error",
+                        message=f"Fout bij versturen: {outcome['error']}",
+                    )
+
+            await self.app_repo.mark_synced(synced_ids)
+            logger.info(f"Batch push-back for vacancy {vacancy_id}: {len(synced_ids)}/{len(app_rows)} synced")
+
+        return [results[row["id"]] for row in app_rows]
+
+    async def _load_pushback_target(self, workspace_id: UUID) -> tuple[Optional[dict], Optional[tuple[str, str]]]:
+        """
+        Resolve where and how to push for this workspace.
+
+        Returns (target, None) with provider, credentials, sf_object and compiled
+        mapping plan, or (None, (status, message)) when push-back is unavailable.
+        """
+        connection = await self._get_active_connection(workspace_id)
+        if not connection:
+            return None, ("error", "Geen actieve ATS-integratie gevonden")
+
+        provider_slug = connection["slug"]
+        credentials = json.loads(connection["credentials"]) if isinstance(connection["credentials"], str) else connection["credentials"]
+        settings = json.loads(connection["settings"]) if isinstance(connection["settings"], str) else (connection["settings"] or {})
+
+        pushback_settings = settings.get("data_pushback", {})
+        if not pushback_settings.get("enabled"):
+            return None, ("skipped", "Data terugkoppeling is niet ingeschakeld")
+
+        mapping = pushback_settings.get("mappings", {})
+        if not mapping:
+            return None, ("error", "Geen veldmapping geconfigureerd voor data terugkoppeling")
+
+        sf_object = pushback_settings.get("sf_object")
+        if not sf_object:
+            config = PROVIDER_EXPORT_CONFIG.get(provider_slug, {})
+            sf_object = config.get("default_sf_object", "cxsrec__cxsCandidate__c")
+
+        provider: ATSProvider = get_provider(provider_slug)
+        return {
+            "provider": provider,
+            "credentials": credentials,
+            "sf_object": sf_object,
+            "plan": self._compile_mapping(mapping, connection["id"]),
+        }, None
 
     # =========================================================================
     # Export Record Building
@@ -247,31 +314,12 @@ class DataPushbackService:
     # =========================================================================
 
     @staticmethod
-    def _resolve_template(template: str, record: dict) -> str:
-        """Resolve {{field_name}} placeholders from the export record dict."""
-        def replacer(match):
-            field_name = match.group(1)
-            value = record.get(field_name)
-            return str(value) if value is not None else ""
-        return TEMPLATE_PATTERN.sub(replacer, template).strip()
-
-    @classmethod
-    def _resolve_mapping(cls, mapping: dict, record: dict) -> dict:
-        """
-        Apply the export mapping to build the Salesforce payload.
+    def _compile_mapping(mapping: dict, connection_id: Optional[UUID] = None) -> CompiledMapping:
+        """Compile the export mapping into a reusable plan (cached per mapping version).
 
-        Mapping format: { "SF_Field__c": { "template": "{{taloo_field}}" }, ... }
-        Returns a dict ready for Salesforce API.
+        Empty values are dropped so only filled fields are sent to the ATS.
         """
-        payload = {}
-        for sf_field, config in mapping.items():
-            template = config.get("template", "")
-            if not template:
-                continue
-            value = cls._resolve_template(template, record)
-            if value:  # Only include non-empty values
-                payload[sf_field] = value
-        return payload
+        return get_compiled_mapping(mapping, scope=f"pushback:{connection_id}", drop_empty=True)
 
     # =========================================================================
     # Database Helpers
@@ -290,14 +338,3 @@ class DataPushbackService:
               AND i.slug != 'microsoft'
             LIMIT 1
         """, workspace_id)
-
-    async def _mark_synced(self, application_id: UUID) -> None:
-        """Mark an application as synced to the external ATS."""
-        await self.pool.execute(
-            """
-            UPDATE ats.applications
-            SET synced = true, synced_at = NOW()
-            WHERE id = $1
-            """,
-            application_id,
-        )
@@ -16,6 +16,7 @@ import asyncpg
 
 from src.models.activity import ActivityEventType, ActorType
 from src.services.activity_service import ActivityService
+from src.utils.agent_state_store import save_agent_state
 
 logger = logging.getLogger(__name__)
 
@@ -349,12 +350,6 @@ class DocumentCollectionPlannerService:
                 )
 
         # Persist agent state so the webhook can continue the conversation
-        await self.pool.execute(
-            """UPDATE agents.document_collections
-            SET agent_state = $1::jsonb, updated_at = NOW()
-            WHERE id = $2""",
-            agent.state.to_json(),
-            collection_id,
-        )
+        await save_agent_state(self.pool, "agents.document_collections", collection_id, agent.state.to_dict())
 
         logger.info(f"📤 Opening WhatsApp message sent for collection {collection_id}")
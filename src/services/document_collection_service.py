@@ -1,6 +1,7 @@
 """
 Document collection service - business logic for document collection.
 """
+import copy
 import json
 import logging
 from typing import Optional
@@ -8,6 +9,8 @@ from uuid import UUID
 
 import asyncpg
 
+from src.utils.type_registry import get_types, invalidate_types
+
 
 # ─── Plan enrichment ─────────────────────────────────────────────────────────
 
@@ -15,29 +18,22 @@ async def enrich_plan_documents(pool: asyncpg.Pool, workspace_id: UUID, document
     """Enrich plan documents with metadata from ontology.types_documents.
 
     Stored collection plans may be missing scan_mode, verification_config, etc.
-    This patches them in from the document types table so the collection agent
-    has the full metadata it needs.
+    This patches them in from the workspace's type registry snapshot so the
+    collection agent has the full metadata it needs.
     """
     if not documents:
         return documents
 
-    slugs = [d["slug"] for d in documents]
-    rows = await pool.fetch(
-        """SELECT slug, scan_mode, is_verifiable, verification_config, ai_hint, category
-           FROM ontology.types_documents
-           WHERE workspace_id = $1 AND slug = ANY($2)""",
-        workspace_id, slugs
-    )
-    type_map = {r["slug"]: r for r in rows}
+    types = await get_types(pool, workspace_id)
 
     for doc in documents:
-        dt = type_map.get(doc["slug"])
+        dt = types.get_doc_type(doc["slug"], active_only=False)
         if dt:
             doc.setdefault("scan_mode", dt["scan_mode"] or "single")
             doc.setdefault("is_verifiable", dt["is_verifiable"])
             if dt["verification_config"]:
-                vc = dt["verification_config"] if isinstance(dt["verification_config"], dict) else json.loads(dt["verification_config"])
-                doc.setdefault("verification_config", vc)
+                # The registry's decoded config is shared; the plan gets its own copy
+                doc.setdefault("verification_config", copy.deepcopy(dt["verification_config"]))
             doc.setdefault("ai_hint", dt["ai_hint"])
             doc.setdefault("category", dt["category"])
         else:
@@ -118,6 +114,7 @@ class DocumentCollectionService:
             raise ValidationError(f"Document type with slug '{kwargs['slug']}' already exists", field="slug")
 
         row = await self.doc_type_repo.create(workspace_id, **kwargs)
+        await invalidate_types(workspace_id)
         return self._build_doc_type_response(row)
 
     async def update_document_type(
@@ -131,6 +128,7 @@ class DocumentCollectionService:
             raise NotFoundError("Document type", str(doc_type_id))
 
         row = await self.doc_type_repo.update(doc_type_id, **kwargs)
+        await invalidate_types(workspace_id)
         return self._build_doc_type_response(row)
 
     async def delete_document_type(
@@ -144,6 +142,7 @@ class DocumentCollectionService:
             raise NotFoundError("Document type", str(doc_type_id))
 
         await self.doc_type_repo.soft_delete(doc_type_id)
+        await invalidate_types(workspace_id)
 
     # =========================================================================
     # Document Resolution
@@ -502,16 +501,8 @@ class DocumentCollectionService:
         if not slugs:
             return {}
 
-        slug_list = list(slugs)
-        rows = await self.pool.fetch(
-            """SELECT slug, name FROM ontology.types_documents
-               WHERE workspace_id = $1 AND slug = ANY($2)
-               UNION ALL
-               SELECT slug, name FROM ontology.types_attributes
-               WHERE workspace_id = $1 AND slug = ANY($2)""",
-            workspace_id, slug_list
-        )
-        return {r["slug"]: r["name"] for r in rows}
+        types = await get_types(self.pool, workspace_id)
+        return types.names(slugs)
 
     @staticmethod
     def _format_attr_value(attr_info: Optional[dict]):
@@ -0,0 +1,118 @@
+"""
+Document Storage - Object storage for original document uploads.
+
+Originals are kept for the record only; recognition works on a downscaled
+copy. DocumentStorage is the object-storage interface (put/get/exists by
+key); LocalDocumentStorage implements it on the local filesystem under
+DOCUMENT_STORAGE_DIR and stands in until a bucket-backed implementation is
+configured. Writes happen off the event loop and are atomic (temp file +
+rename), so a reader never sees a partial object.
+
+save_in_background() stores an object without the caller waiting for it;
+the pending saves are tracked (and awaited on shutdown by
+wait_for_background_saves), and a failed save is logged.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from src.config import DOCUMENT_STORAGE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentStorage:
+    """Object storage interface for document uploads."""
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        """Store data under key (overwrites). Returns the object's URI."""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the object's bytes, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+
+class LocalDocumentStorage(DocumentStorage):
+    """DocumentStorage on the local filesystem (keys are relative paths)."""
+
+    def __init__(self, base_dir: str = DOCUMENT_STORAGE_DIR):
+        self.base_dir = Path(base_dir).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.base_dir / key).resolve()
+        if not path.is_relative_to(self.base_dir):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        path = self._path(key)
+        await asyncio.to_thread(self._write, path, data)
+        return path.as_uri()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+
+_storage: Optional[DocumentStorage] = None
+_background_saves: set[asyncio.Task] = set()
+
+
+def get_document_storage() -> DocumentStorage:
+    """Get the configured document storage."""
+    global _storage
+    if _storage is None:
+        _storage = LocalDocumentStorage()
+    return _storage
+
+
+async def _save_if_missing(key: str, data: bytes, content_type: str):
+    storage = get_document_storage()
+    if await storage.exists(key):
+        return
+    uri = await storage.put(key, data, content_type)
+    logger.info(f"✅ Saved document: {uri}")
+
+
+def _on_save_done(task: asyncio.Task):
+    _background_saves.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Failed to save document {task.get_name()}: {task.exception()}", exc_info=task.exception())
+
+
+def save_in_background(key: str, data: bytes, content_type: str) -> asyncio.Task:
+    """Store data under key (unless already stored) without waiting for it."""
+    task = asyncio.create_task(_save_if_missing(key, data, content_type), name=key)
+    _background_saves.add(task)
+    task.add_done_callback(_on_save_done)
+    return task
+
+
+async def wait_for_background_saves():
+    """Wait for pending background saves (e.g. on shutdown)."""
+    if _background_saves:
+        await asyncio.gather(*_background_saves, return_exceptions=True)
@@ -23,14 +23,21 @@ from src.database import get_db_pool
 logger = logging.getLogger(__name__)
 
 
-async def fetch_agent_config(config_type: str = "pre_screening") -> dict:
-    """Fetch active agent config settings from agents.agent_config."""
+async def fetch_agent_config(config_type: str = "pre_screening", workspace_id: Optional[uuid.UUID] = None) -> dict:
+    """Fetch active agent config settings from agents.agent_config (preferring the workspace's own)."""
     try:
         pool = await get_db_pool()
-        row = await pool.fetchrow(
-            "SELECT settings FROM agents.agent_config WHERE config_type = $1 AND is_active = true LIMIT 1",
-            config_type,
-        )
+        row = None
+        if workspace_id is not None:
+            row = await pool.fetchrow(
+                "SELECT settings FROM agents.agent_config WHERE workspace_id = $1 AND config_type = $2 AND is_active = true LIMIT 1",
+                workspace_id, config_type,
+            )
+        if row is None:
+            row = await pool.fetchrow(
+                "SELECT settings FROM agents.agent_config WHERE config_type = $1 AND is_active = true LIMIT 1",
+                config_type,
+            )
         if row:
             import json
             settings = row["settings"] if isinstance(row["settings"], dict) else json.loads(row["settings"])
@@ -80,6 +87,18 @@ async def fetch_scheduling_config() -> dict:
     }
 
 
+async def fetch_turn_strategy(workspace_id: Optional[uuid.UUID] = None) -> str:
+    """Fetch the WhatsApp agent's turn strategy (interview group) for a workspace."""
+    from agents.pre_screening.whatsapp import TURN_STRATEGIES, TURN_STRATEGY_SPECULATIVE
+
+    settings = await fetch_agent_config("pre_screening", workspace_id)
+    strategy = settings.get("interview", {}).get("whatsapp_turn_strategy", TURN_STRATEGY_SPECULATIVE)
+    if strategy not in TURN_STRATEGIES:
+        logger.warning(f"Unknown whatsapp_turn_strategy '{strategy}', using {TURN_STRATEGY_SPECULATIVE}")
+        return TURN_STRATEGY_SPECULATIVE
+    return strategy
+
+
 async def fetch_persona_name() -> str:
     """Fetch persona_name from the pre_screening general config. Defaults to 'Anna'."""
     settings = await fetch_agent_config("pre_screening")
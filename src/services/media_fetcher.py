@@ -0,0 +1,157 @@
+"""
+Media Fetcher - Streaming download of WhatsApp media (Twilio).
+
+All downloads share one pooled HTTP client (keep-alive to Twilio and its
+media CDN). The body is streamed with a hard cap (MEDIA_MAX_BYTES): an
+oversized Content-Length is rejected before reading, and a body that grows
+past the cap is aborted mid-stream, so memory per upload stays bounded.
+Chunks are written into one growing buffer that becomes the body without a
+final copy, and the SHA-256 of the original is computed chunk by chunk while
+streaming.
+
+Images are then decoded in the image pipeline with early downscaling (JPEG
+draft mode) to VISION_IMAGE_MAX_SIZE, the largest size recognition uses;
+the downscaled copy is what the agents work with. Other media (PDFs) are
+passed through unchanged. The original is handed over to storage with
+release_original(), so the turn doesn't keep it in memory.
+"""
+import hashlib
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from src.config import (
+    MEDIA_FETCH_MAX_CONNECTIONS,
+    MEDIA_FETCH_TIMEOUT,
+    MEDIA_MAX_BYTES,
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+    VISION_IMAGE_MAX_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+# Extension used when storing an original, by content type
+MEDIA_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/heic": ".heic",
+    "application/pdf": ".pdf",
+}
+
+
+class MediaTooLargeError(Exception):
+    """Raised when a media body exceeds MEDIA_MAX_BYTES."""
+
+
+class MediaFetchError(Exception):
+    """Raised when a media download fails."""
+
+
+@dataclass
+class FetchedMedia:
+    """A downloaded media item."""
+    data: bytes  # Downscaled JPEG for images, the original otherwise
+    content_type: str  # Content type of data
+    original: Optional[bytes]  # None once released
+    original_content_type: str
+    content_hash: str  # SHA-256 of the original
+
+    @property
+    def extension(self) -> str:
+        return MEDIA_EXTENSIONS.get(self.original_content_type, ".bin")
+
+    def release_original(self) -> bytes:
+        """Hand over the original bytes (e.g. to storage); this item no longer holds them."""
+        original, self.original = self.original, None
+        if original is None:
+            raise RuntimeError("Original already released")
+        return original
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(MEDIA_FETCH_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MEDIA_FETCH_MAX_CONNECTIONS,
+                max_keepalive_connections=MEDIA_FETCH_MAX_CONNECTIONS,
+            ),
+            # Twilio media URLs redirect to their CDN; auth is dropped on the cross-origin hop
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_media_fetcher():
+    """Close the pooled HTTP client (called on application shutdown)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def stream_media(
+    url: str,
+    auth: Optional[httpx.Auth] = None,
+    max_bytes: int = MEDIA_MAX_BYTES,
+) -> tuple[bytes, str, str]:
+    """
+    Stream a media body with a hard size cap.
+
+    Returns:
+        (body, content_type, sha256 hex digest)
+    """
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    received = 0
+
+    async with _get_client().stream("GET", url, auth=auth) as resp:
+        if resp.status_code != 200:
+            raise MediaFetchError(f"Failed to download media: HTTP {resp.status_code}")
+        declared = resp.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise MediaTooLargeError(f"Media is {int(declared)} bytes (max {max_bytes})")
+
+        async for chunk in resp.aiter_bytes():
+            received += len(chunk)
+            if received > max_bytes:
+                raise MediaTooLargeError(f"Media exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            buffer.write(chunk)
+        content_type = resp.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+
+    # getvalue() hands over the buffer's bytes (trimmed in place, not copied)
+    body = buffer.getvalue()
+    buffer.close()
+    return body, content_type, digest.hexdigest()
+
+
+async def fetch_twilio_media(media_url: str, max_size: int = VISION_IMAGE_MAX_SIZE) -> FetchedMedia:
+    """Download a Twilio media item and downscale it for recognition if it is an image."""
+    from agents.document_collection.recognition.image_pipeline import resize_for_vision, run_image_job
+
+    # Twilio requires Basic Auth
+    auth = httpx.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN else None
+    original, content_type, content_hash = await stream_media(media_url, auth=auth)
+    media = FetchedMedia(original, content_type, original, content_type, content_hash)
+    if not content_type.startswith("image/"):
+        return media
+
+    try:
+        image, timings = await run_image_job(resize_for_vision, original, max_size, content_hash)
+        media.data, media.content_type = image.data, image.mime_type
+        logger.info(
+            f"Media downloaded: {len(original) / 1024:.1f}KB {content_type} → "
+            f"{len(image.data) / 1024:.1f}KB ({image.size[0]}x{image.size[1]}px) | {timings}"
+        )
+    except Exception as e:
+        logger.warning(f"Media downscale failed, using original: {e}")
+    return media
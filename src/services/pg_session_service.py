@@ -0,0 +1,457 @@
+"""
+ADK session service on the shared asyncpg pool.
+
+DatabaseSessionService brings its own SQLAlchemy engine (pool, pre-ping on
+every checkout) per instance, and SessionManager used to create three of
+them next to the asyncpg pool. PgSessionService stores sessions and events
+in the adk schema through the application's asyncpg pool instead, so the
+number of database connections is that pool's size (DB_POOL_MAX_SIZE).
+
+Tables (created by run_schema_migrations):
+- adk.agent_sessions:    one row per session, its state and update_time
+- adk.agent_events:      the session's events (Event JSON)
+- adk.agent_app_states / adk.agent_user_states: "app:" / "user:" state
+
+Appends:
+- A session's update_time is its revision: an append only applies if the
+  stored update_time still equals the session's last_update_time, otherwise
+  it fails as a stale session (like DatabaseSessionService).
+- Appends that arrive while a write is in flight are written together: one
+  statement updates the sessions and inserts the events of the whole batch
+  (at most ADK_SESSION_APPEND_BATCH, one per session), in one round trip on
+  one connection. Every caller still waits for its own event to be written.
+
+No connection is pinged before use: a query that fails on a dead connection
+(the pool drops it) is retried once. Event ids make a retried append
+idempotent when the first attempt did commit.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import asyncpg
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from pydantic_core import to_jsonable_python
+
+try:
+    from google.adk.errors._stale_session_error import StaleSessionError
+except ImportError:  # older google-adk
+    StaleSessionError = ValueError
+try:
+    from google.adk.errors.session_not_found_error import SessionNotFoundError
+except ImportError:  # older google-adk
+    SessionNotFoundError = ValueError
+
+logger = logging.getLogger(__name__)
+
+ADK_SESSION_APPEND_BATCH = int(os.environ.get("ADK_SESSION_APPEND_BATCH", "64"))
+
+# Errors after which the query is retried once on another connection
+_CONNECTION_ERRORS = (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, ConnectionError, OSError)
+
+# safe_append_event recognizes stale sessions by this wording
+_STALE_MESSAGE = "Stale session: the session was modified in storage since it was loaded"
+
+_APPEND_BATCH_SQL = """
+WITH input AS (
+    SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::float8[], $5::jsonb[], $6::float8[])
+        AS t(app_name, user_id, session_id, expected, delta, ts)
+), updated AS (
+    UPDATE adk.agent_sessions s
+    SET state = s.state || i.delta,
+        update_time = GREATEST(i.ts, s.update_time + 0.000001)
+    FROM input i
+    WHERE s.app_name = i.app_name AND s.user_id = i.user_id AND s.id = i.session_id
+      AND s.update_time = i.expected
+    RETURNING s.app_name, s.user_id, s.id, s.update_time
+), inserted AS (
+    INSERT INTO adk.agent_events (id, app_name, user_id, session_id, invocation_id, author, timestamp, event_data)
+    SELECT e.id, e.app_name, e.user_id, e.session_id, e.invocation_id, e.author, e.ts, e.data
+    FROM unnest($7::text[], $1::text[], $2::text[], $3::text[], $8::text[], $9::text[], $6::float8[], $10::jsonb[])
+        AS e(id, app_name, user_id, session_id, invocation_id, author, ts, data)
+    JOIN updated u ON u.app_name = e.app_name AND u.user_id = e.user_id AND u.id = e.session_id
+    RETURNING 1
+)
+SELECT app_name, user_id, id, update_time FROM updated
+"""
+
+
+def _split_state(state: dict) -> dict[str, dict]:
+    """Split a state (delta) into app, user and session parts; temp: keys are never stored."""
+    parts = {"app": {}, "user": {}, "session": {}}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            parts["app"][key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            parts["user"][key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            parts["session"][key] = value
+    return parts
+
+
+def _merge_state(app_state: dict, user_state: dict, session_state: dict) -> dict:
+    merged = dict(session_state)
+    merged.update({State.APP_PREFIX + k: v for k, v in app_state.items()})
+    merged.update({State.USER_PREFIX + k: v for k, v in user_state.items()})
+    return merged
+
+
+def _to_json(value) -> str:
+    return json.dumps(to_jsonable_python(value, fallback=str), ensure_ascii=False)
+
+
+def _from_json(value) -> Any:
+    return json.loads(value) if isinstance(value, str) else (value or {})
+
+
+@dataclass
+class _PendingAppend:
+    key: tuple[str, str, str]
+    session: Session
+    event: Event
+    parts: dict[str, dict]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class PgSessionService(BaseSessionService):
+    """ADK sessions and events in the adk schema, on the application's asyncpg pool."""
+
+    def __init__(
+        self,
+        get_pool: Callable[[], Awaitable[asyncpg.Pool]],
+        append_batch: int = ADK_SESSION_APPEND_BATCH,
+    ):
+        self._get_pool = get_pool
+        self._append_batch = max(1, append_batch)
+        self._queue: deque[_PendingAppend] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._stats = {"appends": 0, "batches": 0, "stale": 0, "retries": 0}
+        self._last_error: Optional[str] = None
+        self._last_error_at: Optional[float] = None
+
+    async def _run(self, operation: str, fn: Callable[[asyncpg.Connection], Awaitable[Any]]) -> Any:
+        """Run fn on a pooled connection, once more on another one if the connection was dead."""
+        pool = await self._get_pool()
+        for attempt in (1, 2):
+            try:
+                async with pool.acquire() as conn:
+                    return await fn(conn)
+            except _CONNECTION_ERRORS as e:
+                self._last_error, self._last_error_at = f"{type(e).__name__}: {e}", time.time()
+                if attempt == 2:
+                    raise
+                self._stats["retries"] += 1
+                logger.warning(f"ADK session {operation}: connection error, retrying: {e}")
+
+    # -------------------------------------------------------------------------
+    # Sessions
+    # -------------------------------------------------------------------------
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        parts = _split_state(state or {})
+
+        async def create(conn: asyncpg.Connection):
+            async with conn.transaction():
+                await self._upsert_shared_state(conn, app_name, user_id, parts)
+                return await conn.fetchrow(
+                    """
+                    INSERT INTO adk.agent_sessions (app_name, user_id, id, state, create_time, update_time)
+                    VALUES ($1, $2, $3, $4::jsonb, NOW(), $5)
+                    ON CONFLICT DO NOTHING
+                    RETURNING update_time,
+                        (SELECT state FROM adk.agent_app_states WHERE app_name = $1) AS app_state,
+                        (SELECT state FROM adk.agent_user_states WHERE app_name = $1 AND user_id = $2) AS user_state
+                    """,
+                    app_name, user_id, session_id, _to_json(parts["session"]), time.time(),
+                )
+
+        row = await self._run("create", create)
+        if row is None:
+            raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=_merge_state(_from_json(row["app_state"]), _from_json(row["user_state"]), _from_json(_to_json(parts["session"]))),
+            last_update_time=row["update_time"],
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        limit = config.num_recent_events if config else None
+        after = config.after_timestamp if config else None
+        await self._wait_for_appends(app_name, user_id, session_id)
+
+        async def fetch(conn: asyncpg.Connection):
+            # Session, shared state and events in one round trip
+            return await conn.fetchrow(
+                """
+                SELECT s.state, s.update_time, a.state AS app_state, u.state AS user_state,
+                    (SELECT COALESCE(json_agg(e.event_data ORDER BY e.timestamp, e.id), '[]')
+                     FROM (
+                         SELECT event_data, timestamp, id FROM adk.agent_events
+                         WHERE app_name = s.app_name AND user_id = s.user_id AND session_id = s.id
+                           AND ($4::float8 IS NULL OR timestamp >= $4)
+                         ORDER BY timestamp DESC, id DESC
+                         LIMIT $5
+                     ) e) AS events
+                FROM adk.agent_sessions s
+                LEFT JOIN adk.agent_app_states a ON a.app_name = s.app_name
+                LEFT JOIN adk.agent_user_states u ON u.app_name = s.app_name AND u.user_id = s.user_id
+                WHERE s.app_name = $1 AND s.user_id = $2 AND s.id = $3
+                """,
+                app_name, user_id, session_id, after, limit,
+            )
+
+        row = await self._run("get", fetch)
+        if row is None:
+            return None
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=_merge_state(_from_json(row["app_state"]), _from_json(row["user_state"]), _from_json(row["state"])),
+            events=[Event.model_validate(e) for e in json.loads(row["events"])],
+            last_update_time=row["update_time"],
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        async def fetch(conn: asyncpg.Connection):
+            return await conn.fetch(
+                """
+                SELECT s.id, s.user_id, s.state, s.update_time, a.state AS app_state, u.state AS user_state
+                FROM adk.agent_sessions s
+                LEFT JOIN adk.agent_app_states a ON a.app_name = s.app_name
+                LEFT JOIN adk.agent_user_states u ON u.app_name = s.app_name AND u.user_id = s.user_id
+                WHERE s.app_name = $1 AND ($2::text IS NULL OR s.user_id = $2)
+                ORDER BY s.update_time, s.user_id, s.id
+                """,
+                app_name, user_id,
+            )
+
+        rows = await self._run("list", fetch)
+        return ListSessionsResponse(sessions=[
+            Session(
+                id=row["id"],
+                app_name=app_name,
+                user_id=row["user_id"],
+                state=_merge_state(_from_json(row["app_state"]), _from_json(row["user_state"]), _from_json(row["state"])),
+                last_update_time=row["update_time"],
+            )
+            for row in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._wait_for_appends(app_name, user_id, session_id)
+        await self._run("delete", lambda conn: conn.execute(
+            "DELETE FROM adk.agent_sessions WHERE app_name = $1 AND user_id = $2 AND id = $3",
+            app_name, user_id, session_id,
+        ))
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict[str, Any]:
+        state = await self._run("user state", lambda conn: conn.fetchval(
+            "SELECT state FROM adk.agent_user_states WHERE app_name = $1 AND user_id = $2",
+            app_name, user_id,
+        ))
+        return _from_json(state) if state is not None else {}
+
+    @staticmethod
+    async def _upsert_shared_state(conn: asyncpg.Connection, app_name: str, user_id: str, parts: dict[str, dict]):
+        if parts["app"]:
+            await conn.execute(
+                """
+                INSERT INTO adk.agent_app_states (app_name, state) VALUES ($1, $2::jsonb)
+                ON CONFLICT (app_name) DO UPDATE SET state = adk.agent_app_states.state || EXCLUDED.state
+                """,
+                app_name, _to_json(parts["app"]),
+            )
+        if parts["user"]:
+            await conn.execute(
+                """
+                INSERT INTO adk.agent_user_states (app_name, user_id, state) VALUES ($1, $2, $3::jsonb)
+                ON CONFLICT (app_name, user_id) DO UPDATE SET state = adk.agent_user_states.state || EXCLUDED.state
+                """,
+                app_name, user_id, _to_json(parts["user"]),
+            )
+
+    # -------------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------------
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+
+        # temp: state lives in memory only; the stored event doesn't carry it
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+        state_delta = event.actions.state_delta if event.actions and event.actions.state_delta else {}
+        pending = _PendingAppend(
+            key=(session.app_name, session.user_id, session.id),
+            session=session,
+            event=event,
+            parts=_split_state(state_delta),
+        )
+        self._enqueue(pending)
+        await pending.future
+        self._stats["appends"] += 1
+
+        # Apply the event to the in-memory session (state delta, events list)
+        return await super().append_event(session, event)
+
+    def _enqueue(self, pending: _PendingAppend):
+        if self._writer is None or self._writer.done():
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+        self._queue.append(pending)
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def _wait_for_appends(self, app_name: str, user_id: str, session_id: str):
+        """Read-your-writes: wait until this process's queued appends to the session are written."""
+        key = (app_name, user_id, session_id)
+        waiting = [p.future for p in self._queue if p.key == key]
+        if waiting:
+            await asyncio.gather(*waiting, return_exceptions=True)
+
+    async def flush(self) -> None:
+        """Wait until every queued append is written."""
+        if self._idle is not None and self._writer is not None and not self._writer.done():
+            await self._idle.wait()
+
+    async def _write_loop(self):
+        while True:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # One append per session per batch: the next one builds on its revision
+            batch, deferred, keys = [], deque(), set()
+            while self._queue and len(batch) < self._append_batch:
+                pending = self._queue.popleft()
+                if pending.key in keys:
+                    deferred.append(pending)
+                else:
+                    keys.add(pending.key)
+                    batch.append(pending)
+            self._queue.extendleft(reversed(deferred))
+
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+
+    async def _write_batch(self, batch: list[_PendingAppend]):
+        events = [p.event for p in batch]
+        args = (
+            [p.key[0] for p in batch],
+            [p.key[1] for p in batch],
+            [p.key[2] for p in batch],
+            [p.session.last_update_time for p in batch],
+            [_to_json(p.parts["session"]) for p in batch],
+            [e.timestamp for e in events],
+            [e.id for e in events],
+            [e.invocation_id for e in events],
+            [e.author for e in events],
+            [e.model_dump_json(exclude_none=True) for e in events],
+        )
+
+        async def write(conn: asyncpg.Connection):
+            async with conn.transaction():
+                rows = await conn.fetch(_APPEND_BATCH_SQL, *args)
+                applied = {(r["app_name"], r["user_id"], r["id"]): r["update_time"] for r in rows}
+                for p in batch:
+                    if p.key in applied and (p.parts["app"] or p.parts["user"]):
+                        await self._upsert_shared_state(conn, p.key[0], p.key[1], p.parts)
+                failed = [p for p in batch if p.key not in applied]
+                outcomes = {p.key: await self._explain_failure(conn, p) for p in failed}
+            return applied, outcomes
+
+        applied, outcomes = await self._run("append", write)
+        self._stats["batches"] += 1
+        if len(batch) > 1:
+            logger.debug(f"ADK session appends: {len(batch)} events in one batch")
+
+        # The new revision goes on the session right away: a deferred append to
+        # the same session object is written next and builds on it
+        for p in batch:
+            outcome = applied[p.key] if p.key in applied else outcomes[p.key]
+            if isinstance(outcome, Exception):
+                if isinstance(outcome, StaleSessionError):
+                    self._stats["stale"] += 1
+                p.future.set_exception(outcome)
+            else:
+                p.session.last_update_time = outcome
+                p.future.set_result(outcome)
+
+    @staticmethod
+    async def _explain_failure(conn: asyncpg.Connection, p: _PendingAppend):
+        """Why an append didn't apply: the stored update_time if the event is already stored, else the error."""
+        row = await conn.fetchrow(
+            """
+            SELECT s.update_time,
+                EXISTS (SELECT 1 FROM adk.agent_events e
+                        WHERE e.app_name = s.app_name AND e.user_id = s.user_id
+                          AND e.session_id = s.id AND e.id = $4) AS already_written
+            FROM adk.agent_sessions s
+            WHERE s.app_name = $1 AND s.user_id = $2 AND s.id = $3
+            """,
+            *p.key, p.event.id,
+        )
+        if row is None:
+            return SessionNotFoundError(f"Session {p.key[2]} not found.")
+        if row["already_written"]:
+            # A retry of an append whose first attempt committed
+            return row["update_time"]
+        return StaleSessionError(_STALE_MESSAGE)
+
+    # -------------------------------------------------------------------------
+    # Lifecycle / health
+    # -------------------------------------------------------------------------
+
+    async def close(self):
+        """Write the queued appends and stop the writer."""
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
+    def health(self) -> dict:
+        """Append statistics and the last connection error (no query is made)."""
+        return {
+            "queued_appends": len(self._queue),
+            **self._stats,
+            "last_connection_error": self._last_error,
+            "last_connection_error_at": self._last_error_at,
+        }
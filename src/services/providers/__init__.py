@@ -4,10 +4,15 @@ ATS provider interface and registry.
 Each provider implements fetch_vacancies() to retrieve raw records
 from an external ATS system. The generic VacancyImportService handles
 field mapping, transformation, and upserting into the local database.
+
+Providers that page through their source can override
+iter_vacancy_pages() so the import can stream pages instead of
+materializing the full result set.
 """
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -37,12 +42,47 @@ class ATSProvider:
         """
         raise NotImplementedError
 
+    async def iter_vacancy_pages(
+        self, credentials: dict, settings: dict, mapping: dict,
+        since: str | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield raw vacancy records page by page.
+
+        The default implementation yields the full fetch_vacancies() result
+        as a single page. Providers with native pagination should override
+        this to keep memory bounded to a page or two.
+        """
+        records = await self.fetch_vacancies(credentials, settings, mapping, since=since)
+        if records:
+            yield records
+
     async def create_record(
         self, credentials: dict, sf_object: str, data: dict
     ) -> str:
         """Create a record in the external system. Returns the record ID."""
         raise NotImplementedError
 
+    async def create_records(
+        self, credentials: dict, sf_object: str, records: list[dict]
+    ) -> list[dict]:
+        """
+        Create many records in the external system.
+
+        Returns one result per input record, in order:
+        {"success": bool, "id": str | None, "error": str | None}.
+        A failing record does not fail the others. The default implementation
+        calls create_record() per record; providers with a bulk API override it.
+        """
+        results = []
+        for data in records:
+            try:
+                record_id = await self.create_record(credentials, sf_object, data)
+                results.append({"success": True, "id": record_id, "error": None})
+            except Exception as e:
+                results.append({"success": False, "id": None, "error": str(e)})
+        return results
+
     async def update_record(
         self, credentials: dict, sf_object: str, record_id: str, data: dict
     ) -> None:
@@ -3,20 +3,20 @@ Connexys (Salesforce) ATS provider.
 
 Handles Salesforce OAuth2 authentication, SOQL query building,
 and paginated record fetching from the Connexys vacancy object.
+Bulk writes go through the sObject Collections API (200 records per request).
 """
+import asyncio
 import logging
-import re
+from collections.abc import AsyncIterator
 
 import httpx
 
 from src.services.providers import ATSProvider
 from src.services.integration_service import CONNEXYS_DEFAULT_SF_OBJECT
+from src.utils.template_engine import build_soql_fields
 
 logger = logging.getLogger(__name__)
 
-# Regex to extract {{field}} placeholders from mapping templates
-TEMPLATE_PATTERN = re.compile(r"\{\{(\w+(?:\.\w+)*)\}\}")
-
 # Connexys vacancy statuses that should be synced
 SYNC_STATUSES = [
     "Nieuwe",
@@ -28,6 +28,12 @@ SYNC_STATUSES = [
     "Heropend",
 ]
 
+# sObject Collections accepts at most 200 records per request
+COLLECTION_BATCH_SIZE = 200
+
+# Collection requests in flight at once (Salesforce limits concurrent API calls per org)
+COLLECTION_CONCURRENCY = 3
+
 
 class ConnexysProvider(ATSProvider):
     """Fetches vacancy records from Connexys via the Salesforce REST API."""
@@ -43,6 +49,22 @@ class ConnexysProvider(ATSProvider):
         Args:
             since: ISO datetime string — only fetch records modified after this time.
         """
+        records: list[dict] = []
+        async for page in self.iter_vacancy_pages(credentials, settings, mapping, since=since):
+            records.extend(page)
+        logger.info(f"Fetched {len(records)} records from Connexys")
+        return records
+
+    async def iter_vacancy_pages(
+        self, credentials: dict, settings: dict, mapping: dict,
+        since: str | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield vacancy records one Salesforce page at a time.
+
+        The next page (nextRecordsUrl) is fetched in the background while the
+        caller processes the current one, so at most two pages are in memory.
+        """
         access_token, instance_url = await self._get_token(credentials)
         sf_object = settings.get("sf_object", CONNEXYS_DEFAULT_SF_OBJECT)
 
@@ -50,9 +72,8 @@ class ConnexysProvider(ATSProvider):
         valid_fields = self._get_valid_fields(settings)
         soql = self._build_soql(mapping, sf_object, valid_fields, since=since)
         logger.info(f"Connexys SOQL: {soql}")
-        records = await self._fetch_all_records(access_token, instance_url, soql)
-        logger.info(f"Fetched {len(records)} records from Connexys")
-        return records
+        async for page in self._iter_record_pages(access_token, instance_url, soql):
+            yield page
 
     @staticmethod
     async def _get_token(credentials: dict) -> tuple[str, str]:
@@ -83,11 +104,8 @@ class ConnexysProvider(ATSProvider):
         Args:
             since: ISO datetime string — adds LastModifiedDate filter for incremental sync.
         """
-        # Collect all Salesforce fields referenced in the mapping templates
-        fields: set[str] = set()
-        for _target, config in mapping.items():
-            template = config.get("template", "")
-            fields.update(TEMPLATE_PATTERN.findall(template))
+        # Collect all Salesforce fields referenced in the mapping templates (compiled plan)
+        fields: set[str] = set(build_soql_fields(mapping))
 
         # Always include these for identification and filtering
         fields.update(["Id", "cxsrec__Status__c", "LastModifiedDate"])
@@ -142,6 +160,68 @@ class ConnexysProvider(ATSProvider):
             logger.info(f"Created {sf_object} record: {record_id}")
             return record_id
 
+    async def create_records(self, credentials: dict, sf_object: str, records: list[dict]) -> list[dict]:
+        """
+        Create many Salesforce records via the sObject Collections API.
+
+        Records are sent in chunks of COLLECTION_BATCH_SIZE with allOrNone=false,
+        at most COLLECTION_CONCURRENCY requests at a time, using a single token
+        and HTTP client. Returns one result per record, in input order.
+        """
+        if not records:
+            return []
+
+        access_token, instance_url = await self._get_token(credentials)
+        url = f"{instance_url}/services/data/v62.0/composite/sobjects"
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+        semaphore = asyncio.Semaphore(COLLECTION_CONCURRENCY)
+
+        async with httpx.AsyncClient(timeout=120.0) as client:
+
+            async def send_chunk(chunk: list[dict]) -> list[dict]:
+                body = {
+                    "allOrNone": False,
+                    "records": [{"attributes": {"type": sf_object}, **data} for data in chunk],
+                }
+                async with semaphore:
+                    try:
+                        resp = await client.post(url, json=body, headers=headers)
+                    except httpx.HTTPError as e:
+                        logger.error(f"Salesforce collection create failed for {sf_object}: {e}")
+                        return [{"success": False, "id": None, "error": str(e)}] * len(chunk)
+
+                if resp.status_code != 200:
+                    error_body = resp.text[:500]
+                    logger.error(f"Salesforce collection create failed for {sf_object} ({resp.status_code}): {error_body}")
+                    error = f"Salesforce create failed ({resp.status_code}): {error_body}"
+                    return [{"success": False, "id": None, "error": error}] * len(chunk)
+
+                results = []
+                for item in resp.json():
+                    errors = item.get("errors") or []
+                    results.append({
+                        "success": bool(item.get("success")),
+                        "id": item.get("id"),
+                        "error": "; ".join(
+                            f"{err.get('statusCode')}: {err.get('message')}" for err in errors
+                        ) or None,
+                    })
+                return results
+
+            chunks = [
+                records[i:i + COLLECTION_BATCH_SIZE]
+                for i in range(0, len(records), COLLECTION_BATCH_SIZE)
+            ]
+            chunk_results = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+
+        results = [result for chunk in chunk_results for result in chunk]
+        created = sum(1 for r in results if r["success"])
+        logger.info(f"Created {created}/{len(records)} {sf_object} records in {len(chunks)} collection request(s)")
+        return results
+
     async def update_record(self, credentials: dict, sf_object: str, record_id: str, data: dict) -> None:
         """Update an existing Salesforce record."""
         access_token, instance_url = await self._get_token(credentials)
@@ -194,33 +274,63 @@ class ConnexysProvider(ATSProvider):
     # =========================================================================
 
     @staticmethod
-    async def _fetch_all_records(
-        access_token: str, instance_url: str, soql: str
-    ) -> list[dict]:
-        """Fetch all records from Salesforce with pagination."""
+    async def _fetch_page(
+        client: httpx.AsyncClient, url: str, headers: dict, params: dict | None,
+    ) -> dict:
+        """Fetch a single query result page from Salesforce."""
+        resp = await client.get(url, headers=headers, params=params)
+        if resp.status_code != 200:
+            error_body = resp.text[:500]
+            logger.error(f"Salesforce query failed ({resp.status_code}): {error_body}")
+            raise ValueError(f"Salesforce query failed ({resp.status_code}): {error_body}")
+        return resp.json()
+
+    @classmethod
+    async def _iter_record_pages(
+        cls, access_token: str, instance_url: str, soql: str
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield record pages from Salesforce, prefetching the next page.
+
+        While the consumer works on page N, page N+1 is already in flight.
+        The prefetch task is cancelled if the consumer stops early.
+        """
         headers = {"Authorization": f"Bearer {access_token}"}
         url = f"{instance_url}/services/data/v62.0/query"
-        params = {"q": soql}
-        all_records: list[dict] = []
 
         async with httpx.AsyncClient(timeout=60.0) as client:
-            while True:
-                resp = await client.get(url, headers=headers, params=params)
-                if resp.status_code != 200:
-                    error_body = resp.text[:500]
-                    logger.error(f"Salesforce query failed ({resp.status_code}): {error_body}")
-                    raise ValueError(f"Salesforce query failed ({resp.status_code}): {error_body}")
-                data = resp.json()
-                all_records.extend(data.get("records", []))
-
-                if data.get("done", True):
-                    break
-
-                # Follow pagination URL
-                next_url = data.get("nextRecordsUrl")
-                if not next_url:
-                    break
-                url = f"{instance_url}{next_url}"
-                params = None  # nextRecordsUrl is a full path
-
+            pending: asyncio.Task | None = asyncio.create_task(
+                cls._fetch_page(client, url, headers, {"q": soql})
+            )
+            try:
+                while pending is not None:
+                    data = await pending
+                    pending = None
+
+                    # Follow pagination URL (nextRecordsUrl is a full path)
+                    next_url = data.get("nextRecordsUrl")
+                    if not data.get("done", True) and next_url:
+                        pending = asyncio.create_task(
+                            cls._fetch_page(client, f"{instance_url}{next_url}", headers, None)
+                        )
+
+                    records = data.get("records", [])
+                    if records:
+                        yield records
+            finally:
+                if pending is not None and not pending.done():
+                    pending.cancel()
+                    try:
+                        await pending
+                    except (asyncio.CancelledError, Exception):
+                        pass
+
+    @classmethod
+    async def _fetch_all_records(
+        cls, access_token: str, instance_url: str, soql: str
+    ) -> list[dict]:
+        """Fetch all records from Salesforce with pagination."""
+        all_records: list[dict] = []
+        async for page in cls._iter_record_pages(access_token, instance_url, soql):
+            all_records.extend(page)
         return all_records
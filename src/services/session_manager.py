@@ -2,16 +2,25 @@
 Session management service - handles ADK session lifecycle and runner caching.
 """
 import logging
+import os
 import time
 from typing import Optional, Callable, Any
-from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions import BaseSessionService, DatabaseSessionService
 from google.adk.events import Event, EventActions
 from google.adk.runners import Runner
 from google.adk.agents.llm_agent import Agent
 from sqlalchemy.exc import InterfaceError, OperationalError, IntegrityError
 
+from src.database import get_db_pool
+from src.services.pg_session_service import PgSessionService
+
 logger = logging.getLogger(__name__)
 
+# "sqlalchemy" (default): a DatabaseSessionService (own engine and pool) per service
+# "postgres": one PgSessionService on the shared asyncpg pool (adk.agent_* tables);
+# opt-in, as sessions stored by the sqlalchemy backend aren't visible to it
+ADK_SESSION_BACKEND = os.environ.get("ADK_SESSION_BACKEND", "sqlalchemy").lower()
+
 
 class SessionManager:
     """
@@ -20,13 +29,17 @@ class SessionManager:
     Manages session service creation, event appending with retry logic,
     and document runner caching.
 
+    With the postgres backend (ADK_SESSION_BACKEND=postgres) the interview, analyst and document
+    services are one PgSessionService on the application's asyncpg pool, so
+    ADK sessions use no connections of their own.
+
     Note: Screening (WhatsApp/Web chat) now uses pre_screening_whatsapp_agent
     with JSON state storage instead of ADK sessions.
     """
 
     def __init__(self, database_url: str):
         self.database_url = database_url
-        # SQLAlchemy engine kwargs optimized for Supabase Session Mode Pooler
+        # SQLAlchemy engine kwargs (sqlalchemy backend) optimized for Supabase Session Mode Pooler
         # - pool_pre_ping: Validates connections before use (prevents stale connection errors)
         # - pool_recycle: Recycle connections every 5 min (match Supabase pooler timeout)
         # - pool_size: Smaller pools per service to avoid connection exhaustion
@@ -39,11 +52,14 @@ class SessionManager:
             "connect_args": {"statement_cache_size": 0},
         }
 
+        self.backend = ADK_SESSION_BACKEND
+        self._pg_session_service: Optional[PgSessionService] = None
+
         # Session services
-        self.session_service: Optional[DatabaseSessionService] = None
-        self.interview_session_service: Optional[DatabaseSessionService] = None
-        self.analyst_session_service: Optional[DatabaseSessionService] = None
-        self.document_session_service: Optional[DatabaseSessionService] = None
+        self.session_service: Optional[BaseSessionService] = None
+        self.interview_session_service: Optional[BaseSessionService] = None
+        self.analyst_session_service: Optional[BaseSessionService] = None
+        self.document_session_service: Optional[BaseSessionService] = None
 
         # Runners (stateful)
         self.interview_runner: Optional[Runner] = None
@@ -57,29 +73,36 @@ class SessionManager:
         # Document collection runners cache (keyed by collection_id)
         self.document_runners: dict[str, Runner] = {}
 
-    def create_session_service(self) -> DatabaseSessionService:
+    def _new_session_service(self) -> BaseSessionService:
+        """A session service for the configured backend.
+
+        The postgres service is shared and stateless between calls (it retries
+        dead connections itself), so "recreating" it returns the same instance.
+        """
+        if self.backend == "sqlalchemy":
+            return DatabaseSessionService(db_url=self.database_url, **self.engine_kwargs)
+        if self._pg_session_service is None:
+            self._pg_session_service = PgSessionService(get_db_pool)
+            logger.info("Created ADK session service on the shared asyncpg pool")
+        return self._pg_session_service
+
+    def create_session_service(self) -> BaseSessionService:
         """Create the main session service."""
-        self.session_service = DatabaseSessionService(
-            db_url=self.database_url,
-            **self.engine_kwargs
-        )
-        logger.info("Created session service (pool_pre_ping=True, pool_recycle=300s)")
+        self.session_service = self._new_session_service()
+        logger.info(f"Created session service ({self.backend})")
         return self.session_service
 
     def create_interview_session_service(
         self,
         interview_agent: Agent,
         interview_editor_agent: Agent
-    ) -> DatabaseSessionService:
+    ) -> BaseSessionService:
         """Create interview generator session service and runners."""
         # Store agent references for recreation on connection errors
         self.interview_agent = interview_agent
         self.interview_editor_agent = interview_editor_agent
 
-        self.interview_session_service = DatabaseSessionService(
-            db_url=self.database_url,
-            **self.engine_kwargs
-        )
+        self.interview_session_service = self._new_session_service()
 
         # Full thinking agent for initial generation
         self.interview_runner = Runner(
@@ -101,12 +124,9 @@ class SessionManager:
     def create_analyst_session_service(
         self,
         recruiter_analyst_agent: Agent
-    ) -> DatabaseSessionService:
+    ) -> BaseSessionService:
         """Create recruiter analyst session service and runner."""
-        self.analyst_session_service = DatabaseSessionService(
-            db_url=self.database_url,
-            **self.engine_kwargs
-        )
+        self.analyst_session_service = self._new_session_service()
         self.analyst_runner = Runner(
             agent=recruiter_analyst_agent,
             app_name="recruiter_analyst",
@@ -115,18 +135,15 @@ class SessionManager:
         logger.info("Created recruiter analyst session service and runner")
         return self.analyst_session_service
 
-    def create_document_session_service(self) -> DatabaseSessionService:
+    def create_document_session_service(self) -> BaseSessionService:
         """Create document collection session service."""
-        self.document_session_service = DatabaseSessionService(
-            db_url=self.database_url,
-            **self.engine_kwargs
-        )
-        logger.info("Created document collection session service (pool_pre_ping=True)")
+        self.document_session_service = self._new_session_service()
+        logger.info(f"Created document collection session service ({self.backend})")
         return self.document_session_service
 
     async def safe_append_event(
         self,
-        session_service: DatabaseSessionService,
+        session_service: BaseSessionService,
         session,
         event: Event,
         app_name: str,
@@ -138,12 +155,20 @@ class SessionManager:
 
         If the session is stale (update_time mismatch), re-fetches the session and retries.
         If still failing, logs a warning and continues (the data is in our DB anyway).
+
+        Returns the session the event was appended to (the re-fetched one after a
+        retry), to use for the next append.
         """
         try:
             await session_service.append_event(session, event)
         except ValueError as e:
             error_msg = str(e).lower()
-            if "stale session" in error_msg or "last_update_time" in error_msg or "earlier than" in error_msg:
+            if (
+                "stale session" in error_msg
+                or "last_update_time" in error_msg
+                or "earlier than" in error_msg
+                or "modified in storage" in error_msg
+            ):
                 logger.warning(f"Stale session detected for {session_id}, re-fetching: {e}")
                 # Re-fetch fresh session and retry
                 fresh_session = await session_service.get_session(
@@ -162,8 +187,10 @@ class SessionManager:
                     except ValueError:
                         # If still failing, log and continue
                         logger.warning(f"Could not update session state for {session_id}, continuing without it")
+                    return fresh_session
             else:
                 raise
+        return session
 
     async def with_session_retry(
         self,
@@ -253,3 +280,14 @@ class SessionManager:
         except Exception as e:
             # Log but don't fail - session may already be deleted
             logger.warning(f"Could not delete ADK session {session_id[:8]}: {e}")
+
+    async def close(self):
+        """Write queued session events (postgres backend) before the pool closes."""
+        if self._pg_session_service is not None:
+            await self._pg_session_service.close()
+
+    def health(self) -> dict:
+        """Session backend and, for postgres, its append statistics."""
+        if self._pg_session_service is None:
+            return {"backend": self.backend}
+        return {"backend": self.backend, **self._pg_session_service.health()}
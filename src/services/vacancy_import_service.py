@@ -10,15 +10,20 @@ After import, optionally auto-generates pre-screening questions for new
 vacancies via the interview generator agent (when auto_generate is enabled).
 
 Uses a background task pattern: POST starts the sync, GET polls for progress.
+Each sync holds a per-workspace lease in system.ats_sync_state, which also
+stores its progress, so syncs never overlap across instances.
 """
 import asyncio
 import html as html_module
 import json
 import logging
+import os
 import re
+import socket
+import time
 import unicodedata
 import uuid as uuid_mod
-from datetime import date, datetime, timezone
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
@@ -29,13 +34,18 @@ from google.adk.errors.already_exists_error import AlreadyExistsError
 
 from src.services.providers import ATSProvider, get_provider
 from src.services.integration_service import PROVIDER_MAPPING_CONFIG
-from src.config import SIMULATED_REASONING
+from src.repositories.ats_sync_state_repo import AtsSyncStateRepository
+from src.config import (
+    SIMULATED_REASONING,
+    ATS_SYNC_INTERVAL,
+    ATS_SYNC_MIN_INTERVAL,
+    ATS_SYNC_MAX_INTERVAL,
+    ATS_SYNC_LEASE_SECONDS,
+)
+from src.utils.template_engine import CompiledMapping, get_compiled_mapping
 
 logger = logging.getLogger(__name__)
 
-# Regex to extract {{field}} placeholders from mapping templates
-TEMPLATE_PATTERN = re.compile(r"\{\{(\w+(?:\.\w+)*)\}\}")
-
 # Text sanitization patterns
 _CONTROL_CHAR_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
 _MULTI_SPACE_RE = re.compile(r"[ \t]+")
@@ -44,56 +54,143 @@ _HTML_TAG_RE = re.compile(r"<[^>]+>")
 
 
 # ---------------------------------------------------------------------------
-# In-memory sync progress (module-level singleton)
+# Per-workspace sync progress (persisted with the sync lease)
 # ---------------------------------------------------------------------------
 
-_sync_progress: dict | None = None
+# Unique indexes the bulk import's ON CONFLICT targets need (see run_schema_migrations)
+_BULK_IMPORT_INDEXES = [
+    "uq_recruiters_email", "uq_clients_workspace_name", "uq_office_locations_source", "uq_vacancies_source",
+]
 
+# Counters that make up the "processed" total used for throughput reporting
+_PROCESSED_KEYS = ("inserted", "updated", "skipped", "unpublished", "failed")
 
-def get_sync_progress() -> dict | None:
-    """Return current sync progress, or None if no sync has run."""
-    return _sync_progress
+# A sync with at least this many changed vacancies halves the workspace's interval
+_BUSY_CHANGE_COUNT = 25
 
 
-def clear_sync_progress():
-    """Clear sync progress."""
-    global _sync_progress
-    _sync_progress = None
+async def get_sync_progress(pool: asyncpg.Pool, workspace_id: UUID) -> dict | None:
+    """Return the latest sync progress for a workspace, or None if it never synced.
 
+    A sync whose lease expired while still "syncing" (instance crashed or was
+    stopped mid-sync) is reported as an error.
+    """
+    state = await AtsSyncStateRepository(pool).get_state(workspace_id)
+    if not state:
+        return None
+    progress = state["progress"]
+    if isinstance(progress, str):
+        progress = json.loads(progress)
+    progress = {**(progress or {}), "status": state["status"], "message": state["message"]}
+    if state["status"] == "syncing" and not state["lease_active"]:
+        progress["status"] = "error"
+        progress["message"] = "Sync onderbroken"
+    return progress
+
+
+def _next_sync_interval(previous: Optional[int], change_count: int) -> int:
+    """Adapt a workspace's sync interval to its change volume.
+
+    Quiet tenants (no changes) back off by 1.5x, busy tenants are synced twice
+    as often, anything in between drifts back to ATS_SYNC_INTERVAL. Bounded by
+    ATS_SYNC_MIN_INTERVAL and ATS_SYNC_MAX_INTERVAL.
+    """
+    interval = float(previous or ATS_SYNC_INTERVAL)
+    if change_count == 0:
+        interval *= 1.5
+    elif change_count >= _BUSY_CHANGE_COUNT:
+        interval /= 2
+    else:
+        interval = (interval + ATS_SYNC_INTERVAL) / 2
+    return int(min(max(interval, ATS_SYNC_MIN_INTERVAL), ATS_SYNC_MAX_INTERVAL))
 
-def _reset_progress():
-    """Reset progress to initial state."""
-    global _sync_progress
-    _sync_progress = {
-        "status": "syncing",
-        "message": "Vacatures ophalen...",
-        "total_fetched": 0,
-        "inserted": 0,
-        "updated": 0,
-        "skipped": 0,
-        "unpublished": 0,
-        "failed": 0,
-    }
 
+class SyncProgressTracker:
+    """
+    Progress of a single workspace sync.
 
-def _set_progress_error(message: str):
-    global _sync_progress
-    if _sync_progress is None:
-        _sync_progress = {}
-    _sync_progress["status"] = "error"
-    _sync_progress["message"] = message
+    Counters are kept in memory and written to system.ats_sync_state on
+    flush() (once per page), which also extends the workspace sync lease.
+    Slow stretches within a page (the per-record import) call heartbeat(),
+    which flushes once a quarter of the lease has passed since the last one.
+    A tracker without a workspace_id is detached and never touches the DB.
+    """
 
+    def __init__(self, pool: asyncpg.Pool, workspace_id: Optional[UUID]):
+        self.repo = AtsSyncStateRepository(pool)
+        self.workspace_id = workspace_id
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid_mod.uuid4().hex[:8]}"
+        self.started_at = time.monotonic()
+        self.flushed_at = self.started_at
+        self.data: dict = {
+            "status": "syncing",
+            "message": "Vacatures ophalen...",
+            "total_fetched": 0,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0,
+            "unpublished": 0,
+            "failed": 0,
+            "records_per_second": 0.0,
+        }
+
+    @property
+    def change_count(self) -> int:
+        """Vacancies inserted, updated or unpublished by this sync."""
+        return self.data["inserted"] + self.data["updated"] + self.data["unpublished"]
+
+    def update(self, **kwargs):
+        """Set progress fields and refresh records_per_second."""
+        self.data.update(kwargs)
+        elapsed = time.monotonic() - self.started_at
+        processed = sum(self.data.get(k, 0) for k in _PROCESSED_KEYS)
+        if elapsed > 0:
+            self.data["records_per_second"] = round(processed / elapsed, 1)
+
+    def increment(self, **counts: int):
+        """Add to one or more counters."""
+        self.update(**{key: self.data.get(key, 0) + n for key, n in counts.items()})
+
+    def error(self, message: str):
+        self.data["status"] = "error"
+        self.data["message"] = message
+
+    def complete(self):
+        self.data["status"] = "complete"
+        self.data["message"] = (
+            f"Sync voltooid: {self.data['inserted']} nieuw, "
+            f"{self.data['updated']} bijgewerkt, "
+            f"{self.data['skipped']} overgeslagen"
+        )
 
-def _set_progress_complete():
-    global _sync_progress
-    if _sync_progress is None:
-        return
-    _sync_progress["status"] = "complete"
-    _sync_progress["message"] = (
-        f"Sync voltooid: {_sync_progress['inserted']} nieuw, "
-        f"{_sync_progress['updated']} bijgewerkt, "
-        f"{_sync_progress['skipped']} overgeslagen"
-    )
+    async def acquire(self) -> bool:
+        """Take the workspace sync lease. Returns False if another sync holds it."""
+        return await self.repo.try_acquire_lease(self.workspace_id, self.owner, ATS_SYNC_LEASE_SECONDS)
+
+    async def flush(self) -> bool:
+        """Persist the current progress and extend the lease. Returns False if the lease was lost."""
+        if self.workspace_id is None:
+            return True
+        self.flushed_at = time.monotonic()
+        return await self.repo.save_progress(self.workspace_id, self.owner, self.data, ATS_SYNC_LEASE_SECONDS)
+
+    async def heartbeat(self) -> bool:
+        """flush() if a quarter of the lease passed since the last one. Returns False if the lease was lost."""
+        if time.monotonic() - self.flushed_at < ATS_SYNC_LEASE_SECONDS / 4:
+            return True
+        return await self.flush()
+
+    async def release(self):
+        """Persist the final progress, schedule the next sync and free the lease."""
+        if self.workspace_id is None:
+            return
+        state = await self.repo.get_state(self.workspace_id)
+        previous = state["sync_interval_seconds"] if state else None
+        if self.data["status"] == "error":
+            interval = previous or ATS_SYNC_INTERVAL
+        else:
+            interval = _next_sync_interval(previous, self.change_count)
+        await self.repo.release_lease(self.workspace_id, self.owner, self.data, self.change_count, interval)
 
 
 class VacancyImportService:
@@ -101,152 +198,234 @@ class VacancyImportService:
 
     def __init__(self, pool: asyncpg.Pool):
         self.pool = pool
+        self.progress = SyncProgressTracker(pool, None)
 
-    async def sync(self, workspace_id: UUID, full: bool = False) -> None:
+    async def sync(self, workspace_id: UUID, full: bool = False, bulk: bool = True) -> Optional[dict]:
         """
         Main sync entry point. Runs as a background task.
 
-        1. Find active ATS connection for workspace
-        2. Resolve provider + mapping
-        3. Fetch raw records via provider
-        4. Transform and upsert each record
+        1. Take the workspace sync lease (one sync per workspace across instances)
+        2. Find active ATS connection, resolve provider + mapping
+        3. Stream raw record pages from the provider
+        4. Transform and upsert each page as it arrives
+        5. Release the lease and schedule the next sync, then auto-generate
+           pre-screenings for new vacancies
+
+        Args:
+            bulk: Upsert each page with set-based statements (see _import_page_bulk).
+                  When false, or when a bulk page fails, records are imported one by one.
+
+        Returns the final progress dict, or None when another sync already
+        holds the workspace lease.
         """
-        _reset_progress()
+        self.progress = SyncProgressTracker(self.pool, workspace_id)
+        if not await self.progress.acquire():
+            logger.info(f"Sync for workspace {workspace_id} skipped — another sync holds the lease")
+            return None
 
+        newly_inserted: list[dict] = []
         try:
-            # Load the active ATS connection
-            connection = await self._get_active_connection(workspace_id)
-            if not connection:
-                _set_progress_error("Geen actieve integratie gevonden voor deze workspace")
-                return
+            newly_inserted = await self._run_import(workspace_id, full=full, bulk=bulk)
+        except Exception as e:
+            logger.error(f"Vacancy sync failed: {e}", exc_info=True)
+            self.progress.error(f"Sync mislukt: {str(e)}")
+        finally:
+            await self.progress.release()
 
-            provider_slug = connection["slug"]
-            try:
-                credentials = json.loads(connection["credentials"]) if isinstance(connection["credentials"], str) else connection["credentials"]
-                settings = json.loads(connection["settings"]) if isinstance(connection["settings"], str) else (connection["settings"] or {})
-            except (json.JSONDecodeError, TypeError) as e:
-                _set_progress_error(f"Ongeldige integratie-instellingen: {e}")
-                return
-
-            # Resolve the field mapping (custom or default)
-            mapping = self._get_active_mapping(settings, provider_slug)
-
-            # Get provider and fetch records (incremental: only since last sync)
-            provider: ATSProvider = get_provider(provider_slug)
-            last_synced_at = None if full else settings.get("last_synced_at")
-            if last_synced_at:
-                logger.info(f"Incremental sync since {last_synced_at}")
-            else:
-                logger.info("Full sync (no last_synced_at)")
-            _update_progress(message="Vacatures ophalen van extern systeem...")
+        # Phase 2: Auto-generate pre-screening questions for new vacancies
+        if newly_inserted:
+            await self._auto_generate_pre_screenings(workspace_id, newly_inserted)
+
+        return self.progress.data
+
+    async def _run_import(self, workspace_id: UUID, full: bool, bulk: bool) -> list[dict]:
+        """Import all vacancies for the workspace. Returns the newly inserted vacancies."""
+        # Load the active ATS connection
+        connection = await self._get_active_connection(workspace_id)
+        if not connection:
+            self.progress.error("Geen actieve integratie gevonden voor deze workspace")
+            return []
 
-            raw_records = await provider.fetch_vacancies(credentials, settings, mapping, since=last_synced_at)
-            _update_progress(total_fetched=len(raw_records), message=f"{len(raw_records)} vacatures opgehaald, importeren...")
+        provider_slug = connection["slug"]
+        try:
+            credentials = json.loads(connection["credentials"]) if isinstance(connection["credentials"], str) else connection["credentials"]
+            settings = json.loads(connection["settings"]) if isinstance(connection["settings"], str) else (connection["settings"] or {})
+        except (json.JSONDecodeError, TypeError) as e:
+            self.progress.error(f"Ongeldige integratie-instellingen: {e}")
+            return []
+
+        # Resolve the field mapping (custom or default) and compile it once for the whole sync
+        mapping = self._get_active_mapping(settings, provider_slug)
+        plan = self._compile_mapping(mapping, provider_slug, connection["id"])
+
+        # Get provider and fetch records (incremental: only since last sync)
+        provider: ATSProvider = get_provider(provider_slug)
+        last_synced_at = None if full else settings.get("last_synced_at")
+        if last_synced_at:
+            logger.info(f"Incremental sync since {last_synced_at}")
+        else:
+            logger.info("Full sync (no last_synced_at)")
+        self.progress.update(message="Vacatures ophalen van extern systeem...")
+        await self.progress.flush()
 
-            # Transform and upsert each record
-            newly_inserted: list[dict] = []  # Track new vacancies for auto-generation
+        # Stream pages from the provider: the next page is prefetched while
+        # the current one is written, so memory stays bounded to ~2 pages.
+        newly_inserted: list[dict] = []  # Track new vacancies for auto-generation
 
-            async with self.pool.acquire() as conn:
-                default_office_id = await self._get_default_office_location_id(conn, workspace_id)
+        async with self.pool.acquire() as conn:
+            default_office_id = await self._get_default_office_location_id(conn, workspace_id)
+            if bulk and not await self._bulk_indexes_present(conn):
+                logger.warning("Bulk vacancy import unavailable (unique indexes missing, see migration log): importing per record")
+                bulk = False
+
+            pages = provider.iter_vacancy_pages(credentials, settings, mapping, since=last_synced_at)
+            async for page in pages:
+                total_fetched = self.progress.data["total_fetched"] + len(page)
+                self.progress.update(
+                    total_fetched=total_fetched,
+                    message=f"{total_fetched} vacatures opgehaald, importeren...",
+                )
 
-                for record in raw_records:
+                imported = False
+                if bulk:
                     try:
-                        vacancy_data = self._transform_record(record, mapping)
-
-                        # Filter: check sync_filter and is_online flags from ATS
-                        sync_filter = vacancy_data.pop("sync_filter", None)
-                        is_online_ats = vacancy_data.pop("is_online", None)
-                        should_unpublish = (sync_filter is False) or (is_online_ats is False)
-
-                        if should_unpublish:
-                            # If vacancy already exists in TALOO, archive it and take agents offline
-                            source_id = vacancy_data.get("source_id")
-                            existing = await conn.fetchrow(
-                                "SELECT id, status FROM ats.vacancies WHERE source = $1 AND source_id = $2 AND workspace_id = $3",
-                                provider_slug, source_id, workspace_id,
-                            )
-                            if existing and existing["status"] not in ("closed", "filled"):
-                                await self._archive_vacancy(conn, existing["id"])
-                                _update_progress(unpublished=(_sync_progress or {}).get("unpublished", 0) + 1)
-                            else:
-                                _update_progress(skipped=(_sync_progress or {}).get("skipped", 0) + 1)
-                            continue
-
-                        # Ensure recruiter exists
-                        recruiter_id = None
-                        recruiter_email = vacancy_data.pop("recruiter_email", None)
-                        recruiter_name = vacancy_data.pop("recruiter_name", None)
-                        recruiter_phone = vacancy_data.pop("recruiter_phone", None)
-                        recruiter_role = vacancy_data.pop("recruiter_role", None)
-                        if recruiter_email:
-                            recruiter_id = await self._ensure_recruiter(
-                                conn, workspace_id, recruiter_email,
-                                name=recruiter_name or None,
-                                phone=recruiter_phone or None,
-                                role=recruiter_role or None,
-                            )
+                        await self._import_page_bulk(
+                            conn, workspace_id, provider_slug, page, plan,
+                            default_office_id, newly_inserted,
+                        )
+                        imported = True
+                    except asyncpg.PostgresError as e:
+                        logger.warning(f"Bulk import failed for page, falling back to per-record import: {e}")
+
+                if not imported:
+                    await self._import_records(
+                        conn, workspace_id, provider_slug, page, plan,
+                        default_office_id, newly_inserted,
+                    )
 
-                        # Ensure client exists
-                        client_id = None
-                        company = vacancy_data.get("company")
-                        if company:
-                            client_id = await self._ensure_client(conn, workspace_id, company)
-
-                        # Ensure office location exists (from Connexys data or fallback to default)
-                        office_location_id = default_office_id
-                        office_name = vacancy_data.pop("office_name", None)
-                        office_email = vacancy_data.pop("office_email", None)
-                        office_phone = vacancy_data.pop("office_phone", None)
-                        office_address = vacancy_data.pop("office_address", None)
-                        office_source_id = vacancy_data.pop("office_source_id", None)
-                        office_spoken_name = vacancy_data.pop("office_spoken_name", None)
-                        if office_name:
-                            office_location_id = await self._ensure_office_location(
-                                conn, workspace_id, provider_slug,
-                                name=office_name,
-                                email=office_email or None,
-                                phone=office_phone or None,
-                                address=office_address or None,
-                                source_id=office_source_id or None,
-                                spoken_name=office_spoken_name or None,
-                            )
+                # Persist progress and extend the lease once per page
+                if not await self.progress.flush():
+                    raise RuntimeError("Sync-lease verloren aan een andere instantie")
 
-                        # Upsert the vacancy
-                        action, vacancy_id = await self._upsert_vacancy(
-                            conn, workspace_id, provider_slug,
-                            vacancy_data, recruiter_id, client_id, office_location_id,
-                        )
+        # Save last_synced_at for incremental sync next time
+        await self._save_last_synced_at(connection["id"], settings)
 
-                        if action == "inserted":
-                            _update_progress(inserted=(_sync_progress or {}).get("inserted", 0) + 1)
-                            newly_inserted.append({
-                                "id": str(vacancy_id),
-                                "title": vacancy_data.get("title", ""),
-                                "description": vacancy_data.get("description", ""),
-                            })
-                        elif action == "reopened":
-                            from src.events import emit
-                            await emit("vacancy_reopened", pool=self.pool, vacancy_id=vacancy_id)
-                            _update_progress(updated=(_sync_progress or {}).get("updated", 0) + 1)
-                        elif action == "updated":
-                            _update_progress(updated=(_sync_progress or {}).get("updated", 0) + 1)
-
-                    except Exception as e:
-                        logger.error(f"Failed to import record {record.get('Id', '?')}: {e}")
-                        _update_progress(failed=(_sync_progress or {}).get("failed", 0) + 1)
-
-            # Save last_synced_at for incremental sync next time
-            await self._save_last_synced_at(connection["id"], settings)
-
-            _set_progress_complete()
-
-            # Phase 2: Auto-generate pre-screening questions for new vacancies
-            if newly_inserted:
-                await self._auto_generate_pre_screenings(workspace_id, newly_inserted)
+        self.progress.complete()
+        return newly_inserted
 
-        except Exception as e:
-            logger.error(f"Vacancy sync failed: {e}", exc_info=True)
-            _set_progress_error(f"Sync mislukt: {str(e)}")
+    async def _import_records(
+        self,
+        conn: asyncpg.Connection,
+        workspace_id: UUID,
+        provider_slug: str,
+        records: list[dict],
+        plan: CompiledMapping,
+        default_office_id: Optional[UUID],
+        newly_inserted: list[dict],
+    ) -> None:
+        """Import records one by one, counting failures without aborting the page."""
+        for record in records:
+            # One record at a time can take longer than the lease: keep it alive
+            if not await self.progress.heartbeat():
+                raise RuntimeError("Sync-lease verloren aan een andere instantie")
+            try:
+                await self._import_record(
+                    conn, workspace_id, provider_slug, record, plan,
+                    default_office_id, newly_inserted,
+                )
+            except Exception as e:
+                logger.error(f"Failed to import record {record.get('Id', '?')}: {e}")
+                self.progress.increment(failed=1)
+
+    async def _import_record(
+        self,
+        conn: asyncpg.Connection,
+        workspace_id: UUID,
+        provider_slug: str,
+        record: dict,
+        plan: CompiledMapping,
+        default_office_id: Optional[UUID],
+        newly_inserted: list[dict],
+    ) -> None:
+        """Transform a single raw record and upsert it with its related entities."""
+        vacancy_data = self._transform_record(record, plan)
+
+        # Filter: check sync_filter and is_online flags from ATS
+        sync_filter = vacancy_data.pop("sync_filter", None)
+        is_online_ats = vacancy_data.pop("is_online", None)
+        should_unpublish = (sync_filter is False) or (is_online_ats is False)
+
+        if should_unpublish:
+            # If vacancy already exists in TALOO, archive it and take agents offline
+            source_id = vacancy_data.get("source_id")
+            existing = await conn.fetchrow(
+                "SELECT id, status FROM ats.vacancies WHERE source = $1 AND source_id = $2 AND workspace_id = $3",
+                provider_slug, source_id, workspace_id,
+            )
+            if existing and existing["status"] not in ("closed", "filled"):
+                await self._archive_vacancy(conn, existing["id"])
+                self.progress.increment(unpublished=1)
+            else:
+                self.progress.increment(skipped=1)
+            return
+
+        # Ensure recruiter exists
+        recruiter_id = None
+        recruiter_email = vacancy_data.pop("recruiter_email", None)
+        recruiter_name = vacancy_data.pop("recruiter_name", None)
+        recruiter_phone = vacancy_data.pop("recruiter_phone", None)
+        recruiter_role = vacancy_data.pop("recruiter_role", None)
+        if recruiter_email:
+            recruiter_id = await self._ensure_recruiter(
+                conn, workspace_id, recruiter_email,
+                name=recruiter_name or None,
+                phone=recruiter_phone or None,
+                role=recruiter_role or None,
+            )
+
+        # Ensure client exists
+        client_id = None
+        company = vacancy_data.get("company")
+        if company:
+            client_id = await self._ensure_client(conn, workspace_id, company)
+
+        # Ensure office location exists (from Connexys data or fallback to default)
+        office_location_id = default_office_id
+        office_name = vacancy_data.pop("office_name", None)
+        office_email = vacancy_data.pop("office_email", None)
+        office_phone = vacancy_data.pop("office_phone", None)
+        office_address = vacancy_data.pop("office_address", None)
+        office_source_id = vacancy_data.pop("office_source_id", None)
+        office_spoken_name = vacancy_data.pop("office_spoken_name", None)
+        if office_name:
+            office_location_id = await self._ensure_office_location(
+                conn, workspace_id, provider_slug,
+                name=office_name,
+                email=office_email or None,
+                phone=office_phone or None,
+                address=office_address or None,
+                source_id=office_source_id or None,
+                spoken_name=office_spoken_name or None,
+            )
+
+        # Upsert the vacancy
+        action, vacancy_id = await self._upsert_vacancy(
+            conn, workspace_id, provider_slug,
+            vacancy_data, recruiter_id, client_id, office_location_id,
+        )
+
+        if action == "inserted":
+            self.progress.increment(inserted=1)
+            newly_inserted.append({
+                "id": str(vacancy_id),
+                "title": vacancy_data.get("title", ""),
+                "description": vacancy_data.get("description", ""),
+            })
+        elif action == "reopened":
+            await self._emit("vacancy_reopened", vacancy_id)
+            self.progress.increment(updated=1)
+        elif action == "updated":
+            self.progress.increment(updated=1)
 
     # =========================================================================
     # Connection & Mapping
@@ -296,51 +475,33 @@ class VacancyImportService:
     # =========================================================================
 
     @staticmethod
-    def _resolve_template(template: str, record: dict) -> str:
+    def _compile_mapping(
+        mapping: dict, provider_slug: str, connection_id: Optional[UUID] = None,
+    ) -> CompiledMapping:
         """
-        Resolve {{Field.Name}} placeholders from a record dict.
+        Compile the import mapping into a reusable plan (cached per mapping version).
 
-        Handles nested fields like Owner.Email by traversing the dict.
-        Returns empty string for None values.
+        Field types come from the provider's target fields: "html" fields keep
+        their tags when sanitized, "date" and "boolean" fields are coerced.
         """
-        def replacer(match):
-            field_path = match.group(1)
-            value = _get_nested_value(record, field_path)
-            return str(value) if value is not None else ""
-        return TEMPLATE_PATTERN.sub(replacer, template).strip()
-
-    # Fields that contain HTML content (should preserve tags but sanitize)
-    HTML_FIELDS = {"description"}
+        target_fields = PROVIDER_MAPPING_CONFIG.get(provider_slug, {}).get("target_fields", [])
+        return get_compiled_mapping(
+            mapping,
+            scope=f"import:{provider_slug}:{connection_id}",
+            field_types={f.name: f.type for f in target_fields},
+            preprocess=lambda value, field_type: _clean_text(value, is_html=field_type == "html"),
+        )
 
-    @classmethod
-    def _transform_record(cls, record: dict, mapping: dict) -> dict:
+    @staticmethod
+    def _transform_record(record: dict, plan: CompiledMapping) -> dict:
         """
-        Apply the full field mapping to a raw record.
+        Apply the compiled field mapping to a raw record.
 
         Returns a dict with keys matching Taloo vacancy fields.
-        Handles type coercion for dates and booleans.
-        Sanitizes text to remove control characters, null bytes, etc.
+        Text is sanitized to remove control characters, null bytes, etc.;
+        dates and booleans are coerced by the plan.
         """
-        result = {}
-        for target_field, config in mapping.items():
-            template = config.get("template", "")
-            if not template:
-                continue
-            value = cls._resolve_template(template, record)
-            if value:
-                value = _clean_text(value, is_html=target_field in cls.HTML_FIELDS)
-            result[target_field] = value
-
-        # Type coercion
-        if "start_date" in result:
-            result["start_date"] = _parse_date(result["start_date"])
-        if "sync_filter" in result:
-            result["sync_filter"] = _parse_boolean(result["sync_filter"])
-        if "is_online" in result:
-            # ATS is_online maps to should_unpublish logic, parse as boolean
-            result["is_online"] = _parse_boolean(result["is_online"])
-
-        return result
+        return plan.apply(record)
 
     # =========================================================================
     # Database Operations
@@ -414,13 +575,20 @@ class VacancyImportService:
 
     async def _archive_vacancy(self, conn: asyncpg.Connection, vacancy_id: UUID):
         """Archive vacancy and emit event for agents to handle their own cleanup."""
-        from src.events import emit
-
         await conn.execute(
             "UPDATE ats.vacancies SET status = 'closed' WHERE id = $1",
             vacancy_id,
         )
-        await emit("vacancy_archived", pool=self.pool, vacancy_id=vacancy_id)
+        await self._emit("vacancy_archived", vacancy_id)
+
+    async def _emit(self, event: str, vacancy_id: UUID):
+        """Emit a vacancy event; a failing handler is logged, the vacancy is already written."""
+        from src.events import emit
+
+        try:
+            await emit(event, pool=self.pool, vacancy_id=vacancy_id)
+        except Exception as e:
+            logger.error(f"Failed to emit {event} for vacancy {vacancy_id}: {e}")
 
     @staticmethod
     async def _ensure_recruiter(
@@ -485,11 +653,7 @@ class VacancyImportService:
         spoken_name: Optional[str] = None,
     ) -> UUID:
         """Lookup office location by source + source_id, or by name. Create if not found."""
-        # Clean up address (template may produce "  ,  " when fields are empty)
-        if address:
-            address = ", ".join(part.strip() for part in address.split(",") if part.strip())
-            if not address:
-                address = None
+        address = _clean_address(address)
 
         # Try to find by source_id first (most reliable)
         if source_id:
@@ -533,6 +697,15 @@ class VacancyImportService:
         """, workspace_id, name, address, email, phone, source, source_id, spoken_name)
         return row["id"]
 
+    @staticmethod
+    async def _bulk_indexes_present(conn: asyncpg.Connection) -> bool:
+        """Whether every unique index the bulk import relies on exists."""
+        count = await conn.fetchval(
+            "SELECT count(*) FROM pg_indexes WHERE schemaname = 'ats' AND indexname = ANY($1::text[])",
+            _BULK_IMPORT_INDEXES,
+        )
+        return count == len(_BULK_IMPORT_INDEXES)
+
     @staticmethod
     async def _get_default_office_location_id(conn: asyncpg.Connection, workspace_id: UUID) -> Optional[UUID]:
         """Look up the default office location for a workspace."""
@@ -542,6 +715,395 @@ class VacancyImportService:
         )
         return row["id"] if row else None
 
+    # =========================================================================
+    # Bulk Import (set-based upserts per page)
+    # =========================================================================
+
+    async def _import_page_bulk(
+        self,
+        conn: asyncpg.Connection,
+        workspace_id: UUID,
+        provider_slug: str,
+        records: list[dict],
+        plan: CompiledMapping,
+        default_office_id: Optional[UUID],
+        newly_inserted: list[dict],
+    ) -> None:
+        """
+        Import a whole page with a handful of set-based statements.
+
+        Transforms every record first, dedupes recruiters, clients and office
+        locations in memory, then resolves each entity type with a single
+        unnest-based INSERT ... ON CONFLICT ... RETURNING. Vacancies are
+        upserted in one statement that reports inserted/updated/reopened ids.
+
+        Runs in a transaction: on a database error the page is rolled back and
+        the exception propagates so the caller can retry per record. Events are
+        only emitted after the transaction commits.
+        """
+        page = self._prepare_page(records, plan)
+        failed = page["failed"]
+
+        async with conn.transaction():
+            archived_ids = await self._bulk_archive_vacancies(
+                conn, workspace_id, provider_slug, list(page["unpublish"]),
+            )
+            recruiter_ids = await self._bulk_ensure_recruiters(conn, page["recruiters"])
+            client_ids = await self._bulk_ensure_clients(conn, workspace_id, page["clients"])
+            office_ids = await self._bulk_ensure_office_locations(
+                conn, workspace_id, provider_slug, page["offices"],
+            )
+
+            rows = []
+            for item in page["vacancies"].values():
+                office_key = item["office_key"]
+                rows.append((
+                    item["data"],
+                    recruiter_ids.get(item["recruiter_email"]),
+                    client_ids.get(item["data"].get("company")),
+                    office_ids.get(office_key, default_office_id) if office_key else default_office_id,
+                ))
+            results = await self._bulk_upsert_vacancies(conn, workspace_id, provider_slug, rows)
+
+        # Post-commit: events (per vacancy, failures logged) and progress
+        for vacancy_id in archived_ids:
+            await self._emit("vacancy_archived", vacancy_id)
+
+        inserted = updated = 0
+        for action, vacancy_id, source_id in results:
+            if action == "inserted":
+                inserted += 1
+                data = page["vacancies"][source_id]["data"]
+                newly_inserted.append({
+                    "id": str(vacancy_id),
+                    "title": data.get("title", ""),
+                    "description": data.get("description", ""),
+                })
+            else:
+                updated += 1
+                if action == "reopened":
+                    await self._emit("vacancy_reopened", vacancy_id)
+
+        self.progress.increment(
+            inserted=inserted,
+            updated=updated,
+            unpublished=len(archived_ids),
+            skipped=len(page["unpublish"]) - len(archived_ids),
+            failed=failed,
+        )
+
+    @staticmethod
+    def _prepare_page(records: list[dict], plan: CompiledMapping) -> dict:
+        """
+        Transform a page of raw records and dedupe related entities in memory.
+
+        Returns a dict with:
+            vacancies: source_id -> {"data", "recruiter_email", "office_key"} (last record wins)
+            unpublish: set of source_ids to archive
+            recruiters: email -> {"name", "phone", "role"}
+            clients: set of company names
+            offices: office_key -> office fields, where office_key is
+                     ("source_id", id) or ("name", name)
+            failed: number of records that could not be transformed
+        """
+        vacancies: dict[str, dict] = {}
+        unpublish: set[str] = set()
+        recruiters: dict[str, dict] = {}
+        clients: set[str] = set()
+        offices: dict[tuple, dict] = {}
+        failed = 0
+
+        def _on_error(record: dict, e: Exception) -> None:
+            logger.error(f"Failed to transform record {record.get('Id', '?')}: {e}")
+
+        for record, vacancy_data in zip(records, plan.apply_batch(records, on_error=_on_error)):
+            if vacancy_data is None:
+                failed += 1
+                continue
+
+            source_id = vacancy_data.get("source_id")
+            if not source_id:
+                logger.error(f"Failed to import record {record.get('Id', '?')}: source_id is required for vacancy upsert")
+                failed += 1
+                continue
+
+            sync_filter = vacancy_data.pop("sync_filter", None)
+            is_online_ats = vacancy_data.pop("is_online", None)
+            if (sync_filter is False) or (is_online_ats is False):
+                unpublish.add(source_id)
+                vacancies.pop(source_id, None)
+                continue
+            unpublish.discard(source_id)
+
+            recruiter_email = vacancy_data.pop("recruiter_email", None) or None
+            recruiter = {
+                "name": vacancy_data.pop("recruiter_name", None) or None,
+                "phone": vacancy_data.pop("recruiter_phone", None) or None,
+                "role": vacancy_data.pop("recruiter_role", None) or None,
+            }
+            if recruiter_email:
+                recruiters[recruiter_email] = recruiter
+
+            if vacancy_data.get("company"):
+                clients.add(vacancy_data["company"])
+
+            office = {
+                "name": vacancy_data.pop("office_name", None) or None,
+                "email": vacancy_data.pop("office_email", None) or None,
+                "phone": vacancy_data.pop("office_phone", None) or None,
+                "address": _clean_address(vacancy_data.pop("office_address", None)),
+                "source_id": vacancy_data.pop("office_source_id", None) or None,
+                "spoken_name": vacancy_data.pop("office_spoken_name", None) or None,
+            }
+            office_key = None
+            if office["name"]:
+                office_key = ("source_id", office["source_id"]) if office["source_id"] else ("name", office["name"])
+                offices[office_key] = office
+
+            vacancies[source_id] = {
+                "data": vacancy_data,
+                "recruiter_email": recruiter_email,
+                "office_key": office_key,
+            }
+
+        return {
+            "vacancies": vacancies,
+            "unpublish": unpublish,
+            "recruiters": recruiters,
+            "clients": clients,
+            "offices": offices,
+            "failed": failed,
+        }
+
+    @staticmethod
+    async def _bulk_archive_vacancies(
+        conn: asyncpg.Connection, workspace_id: UUID, source: str, source_ids: list[str],
+    ) -> list[UUID]:
+        """Close all open vacancies with the given source ids. Returns the archived ids."""
+        if not source_ids:
+            return []
+        rows = await conn.fetch("""
+            UPDATE ats.vacancies SET status = 'closed'
+            WHERE workspace_id = $1 AND source = $2 AND source_id = ANY($3::text[])
+              AND status NOT IN ('closed', 'filled')
+            RETURNING id
+        """, workspace_id, source, source_ids)
+        return [row["id"] for row in rows]
+
+    @staticmethod
+    async def _bulk_ensure_recruiters(
+        conn: asyncpg.Connection, recruiters: dict[str, dict],
+    ) -> dict[str, UUID]:
+        """Upsert recruiters by email in one statement. Returns email -> recruiter id."""
+        if not recruiters:
+            return {}
+        emails = list(recruiters)
+        rows = await conn.fetch("""
+            INSERT INTO ats.recruiters AS r (name, email, phone, role, is_active)
+            SELECT COALESCE(i.name, i.email), i.email, i.phone, i.role, true
+            FROM unnest($1::text[], $2::text[], $3::text[], $4::text[]) AS i(email, name, phone, role)
+            ON CONFLICT (email) DO UPDATE SET
+                -- name falls back to the email on insert; keep the stored name in that case
+                name = CASE WHEN EXCLUDED.name = EXCLUDED.email THEN r.name ELSE EXCLUDED.name END,
+                phone = COALESCE(EXCLUDED.phone, r.phone),
+                role = COALESCE(EXCLUDED.role, r.role)
+            RETURNING id, email
+        """,
+            emails,
+            [recruiters[e]["name"] for e in emails],
+            [recruiters[e]["phone"] for e in emails],
+            [recruiters[e]["role"] for e in emails],
+        )
+        return {row["email"]: row["id"] for row in rows}
+
+    @staticmethod
+    async def _bulk_ensure_clients(
+        conn: asyncpg.Connection, workspace_id: UUID, names: set[str],
+    ) -> dict[str, UUID]:
+        """Upsert clients by name within the workspace. Returns name -> client id."""
+        if not names:
+            return {}
+        rows = await conn.fetch("""
+            INSERT INTO ats.clients (name, workspace_id)
+            SELECT n, $1 FROM unnest($2::text[]) AS n
+            ON CONFLICT (workspace_id, name) DO UPDATE SET name = EXCLUDED.name
+            RETURNING id, name
+        """, workspace_id, list(names))
+        return {row["name"]: row["id"] for row in rows}
+
+    async def _bulk_ensure_office_locations(
+        self,
+        conn: asyncpg.Connection,
+        workspace_id: UUID,
+        source: str,
+        offices: dict[tuple, dict],
+    ) -> dict[tuple, UUID]:
+        """
+        Resolve office locations for a page. Returns office_key -> location id.
+
+        Offices with an external id are upserted by (workspace, source, source_id)
+        in one statement; existing name-matched locations without a source id
+        adopt it first, mirroring _ensure_office_location. Offices known only by
+        name are rare and go through _ensure_office_location.
+        """
+        result: dict[tuple, UUID] = {}
+        by_source_id = [o for key, o in offices.items() if key[0] == "source_id"]
+
+        if by_source_id:
+            # Adopt the external id onto locations that were created by name; like the
+            # name match in _ensure_office_location, missing contact details keep the stored ones
+            adopted = await conn.fetch("""
+                UPDATE ats.office_locations o
+                SET source = $2, source_id = i.source_id,
+                    email = COALESCE(i.email, o.email), phone = COALESCE(i.phone, o.phone),
+                    address = COALESCE(NULLIF(i.address, ''), o.address),
+                    spoken_name = COALESCE(i.spoken_name, o.spoken_name),
+                    updated_at = now()
+                FROM unnest($3::text[], $4::text[], $5::text[], $6::text[], $7::text[], $8::text[])
+                    AS i(source_id, name, address, email, phone, spoken_name)
+                WHERE o.workspace_id = $1 AND o.name = i.name AND o.source_id IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM ats.office_locations x
+                      WHERE x.workspace_id = $1 AND x.source = $2 AND x.source_id = i.source_id
+                  )
+                RETURNING o.id, o.source_id
+            """, workspace_id, source, *self._office_columns(by_source_id))
+            result.update({("source_id", row["source_id"]): row["id"] for row in adopted})
+            upserts = [o for o in by_source_id if ("source_id", o["source_id"]) not in result]
+
+        if by_source_id and upserts:
+            rows = await conn.fetch("""
+                INSERT INTO ats.office_locations AS o
+                    (workspace_id, name, address, email, phone, source, source_id, spoken_name)
+                SELECT $1, i.name, COALESCE(i.address, ''), i.email, i.phone, $2, i.source_id, i.spoken_name
+                FROM unnest($3::text[], $4::text[], $5::text[], $6::text[], $7::text[], $8::text[])
+                    AS i(source_id, name, address, email, phone, spoken_name)
+                ON CONFLICT (workspace_id, source, source_id) WHERE source_id IS NOT NULL DO UPDATE SET
+                    name = EXCLUDED.name,
+                    email = EXCLUDED.email,
+                    phone = EXCLUDED.phone,
+                    address = COALESCE(NULLIF(EXCLUDED.address, ''), o.address),
+                    spoken_name = COALESCE(EXCLUDED.spoken_name, o.spoken_name),
+                    updated_at = now()
+                RETURNING id, source_id
+            """, workspace_id, source, *self._office_columns(upserts))
+            result.update({("source_id", row["source_id"]): row["id"] for row in rows})
+
+        for key, office in offices.items():
+            if key[0] == "name":
+                result[key] = await self._ensure_office_location(
+                    conn, workspace_id, source,
+                    name=office["name"],
+                    email=office["email"],
+                    phone=office["phone"],
+                    address=office["address"],
+                    spoken_name=office["spoken_name"],
+                )
+
+        return result
+
+    @staticmethod
+    def _office_columns(offices: list[dict]) -> list[list]:
+        """Column arrays for unnest(source_id, name, address, email, phone, spoken_name)."""
+        return [
+            [o[field] for o in offices]
+            for field in ("source_id", "name", "address", "email", "phone", "spoken_name")
+        ]
+
+    @staticmethod
+    async def _bulk_upsert_vacancies(
+        conn: asyncpg.Connection,
+        workspace_id: UUID,
+        source: str,
+        rows: list[tuple[dict, Optional[UUID], Optional[UUID], Optional[UUID]]],
+    ) -> list[tuple[str, UUID, str]]:
+        """
+        Upsert vacancies by (workspace, source, source_id) in one statement.
+
+        Args:
+            rows: (vacancy_data, recruiter_id, client_id, office_location_id) tuples
+                  with unique source_ids.
+
+        Returns (action, vacancy_id, source_id) tuples where action is
+        "inserted", "updated" or "reopened" (was closed/filled before).
+        Default agents are registered for inserted vacancies.
+        """
+        if not rows:
+            return []
+
+        result = await conn.fetch("""
+            WITH input AS (
+                SELECT * FROM unnest(
+                    $3::text[], $4::text[], $5::text[], $6::text[], $7::text[],
+                    $8::date[], $9::uuid[], $10::uuid[], $11::uuid[], $12::text[]
+                ) AS t(source_id, title, company, location, description,
+                       start_date, recruiter_id, client_id, office_location_id, job_url_website)
+            ),
+            previous AS (
+                -- Snapshot before the upsert: tells updated and reopened apart
+                SELECT v.source_id, v.status
+                FROM ats.vacancies v
+                JOIN input i ON i.source_id = v.source_id
+                WHERE v.workspace_id = $1 AND v.source = $2
+            ),
+            upserted AS (
+                INSERT INTO ats.vacancies
+                    (title, company, location, description, status, source, source_id,
+                     start_date, recruiter_id, client_id, workspace_id, office_location_id,
+                     job_url_website)
+                SELECT title, company, location, description, 'open', $2, source_id,
+                       start_date, recruiter_id, client_id, $1, office_location_id,
+                       job_url_website
+                FROM input
+                ON CONFLICT (workspace_id, source, source_id) DO UPDATE SET
+                    title = EXCLUDED.title, company = EXCLUDED.company,
+                    location = EXCLUDED.location, description = EXCLUDED.description,
+                    start_date = EXCLUDED.start_date, recruiter_id = EXCLUDED.recruiter_id,
+                    client_id = EXCLUDED.client_id, office_location_id = EXCLUDED.office_location_id,
+                    job_url_website = EXCLUDED.job_url_website,
+                    status = 'open'
+                RETURNING id, source_id
+            )
+            SELECT u.id, u.source_id, p.status AS previous_status
+            FROM upserted u
+            LEFT JOIN previous p ON p.source_id = u.source_id
+        """,
+            workspace_id, source,
+            [d.get("source_id") for d, *_ in rows],
+            [d.get("title") for d, *_ in rows],
+            [d.get("company") for d, *_ in rows],
+            [d.get("location") for d, *_ in rows],
+            [d.get("description") for d, *_ in rows],
+            [d.get("start_date") for d, *_ in rows],
+            [r[1] for r in rows],
+            [r[2] for r in rows],
+            [r[3] for r in rows],
+            [d.get("job_url_website") for d, *_ in rows],
+        )
+
+        actions: list[tuple[str, UUID, str]] = []
+        inserted_ids: list[UUID] = []
+        for row in result:
+            previous_status = row["previous_status"]
+            if previous_status is None:
+                action = "inserted"
+                inserted_ids.append(row["id"])
+            elif previous_status in ("closed", "filled"):
+                action = "reopened"
+            else:
+                action = "updated"
+            actions.append((action, row["id"], row["source_id"]))
+
+        # Register default agents for new vacancies
+        if inserted_ids:
+            await conn.execute("""
+                INSERT INTO ats.vacancy_agents (vacancy_id, agent_type, status)
+                SELECT id, 'document_collection', 'generated' FROM unnest($1::uuid[]) AS id
+                ON CONFLICT (vacancy_id, agent_type) DO NOTHING
+            """, inserted_ids)
+
+        return actions
+
     # =========================================================================
     # Auto-generate pre-screening questions
     # =========================================================================
@@ -822,41 +1384,9 @@ def _clean_text(value: str, *, is_html: bool = False) -> str:
     return value
 
 
-def _get_nested_value(record: dict, field_path: str):
-    """Resolve a dotted field path like 'Owner.Email' from a nested dict."""
-    parts = field_path.split(".")
-    current = record
-    for part in parts:
-        if not isinstance(current, dict):
-            return None
-        current = current.get(part)
-    return current
-
-
-def _parse_date(value: str) -> Optional[date]:
-    """Parse an ISO date string to a date object. Returns None on failure."""
-    if not value:
-        return None
-    try:
-        return date.fromisoformat(value[:10])
-    except (ValueError, TypeError):
+def _clean_address(address: Optional[str]) -> Optional[str]:
+    """Normalize an address template result (may produce "  ,  " when fields are empty)."""
+    if not address:
         return None
-
-
-def _parse_boolean(value) -> Optional[bool]:
-    """Parse a boolean value from various representations."""
-    if value is None or value == "":
-        return None
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, str):
-        return value.lower() in ("true", "1", "yes")
-    return bool(value)
-
-
-def _update_progress(**kwargs):
-    """Update specific fields in the sync progress dict."""
-    global _sync_progress
-    if _sync_progress is None:
-        return
-    _sync_progress.update(kwargs)
+    address = ", ".join(part.strip() for part in address.split(",") if part.strip())
+    return address or None
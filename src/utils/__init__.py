@@ -19,6 +19,8 @@ from .conversation_cache import (
     CachedConversation,
     CachedAgent,
     clear_all_caches,
+    configure_shared_tier,
+    close_shared_tier,
 )
 
 __all__ = [
@@ -35,4 +37,6 @@ __all__ = [
     "CachedConversation",
     "CachedAgent",
     "clear_all_caches",
+    "configure_shared_tier",
+    "close_shared_tier",
 ]
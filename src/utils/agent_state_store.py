@@ -0,0 +1,242 @@
+"""
+Delta persistence of agent state (agent_state JSONB columns).
+
+The pre-screening and document-collection agents persist their state after
+every turn. Writing the whole state each time sends the full document (tens
+of KB for long collections) on every message, although a turn typically
+changes a few top-level keys (phase, indices, one new result).
+
+AgentStateStore remembers, per conversation, a digest of every top-level key
+as last written, and on the next save writes only what changed:
+
+- full:  no baseline yet (first save in this process), every
+         AGENT_STATE_COMPACT_EVERY delta saves (compaction, re-converges the
+         row with the in-memory state), or a row that isn't a JSON object.
+- delta: agent_state = (agent_state || changed keys) - removed keys.
+- skip:  nothing changed; agent_state isn't touched at all (only the extra
+         columns, if any, are updated).
+
+Change tracking works on the serialized keys rather than on attribute
+assignments, because handlers mutate the results dicts and lists in place.
+
+The baseline also holds md5(agent_state::text) as it was after our write.
+Delta and skip saves only apply while the row still has that hash: another
+instance that took the conversation over, or a writer outside the store
+(the Yousign webhook, trigger_task_now), changes it, and the save then
+writes the whole state instead of a delta against an outdated baseline.
+
+Note that Postgres stores a changed JSONB value as a whole new version, so
+the row rewrite itself doesn't shrink with a delta: the saving is in bytes
+serialized and sent per turn, and in skipped writes, which leave the TOASTed
+state untouched. scripts/benchmark_state_persistence.py measures both.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+AGENT_STATE_COMPACT_EVERY = int(os.environ.get("AGENT_STATE_COMPACT_EVERY", "25"))
+AGENT_STATE_TRACKED_MAX = int(os.environ.get("AGENT_STATE_TRACKED_MAX", "5000"))
+
+# Tables with an agent_state JSONB column, keyed by id
+STATE_TABLES = ("agents.pre_screening_sessions", "agents.document_collections")
+
+FULL = "full"
+DELTA = "delta"
+SKIP = "skip"
+
+
+def _digest(serialized: str) -> bytes:
+    return hashlib.blake2b(serialized.encode(), digest_size=16).digest()
+
+
+@dataclass
+class _Baseline:
+    """Digests of the top-level keys as last written, the row's hash after that write, and delta saves since the last full one."""
+    digests: dict[str, bytes]
+    row_hash: str
+    deltas: int = 0
+
+
+@dataclass
+class StateWrite:
+    """What a save wrote."""
+    mode: str
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    bytes: int = 0
+
+
+class AgentStateStore:
+    """Writes agent state as top-level deltas against what this process wrote last."""
+
+    def __init__(
+        self,
+        compact_every: int = AGENT_STATE_COMPACT_EVERY,
+        max_tracked: int = AGENT_STATE_TRACKED_MAX,
+        tables: tuple[str, ...] = STATE_TABLES,
+    ):
+        self._tables = tables
+        self._compact_every = compact_every
+        self._max_tracked = max_tracked
+        self._baselines: OrderedDict[tuple[str, str], _Baseline] = OrderedDict()
+        self._bytes = {FULL: 0, DELTA: 0}
+        self._writes = {FULL: 0, DELTA: 0, SKIP: 0}
+
+    def plan(self, table: str, row_id, state: dict) -> tuple[StateWrite, str, dict[str, bytes]]:
+        """
+        Decide how to write a state, without writing it.
+
+        Returns:
+            (write, payload, digests): payload is the JSON to send (the full
+            state or the changed keys), digests the new baseline once written
+        """
+        serialized = {k: json.dumps(v, ensure_ascii=False) for k, v in state.items()}
+        digests = {k: _digest(s) for k, s in serialized.items()}
+
+        baseline = self._baselines.get((table, str(row_id)))
+        if baseline is None or baseline.deltas + 1 >= self._compact_every:
+            payload = "{" + ", ".join(f"{json.dumps(k)}: {s}" for k, s in serialized.items()) + "}"
+            return StateWrite(FULL, changed=list(state), bytes=len(payload.encode())), payload, digests
+
+        changed = [k for k, d in digests.items() if baseline.digests.get(k) != d]
+        removed = [k for k in baseline.digests if k not in digests]
+        if not changed and not removed:
+            return StateWrite(SKIP), "", digests
+
+        payload = "{" + ", ".join(f"{json.dumps(k)}: {serialized[k]}" for k in changed) + "}"
+        return StateWrite(DELTA, changed=changed, removed=removed, bytes=len(payload.encode())), payload, digests
+
+    def _remember(self, table: str, row_id, digests: dict[str, bytes], mode: str, row_hash: str):
+        key = (table, str(row_id))
+        if mode == FULL:
+            self._baselines[key] = _Baseline(digests, row_hash)
+        else:
+            baseline = self._baselines.get(key)
+            if baseline is None:
+                return
+            baseline.digests = digests
+            baseline.row_hash = row_hash
+            if mode == DELTA:
+                baseline.deltas += 1
+        self._baselines.move_to_end(key)
+        while len(self._baselines) > self._max_tracked:
+            self._baselines.popitem(last=False)
+
+    def forget(self, table: str, row_id):
+        """Drop the baseline (the row was written elsewhere); the next save is a full one."""
+        self._baselines.pop((table, str(row_id)), None)
+
+    async def save(
+        self,
+        pool: asyncpg.Pool,
+        table: str,
+        row_id,
+        state: dict,
+        extra_set: str = "",
+    ) -> StateWrite:
+        """
+        Persist an agent state to table.agent_state for row_id.
+
+        Args:
+            pool: Database pool (or connection)
+            table: One of the store's tables (STATE_TABLES)
+            row_id: The row's id (UUID or string)
+            state: The state dict (to_dict())
+            extra_set: Constant assignments to add to the UPDATE, e.g.
+                "message_count = COALESCE(message_count, 0) + 1"
+        """
+        if table not in self._tables:
+            raise ValueError(f"No agent_state column known for {table}")
+        extra = f", {extra_set}" if extra_set else ""
+        write, payload, digests = self.plan(table, row_id, state)
+
+        baseline = self._baselines.get((table, str(row_id)))
+        try:
+            if write.mode == DELTA:
+                row_hash = await pool.fetchval(
+                    f"""
+                    UPDATE {table}
+                    SET agent_state = (agent_state || $1::jsonb) - $2::text[], updated_at = NOW(){extra}
+                    WHERE id = $3::uuid AND jsonb_typeof(agent_state) = 'object'
+                      AND md5(agent_state::text) = $4
+                    RETURNING md5(agent_state::text)
+                    """,
+                    payload, write.removed, str(row_id), baseline.row_hash,
+                )
+            elif write.mode == FULL:
+                row_hash = await pool.fetchval(
+                    f"""
+                    UPDATE {table} SET agent_state = $1::jsonb, updated_at = NOW(){extra}
+                    WHERE id = $2::uuid
+                    RETURNING md5(agent_state::text)
+                    """,
+                    payload, str(row_id),
+                )
+            elif extra_set:
+                row_hash = await pool.fetchval(
+                    f"""
+                    UPDATE {table} SET updated_at = NOW(){extra}
+                    WHERE id = $1::uuid AND md5(agent_state::text) = $2
+                    RETURNING md5(agent_state::text)
+                    """,
+                    str(row_id), baseline.row_hash,
+                )
+            else:
+                row_hash = await pool.fetchval(
+                    f"SELECT md5(agent_state::text) FROM {table} WHERE id = $1::uuid", str(row_id)
+                )
+                if row_hash != baseline.row_hash:
+                    row_hash = None
+        except Exception:
+            # Unknown what the row holds now
+            self.forget(table, row_id)
+            raise
+
+        if row_hash is None and write.mode != FULL:
+            # Written elsewhere since our last save (or missing / not an object): write it whole
+            logger.info(f"💾 agent_state {table} {str(row_id)[:8]} changed elsewhere, writing it whole")
+            self.forget(table, row_id)
+            return await self.save(pool, table, row_id, state, extra_set)
+
+        if row_hash is None:
+            # Full write of a missing row: nothing to track
+            self.forget(table, row_id)
+        else:
+            self._remember(table, row_id, digests, write.mode, row_hash)
+        self._writes[write.mode] += 1
+        if write.mode != SKIP:
+            self._bytes[write.mode] += write.bytes
+        logger.debug(
+            f"💾 agent_state {write.mode} save {table} {str(row_id)[:8]}: "
+            f"{write.bytes} bytes, changed={write.changed if write.mode == DELTA else 'all'}"
+        )
+        return write
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._baselines),
+            "writes": dict(self._writes),
+            "bytes": dict(self._bytes),
+        }
+
+
+agent_state_store = AgentStateStore()
+
+
+async def save_agent_state(
+    pool: asyncpg.Pool,
+    table: str,
+    row_id,
+    state: dict,
+    extra_set: str = "",
+) -> StateWrite:
+    """Persist an agent state with the process-wide store (see AgentStateStore.save)."""
+    return await agent_state_store.save(pool, table, row_id, state, extra_set)
+
@@ -1,21 +1,97 @@
 """
-In-memory cache for conversation routing and agent instances.
+Two-tier cache for conversation routing and agent instances.
 
 Caches active conversation lookups to avoid repeated DB queries during
 the same conversation. Also caches agent instances to avoid
 deserializing/serializing agent state on every message.
 
-Uses TTL to auto-expire stale entries.
+Each cache has a local tier (per-process LRU with TTL) in front of an
+optional shared tier (see shared_cache.py) that all instances see:
+
+- Routing entries are stored in both tiers, so a message routed to another
+  instance still skips the routing queries.
+- Agents live in the local tier only (they're live objects); the shared tier
+  holds a snapshot of their state, published in the background after every
+  set so the shared write isn't on the reply path (one write in flight per
+  conversation; a newer state waiting behind it replaces an older one). An
+  instance that takes a conversation over restores from that snapshot
+  instead of agent_state, whose write is in the background too; only a
+  message that arrives within that publish round trip can miss it.
+- Every write notifies the other instances to drop their local copy, so the
+  instance that handled a conversation last (its owner) is the only one
+  serving it from memory. clear_all clears the shared tier too, and with it
+  every instance's local tier.
+
+Without a shared tier (configure_shared_tier not called, or
+CACHE_SHARED_BACKEND=none) the caches behave as before: per process.
+
+The local agent tier is bounded by entry count and approximate memory, with
+locks striped per key instead of one global lock. Agents whose state
+hasn't been persisted yet (dirty) are written back to their session table
+before they leave the local tier for any reason but another instance taking
+them over, and a background sweeper
+(cache_sweeper_loop) removes expired entries.
+
+The sweeper also packs the state of agents idle for AGENT_CACHE_PACK_AFTER
+seconds (see state_codec.py): the agent keeps its config and helpers, its
+state is held as compressed bytes and unpacked by the next get().
 """
 import asyncio
+import json
+import os
 import time
 import logging
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional, Any
 from enum import Enum
 
+import asyncpg
+
+from src.utils.agent_state_store import save_agent_state
+from src.utils.interview_session_cache import interview_session_cache
+from src.utils.nl_sql_cache import nl_sql_cache
+from src.utils.shared_cache import INSTANCE_ID, SharedCacheBackend, create_shared_backend
+from src.utils.state_codec import decode_state, encode_state
+from src.utils.type_registry import type_registry
+
 logger = logging.getLogger(__name__)
 
+# Local tier bound per cache (least recently used entries are dropped first)
+LOCAL_MAX_ENTRIES = 5000
+
+# Local agent tier bounds; sizes are estimates (see _estimate_agent_size)
+AGENT_CACHE_MAX_ENTRIES = int(os.environ.get("AGENT_CACHE_MAX_ENTRIES", "2000"))
+AGENT_CACHE_MAX_BYTES = int(os.environ.get("AGENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Per-key lock striping: keys only contend with keys hashing to the same stripe
+CACHE_LOCK_STRIPES = int(os.environ.get("CACHE_LOCK_STRIPES", "64"))
+
+# Seconds between expiry sweeps
+CACHE_SWEEP_INTERVAL = float(os.environ.get("CACHE_SWEEP_INTERVAL", "30"))
+
+# Seconds without get/set after which a cached agent's state is packed (0 = never)
+AGENT_CACHE_PACK_AFTER = float(os.environ.get("AGENT_CACHE_PACK_AFTER", "60"))
+
+# Approximate memory held per cached agent besides its state (object, config, entry)
+AGENT_BASE_BYTES = 4096
+# Live Python objects take roughly this many times their JSON size
+AGENT_STATE_OVERHEAD = 3
+
+# Where dirty agents are written back to, by agent class
+_WRITE_BACK_TABLE = {
+    "SimplePreScreeningAgent": "agents.pre_screening_sessions",
+    "DocumentCollectionAgent": "agents.document_collections",
+}
+
+_db_pool: Optional[asyncpg.Pool] = None
+
+
+def set_db_pool(pool: asyncpg.Pool):
+    """Set the database pool used to write back dirty agents."""
+    global _db_pool
+    _db_pool = pool
+
 
 class ConversationType(Enum):
     DOCUMENT_COLLECTION = "document_collection"
@@ -23,7 +99,7 @@ class ConversationType(Enum):
     NONE = "none"
 
 
-@dataclass
+@dataclass(slots=True)
 class CachedConversation:
     """Cached conversation routing info."""
     conversation_type: ConversationType
@@ -35,43 +111,222 @@ class CachedConversation:
     vacancy_title: Optional[str] = None
     cached_at: float = 0.0
 
-
-@dataclass
+    def to_dict(self) -> dict:
+        return {
+            "conversation_type": self.conversation_type.value,
+            "conversation_id": self.conversation_id,
+            "vacancy_id": self.vacancy_id,
+            "pre_screening_id": self.pre_screening_id,
+            "session_id": self.session_id,
+            "candidate_name": self.candidate_name,
+            "vacancy_title": self.vacancy_title,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, cached_at: float) -> "CachedConversation":
+        return cls(
+            conversation_type=ConversationType(data["conversation_type"]),
+            conversation_id=data.get("conversation_id"),
+            vacancy_id=data.get("vacancy_id"),
+            pre_screening_id=data.get("pre_screening_id"),
+            session_id=data.get("session_id"),
+            candidate_name=data.get("candidate_name"),
+            vacancy_title=data.get("vacancy_title"),
+            cached_at=cached_at,
+        )
+
+
+@dataclass(slots=True)
 class CachedAgent:
     """Cached agent instance with metadata."""
     agent: Any  # The actual agent object
     conversation_id: str
     cached_at: float = 0.0
     dirty: bool = False  # True if state needs to be saved to DB
+    size: int = 0  # Approximate bytes held
+    version: int = 0  # Bumped on every set; mark_clean only clears the version that was saved
+    used_at: float = 0.0  # Last get/set
+    packed: Optional[bytes] = None  # The agent's state while packed (agent.state is None then)
+    state_type: Any = None  # Class to restore a packed state with
+
+
+def _agent_state_dict(agent: Any) -> Optional[dict]:
+    state = getattr(agent, "state", None)
+    if state is None or not hasattr(state, "to_dict"):
+        return None
+    return state.to_dict()
+
 
+def _entry_state_dict(entry: CachedAgent) -> Optional[dict]:
+    if entry.packed is not None:
+        return decode_state(entry.packed)
+    return _agent_state_dict(entry.agent)
+
+
+def _estimate_agent_size(state_dict: Optional[dict]) -> int:
+    """Approximate memory held by a cached agent, from the size of its serialized state."""
+    if state_dict is None:
+        return AGENT_BASE_BYTES
+    return AGENT_BASE_BYTES + AGENT_STATE_OVERHEAD * len(json.dumps(state_dict, default=str))
+
+
+class _TwoTierCache:
+    """Local LRU with TTL, optionally backed by a shared tier."""
+
+    namespace = ""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = LOCAL_MAX_ENTRIES):
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._locks = [asyncio.Lock() for _ in range(CACHE_LOCK_STRIPES)]
+        self._shared: Optional[SharedCacheBackend] = None
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def _discard(self, key: str, entry, reason: str):
+        """Hook for entries leaving the local tier (already removed from it)."""
+
+    def attach_shared(self, shared: Optional[SharedCacheBackend]):
+        """Put a shared tier behind this cache (None = local only)."""
+        self._shared = shared
+        if shared is not None:
+            shared.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, namespace: Optional[str], key: Optional[str]):
+        """Another instance changed an entry: drop the local copy."""
+        if namespace is not None and namespace != self.namespace:
+            return
+        if key is None:
+            for k, entry in list(self._cache.items()):
+                del self._cache[k]
+                self._discard(k, entry, "flushed")
+        else:
+            entry = self._cache.pop(key, None)
+            if entry is not None:
+                self._discard(key, entry, "invalidated")
+
+    def _is_expired(self, entry) -> bool:
+        return time.time() - entry.cached_at > self._ttl
+
+    def _local_get(self, key: str):
+        """Local entry, if present, fresh and trustworthy (no missed invalidations)."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if self._is_expired(entry):
+            del self._cache[key]
+            self._discard(key, entry, "expired")
+            return None
+        if self._shared is not None and not self._shared.coherent:
+            del self._cache[key]
+            self._discard(key, entry, "incoherent")
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: str, entry):
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._discard(key, previous, "replaced")
+        self._cache[key] = entry
+        self._evict()
+
+    def _over_capacity(self) -> bool:
+        return len(self._cache) > self._max_entries
+
+    def _evict(self):
+        """Drop least recently used entries while over capacity."""
+        while len(self._cache) > 1 and self._over_capacity():
+            key, entry = self._cache.popitem(last=False)
+            self._discard(key, entry, "evicted")
+
+    async def _shared_get(self, key: str):
+        if self._shared is None:
+            return None
+        try:
+            return await self._shared.get(self.namespace, key)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed ({self.namespace}): {e}")
+            return None
 
-class ConversationCache:
+    async def _shared_set(self, key: str, value: dict) -> Optional[str]:
+        if self._shared is None:
+            return None
+        try:
+            return await self._shared.set(self.namespace, key, value, self._ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed ({self.namespace}): {e}")
+            return None
+
+    async def _shared_delete(self, key: str):
+        if self._shared is None:
+            return
+        try:
+            await self._shared.delete(self.namespace, key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed ({self.namespace}): {e}")
+
+    async def cleanup_expired(self):
+        """Remove all expired entries."""
+        now = time.time()
+        expired = [k for k, v in self._cache.items() if now - v.cached_at > self._ttl]
+        for k in expired:
+            entry = self._cache.pop(k)
+            self._discard(k, entry, "expired")
+        if expired:
+            logger.debug(f"{self.namespace} cache cleanup: removed {len(expired)} expired entries")
+        if self._shared is not None:
+            try:
+                await self._shared.purge_expired()
+            except Exception as e:
+                logger.warning(f"Shared cache cleanup failed: {e}")
+
+    async def clear_all(self) -> int:
+        """Clear all cached entries, on every instance when there is a shared tier."""
+        count = len(self._cache)
+        for key, entry in list(self._cache.items()):
+            del self._cache[key]
+            self._discard(key, entry, "cleared")
+        if self._shared is not None:
+            try:
+                count = max(count, await self._shared.clear(self.namespace))
+            except Exception as e:
+                logger.warning(f"Shared cache clear failed ({self.namespace}): {e}")
+        logger.info(f"{self.namespace} cache CLEARED: removed {count} entries")
+        return count
+
+
+class ConversationCache(_TwoTierCache):
     """
-    Simple TTL-based cache for conversation routing.
+    TTL-based cache for conversation routing.
 
     Maps phone number -> active conversation info.
     TTL is short (60s) since conversations can change status.
     """
 
-    def __init__(self, ttl_seconds: int = 60):
-        self._cache: dict[str, CachedConversation] = {}
-        self._ttl = ttl_seconds
-        self._lock = asyncio.Lock()
+    namespace = "conversation"
 
-    def _is_expired(self, entry: CachedConversation) -> bool:
-        return time.time() - entry.cached_at > self._ttl
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = LOCAL_MAX_ENTRIES):
+        super().__init__(ttl_seconds, max_entries)
 
     async def get(self, phone: str) -> Optional[CachedConversation]:
         """Get cached conversation for phone number."""
-        async with self._lock:
-            entry = self._cache.get(phone)
-            if entry and not self._is_expired(entry):
-                logger.debug(f"Cache HIT for {phone}: {entry.conversation_type.value}")
-                return entry
-            elif entry:
-                # Expired, remove it
-                del self._cache[phone]
+        async with self._lock_for(phone):
+            entry = self._local_get(phone)
+        if entry:
+            logger.debug(f"Cache HIT for {phone}: {entry.conversation_type.value}")
+            return entry
+
+        shared = await self._shared_get(phone)
+        if shared is None:
             return None
+        entry = CachedConversation.from_dict(shared.value, cached_at=time.time())
+        async with self._lock_for(phone):
+            self._local_put(phone, entry)
+        logger.debug(f"Shared cache HIT for {phone}: {entry.conversation_type.value} (owner {shared.owner})")
+        return entry
 
     async def set(
         self,
@@ -85,119 +340,324 @@ class ConversationCache:
         vacancy_title: Optional[str] = None,
     ):
         """Cache conversation routing info for phone number."""
-        async with self._lock:
-            self._cache[phone] = CachedConversation(
-                conversation_type=conversation_type,
-                conversation_id=conversation_id,
-                vacancy_id=vacancy_id,
-                pre_screening_id=pre_screening_id,
-                session_id=session_id,
-                candidate_name=candidate_name,
-                vacancy_title=vacancy_title,
-                cached_at=time.time(),
-            )
-            logger.debug(f"Cache SET for {phone}: {conversation_type.value}")
+        entry = CachedConversation(
+            conversation_type=conversation_type,
+            conversation_id=conversation_id,
+            vacancy_id=vacancy_id,
+            pre_screening_id=pre_screening_id,
+            session_id=session_id,
+            candidate_name=candidate_name,
+            vacancy_title=vacancy_title,
+            cached_at=time.time(),
+        )
+        async with self._lock_for(phone):
+            self._local_put(phone, entry)
+        await self._shared_set(phone, entry.to_dict())
+        logger.debug(f"Cache SET for {phone}: {conversation_type.value}")
 
     async def invalidate(self, phone: str):
         """Remove cached entry for phone number."""
-        async with self._lock:
-            if phone in self._cache:
-                del self._cache[phone]
+        async with self._lock_for(phone):
+            if self._cache.pop(phone, None) is not None:
                 logger.debug(f"Cache INVALIDATED for {phone}")
-
-    async def cleanup_expired(self):
-        """Remove all expired entries."""
-        async with self._lock:
-            now = time.time()
-            expired = [k for k, v in self._cache.items() if now - v.cached_at > self._ttl]
-            for k in expired:
-                del self._cache[k]
-            if expired:
-                logger.debug(f"Cache cleanup: removed {len(expired)} expired entries")
-
-    async def clear_all(self):
-        """Clear all cached entries."""
-        async with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            logger.info(f"Conversation cache CLEARED: removed {count} entries")
-            return count
+        await self._shared_delete(phone)
 
 
-class AgentCache:
+class AgentCache(_TwoTierCache):
     """
-    In-memory cache for agent instances.
+    Cache for agent instances.
 
     Caches agent objects to avoid loading/restoring from DB on every message.
     TTL is longer (5 min) since conversations are typically short-lived.
+
+    Bounded by entry count and approximate bytes (least recently used agents
+    go first). Agents set with dirty=True hold state that isn't persisted
+    yet; when such an agent leaves the cache (evicted, expired, cleared) it
+    is written back to its session table first, and stays retrievable until
+    that finished. mark_clean() clears the flag once the regular save landed.
+    Agents dropped because another instance changed them are never written
+    back: that instance has the newer state. Agents dropped because the
+    shared tier was flushed or missed invalidations are: nothing says
+    another instance has anything newer.
     """
 
-    def __init__(self, ttl_seconds: int = 300):
-        self._cache: dict[str, CachedAgent] = {}
-        self._ttl = ttl_seconds
-        self._lock = asyncio.Lock()
+    namespace = "agent"
 
-    def _is_expired(self, entry: CachedAgent) -> bool:
-        return time.time() - entry.cached_at > self._ttl
+    # Reasons to leave the cache after which this instance's state is still the latest
+    _WRITE_BACK_REASONS = {"evicted", "expired", "cleared", "flushed", "incoherent"}
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_entries: int = AGENT_CACHE_MAX_ENTRIES,
+        max_bytes: int = AGENT_CACHE_MAX_BYTES,
+    ):
+        super().__init__(ttl_seconds, max_entries)
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._version = 0
+        self._evicting: dict[str, CachedAgent] = {}
+        self._write_backs: set[asyncio.Task] = set()
+        # Shared-tier state publishing: latest unpublished state and the task publishing it, per key
+        self._unpublished: dict[str, dict] = {}
+        self._publishers: dict[str, asyncio.Task] = {}
+        self._evictions = 0
+        self._written_back = 0
+
+    def _over_capacity(self) -> bool:
+        return len(self._cache) > self._max_entries or self._bytes > self._max_bytes
+
+    def _discard(self, key: str, entry: CachedAgent, reason: str):
+        self._bytes -= entry.size
+        if reason == "evicted":
+            self._evictions += 1
+        if entry.dirty and reason in self._WRITE_BACK_REASONS:
+            self._evicting[key] = entry
+            task = asyncio.create_task(self._write_back(key, entry))
+            self._write_backs.add(task)
+            task.add_done_callback(self._write_backs.discard)
+
+    async def _write_back(self, key: str, entry: CachedAgent):
+        """Persist a dirty agent's state to its session table."""
+        try:
+            async with self._lock_for(key):
+                if not entry.dirty:
+                    return
+                table = _WRITE_BACK_TABLE.get(type(entry.agent).__name__)
+                state = _entry_state_dict(entry)
+                if table is None or state is None or _db_pool is None:
+                    logger.warning(f"Agent {key[:8]} dropped with unsaved state (no write-back for {type(entry.agent).__name__})")
+                    return
+                version = entry.version
+                await save_agent_state(_db_pool, table, key, state)
+                if entry.version == version:
+                    entry.dirty = False
+                self._written_back += 1
+                logger.info(f"💾 Agent {key[:8]} written back before eviction")
+        except Exception as e:
+            logger.error(f"❌ Write-back of agent {key[:8]} failed: {e}")
+        finally:
+            if self._evicting.get(key) is entry:
+                del self._evicting[key]
 
     async def get(self, conversation_id: str) -> Optional[Any]:
-        """Get cached agent for conversation."""
-        async with self._lock:
-            entry = self._cache.get(conversation_id)
-            if entry and not self._is_expired(entry):
-                logger.debug(f"Agent cache HIT for {conversation_id[:8]}")
-                return entry.agent
-            elif entry:
-                # Expired, remove it
-                del self._cache[conversation_id]
-                logger.debug(f"Agent cache EXPIRED for {conversation_id[:8]}")
+        """Get cached agent for conversation (only from this instance's memory)."""
+        async with self._lock_for(conversation_id):
+            entry = self._local_get(conversation_id)
+            coherent = self._shared is None or self._shared.coherent
+            if entry is None and conversation_id in self._evicting and coherent:
+                # Evicted but not written back yet: its state is newer than the DB's
+                entry = self._evicting[conversation_id]
+                entry.cached_at = time.time()
+                self._bytes += entry.size
+                self._local_put(conversation_id, entry)
+            if entry is not None:
+                entry.used_at = time.time()
+                if entry.packed is not None:
+                    self._unpack(entry)
+        if entry:
+            logger.debug(f"Agent cache HIT for {conversation_id[:8]}")
+            return entry.agent
+        return None
+
+    async def get_state(self, conversation_id: str) -> Optional[dict]:
+        """Latest state snapshot written by any instance, to restore the agent from."""
+        shared = await self._shared_get(conversation_id)
+        if shared is None:
             return None
-
-    async def set(self, conversation_id: str, agent: Any):
-        """Cache agent instance."""
-        async with self._lock:
-            self._cache[conversation_id] = CachedAgent(
+        if shared.owner != INSTANCE_ID:
+            logger.info(f"Agent {conversation_id[:8]} taken over from instance {shared.owner}")
+        return shared.value.get("state")
+
+    async def set(self, conversation_id: str, agent: Any, dirty: bool = False) -> int:
+        """
+        Cache agent instance (and publish its state to the shared tier).
+
+        Args:
+            conversation_id: Conversation the agent belongs to
+            agent: The agent
+            dirty: The agent's current state isn't persisted yet
+
+        Returns:
+            Version of this entry, to pass to mark_clean once the state is saved
+        """
+        state = _agent_state_dict(agent)
+        async with self._lock_for(conversation_id):
+            self._version += 1
+            now = time.time()
+            entry = CachedAgent(
                 agent=agent,
                 conversation_id=conversation_id,
-                cached_at=time.time(),
-                dirty=False,
+                cached_at=now,
+                dirty=dirty,
+                size=_estimate_agent_size(state),
+                version=self._version,
+                used_at=now,
             )
-            logger.debug(f"Agent cache SET for {conversation_id[:8]}")
+            self._bytes += entry.size
+            self._local_put(conversation_id, entry)
+        if state is not None and self._shared is not None:
+            self._publish(conversation_id, state)
+        logger.debug(f"Agent cache SET for {conversation_id[:8]}")
+        return entry.version
+
+    def _publish(self, key: str, state: dict):
+        """Write the state to the shared tier in the background, after any write in flight."""
+        self._unpublished[key] = state
+        if key not in self._publishers:
+            self._publishers[key] = asyncio.create_task(self._publish_loop(key))
+
+    async def _publish_loop(self, key: str):
+        try:
+            while key in self._unpublished:
+                state = self._unpublished.pop(key)
+                try:
+                    await self._shared.set(self.namespace, key, {"state": state}, self._ttl)
+                except Exception as e:
+                    logger.warning(f"Shared cache write failed ({self.namespace}): {e}")
+                    # The shared snapshot is now older than this state: drop it, so a
+                    # restore elsewhere falls back to the DB instead of preferring it
+                    await self._shared_delete(key)
+        finally:
+            del self._publishers[key]
+
+    def _pack(self, entry: CachedAgent):
+        state = entry.agent.state
+        packed = encode_state(state.to_dict())
+        entry.state_type = type(state)
+        entry.packed = packed
+        entry.agent.state = None
+        self._bytes -= entry.size
+        entry.size = AGENT_BASE_BYTES + len(packed)
+        self._bytes += entry.size
+
+    def _unpack(self, entry: CachedAgent):
+        state_dict = decode_state(entry.packed)
+        entry.agent.state = entry.state_type.from_dict(state_dict)
+        entry.packed = None
+        entry.state_type = None
+        self._bytes -= entry.size
+        entry.size = _estimate_agent_size(state_dict)
+        self._bytes += entry.size
+
+    def pack_idle(self, idle_seconds: float = AGENT_CACHE_PACK_AFTER) -> int:
+        """Pack the state of agents not used for idle_seconds. Returns how many were packed."""
+        if idle_seconds <= 0:
+            return 0
+        cutoff = time.time() - idle_seconds
+        packed = 0
+        for key, entry in list(self._cache.items()):
+            if entry.packed is not None or entry.used_at > cutoff:
+                continue
+            if not hasattr(getattr(entry.agent, "state", None), "to_dict"):
+                continue
+            try:
+                self._pack(entry)
+                packed += 1
+            except Exception as e:
+                logger.warning(f"Could not pack agent {key[:8]}: {e}")
+        if packed:
+            logger.debug(f"Packed {packed} idle agents")
+        return packed
+
+    def mark_clean(self, conversation_id: str, version: int):
+        """The state of this entry version has been saved; no write-back needed."""
+        for entry in (self._cache.get(conversation_id), self._evicting.get(conversation_id)):
+            if entry is not None and entry.version == version:
+                entry.dirty = False
 
     async def invalidate(self, conversation_id: str):
         """Remove cached agent."""
-        async with self._lock:
-            if conversation_id in self._cache:
-                del self._cache[conversation_id]
+        async with self._lock_for(conversation_id):
+            entry = self._cache.pop(conversation_id, None)
+            if entry is not None:
+                self._discard(conversation_id, entry, "invalidated")
                 logger.debug(f"Agent cache INVALIDATED for {conversation_id[:8]}")
-
-    async def cleanup_expired(self):
-        """Remove all expired entries."""
-        async with self._lock:
-            now = time.time()
-            expired = [k for k, v in self._cache.items() if now - v.cached_at > self._ttl]
-            for k in expired:
-                del self._cache[k]
-            if expired:
-                logger.debug(f"Agent cache cleanup: removed {len(expired)} expired entries")
-
-    async def clear_all(self):
-        """Clear all cached agents."""
-        async with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            logger.info(f"Agent cache CLEARED: removed {count} entries")
-            return count
+        # Don't let a publish in flight land after the delete
+        self._unpublished.pop(conversation_id, None)
+        publisher = self._publishers.get(conversation_id)
+        if publisher is not None:
+            await asyncio.gather(publisher, return_exceptions=True)
+        await self._shared_delete(conversation_id)
+
+    async def flush(self):
+        """Write back every dirty agent (e.g. on shutdown) and wait for pending write-backs."""
+        for key, entry in list(self._cache.items()):
+            if entry.dirty:
+                await self._write_back(key, entry)
+        if self._write_backs:
+            await asyncio.gather(*self._write_backs, return_exceptions=True)
+        if self._publishers:
+            await asyncio.gather(*self._publishers.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._cache),
+            "approx_bytes": self._bytes,
+            "dirty": sum(1 for e in self._cache.values() if e.dirty),
+            "packed": sum(1 for e in self._cache.values() if e.packed is not None),
+            "pending_write_backs": len(self._evicting),
+            "evictions": self._evictions,
+            "written_back": self._written_back,
+        }
 
 
 # Global cache instances
 conversation_cache = ConversationCache(ttl_seconds=60)
 agent_cache = AgentCache(ttl_seconds=300)
 
+_shared_tier: Optional[SharedCacheBackend] = None
+
+
+async def configure_shared_tier(pool, database_url: Optional[str]):
+    """Put the shared tier (CACHE_SHARED_BACKEND) behind the global caches and start listening."""
+    global _shared_tier
+    dsn = database_url.replace("postgresql+asyncpg://", "postgresql://") if database_url else None
+    _shared_tier = create_shared_backend(pool, dsn)
+    if _shared_tier is None:
+        logger.info("Conversation/agent caches: local tier only")
+        return
+    await _shared_tier.start()
+    conversation_cache.attach_shared(_shared_tier)
+    agent_cache.attach_shared(_shared_tier)
+    type_registry.attach_shared(_shared_tier)
+    interview_session_cache.attach_shared(_shared_tier)
+    nl_sql_cache.attach_shared(_shared_tier)
+    logger.info(f"Conversation/agent caches: shared tier {type(_shared_tier).__name__} (instance {INSTANCE_ID})")
+
+
+async def close_shared_tier():
+    """Stop the shared tier's invalidation listener."""
+    global _shared_tier
+    if _shared_tier is not None:
+        await _shared_tier.stop()
+        conversation_cache.attach_shared(None)
+        agent_cache.attach_shared(None)
+        type_registry.attach_shared(None)
+        interview_session_cache.attach_shared(None)
+        nl_sql_cache.attach_shared(None)
+        _shared_tier = None
+
+
+async def cache_sweeper_loop(interval: float = CACHE_SWEEP_INTERVAL):
+    """Background task: remove expired entries (writing back dirty agents) and pack idle agents every interval."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await conversation_cache.cleanup_expired()
+            await agent_cache.cleanup_expired()
+            agent_cache.pack_idle()
+            logger.debug(f"Agent cache: {agent_cache.stats()}")
+        except Exception as e:
+            logger.error(f"Cache sweep failed: {e}")
+
 
 async def clear_all_caches():
-    """Clear all conversation and agent caches. Returns count of cleared entries."""
+    """Clear all conversation and agent caches (and type snapshots, clean interview sessions, cached analyst SQL). Returns count of cleared entries."""
     conv_count = await conversation_cache.clear_all()
     agent_count = await agent_cache.clear_all()
+    type_registry.clear()
+    interview_session_cache.clear()
+    nl_sql_cache.clear()
     logger.info(f"All caches cleared: {conv_count} conversations, {agent_count} agents")
     return {"conversations": conv_count, "agents": agent_count}
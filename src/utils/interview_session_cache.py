@@ -0,0 +1,450 @@
+"""
+In-process write-behind cache of interview generator session state.
+
+The recruiter's question edits (reorder, delete, add) used to do a full ADK
+get_session from the DatabaseSessionService (session row plus every event)
+followed by an append_event, for every single edit; dragging questions around
+produced a burst of both. The cache keeps, per session:
+
+- the interview dict and the ADK session object it was loaded with, so reads
+  and edits are served from memory;
+- a version, bumped by every edit, and the version last persisted. Edits are
+  optimistic: they're applied to a copy of the version they read and only
+  committed if that is still the current version (otherwise retried);
+- a debounced flush: INTERVIEW_SESSION_FLUSH_DELAY seconds after the last
+  edit, everything since the previous flush is persisted as one event.
+  The flush reloads the session first and compares its interview with the
+  one the edits were made on; if another instance (or a write that bypassed
+  the cache, like a regeneration) changed it in the meantime, the stored
+  interview wins and the pending edits are discarded: they address questions
+  by ids (ko_1, ...) that a regenerated interview reuses for other questions.
+  If the session was deleted, the entry and its edits are dropped.
+
+The agent writes the same state through its tools (stream_feedback and
+generation), so an agent turn is bracketed with agent_turn(): pending edits
+are flushed first (or discarded, for a fresh generation), edits arriving
+during the turn wait for it (up to INTERVIEW_SESSION_TURN_WAIT seconds,
+then fail with TimeoutError), and the state the agent left is put back with
+put() afterwards. A turn that ends without put() drops the entry, so the next
+read loads from the session service again.
+
+With a shared cache tier (see shared_cache.py), flushing and put() notify
+the other instances to drop their copy of the session.
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from src.utils.shared_cache import SharedCacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last edit before the edits are persisted
+INTERVIEW_SESSION_FLUSH_DELAY = float(os.environ.get("INTERVIEW_SESSION_FLUSH_DELAY", "1.5"))
+INTERVIEW_SESSION_MAX = int(os.environ.get("INTERVIEW_SESSION_MAX", "500"))
+INTERVIEW_SESSION_TTL = float(os.environ.get("INTERVIEW_SESSION_TTL", "1800"))
+# Longest an edit waits for a running agent turn (generation) before failing
+INTERVIEW_SESSION_TURN_WAIT = float(os.environ.get("INTERVIEW_SESSION_TURN_WAIT", "120"))
+
+# Namespace of interview session invalidations in the shared tier
+NAMESPACE = "interview"
+
+# Optimistic edit attempts before giving up
+_EDIT_ATTEMPTS = 5
+
+# load() -> (adk_session, interview), or None if there is no session
+Loader = Callable[[], Awaitable[Optional[tuple[Any, dict]]]]
+# persist(adk_session or None, interview, reason) -> the session to keep using
+Persister = Callable[[Any, dict, str], Awaitable[Any]]
+
+
+def _same_interview(a: dict, b: dict) -> bool:
+    """Equal as stored (JSON), so a round trip through the session service isn't a change."""
+    return json.dumps(a, sort_keys=True, default=str) == json.dumps(b, sort_keys=True, default=str)
+
+
+@dataclass(slots=True)
+class _SessionEntry:
+    session: Any
+    interview: dict
+    # The stored interview the pending edits were made on (None: unknown, not checked)
+    base: Optional[dict] = None
+    version: int = 0
+    persisted_version: int = 0
+    reasons: list[str] = field(default_factory=list)
+    load: Optional[Loader] = None
+    persist: Optional[Persister] = None
+    flush_task: Optional[asyncio.Task] = None
+    flush_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    edited_at: float = 0.0
+    used_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def dirty(self) -> bool:
+        return self.version > self.persisted_version
+
+
+class InterviewSessionCache:
+    """Interview state per session, read from memory and persisted behind edits."""
+
+    def __init__(
+        self,
+        flush_delay: float = INTERVIEW_SESSION_FLUSH_DELAY,
+        max_sessions: int = INTERVIEW_SESSION_MAX,
+        ttl_seconds: float = INTERVIEW_SESSION_TTL,
+        turn_wait: float = INTERVIEW_SESSION_TURN_WAIT,
+    ):
+        self._flush_delay = flush_delay
+        self._turn_wait = turn_wait
+        self._max_sessions = max_sessions
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, _SessionEntry] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+        self._turns: dict[str, asyncio.Event] = {}
+        # Entry put() during a running agent turn
+        self._settled: dict[str, _SessionEntry] = {}
+        self._shared: Optional[SharedCacheBackend] = None
+        self._edits = 0
+        self._flushes = 0
+        self._conflicts = 0
+
+    def attach_shared(self, shared: Optional[SharedCacheBackend]):
+        """Send and receive invalidations through a shared tier (None = this instance only)."""
+        self._shared = shared
+        if shared is not None:
+            shared.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, namespace: Optional[str], key: Optional[str]):
+        if namespace is not None and namespace != NAMESPACE:
+            return
+        for session_id in ([key] if key is not None else list(self._entries)):
+            entry = self._entries.get(session_id)
+            if entry is None:
+                continue
+            if entry.dirty:
+                # Edited here and elsewhere: the next flush keeps theirs and drops ours
+                logger.info(f"Interview session {session_id[:8]} changed on another instance while it has unsaved edits here")
+                continue
+            del self._entries[session_id]
+
+    async def _notify(self, session_id: str):
+        if self._shared is None:
+            return
+        try:
+            await self._shared.delete(NAMESPACE, session_id)
+        except Exception as e:
+            logger.warning(f"Interview session invalidation not sent for {session_id[:8]}: {e}")
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    def in_agent_turn(self, session_id: str) -> bool:
+        return session_id in self._turns
+
+    def _fresh(self, session_id: str) -> Optional[_SessionEntry]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if not entry.dirty and time.monotonic() - entry.used_at > self._ttl:
+            del self._entries[session_id]
+            return None
+        entry.used_at = time.monotonic()
+        self._entries.move_to_end(session_id)
+        return entry
+
+    async def _entry(self, session_id: str, load: Loader) -> Optional[_SessionEntry]:
+        """The cached entry, loading it once however many callers ask at the same time."""
+        entry = self._fresh(session_id)
+        if entry is not None:
+            return entry
+
+        pending = self._loading.get(session_id)
+        while pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The loading task was cancelled, not us: load ourselves
+                if not pending.cancelled():
+                    raise
+            pending = self._loading.get(session_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[session_id] = future
+        try:
+            loaded = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; nobody else retrieves it when there are none
+            future.exception()
+            raise
+        else:
+            entry = None
+            if loaded is not None:
+                entry = _SessionEntry(session=loaded[0], interview=loaded[1], base=copy.deepcopy(loaded[1]))
+                self._store(session_id, entry)
+            future.set_result(entry)
+            return entry
+        finally:
+            self._loading.pop(session_id, None)
+
+    def _store(self, session_id: str, entry: _SessionEntry):
+        previous = self._entries.get(session_id)
+        if previous is not None and previous.flush_task and not previous.flush_task.done():
+            previous.flush_task.cancel()
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        self._evict()
+
+    def _evict(self):
+        """Drop the least recently used clean entries over the bound (dirty ones stay until flushed)."""
+        excess = len(self._entries) - self._max_sessions
+        for session_id, entry in list(self._entries.items()):
+            if excess <= 0:
+                break
+            if entry.dirty or session_id in self._turns:
+                continue
+            del self._entries[session_id]
+            excess -= 1
+
+    async def get(self, session_id: str, load: Loader) -> Optional[dict]:
+        """The session's interview (a copy), or None if the session doesn't exist."""
+        entry = await self._entry(session_id, load)
+        return copy.deepcopy(entry.interview) if entry is not None else None
+
+    # -------------------------------------------------------------------------
+    # Edits
+    # -------------------------------------------------------------------------
+
+    async def edit(
+        self,
+        session_id: str,
+        load: Loader,
+        mutate: Callable[[dict], Any],
+        persist: Persister,
+        reason: str,
+    ) -> tuple[Any, dict]:
+        """
+        Apply an edit to the session's interview and schedule its persistence.
+
+        Args:
+            session_id: The interview session
+            load: Loads the session on a cache miss
+            mutate: Changes the interview dict in place (raising leaves the
+                session untouched); its return value is passed through
+            persist: Writes the interview to the session (see Persister)
+            reason: Short label of the edit, used in the persisted event's id
+
+        Returns:
+            (mutate's result, a copy of the edited interview)
+
+        Raises:
+            LookupError: the session doesn't exist
+            TimeoutError: an agent turn on the session didn't end within INTERVIEW_SESSION_TURN_WAIT
+        """
+        for _ in range(_EDIT_ATTEMPTS):
+            turn = self._turns.get(session_id)
+            if turn is not None:
+                async with asyncio.timeout(self._turn_wait):
+                    await turn.wait()
+                continue
+
+            entry = await self._entry(session_id, load)
+            if entry is None:
+                raise LookupError(session_id)
+            base_version = entry.version
+            interview = copy.deepcopy(entry.interview)
+            result = mutate(interview)
+
+            if (self._entries.get(session_id) is not entry
+                    or entry.version != base_version
+                    or session_id in self._turns):
+                continue
+
+            entry.interview = interview
+            entry.version += 1
+            entry.reasons.append(reason)
+            entry.load = load
+            entry.persist = persist
+            self._edits += 1
+            self._schedule_flush(session_id, entry)
+            return result, copy.deepcopy(interview)
+
+        raise RuntimeError(f"Interview session {session_id} kept changing during an edit")
+
+    def _schedule_flush(self, session_id: str, entry: _SessionEntry):
+        entry.edited_at = time.monotonic()
+        if entry.flush_task is None or entry.flush_task.done():
+            entry.flush_task = asyncio.create_task(self._flush_later(session_id, entry))
+
+    async def _flush_later(self, session_id: str, entry: _SessionEntry):
+        """Persist once no edit arrived for flush_delay seconds (edits during the write trigger another round)."""
+        failures = 0
+        while entry.dirty and self._entries.get(session_id) is entry:
+            delay = entry.edited_at + self._flush_delay * (1 + failures) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await self._flush_entry(session_id, entry)
+                failures = 0
+            except LookupError:
+                return
+            except Exception as e:
+                failures = min(failures + 1, 10)
+                logger.error(f"Persisting interview edits for {session_id[:8]} failed, retrying: {e}")
+
+    async def _flush_entry(self, session_id: str, entry: _SessionEntry):
+        """Persist the entry's edits up to its current version as one event."""
+        async with entry.flush_lock:
+            if not entry.dirty or entry.persist is None:
+                return
+            if entry.load is not None:
+                current = await entry.load()
+                if current is None:
+                    self._drop_edits(entry)
+                    if self._entries.get(session_id) is entry:
+                        del self._entries[session_id]
+                    logger.warning(f"Interview session {session_id[:8]} no longer exists: dropped its unsaved edits")
+                    raise LookupError(session_id)
+                entry.session = current[0]
+                if entry.base is not None and not _same_interview(current[1], entry.base):
+                    self._discard_edits(session_id, entry, current[1])
+                    return
+            version = entry.version
+            reasons = entry.reasons[:]
+            interview = copy.deepcopy(entry.interview)
+            label = reasons[0] if len(reasons) == 1 else f"edits_{len(reasons)}"
+
+            entry.session = await entry.persist(entry.session, interview, label)
+
+            entry.persisted_version = max(entry.persisted_version, version)
+            entry.base = interview
+            del entry.reasons[:len(reasons)]
+            self._flushes += 1
+            logger.info(f"💾 Interview session {session_id[:8]}: {len(reasons)} edit(s) persisted as one event (v{version})")
+        await self._notify(session_id)
+
+    @staticmethod
+    def _drop_edits(entry: _SessionEntry):
+        entry.persisted_version = entry.version
+        entry.reasons.clear()
+
+    def _discard_edits(self, session_id: str, entry: _SessionEntry, stored: dict):
+        """The stored interview changed since the edits were made: keep it, drop the edits."""
+        discarded = len(entry.reasons)
+        self._drop_edits(entry)
+        entry.interview = copy.deepcopy(stored)
+        entry.base = copy.deepcopy(stored)
+        self._conflicts += 1
+        logger.warning(
+            f"Interview session {session_id[:8]} was changed elsewhere: discarded {discarded} unsaved edit(s)"
+        )
+
+    async def flush(self, session_id: str):
+        """Persist the session's pending edits now."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        await self._flush_entry(session_id, entry)
+
+    async def flush_all(self):
+        """Persist every session's pending edits (e.g. on shutdown)."""
+        for session_id, entry in list(self._entries.items()):
+            if entry.dirty:
+                try:
+                    await self.flush(session_id)
+                except Exception as e:
+                    logger.error(f"Persisting interview edits for {session_id[:8]} failed: {e}")
+
+    # -------------------------------------------------------------------------
+    # Agent turns
+    # -------------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def agent_turn(self, session_id: str, keep_edits: bool = True):
+        """
+        Bracket an agent run (or another write that bypasses the cache, like a
+        restore from the saved pre-screening) that writes the session state.
+
+        Pending edits are persisted before the run (or discarded with
+        keep_edits=False, when the session is about to be reset) and edits
+        wait until it ends. Call put() with the state the agent left;
+        otherwise the entry is dropped when the turn ends.
+        """
+        done = asyncio.Event()
+        self._turns[session_id] = done
+        self._settled.pop(session_id, None)
+        entry = self._entries.get(session_id)
+        started = True
+        try:
+            if entry is not None:
+                if keep_edits:
+                    try:
+                        await self.flush(session_id)
+                    except BaseException:
+                        # The turn doesn't start: keep the edits (the flush task retries them)
+                        started = False
+                        raise
+                else:
+                    if entry.flush_task and not entry.flush_task.done():
+                        entry.flush_task.cancel()
+                    if entry.dirty:
+                        logger.info(f"Interview session {session_id[:8]}: discarding {len(entry.reasons)} unsaved edit(s) before reset")
+                    self._entries.pop(session_id, None)
+            yield
+        finally:
+            settled = self._settled.pop(session_id, None)
+            if self._turns.get(session_id) is done:
+                del self._turns[session_id]
+            current = self._entries.get(session_id)
+            if started and current is not None and current is not settled:
+                # Loaded before or during the turn: what the agent left is unknown here
+                del self._entries[session_id]
+            done.set()
+
+    async def put(self, session_id: str, session: Any, interview: dict):
+        """
+        Cache a session state that is already persisted (after an agent turn or a restore).
+        session may be None when the caller has no current copy; the persister then loads one.
+        """
+        entry = _SessionEntry(session=session, interview=copy.deepcopy(interview), base=copy.deepcopy(interview))
+        self._store(session_id, entry)
+        if session_id in self._turns:
+            self._settled[session_id] = entry
+        await self._notify(session_id)
+
+    def discard(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None and entry.flush_task and not entry.flush_task.done():
+            entry.flush_task.cancel()
+
+    def clear(self) -> int:
+        """Drop every session without unsaved edits. Returns the number dropped."""
+        clean = [session_id for session_id, entry in self._entries.items() if not entry.dirty]
+        for session_id in clean:
+            self.discard(session_id)
+        return len(clean)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._entries),
+            "dirty": sum(1 for e in self._entries.values() if e.dirty),
+            "agent_turns": len(self._turns),
+            "edits": self._edits,
+            "flushes": self._flushes,
+            "conflicts": self._conflicts,
+        }
+
+
+interview_session_cache = InterviewSessionCache()
@@ -28,9 +28,37 @@ Usage:
         ],
         temperature=0.1,
     )
+
+    # Vision call: structured JSON, shared concurrency limit, hard timeout
+    text = await generate(
+        contents=[types.Content(role="user", parts=[image_part, types.Part(text=prompt)])],
+        response_schema=schema,
+        concurrency_group="vision",
+        timeout=VISION_TIMEOUT,
+    )
+
+    # Large static system instruction: cached provider-side (Gemini context cache)
+    text = await generate(
+        prompt=dynamic_part,
+        system_instruction=LARGE_STATIC_INSTRUCTION,
+        context_cache="interview_analysis",
+    )
+
+Context caching: with context_cache set, the system instruction is registered
+once per model as a Gemini cached content (TTL LLM_CONTEXT_CACHE_TTL) and the
+call references it instead of resending it. Caches are refreshed when used
+close to expiry and recreated when they are gone. Instructions below the
+model's minimum cache size are sent normally, so only opt in with an
+instruction that is static and clears it. Token usage and latency per
+context_cache label are kept for get_context_cache_stats().
 """
+import asyncio
+import base64
+import hashlib
 import logging
 import os
+import time
+from dataclasses import dataclass
 from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
@@ -41,6 +69,29 @@ DEFAULT_MODEL = "gemini-2.5-flash"
 # OpenAI fallback model
 FALLBACK_MODEL = os.environ.get("OPENAI_FALLBACK_MODEL", "gpt-4.1-mini")
 
+# Concurrency limits per call group; calls in a group wait for a free slot.
+# Vision calls (document photos) are heavy and come in bursts, so they get
+# their own limit instead of competing with everything else.
+VISION_CONCURRENCY = int(os.environ.get("LLM_VISION_CONCURRENCY", "8"))
+VISION_TIMEOUT = float(os.environ.get("LLM_VISION_TIMEOUT", "45"))
+_GROUP_LIMITS = {"vision": VISION_CONCURRENCY}
+_group_semaphores: dict[str, asyncio.Semaphore] = {}
+
+# Explicit context caching of system instructions
+CONTEXT_CACHE_ENABLED = os.environ.get("LLM_CONTEXT_CACHE", "1") not in ("0", "false", "False")
+CONTEXT_CACHE_TTL = int(os.environ.get("LLM_CONTEXT_CACHE_TTL", "3600"))
+CONTEXT_CACHE_REFRESH_MARGIN = int(os.environ.get("LLM_CONTEXT_CACHE_REFRESH_MARGIN", "300"))
+# Minimum cached content size per model family (tokens); smaller prefixes are not cached
+_CONTEXT_CACHE_MIN_TOKENS = {
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+    "gemini-2.0-flash": 4096,
+    "gemini-3-pro": 4096,
+}
+_CONTEXT_CACHE_DEFAULT_MIN_TOKENS = 4096
+# After a transient failure to create a cache, retry after this long
+_CONTEXT_CACHE_RETRY_SECONDS = 60
+
 # Gemini error codes that trigger fallback
 _FALLBACK_ERROR_CODES = {429, 503}
 _FALLBACK_ERROR_STRINGS = {"UNAVAILABLE", "RESOURCE_EXHAUSTED", "rate limit", "high demand", "overloaded"}
@@ -60,6 +111,171 @@ def _should_fallback(error: Exception) -> bool:
     return False
 
 
+# =============================================================================
+# Context caching
+# =============================================================================
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _min_cache_tokens(model: str) -> int:
+    for prefix, tokens in _CONTEXT_CACHE_MIN_TOKENS.items():
+        if model.startswith(prefix):
+            return tokens
+    return _CONTEXT_CACHE_DEFAULT_MIN_TOKENS
+
+
+@dataclass
+class _CachedPrefix:
+    name: Optional[str]  # None: not cacheable (too small or rejected) until retry_at
+    expires_at: float = 0.0
+    retry_at: float = float("inf")
+
+
+class ContextCacheRegistry:
+    """Gemini cached contents for static system instructions, one per (model, instruction)."""
+
+    def __init__(self, ttl_seconds: int = CONTEXT_CACHE_TTL, refresh_margin: int = CONTEXT_CACHE_REFRESH_MARGIN):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self._entries: dict[str, _CachedPrefix] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(model: str, system_instruction: str) -> str:
+        return hashlib.sha256(f"{model}\0{system_instruction}".encode()).hexdigest()
+
+    def _usable(self, entry: Optional[_CachedPrefix], now: float) -> bool:
+        return entry is not None and entry.name is not None and now < entry.expires_at - self.refresh_margin
+
+    async def get(self, model: str, system_instruction: str, label: str) -> Optional[str]:
+        """Name of the cached content holding this instruction, or None to send it inline."""
+        key = self._key(model, system_instruction)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if self._usable(entry, now):
+            return entry.name
+        if entry is not None and entry.name is None and now < entry.retry_at:
+            return None
+        if _estimate_tokens(system_instruction) < _min_cache_tokens(model):
+            self._entries[key] = _CachedPrefix(None)
+            logger.info(f"[LLM] Context cache skipped for {label} ({model}): instruction below minimum size")
+            return None
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if self._usable(entry, now):
+                return entry.name
+            if entry is not None and entry.name is None and now < entry.retry_at:
+                return None
+
+            from google import genai
+            from google.genai import types
+
+            client = genai.Client()
+            ttl = f"{self.ttl_seconds}s"
+            if entry is not None and entry.name is not None and now < entry.expires_at:
+                # Close to expiry: extend instead of recreating
+                try:
+                    await client.aio.caches.update(
+                        name=entry.name, config=types.UpdateCachedContentConfig(ttl=ttl),
+                    )
+                    entry.expires_at = now + self.ttl_seconds
+                    return entry.name
+                except Exception as e:
+                    logger.warning(f"[LLM] Context cache refresh failed for {label}: {e}")
+
+            try:
+                cached = await client.aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=system_instruction,
+                        display_name=f"{label}-{key[:12]}",
+                        ttl=ttl,
+                    ),
+                )
+            except Exception as e:
+                retry_at = now + _CONTEXT_CACHE_RETRY_SECONDS if _should_fallback(e) else float("inf")
+                self._entries[key] = _CachedPrefix(None, retry_at=retry_at)
+                logger.warning(f"[LLM] Context cache not created for {label} ({model}): {e}")
+                return None
+
+            self._entries[key] = _CachedPrefix(cached.name, expires_at=now + self.ttl_seconds)
+            logger.info(f"[LLM] Context cache created for {label} ({model}): {cached.name}")
+            return cached.name
+
+    def invalidate(self, model: str, system_instruction: str):
+        """Forget a cached content (e.g. it was deleted or expired provider-side)."""
+        self._entries.pop(self._key(model, system_instruction), None)
+
+    async def close(self):
+        """Delete all cached contents created by this process."""
+        names = [entry.name for entry in self._entries.values() if entry.name]
+        self._entries.clear()
+        if not names:
+            return
+        from google import genai
+
+        client = genai.Client()
+        for name in names:
+            try:
+                await client.aio.caches.delete(name=name)
+            except Exception as e:
+                logger.debug(f"[LLM] Context cache delete failed for {name}: {e}")
+
+
+@dataclass
+class _ContextCacheStats:
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    latency_ms: float = 0.0
+    cached_latency_ms: float = 0.0
+
+
+_context_caches = ContextCacheRegistry()
+_context_cache_stats: dict[str, _ContextCacheStats] = {}
+
+
+def _record_usage(label: str, response, cached: bool, latency_ms: float):
+    stats = _context_cache_stats.setdefault(label, _ContextCacheStats())
+    usage = getattr(response, "usage_metadata", None)
+    stats.calls += 1
+    stats.prompt_tokens += (getattr(usage, "prompt_token_count", None) or 0)
+    stats.cached_tokens += (getattr(usage, "cached_content_token_count", None) or 0)
+    stats.latency_ms += latency_ms
+    if cached:
+        stats.cached_calls += 1
+        stats.cached_latency_ms += latency_ms
+
+
+def get_context_cache_stats() -> dict[str, dict]:
+    """Per context_cache label: calls, input tokens, share served from cache and mean latency."""
+    report = {}
+    for label, stats in _context_cache_stats.items():
+        uncached_calls = stats.calls - stats.cached_calls
+        report[label] = {
+            "calls": stats.calls,
+            "cached_calls": stats.cached_calls,
+            "prompt_tokens": stats.prompt_tokens,
+            "cached_tokens": stats.cached_tokens,
+            "cached_token_ratio": round(stats.cached_tokens / stats.prompt_tokens, 3) if stats.prompt_tokens else 0.0,
+            "mean_latency_ms_cached": round(stats.cached_latency_ms / stats.cached_calls, 1) if stats.cached_calls else None,
+            "mean_latency_ms_uncached": (
+                round((stats.latency_ms - stats.cached_latency_ms) / uncached_calls, 1) if uncached_calls else None
+            ),
+        }
+    return report
+
+
+async def close_context_caches():
+    """Delete this process's cached contents (called on application shutdown)."""
+    await _context_caches.close()
+
+
 async def _call_gemini(
     contents,
     model: str,
@@ -67,6 +283,9 @@ async def _call_gemini(
     temperature: Optional[float],
     max_output_tokens: Optional[int],
     thinking_budget: Optional[int],
+    response_mime_type: Optional[str] = None,
+    response_schema=None,
+    context_cache: Optional[str] = None,
 ) -> str:
     """Call Gemini API and return text response."""
     from google import genai
@@ -79,21 +298,44 @@ async def _call_gemini(
         config_kwargs["temperature"] = temperature
     if max_output_tokens is not None:
         config_kwargs["max_output_tokens"] = max_output_tokens
-    if system_instruction is not None:
+    cached_content = None
+    if context_cache and system_instruction and CONTEXT_CACHE_ENABLED:
+        cached_content = await _context_caches.get(model, system_instruction, context_cache)
+    if cached_content is not None:
+        config_kwargs["cached_content"] = cached_content
+    elif system_instruction is not None:
         config_kwargs["system_instruction"] = system_instruction
     if thinking_budget is not None:
         config_kwargs["thinking_config"] = types.ThinkingConfig(
             include_thoughts=True,
             thinking_budget=thinking_budget,
         )
+    if response_mime_type is not None:
+        config_kwargs["response_mime_type"] = response_mime_type
+    if response_schema is not None:
+        config_kwargs["response_schema"] = response_schema
 
     config = types.GenerateContentConfig(**config_kwargs) if config_kwargs else None
 
-    response = await client.aio.models.generate_content(
-        model=model,
-        contents=contents,
-        config=config,
-    )
+    t0 = time.perf_counter()
+    try:
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=contents,
+            config=config,
+        )
+    except Exception as e:
+        if cached_content is None or _should_fallback(e):
+            raise
+        # Cached content gone (expired or deleted elsewhere): send the instruction inline
+        logger.warning(f"[LLM] Context cache {cached_content} unusable, retrying without: {e}")
+        _context_caches.invalidate(model, system_instruction)
+        return await _call_gemini(
+            contents, model, system_instruction, temperature, max_output_tokens, thinking_budget,
+            response_mime_type, response_schema,
+        )
+    if context_cache:
+        _record_usage(context_cache, response, cached_content is not None, (time.perf_counter() - t0) * 1000)
 
     # Extract text, skipping thinking parts
     text = ""
@@ -120,8 +362,9 @@ async def _call_openai(
     temperature: Optional[float],
     max_output_tokens: Optional[int],
     model: str,
+    json_output: bool = False,
 ) -> str:
-    """Call OpenAI API as fallback. Converts Gemini-style inputs to OpenAI format."""
+    """Call OpenAI API as fallback. Converts Gemini-style inputs (text and inline images) to OpenAI format."""
     from openai import AsyncOpenAI
 
     client = AsyncOpenAI()
@@ -141,11 +384,21 @@ async def _call_openai(
             for content in contents:
                 if hasattr(content, "role") and hasattr(content, "parts"):
                     text_parts = []
+                    image_parts = []
                     for part in content.parts:
                         if hasattr(part, "text") and part.text:
                             text_parts.append(part.text)
-                    if text_parts:
-                        role = "user" if content.role == "user" else "assistant"
+                        elif getattr(part, "inline_data", None) and part.inline_data.data:
+                            blob = part.inline_data
+                            image_parts.append({
+                                "type": "image_url",
+                                "image_url": {"url": f"data:{blob.mime_type};base64,{base64.b64encode(blob.data).decode()}"},
+                            })
+                    role = "user" if content.role == "user" else "assistant"
+                    if image_parts and role == "user":
+                        parts = image_parts + [{"type": "text", "text": t} for t in text_parts]
+                        messages.append({"role": role, "content": parts})
+                    elif text_parts:
                         messages.append({"role": role, "content": "\n".join(text_parts)})
                 elif isinstance(content, str):
                     messages.append({"role": "user", "content": content})
@@ -161,11 +414,21 @@ async def _call_openai(
         kwargs["temperature"] = temperature
     if max_output_tokens is not None:
         kwargs["max_tokens"] = max_output_tokens
+    if json_output:
+        kwargs["response_format"] = {"type": "json_object"}
 
     response = await client.chat.completions.create(**kwargs)
     return response.choices[0].message.content or ""
 
 
+def _get_group_semaphore(group: str) -> asyncio.Semaphore:
+    semaphore = _group_semaphores.get(group)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_GROUP_LIMITS.get(group, 8))
+        _group_semaphores[group] = semaphore
+    return semaphore
+
+
 async def generate(
     prompt: Optional[str] = None,
     *,
@@ -176,6 +439,11 @@ async def generate(
     max_output_tokens: Optional[int] = None,
     thinking_budget: Optional[int] = None,
     fallback_model: Optional[str] = None,
+    response_mime_type: Optional[str] = None,
+    response_schema=None,
+    concurrency_group: Optional[str] = None,
+    timeout: Optional[float] = None,
+    context_cache: Optional[str] = None,
 ) -> str:
     """
     Generate text using Gemini with automatic OpenAI fallback.
@@ -189,10 +457,59 @@ async def generate(
         max_output_tokens: Max tokens in response
         thinking_budget: Gemini thinking budget (ignored for OpenAI fallback)
         fallback_model: Override the default OpenAI fallback model
+        response_mime_type: e.g. "application/json"
+        response_schema: Gemini response schema (implies JSON output)
+        concurrency_group: Share a concurrency limit with other calls in this
+            group (e.g. "vision", limited by LLM_VISION_CONCURRENCY)
+        timeout: Seconds before asyncio.TimeoutError, including the wait
+            for a concurrency slot and any fallback
+        context_cache: Label (e.g. the agent name) to cache the system
+            instruction provider-side under; None sends it with every call
 
     Returns:
         Generated text response
     """
+    call = _generate(
+        prompt=prompt,
+        contents=contents,
+        model=model,
+        system_instruction=system_instruction,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        thinking_budget=thinking_budget,
+        fallback_model=fallback_model,
+        response_mime_type="application/json" if response_schema is not None else response_mime_type,
+        response_schema=response_schema,
+        concurrency_group=concurrency_group,
+        context_cache=context_cache,
+    )
+    if timeout is None:
+        return await call
+    return await asyncio.wait_for(call, timeout=timeout)
+
+
+async def _generate(
+    prompt: Optional[str],
+    contents,
+    model: str,
+    system_instruction: Optional[str],
+    temperature: Optional[float],
+    max_output_tokens: Optional[int],
+    thinking_budget: Optional[int],
+    fallback_model: Optional[str],
+    response_mime_type: Optional[str],
+    response_schema,
+    concurrency_group: Optional[str],
+    context_cache: Optional[str] = None,
+) -> str:
+    if concurrency_group is not None:
+        async with _get_group_semaphore(concurrency_group):
+            return await _generate(
+                prompt, contents, model, system_instruction, temperature, max_output_tokens,
+                thinking_budget, fallback_model, response_mime_type, response_schema, None,
+                context_cache,
+            )
+
     # Prepare contents
     if prompt and not contents:
         contents = prompt
@@ -206,6 +523,9 @@ async def generate(
             temperature=temperature,
             max_output_tokens=max_output_tokens,
             thinking_budget=thinking_budget,
+            response_mime_type=response_mime_type,
+            response_schema=response_schema,
+            context_cache=context_cache,
         )
     except Exception as e:
         if not _should_fallback(e):
@@ -221,4 +541,5 @@ async def generate(
             temperature=temperature,
             max_output_tokens=max_output_tokens,
             model=fb_model,
+            json_output=response_mime_type == "application/json",
         )
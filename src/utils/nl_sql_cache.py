@@ -0,0 +1,197 @@
+"""
+Cache of recruiter analyst questions to validated SQL.
+
+Recruiters ask the same questions over and over ("hoeveel kandidaten deze
+week?"), and each one costs the data query agent a round of SQL generation.
+When a conversation's first question was answered with exactly one
+successful execute_sql call, that SQL is stored under:
+
+- the workspace: questions without one are neither stored nor looked up,
+  as their SQL isn't scoped to anyone
+- the schema catalog fingerprint: a schema change invalidates every entry
+- the normalized question: lowercased, without accents, punctuation and
+  politeness words, with a few synonyms folded together, so "Toon het aantal
+  kandidaten deze week aub" and "hoeveel sollicitanten deze week" share an
+  entry
+
+A later question with the same key runs the stored SQL directly (on the
+analytics pool) and the analyst only phrases the answer. Only questions that
+open a conversation are stored: follow-ups ("en vorige week?") depend on
+what came before. SQL with literal dates isn't stored, as it would answer
+"deze week" with last week's dates.
+
+Entries live in an in-process LRU and, with a shared cache tier (see
+shared_cache.py), in the shared tier for all instances, for NL_SQL_CACHE_TTL.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from src.utils.shared_cache import SharedCacheBackend
+
+logger = logging.getLogger(__name__)
+
+NL_SQL_CACHE_TTL = float(os.environ.get("NL_SQL_CACHE_TTL", str(24 * 60 * 60)))
+NL_SQL_CACHE_MAX = int(os.environ.get("NL_SQL_CACHE_MAX", "1000"))
+
+NAMESPACE = "nl_sql"
+
+# Politeness and request phrasing that doesn't change what is asked
+# (pronouns, "nu", "er", "is", ... do: "vacatures van mij" isn't "vacatures")
+_FILLER_WORDS = {
+    "aub", "alsjeblieft", "alstublieft", "graag", "eens", "even",
+    "kan", "kun", "kunt", "wil", "zou", "willen", "weten",
+    "toon", "geef", "laat", "zien", "tonen", "de", "het", "een",
+    "please", "show", "tell", "the", "a", "an",
+}
+
+_SYNONYMS = {
+    "sollicitanten": "kandidaten",
+    "sollicitant": "kandidaat",
+    "applicants": "kandidaten",
+    "candidates": "kandidaten",
+    "sollicitaties": "applicaties",
+    "applications": "applicaties",
+    "jobs": "vacatures",
+    "vacancies": "vacatures",
+    "dit": "deze",
+    "huidige": "deze",
+    "aantal": "hoeveel",
+}
+
+_DATE_LITERAL = re.compile(r"'\d{4}-\d{2}-\d{2}")
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question, for the cache key."""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = re.findall(r"[a-z0-9]+", text)
+    words = [_SYNONYMS.get(w, w) for w in words if w not in _FILLER_WORDS]
+    return " ".join(words)
+
+
+def is_cacheable_sql(sql: str) -> bool:
+    """Whether SQL can answer the same question later (no literal dates)."""
+    return not _DATE_LITERAL.search(sql)
+
+
+class NlSqlCache:
+    """(workspace, schema fingerprint, normalized question) -> validated SQL."""
+
+    def __init__(self, ttl_seconds: float = NL_SQL_CACHE_TTL, max_entries: int = NL_SQL_CACHE_MAX):
+        self._ttl = ttl_seconds
+        self._max = max_entries
+        # key -> (sql, stored_at)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._shared: Optional[SharedCacheBackend] = None
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def attach_shared(self, shared: Optional[SharedCacheBackend]):
+        """Share entries through a shared tier (None = this instance only)."""
+        self._shared = shared
+        if shared is not None:
+            shared.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, namespace: Optional[str], key: Optional[str]):
+        if namespace is not None and namespace != NAMESPACE:
+            return
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    @staticmethod
+    def _key(workspace_id: Optional[str], fingerprint: str, question: str) -> Optional[str]:
+        normalized = normalize_question(question)
+        if not normalized or not workspace_id:
+            return None
+        raw = f"{workspace_id}|{fingerprint}|{normalized}"
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    async def get(self, workspace_id: Optional[str], fingerprint: str, question: str) -> Optional[str]:
+        """The SQL stored for this question, if any."""
+        key = self._key(workspace_id, fingerprint, question)
+        if key is None:
+            return None
+
+        item = self._entries.get(key)
+        if item is not None and time.time() - item[1] < self._ttl:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return item[0]
+        self._entries.pop(key, None)
+
+        if self._shared is not None:
+            try:
+                entry = await self._shared.get(NAMESPACE, key)
+            except Exception as e:
+                logger.warning(f"NL-SQL cache: shared tier read failed: {e}")
+                entry = None
+            if entry is not None:
+                self._remember(key, entry.value["sql"], entry.value.get("stored_at", time.time()))
+                self._hits += 1
+                return entry.value["sql"]
+
+        self._misses += 1
+        return None
+
+    def _remember(self, key: str, sql: str, stored_at: float):
+        self._entries[key] = (sql, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max:
+            self._entries.popitem(last=False)
+
+    async def put(self, workspace_id: Optional[str], fingerprint: str, question: str, sql: str):
+        """Store the SQL that answered this question."""
+        key = self._key(workspace_id, fingerprint, question)
+        if key is None or not is_cacheable_sql(sql):
+            return
+        stored_at = time.time()
+        self._remember(key, sql, stored_at)
+        self._stores += 1
+        logger.info(f"🧠 NL-SQL cache: stored SQL for '{normalize_question(question)}'")
+        if self._shared is None:
+            return
+        try:
+            await self._shared.set(
+                NAMESPACE, key,
+                {"sql": sql, "question": normalize_question(question), "stored_at": stored_at},
+                self._ttl,
+            )
+        except Exception as e:
+            logger.warning(f"NL-SQL cache: shared tier write failed: {e}")
+
+    async def discard(self, workspace_id: Optional[str], fingerprint: str, question: str):
+        """Forget the SQL for this question (it failed when replayed)."""
+        key = self._key(workspace_id, fingerprint, question)
+        if key is None:
+            return
+        self._entries.pop(key, None)
+        if self._shared is None:
+            return
+        try:
+            await self._shared.delete(NAMESPACE, key)
+        except Exception as e:
+            logger.warning(f"NL-SQL cache: shared tier delete failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "stores": self._stores,
+        }
+
+
+nl_sql_cache = NlSqlCache()
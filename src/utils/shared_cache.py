@@ -0,0 +1,293 @@
+"""
+Shared (cross-instance) cache tier with pushed invalidation.
+
+Every API instance keeps hot entries in a local in-memory tier
+(see conversation_cache.py). This tier holds the same entries for all
+instances, and tells the other instances when an entry changes, so an
+instance never keeps serving a copy another instance has since replaced.
+
+Backends:
+- PostgresSharedCache: UNLOGGED table agents.shared_cache (no WAL; emptied
+  after a crash, which is fine for a cache) plus LISTEN/NOTIFY on the
+  cache_invalidation channel over a dedicated connection.
+- LocalSharedCache: in-process stand-in with the same interface, for a
+  single instance and local development.
+
+Entries record the instance that wrote them last (the owner). With session
+affinity, a phone's messages keep landing on the owner, which then serves
+them from memory; when another instance takes a conversation over, its
+write notifies the previous owner to drop its copy.
+
+While the Postgres listener is disconnected, invalidations can be missed:
+the backend reports itself incoherent, local tiers stop trusting their
+copies, and they are flushed once the listener is back.
+
+Selected with CACHE_SHARED_BACKEND: "postgres" (default), "local" or "none".
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_BACKEND = os.environ.get("CACHE_SHARED_BACKEND", "postgres")
+
+# Identifies this process in ownership and invalidation messages
+INSTANCE_ID = f"{os.environ.get('K_REVISION', 'local')}-{uuid.uuid4().hex[:8]}"
+
+NOTIFY_CHANNEL = "cache_invalidation"
+
+# Keep the LISTEN connection alive through the pooler's idle timeout (~5 min)
+LISTENER_KEEPALIVE_SECONDS = 60
+LISTENER_RETRY_SECONDS = 5
+
+# (namespace, key): namespace None = everything, key None = the whole namespace
+InvalidationHandler = Callable[[Optional[str], Optional[str]], None]
+
+
+@dataclass
+class SharedEntry:
+    """An entry in the shared tier."""
+    value: dict
+    owner: str
+
+
+class SharedCacheBackend:
+    """Interface of the shared tier; values are JSON-serializable dicts."""
+
+    def __init__(self):
+        self._handlers: list[InvalidationHandler] = []
+
+    def subscribe(self, handler: InvalidationHandler):
+        """Register a callback for invalidations from other instances."""
+        self._handlers.append(handler)
+
+    def _dispatch(self, namespace: Optional[str], key: Optional[str]):
+        for handler in self._handlers:
+            try:
+                handler(namespace, key)
+            except Exception as e:
+                logger.warning(f"Cache invalidation handler failed: {e}")
+
+    @property
+    def coherent(self) -> bool:
+        """Whether invalidations are currently received (local copies can be trusted)."""
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def get(self, namespace: str, key: str) -> Optional[SharedEntry]:
+        raise NotImplementedError
+
+    async def set(self, namespace: str, key: str, value: dict, ttl_seconds: float) -> Optional[str]:
+        """Store an entry owned by this instance; returns the previous owner, if any."""
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    async def clear(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    async def purge_expired(self) -> int:
+        raise NotImplementedError
+
+
+class LocalSharedCache(SharedCacheBackend):
+    """In-process stand-in for the shared tier (one instance, no invalidations needed)."""
+
+    def __init__(self):
+        super().__init__()
+        self._entries: dict[tuple[str, str], tuple[SharedEntry, float]] = {}
+
+    async def get(self, namespace: str, key: str) -> Optional[SharedEntry]:
+        item = self._entries.get((namespace, key))
+        if item is None:
+            return None
+        entry, expires_at = item
+        if time.time() > expires_at:
+            del self._entries[(namespace, key)]
+            return None
+        return entry
+
+    async def set(self, namespace: str, key: str, value: dict, ttl_seconds: float) -> Optional[str]:
+        previous = self._entries.get((namespace, key))
+        self._entries[(namespace, key)] = (SharedEntry(value, INSTANCE_ID), time.time() + ttl_seconds)
+        return previous[0].owner if previous else None
+
+    async def delete(self, namespace: str, key: str):
+        self._entries.pop((namespace, key), None)
+
+    async def clear(self, namespace: str) -> int:
+        keys = [k for k in self._entries if k[0] == namespace]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [k for k, (_, expires_at) in self._entries.items() if now > expires_at]
+        for k in expired:
+            del self._entries[k]
+        return len(expired)
+
+
+class PostgresSharedCache(SharedCacheBackend):
+    """Shared tier in agents.shared_cache, invalidated through LISTEN/NOTIFY."""
+
+    def __init__(self, pool: asyncpg.Pool, dsn: str):
+        super().__init__()
+        self._pool = pool
+        self._dsn = dsn
+        self._conn: Optional[asyncpg.Connection] = None
+        self._supervisor: Optional[asyncio.Task] = None
+
+    @property
+    def coherent(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def start(self):
+        try:
+            await self._listen()
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener not started, retrying in background: {e}")
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._supervisor:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def _listen(self):
+        conn = await asyncpg.connect(self._dsn)
+        await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+        logger.info(f"Cache invalidation listener connected (instance {INSTANCE_ID})")
+
+    async def _supervise(self):
+        """Keep the listener alive; reconnect (and flush local tiers) when it drops."""
+        while True:
+            if self.coherent:
+                await asyncio.sleep(LISTENER_KEEPALIVE_SECONDS)
+                try:
+                    await self._conn.execute("SELECT 1")
+                except Exception as e:
+                    logger.warning(f"Cache invalidation listener lost: {e}")
+                    self._on_terminated(self._conn)
+                continue
+
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener reconnect failed: {e}")
+                continue
+            # Invalidations sent while disconnected are lost
+            self._dispatch(None, None)
+
+    def _on_terminated(self, conn):
+        if self._conn is conn:
+            self._conn = None
+            logger.warning("Cache invalidation listener disconnected; local cache tiers bypassed until reconnected")
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        try:
+            message = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring malformed cache invalidation: {payload[:100]}")
+            return
+        if message.get("origin") == INSTANCE_ID:
+            return
+        self._dispatch(message.get("ns"), message.get("key"))
+
+    async def _notify(self, conn, namespace: str, key: Optional[str]):
+        payload = json.dumps({"ns": namespace, "key": key, "origin": INSTANCE_ID})
+        await conn.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+
+    async def get(self, namespace: str, key: str) -> Optional[SharedEntry]:
+        row = await self._pool.fetchrow(
+            """
+            SELECT value, owner FROM agents.shared_cache
+            WHERE namespace = $1 AND key = $2 AND expires_at > NOW()
+            """,
+            namespace, key,
+        )
+        if row is None:
+            return None
+        value = row["value"]
+        return SharedEntry(value=json.loads(value) if isinstance(value, str) else value, owner=row["owner"])
+
+    async def set(self, namespace: str, key: str, value: dict, ttl_seconds: float) -> Optional[str]:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                previous_owner = await conn.fetchval(
+                    """
+                    SELECT owner FROM agents.shared_cache
+                    WHERE namespace = $1 AND key = $2 AND expires_at > NOW()
+                    """,
+                    namespace, key,
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO agents.shared_cache (namespace, key, value, owner, expires_at)
+                    VALUES ($1, $2, $3::jsonb, $4, NOW() + make_interval(secs => $5))
+                    ON CONFLICT (namespace, key) DO UPDATE
+                    SET value = EXCLUDED.value, owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+                    """,
+                    namespace, key, json.dumps(value), INSTANCE_ID, float(ttl_seconds),
+                )
+                await self._notify(conn, namespace, key)
+        return previous_owner
+
+    async def delete(self, namespace: str, key: str):
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "DELETE FROM agents.shared_cache WHERE namespace = $1 AND key = $2",
+                    namespace, key,
+                )
+                await self._notify(conn, namespace, key)
+
+    async def clear(self, namespace: str) -> int:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                status = await conn.execute("DELETE FROM agents.shared_cache WHERE namespace = $1", namespace)
+                await self._notify(conn, namespace, None)
+        return int(status.split()[-1])
+
+    async def purge_expired(self) -> int:
+        status = await self._pool.execute("DELETE FROM agents.shared_cache WHERE expires_at <= NOW()")
+        return int(status.split()[-1])
+
+
+def create_shared_backend(pool: Optional[asyncpg.Pool], dsn: Optional[str]) -> Optional[SharedCacheBackend]:
+    """Build the backend selected by CACHE_SHARED_BACKEND (None = local tier only)."""
+    if SHARED_CACHE_BACKEND == "none":
+        return None
+    if SHARED_CACHE_BACKEND == "local" or pool is None or not dsn:
+        return LocalSharedCache()
+    if SHARED_CACHE_BACKEND != "postgres":
+        logger.warning(f"Unknown CACHE_SHARED_BACKEND '{SHARED_CACHE_BACKEND}', using postgres")
+    return PostgresSharedCache(pool, dsn)
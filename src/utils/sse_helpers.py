@@ -2,9 +2,12 @@
 SSE (Server-Sent Events) formatting helpers.
 
 Provides consistent formatting for SSE event strings used across
-streaming endpoints (interviews, screening, data query, playground).
+streaming endpoints (interviews, screening, data query, playground),
+and EventPump, which interleaves an agent's events with timed messages.
 """
+import asyncio
 import json
+from typing import Any, AsyncIterator, Iterable, Optional
 
 
 def sse_done() -> str:
@@ -22,6 +25,129 @@ def sse_status(status: str, message: str) -> str:
     return f"data: {json.dumps({'type': 'status', 'status': status, 'message': message})}\n\n"
 
 
+def sse_thinking(content: str) -> str:
+    """SSE event for a reasoning line (simulated or the model's thought summary)."""
+    return f"data: {json.dumps({'type': 'thinking', 'content': content})}\n\n"
+
+
 def sse_data(data: dict) -> str:
     """SSE event for arbitrary JSON data."""
     return f"data: {json.dumps(data)}\n\n"
+
+
+def sse_heartbeat() -> str:
+    """SSE comment line: keeps proxies from closing an idle stream, ignored by clients."""
+    return ": keep-alive\n\n"
+
+
+# =============================================================================
+# ADK event helpers
+# =============================================================================
+
+def event_thoughts(event) -> list[str]:
+    """Thought summaries in an agent event (needs ThinkingConfig(include_thoughts=True))."""
+    if event.partial or not event.content or not event.content.parts:
+        return []
+    return [part.text for part in event.content.parts if getattr(part, "thought", False) and part.text]
+
+
+def event_text(event) -> str:
+    """The answer text of an agent event, without its thought parts."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not getattr(part, "thought", False))
+
+
+def event_state_value(event, key: str) -> Any:
+    """A session state value written by the event (e.g. by a tool), or None."""
+    state_delta = event.actions.state_delta if event.actions else None
+    return state_delta.get(key) if state_delta else None
+
+
+# =============================================================================
+# Event pump
+# =============================================================================
+
+class EventPump:
+    """
+    Interleaves an async source (an agent run) with timed messages, without polling.
+
+    Iterating yields (kind, item) tuples:
+    - (EVENT, item): the next item from the source, as soon as it arrives
+    - (TICK, message): the next of `ticks`, every tick_interval seconds while
+      the source runs (stop_ticks() ends them, e.g. once real thoughts arrive)
+    - (HEARTBEAT, None): nothing was yielded for heartbeat_interval seconds
+
+    The source runs in its own task, so a slow consumer doesn't stall it;
+    its exception is raised from the iteration after the items before it.
+    The pump waits on the source until the next tick or heartbeat is due,
+    and cancels the source when the iteration is closed or cancelled (the
+    client disconnected).
+    """
+
+    EVENT = "event"
+    TICK = "tick"
+    HEARTBEAT = "heartbeat"
+    _END = object()
+
+    def __init__(
+        self,
+        source: AsyncIterator,
+        ticks: Iterable = (),
+        tick_interval: float = 3.0,
+        heartbeat_interval: Optional[float] = None,
+    ):
+        self._source = source
+        self._ticks = iter(ticks)
+        self._tick_interval = tick_interval
+        self._heartbeat_interval = heartbeat_interval
+        self._next_tick = next(self._ticks, self._END)
+
+    def stop_ticks(self):
+        """Send no further ticks."""
+        self._next_tick = self._END
+
+    async def __aiter__(self):
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for item in self._source:
+                    queue.put_nowait((self.EVENT, item))
+            except Exception as e:
+                queue.put_nowait((None, e))
+            finally:
+                queue.put_nowait((self._END, None))
+
+        loop = asyncio.get_running_loop()
+        producer = asyncio.create_task(produce())
+        tick_at = loop.time() + self._tick_interval
+        heartbeat_at = loop.time() + self._heartbeat_interval if self._heartbeat_interval else None
+
+        try:
+            while True:
+                deadlines = [d for d in (tick_at if self._next_tick is not self._END else None, heartbeat_at) if d is not None]
+                try:
+                    if deadlines and queue.empty():
+                        async with asyncio.timeout_at(min(deadlines)):
+                            kind, item = await queue.get()
+                    else:
+                        kind, item = await queue.get()
+                except TimeoutError:
+                    now = loop.time()
+                    if self._next_tick is not self._END and now >= tick_at:
+                        message, self._next_tick = self._next_tick, next(self._ticks, self._END)
+                        tick_at = now + self._tick_interval
+                        kind, item = self.TICK, message
+                    else:
+                        kind, item = self.HEARTBEAT, None
+
+                if kind is self._END:
+                    return
+                if kind is None:
+                    raise item
+                if heartbeat_at is not None:
+                    heartbeat_at = loop.time() + self._heartbeat_interval
+                yield kind, item
+        finally:
+            producer.cancel()
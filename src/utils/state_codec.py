@@ -0,0 +1,34 @@
+"""
+Compact binary encoding of agent state dicts.
+
+Used by the agent cache to pack the state of idle agents: a live state is a
+graph of Python dicts, lists and strings several times the size of its JSON,
+and most cached agents are waiting for the candidate's next message.
+
+The encoding is compact JSON compressed with zlib, behind a one-byte format
+tag. It stays JSON underneath, so a packed state decodes into the same dict
+as the agent_state column and goes through the same from_dict (which fills
+in defaults for keys older states don't have). Packed states only live in
+memory, so the format can change between releases.
+"""
+import json
+import os
+import zlib
+
+# zlib level: 1 is several times faster than the default and compresses state nearly as well
+STATE_CODEC_LEVEL = int(os.environ.get("STATE_CODEC_LEVEL", "1"))
+
+_FORMAT_JSON_ZLIB = 1
+
+
+def encode_state(state: dict) -> bytes:
+    """Pack a state dict (as produced by to_dict())."""
+    raw = json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+    return bytes([_FORMAT_JSON_ZLIB]) + zlib.compress(raw, STATE_CODEC_LEVEL)
+
+
+def decode_state(data: bytes) -> dict:
+    """Unpack a state packed with encode_state."""
+    if not data or data[0] != _FORMAT_JSON_ZLIB:
+        raise ValueError(f"Unknown state encoding {data[:1]!r}")
+    return json.loads(zlib.decompress(data[1:]))
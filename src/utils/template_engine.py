@@ -3,11 +3,226 @@ Template engine for integration field mapping.
 
 Resolves N8N-style {{field_name}} placeholders against external system records.
 Supports dot-path traversal for relationship fields (e.g. Owner.Email).
+
+Mappings are compiled once into a CompiledMapping plan (constant segments,
+pre-split field paths, per-field type coercers) and then applied to many
+records. Both the ATS import and the data push-back use the same plans, and
+plans are cached per mapping version so a sync compiles each mapping once.
 """
+import hashlib
+import json
 import re
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from datetime import date
+from functools import lru_cache
+from typing import Any, Optional
+
+TEMPLATE_PATTERN = re.compile(r"\{\{(\w+(?:\.\w+)*)\}\}")
+
+
+# =============================================================================
+# Type coercers
+# =============================================================================
+
+def parse_date(value: str) -> Optional[date]:
+    """Parse an ISO date string to a date object. Returns None on failure."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_boolean(value) -> Optional[bool]:
+    """Parse a boolean value from various representations."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+# Coercers applied by mapping field type (see MappingFieldInfo.type)
+TYPE_COERCERS: dict[str, Callable[[str], Any]] = {
+    "date": parse_date,
+    "boolean": parse_boolean,
+}
 
-TEMPLATE_PATTERN = re.compile(r"\{\{([\w.]+)\}\}")
 
+# =============================================================================
+# Compiled templates
+# =============================================================================
+
+class CompiledTemplate:
+    """A template split into constant strings and pre-split field paths."""
+
+    __slots__ = ("segments", "fields")
+
+    def __init__(self, template: str):
+        segments: list[str | tuple[str, ...]] = []
+        fields: list[str] = []
+        pos = 0
+        for match in TEMPLATE_PATTERN.finditer(template):
+            if match.start() > pos:
+                segments.append(template[pos:match.start()])
+            path = match.group(1)
+            segments.append(tuple(path.split(".")))
+            fields.append(path)
+            pos = match.end()
+        if pos < len(template):
+            segments.append(template[pos:])
+        self.segments = tuple(segments)
+        self.fields = tuple(fields)
+
+    def render(self, record: dict) -> tuple[str, bool]:
+        """Render against a record. Returns (text, resolved_any).
+
+        Missing or None fields render as empty strings; resolved_any tells
+        whether at least one referenced field had a value.
+        """
+        parts: list[str] = []
+        resolved_any = False
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            value = record
+            for key in segment:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(key)
+                if value is None:
+                    break
+            if value is not None:
+                resolved_any = True
+                parts.append(str(value))
+        return "".join(parts), resolved_any
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile (and cache) a single template string."""
+    return CompiledTemplate(template)
+
+
+class CompiledMapping:
+    """
+    A reusable plan for applying a field mapping to records.
+
+    Args:
+        mappings: dict of {target_field: {"template": "..."}}
+        field_types: optional {target_field: type}; "date" and "boolean" fields
+            are coerced with TYPE_COERCERS.
+        preprocess: optional callable (value, field_type) applied to non-empty
+            rendered values before coercion (e.g. text sanitization).
+        drop_empty: leave fields that render to an empty string out of the result.
+    """
+
+    __slots__ = ("fields", "referenced_fields", "drop_empty")
+
+    def __init__(
+        self,
+        mappings: dict,
+        field_types: Optional[dict[str, str]] = None,
+        preprocess: Optional[Callable[[str, Optional[str]], str]] = None,
+        drop_empty: bool = False,
+    ):
+        field_types = field_types or {}
+        fields = []
+        referenced: set[str] = set()
+        for target, config in mappings.items():
+            template = config.get("template", "")
+            if not template:
+                continue
+            compiled = compile_template(template)
+            field_type = field_types.get(target)
+            fields.append((target, compiled, field_type, preprocess, TYPE_COERCERS.get(field_type)))
+            referenced.update(compiled.fields)
+        self.fields = tuple(fields)
+        self.referenced_fields = tuple(sorted(referenced))
+        self.drop_empty = drop_empty
+
+    def apply(self, record: dict) -> dict:
+        """Resolve all mapped fields for one record (values stripped, then coerced)."""
+        result = {}
+        for target, template, field_type, preprocess, coerce in self.fields:
+            value: Any = template.render(record)[0].strip()
+            if value and preprocess is not None:
+                value = preprocess(value, field_type)
+            if self.drop_empty and not value:
+                continue
+            if coerce is not None:
+                value = coerce(value)
+            result[target] = value
+        return result
+
+    def apply_batch(
+        self,
+        records: Iterable[dict],
+        on_error: Optional[Callable[[dict, Exception], None]] = None,
+    ) -> list[Optional[dict]]:
+        """Apply the plan to many records.
+
+        A record that fails to transform yields None (and is reported to
+        on_error) instead of failing the whole batch.
+        """
+        results: list[Optional[dict]] = []
+        for record in records:
+            try:
+                results.append(self.apply(record))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(record, e)
+                results.append(None)
+        return results
+
+
+# Compiled plans keyed by (scope, mapping version); bounded LRU
+_PLAN_CACHE: "OrderedDict[tuple, CompiledMapping]" = OrderedDict()
+_PLAN_CACHE_SIZE = 128
+
+
+def mapping_version(mappings: dict) -> str:
+    """Stable fingerprint of a mapping dict; changes whenever the mapping is edited."""
+    canonical = json.dumps(mappings, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def get_compiled_mapping(
+    mappings: dict,
+    scope: str = "",
+    field_types: Optional[dict[str, str]] = None,
+    preprocess: Optional[Callable[[str, Optional[str]], str]] = None,
+    drop_empty: bool = False,
+) -> CompiledMapping:
+    """Return a cached CompiledMapping for this mapping version.
+
+    Args:
+        scope: cache namespace, e.g. "import:<connection_id>". Callers that pass
+            different field_types/preprocess/drop_empty must use different scopes.
+    """
+    key = (scope, mapping_version(mappings))
+    plan = _PLAN_CACHE.get(key)
+    if plan is not None:
+        _PLAN_CACHE.move_to_end(key)
+        return plan
+
+    plan = CompiledMapping(mappings, field_types=field_types, preprocess=preprocess, drop_empty=drop_empty)
+    _PLAN_CACHE[key] = plan
+    if len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+        _PLAN_CACHE.popitem(last=False)
+    return plan
+
+
+# =============================================================================
+# Convenience helpers
+# =============================================================================
 
 def resolve_template(template: str, record: dict) -> str | None:
     """Resolve {{field}} placeholders against a record dict.
@@ -17,37 +232,13 @@ def resolve_template(template: str, record: dict) -> str | None:
     if not template or not template.strip():
         return None
 
-    resolved_any = False
-
-    def _replace(match: re.Match) -> str:
-        nonlocal resolved_any
-        path = match.group(1)
-        value = _resolve_dot_path(record, path)
-        if value is not None:
-            resolved_any = True
-            return str(value)
-        return ""
-
-    result = TEMPLATE_PATTERN.sub(_replace, template)
-    return result if resolved_any else None
-
-
-def _resolve_dot_path(obj: dict, path: str):
-    """Traverse nested dicts via dot notation (e.g. 'Owner.Email')."""
-    parts = path.split(".")
-    current = obj
-    for part in parts:
-        if not isinstance(current, dict):
-            return None
-        current = current.get(part)
-        if current is None:
-            return None
-    return current
+    text, resolved_any = compile_template(template).render(record)
+    return text if resolved_any else None
 
 
 def extract_referenced_fields(template: str) -> list[str]:
     """Extract all {{field}} references from a template string."""
-    return TEMPLATE_PATTERN.findall(template)
+    return list(compile_template(template).fields)
 
 
 def resolve_mapping(mappings: dict, record: dict) -> dict:
@@ -72,8 +263,4 @@ def build_soql_fields(mappings: dict) -> list[str]:
 
     Used to dynamically build SOQL SELECT clauses.
     """
-    fields = set()
-    for config in mappings.values():
-        template = config.get("template", "")
-        fields.update(extract_referenced_fields(template))
-    return sorted(fields)
+    return list(get_compiled_mapping(mappings).referenced_fields)
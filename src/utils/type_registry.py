@@ -0,0 +1,254 @@
+"""
+Process-wide registry of a workspace's document and attribute types.
+
+Workspaces have a few dozen document types (ontology.types_documents) and
+attribute types (ontology.types_attributes), and they rarely change. The
+collection agent's TypeCache, plan enrichment and attribute extraction all
+need them, so instead of each querying the tables, they share one snapshot
+per workspace:
+
+- Snapshots are immutable: the type maps and the types in them are read-only
+  mappings, and the JSON columns (fields, options, verification_config) are
+  decoded once when the snapshot is loaded. The decoded values are shared by
+  every reader; copy them before modifying.
+- Every workspace has a version counter. The create/update/delete paths of
+  both type tables call invalidate_types(), which bumps it; a snapshot of an
+  older version is reloaded on its next use.
+- Loads are single-flight: concurrent readers of a missing or stale snapshot
+  wait for one query instead of each running their own.
+- With a shared cache tier (see shared_cache.py), an invalidation is also
+  sent to the other instances. TYPE_REGISTRY_TTL bounds how long a snapshot
+  is used without a reload, for changes made outside the API.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import asyncpg
+
+from src.utils.shared_cache import SharedCacheBackend
+
+logger = logging.getLogger(__name__)
+
+TYPE_REGISTRY_TTL = float(os.environ.get("TYPE_REGISTRY_TTL", "600"))
+
+# Namespace of type invalidations in the shared tier
+NAMESPACE = "types"
+
+_DOC_TYPES_SQL = """
+    SELECT id, slug, name, description, category, requires_front_back, is_verifiable,
+           is_default, is_active, sort_order, parent_id, scan_mode, verification_config, ai_hint
+    FROM ontology.types_documents
+    WHERE workspace_id = $1
+    ORDER BY sort_order, name
+"""
+
+_ATTR_TYPES_SQL = """
+    SELECT id, slug, name, description, category, data_type, options, fields,
+           is_default, is_active, sort_order, collected_by, ai_hint
+    FROM ontology.types_attributes
+    WHERE workspace_id = $1
+    ORDER BY sort_order, name
+"""
+
+
+def _decode(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _freeze(row: asyncpg.Record, json_columns: tuple[str, ...]) -> Mapping:
+    entry = dict(row)
+    for column in json_columns:
+        entry[column] = _decode(entry[column])
+    return MappingProxyType(entry)
+
+
+@dataclass(frozen=True)
+class TypeSnapshot:
+    """All document and attribute types of a workspace (active and inactive), by slug."""
+    workspace_id: uuid.UUID
+    version: int
+    doc_types: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+    attr_types: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def get_doc_type(self, slug: str, active_only: bool = True) -> Optional[Mapping]:
+        dt = self.doc_types.get(slug)
+        if dt is None or (active_only and not dt["is_active"]):
+            return None
+        return dt
+
+    def get_attr_type(self, slug: str, active_only: bool = True) -> Optional[Mapping]:
+        at = self.attr_types.get(slug)
+        if at is None or (active_only and not at["is_active"]):
+            return None
+        return at
+
+    def active_attr_types(
+        self,
+        category: Optional[str] = None,
+        collected_by: Optional[str] = None,
+    ) -> list[Mapping]:
+        """Active attribute types in catalog order, optionally filtered."""
+        return [
+            at for at in self.attr_types.values()
+            if at["is_active"]
+            and (category is None or at["category"] == category)
+            and (collected_by is None or at["collected_by"] == collected_by)
+        ]
+
+    def names(self, slugs) -> dict[str, str]:
+        """Display names of document and attribute types (inactive included)."""
+        result = {}
+        for slug in slugs:
+            t = self.doc_types.get(slug) or self.attr_types.get(slug)
+            if t is not None:
+                result[slug] = t["name"]
+        return result
+
+
+class TypeRegistry:
+    """Versioned per-workspace type snapshots with single-flight loading."""
+
+    def __init__(self, ttl_seconds: float = TYPE_REGISTRY_TTL):
+        self._ttl = ttl_seconds
+        self._snapshots: dict[uuid.UUID, TypeSnapshot] = {}
+        self._versions: dict[uuid.UUID, int] = {}
+        self._loading: dict[uuid.UUID, asyncio.Future] = {}
+        self._shared: Optional[SharedCacheBackend] = None
+        self._loads = 0
+
+    def attach_shared(self, shared: Optional[SharedCacheBackend]):
+        """Send and receive invalidations through a shared tier (None = this instance only)."""
+        self._shared = shared
+        if shared is not None:
+            shared.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, namespace: Optional[str], key: Optional[str]):
+        if namespace is not None and namespace != NAMESPACE:
+            return
+        if key is None:
+            for workspace_id in list(self._snapshots):
+                self._bump(workspace_id)
+            return
+        try:
+            self._bump(uuid.UUID(key))
+        except ValueError:
+            pass
+
+    def version(self, workspace_id: uuid.UUID) -> int:
+        return self._versions.get(workspace_id, 0)
+
+    def _bump(self, workspace_id: uuid.UUID) -> int:
+        version = self._versions.get(workspace_id, 0) + 1
+        self._versions[workspace_id] = version
+        return version
+
+    def _is_current(self, snapshot: TypeSnapshot) -> bool:
+        return (
+            snapshot.version == self.version(snapshot.workspace_id)
+            and time.monotonic() - snapshot.loaded_at < self._ttl
+        )
+
+    def peek(self, workspace_id: uuid.UUID) -> Optional[TypeSnapshot]:
+        """The latest loaded snapshot, without loading or checking it."""
+        return self._snapshots.get(workspace_id)
+
+    async def get(self, pool: asyncpg.Pool, workspace_id: uuid.UUID) -> TypeSnapshot:
+        """The workspace's current snapshot, loaded (once, for all waiters) if missing or stale."""
+        snapshot = self._snapshots.get(workspace_id)
+        if snapshot is not None and self._is_current(snapshot):
+            return snapshot
+
+        pending = self._loading.get(workspace_id)
+        while pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The loading task was cancelled, not us: load ourselves
+                if not pending.cancelled():
+                    raise
+            pending = self._loading.get(workspace_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[workspace_id] = future
+        try:
+            snapshot = await self._load(pool, workspace_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; nobody else retrieves it when there are none
+            future.exception()
+            raise
+        else:
+            self._snapshots[workspace_id] = snapshot
+            future.set_result(snapshot)
+            return snapshot
+        finally:
+            self._loading.pop(workspace_id, None)
+
+    async def _load(self, pool: asyncpg.Pool, workspace_id: uuid.UUID) -> TypeSnapshot:
+        # Versions bumped during the load make this snapshot stale right away
+        version = self.version(workspace_id)
+        t0 = time.perf_counter()
+        doc_rows, attr_rows = await asyncio.gather(
+            pool.fetch(_DOC_TYPES_SQL, workspace_id),
+            pool.fetch(_ATTR_TYPES_SQL, workspace_id),
+        )
+        snapshot = TypeSnapshot(
+            workspace_id=workspace_id,
+            version=version,
+            doc_types=MappingProxyType({r["slug"]: _freeze(r, ("verification_config",)) for r in doc_rows}),
+            attr_types=MappingProxyType({r["slug"]: _freeze(r, ("options", "fields")) for r in attr_rows}),
+        )
+        self._loads += 1
+        logger.info(
+            f"📚 Type registry loaded v{version} for workspace {workspace_id}: "
+            f"{len(snapshot.doc_types)} doc types, {len(snapshot.attr_types)} attr types "
+            f"in {(time.perf_counter() - t0) * 1000:.0f}ms"
+        )
+        return snapshot
+
+    async def invalidate(self, workspace_id: uuid.UUID):
+        """A type of this workspace was created, updated or deleted."""
+        version = self._bump(workspace_id)
+        logger.info(f"📚 Type registry invalidated for workspace {workspace_id} (v{version})")
+        if self._shared is None:
+            return
+        try:
+            await self._shared.delete(NAMESPACE, str(workspace_id))
+        except Exception as e:
+            logger.warning(f"Type invalidation not sent to other instances: {e}")
+
+    def clear(self):
+        for workspace_id in list(self._snapshots):
+            self._bump(workspace_id)
+        self._snapshots.clear()
+
+    def stats(self) -> dict:
+        return {
+            "workspaces": len(self._snapshots),
+            "loads": self._loads,
+            "loading": len(self._loading),
+        }
+
+
+type_registry = TypeRegistry()
+
+
+async def get_types(pool: asyncpg.Pool, workspace_id: uuid.UUID) -> TypeSnapshot:
+    """Current type snapshot of a workspace."""
+    return await type_registry.get(pool, workspace_id)
+
+
+async def invalidate_types(workspace_id: uuid.UUID):
+    """Bump the workspace's type version after a type create/update/delete."""
+    await type_registry.invalidate(workspace_id)
@@ -0,0 +1,168 @@
+"""
+Unit tests for delta persistence of agent state (src/utils/agent_state_store.py).
+
+AgentStateStore.plan is tested directly; save() runs against a fake pool
+that applies the store's UPDATEs to an in-memory row.
+
+Run with: pytest tests/test_agent_state_store.py -v
+"""
+import hashlib
+import json
+import uuid
+
+import pytest
+
+from src.utils.agent_state_store import DELTA, FULL, SKIP, AgentStateStore
+
+TABLE = "agents.document_collections"
+
+
+class FakeStatePool:
+    """One agent_state per id; md5 over the canonical JSON stands in for md5(agent_state::text)."""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+
+    @staticmethod
+    def row_hash(state) -> str:
+        return hashlib.md5(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+    async def fetchval(self, sql: str, *args):
+        if "agent_state || $1::jsonb" in sql:
+            payload, removed, row_id, expected = args
+            state = self.rows.get(row_id)
+            if not isinstance(state, dict) or self.row_hash(state) != expected:
+                return None
+            state.update(json.loads(payload))
+            for key in removed:
+                state.pop(key, None)
+            return self.row_hash(state)
+        if "SET agent_state = $1::jsonb" in sql:
+            payload, row_id = args
+            if row_id not in self.rows:
+                return None
+            self.rows[row_id] = json.loads(payload)
+            return self.row_hash(self.rows[row_id])
+        if sql.lstrip().startswith("UPDATE"):
+            row_id, expected = args
+            state = self.rows.get(row_id)
+            return self.row_hash(state) if row_id in self.rows and self.row_hash(state) == expected else None
+        row_id, = args
+        return self.row_hash(self.rows[row_id]) if row_id in self.rows else None
+
+
+@pytest.fixture
+def pool():
+    return FakeStatePool()
+
+
+@pytest.fixture
+def row_id(pool):
+    rid = str(uuid.uuid4())
+    pool.rows[rid] = {}
+    return rid
+
+
+STATE = {"phase": "collecting", "index": 0, "results": [{"slug": "id_card", "passed": True}]}
+
+
+class TestPlan:
+    """plan() picks full, delta or skip from the baseline."""
+
+    def test_first_save_is_full(self):
+        store = AgentStateStore()
+        write, payload, _ = store.plan(TABLE, "a", STATE)
+        assert write.mode == FULL
+        assert write.changed == list(STATE)
+        assert json.loads(payload) == STATE
+        assert write.bytes == len(payload.encode())
+
+    def test_delta_and_skip(self):
+        store = AgentStateStore()
+        _, _, digests = store.plan(TABLE, "a", STATE)
+        store._remember(TABLE, "a", digests, FULL, "hash")
+
+        assert store.plan(TABLE, "a", dict(STATE))[0].mode == SKIP
+
+        changed = {**STATE, "index": 1, "new": "x"}
+        del changed["phase"]
+        write, payload, _ = store.plan(TABLE, "a", changed)
+        assert write.mode == DELTA
+        assert write.changed == ["index", "new"]
+        assert write.removed == ["phase"]
+        assert json.loads(payload) == {"index": 1, "new": "x"}
+
+    def test_in_place_mutation_is_detected(self):
+        store = AgentStateStore()
+        state = json.loads(json.dumps(STATE))
+        _, _, digests = store.plan(TABLE, "a", state)
+        store._remember(TABLE, "a", digests, FULL, "hash")
+        state["results"][0]["passed"] = False
+        write, _, _ = store.plan(TABLE, "a", state)
+        assert write.mode == DELTA
+        assert write.changed == ["results"]
+
+    def test_compaction(self):
+        store = AgentStateStore(compact_every=3)
+        state = dict(STATE)
+        _, _, digests = store.plan(TABLE, "a", state)
+        store._remember(TABLE, "a", digests, FULL, "hash")
+        modes = []
+        for i in range(1, 5):
+            state = {**state, "index": i}
+            write, _, digests = store.plan(TABLE, "a", state)
+            store._remember(TABLE, "a", digests, write.mode, "hash")
+            modes.append(write.mode)
+        assert modes == [DELTA, DELTA, FULL, DELTA]
+
+    def test_baselines_are_bounded(self):
+        store = AgentStateStore(max_tracked=2)
+        for rid in ("a", "b", "c"):
+            _, _, digests = store.plan(TABLE, rid, STATE)
+            store._remember(TABLE, rid, digests, FULL, "hash")
+        assert store.plan(TABLE, "a", STATE)[0].mode == FULL
+        assert store.plan(TABLE, "c", STATE)[0].mode == SKIP
+
+
+class TestSave:
+    """save() against a row, including writes from elsewhere."""
+
+    @pytest.mark.asyncio
+    async def test_row_converges(self, pool, row_id):
+        store = AgentStateStore()
+        assert (await store.save(pool, TABLE, row_id, STATE)).mode == FULL
+        state = {**STATE, "index": 1}
+        assert (await store.save(pool, TABLE, row_id, state)).mode == DELTA
+        assert (await store.save(pool, TABLE, row_id, state)).mode == SKIP
+        assert pool.rows[row_id] == state
+        assert store.stats()["writes"] == {FULL: 1, DELTA: 1, SKIP: 1}
+
+    @pytest.mark.asyncio
+    async def test_external_write_forces_full_save(self, pool, row_id):
+        store = AgentStateStore()
+        await store.save(pool, TABLE, row_id, STATE)
+        pool.rows[row_id]["signed"] = True  # e.g. the Yousign webhook
+
+        state = {**STATE, "index": 1}
+        write = await store.save(pool, TABLE, row_id, state)
+        assert write.mode == FULL
+        assert pool.rows[row_id] == state
+
+    @pytest.mark.asyncio
+    async def test_skip_detects_external_write(self, pool, row_id):
+        store = AgentStateStore()
+        await store.save(pool, TABLE, row_id, STATE)
+        pool.rows[row_id] = {"phase": "overwritten"}
+        assert (await store.save(pool, TABLE, row_id, STATE)).mode == FULL
+        assert pool.rows[row_id] == STATE
+
+    @pytest.mark.asyncio
+    async def test_missing_row_is_not_tracked(self, pool):
+        store = AgentStateStore()
+        assert (await store.save(pool, TABLE, str(uuid.uuid4()), STATE)).mode == FULL
+        assert store.stats()["tracked"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_table(self, pool, row_id):
+        with pytest.raises(ValueError):
+            await AgentStateStore().save(pool, "ats.vacancies", row_id, STATE)
@@ -0,0 +1,128 @@
+"""
+Unit tests for the ATS sync schedule and lease heartbeat
+(src/services/vacancy_import_service.py).
+
+Run with: pytest tests/test_ats_sync.py -v
+"""
+from uuid import uuid4
+
+import pytest
+
+from src.services import vacancy_import_service as service
+from src.services.vacancy_import_service import (
+    ATS_SYNC_INTERVAL,
+    ATS_SYNC_LEASE_SECONDS,
+    ATS_SYNC_MAX_INTERVAL,
+    ATS_SYNC_MIN_INTERVAL,
+    SyncProgressTracker,
+    VacancyImportService,
+    _BUSY_CHANGE_COUNT,
+    _next_sync_interval,
+)
+
+
+class FakeSyncStateRepo:
+    """Records save_progress calls; the lease is held while `lease_held`."""
+
+    def __init__(self):
+        self.saves = 0
+        self.lease_held = True
+
+    async def save_progress(self, workspace_id, owner, progress, lease_seconds):
+        self.saves += 1
+        return self.lease_held
+
+
+def make_tracker(monotonic: list[float]) -> tuple[SyncProgressTracker, FakeSyncStateRepo]:
+    tracker = SyncProgressTracker(None, uuid4())
+    repo = FakeSyncStateRepo()
+    tracker.repo = repo
+    tracker.flushed_at = monotonic[0]
+    return tracker, repo
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.monotonic() for the service module."""
+    now = [1000.0]
+    monkeypatch.setattr(service.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestNextSyncInterval:
+    """_next_sync_interval adapts to change volume within the configured bounds."""
+
+    def test_quiet_workspace_backs_off(self):
+        assert _next_sync_interval(ATS_SYNC_INTERVAL, 0) == min(int(ATS_SYNC_INTERVAL * 1.5), ATS_SYNC_MAX_INTERVAL)
+
+    def test_busy_workspace_syncs_more_often(self):
+        expected = max(int(ATS_SYNC_INTERVAL / 2), ATS_SYNC_MIN_INTERVAL)
+        assert _next_sync_interval(ATS_SYNC_INTERVAL, _BUSY_CHANGE_COUNT) == expected
+
+    def test_moderate_changes_drift_back_to_default(self):
+        interval = ATS_SYNC_MAX_INTERVAL
+        for _ in range(30):
+            interval = _next_sync_interval(interval, 1)
+        assert abs(interval - ATS_SYNC_INTERVAL) <= 1
+
+    def test_no_previous_interval_starts_from_default(self):
+        assert _next_sync_interval(None, 1) == _next_sync_interval(ATS_SYNC_INTERVAL, 1)
+
+    def test_bounds(self):
+        interval = ATS_SYNC_INTERVAL
+        for _ in range(30):
+            interval = _next_sync_interval(interval, 0)
+        assert interval == ATS_SYNC_MAX_INTERVAL
+        for _ in range(30):
+            interval = _next_sync_interval(interval, _BUSY_CHANGE_COUNT)
+        assert interval == ATS_SYNC_MIN_INTERVAL
+
+
+class TestSyncHeartbeat:
+    """heartbeat() extends the lease once a quarter of it has passed."""
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_waits_for_a_quarter_lease(self, clock):
+        tracker, repo = make_tracker(clock)
+        clock[0] += ATS_SYNC_LEASE_SECONDS / 4 - 1
+        assert await tracker.heartbeat()
+        assert repo.saves == 0
+
+        clock[0] += 2
+        assert await tracker.heartbeat()
+        assert repo.saves == 1
+        # The flush resets the clock
+        assert await tracker.heartbeat()
+        assert repo.saves == 1
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_reports_lost_lease(self, clock):
+        tracker, repo = make_tracker(clock)
+        repo.lease_held = False
+        clock[0] += ATS_SYNC_LEASE_SECONDS
+        assert not await tracker.heartbeat()
+
+    @pytest.mark.asyncio
+    async def test_detached_tracker_never_flushes(self, clock):
+        tracker = SyncProgressTracker(None, None)
+        clock[0] += ATS_SYNC_LEASE_SECONDS * 10
+        assert await tracker.heartbeat()
+
+    @pytest.mark.asyncio
+    async def test_per_record_import_stops_on_lost_lease(self, clock):
+        svc = VacancyImportService(None)
+        svc.progress, repo = make_tracker(clock)
+        imported = []
+
+        async def import_record(conn, workspace_id, provider_slug, record, *args):
+            imported.append(record["Id"])
+            if record["Id"] == "2":
+                # A slow record: the next heartbeat is due, and the lease is gone
+                clock[0] += ATS_SYNC_LEASE_SECONDS
+                repo.lease_held = False
+
+        svc._import_record = import_record
+        records = [{"Id": "1"}, {"Id": "2"}, {"Id": "3"}]
+        with pytest.raises(RuntimeError):
+            await svc._import_records(None, uuid4(), "connexys", records, None, None, [])
+        assert imported == ["1", "2"]
@@ -0,0 +1,148 @@
+"""
+Unit tests for explicit context caching of system instructions
+(ContextCacheRegistry in src/utils/llm.py).
+
+genai.Client is replaced by a fake, so no cached contents are created.
+
+Run with: pytest tests/test_context_cache.py -v
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google import genai
+
+from src.utils import llm
+from src.utils.llm import ContextCacheRegistry, _min_cache_tokens
+
+
+class FakeCaches:
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.fail_with = None
+
+    async def create(self, model, config):
+        await asyncio.sleep(0)
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.created.append((model, config.system_instruction))
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    async def update(self, name, config):
+        self.updated.append(name)
+
+    async def delete(self, name):
+        self.deleted.append(name)
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    fake = FakeCaches()
+    monkeypatch.setattr(genai, "Client", lambda: SimpleNamespace(aio=SimpleNamespace(caches=fake)))
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm.time, "monotonic", lambda: now[0])
+    return now
+
+
+def instruction(tokens: int) -> str:
+    """An instruction estimated at `tokens` tokens (4 characters each)."""
+    return "x" * (tokens * 4)
+
+
+class TestMinimumSize:
+    """Instructions below the model's minimum are never sent to the cache API."""
+
+    def test_min_tokens_per_model_family(self):
+        assert _min_cache_tokens("gemini-2.5-flash") == 1024
+        assert _min_cache_tokens("gemini-2.5-flash-lite") == 1024
+        assert _min_cache_tokens("gemini-2.5-pro") == 4096
+        assert _min_cache_tokens("gemini-2.0-flash") == 4096
+        assert _min_cache_tokens("gemini-3-pro-preview") == 4096
+        assert _min_cache_tokens("some-other-model") == 4096
+
+    @pytest.mark.asyncio
+    async def test_small_instruction_is_skipped(self, caches):
+        registry = ContextCacheRegistry()
+        assert await registry.get("gemini-2.0-flash", instruction(1200), "recognition") is None
+        assert await registry.get("gemini-2.0-flash", instruction(1200), "recognition") is None
+        assert caches.created == []
+
+    @pytest.mark.asyncio
+    async def test_threshold_depends_on_model(self, caches):
+        registry = ContextCacheRegistry()
+        text = instruction(1400)
+        assert await registry.get("gemini-2.5-flash", text, "interview_analysis") == "cachedContents/1"
+        assert await registry.get("gemini-3-pro-preview", text, "transcript") is None
+        assert caches.created == [("gemini-2.5-flash", text)]
+
+
+class TestRegistry:
+    """Creation, reuse, refresh and failure handling."""
+
+    @pytest.mark.asyncio
+    async def test_created_once_for_concurrent_callers(self, caches):
+        registry = ContextCacheRegistry()
+        text = instruction(2000)
+        names = await asyncio.gather(*(registry.get("gemini-2.5-flash", text, "a") for _ in range(5)))
+        assert set(names) == {"cachedContents/1"}
+        assert len(caches.created) == 1
+
+    @pytest.mark.asyncio
+    async def test_refreshed_close_to_expiry(self, caches, clock):
+        registry = ContextCacheRegistry(ttl_seconds=3600, refresh_margin=300)
+        text = instruction(2000)
+        name = await registry.get("gemini-2.5-flash", text, "a")
+        clock[0] += 3600 - 100
+        assert await registry.get("gemini-2.5-flash", text, "a") == name
+        assert caches.updated == [name]
+        assert len(caches.created) == 1
+
+    @pytest.mark.asyncio
+    async def test_recreated_after_expiry(self, caches, clock):
+        registry = ContextCacheRegistry(ttl_seconds=3600, refresh_margin=300)
+        text = instruction(2000)
+        await registry.get("gemini-2.5-flash", text, "a")
+        clock[0] += 3601
+        assert await registry.get("gemini-2.5-flash", text, "a") == "cachedContents/2"
+        assert caches.updated == []
+
+    @pytest.mark.asyncio
+    async def test_transient_failure_is_retried_later(self, caches, clock):
+        registry = ContextCacheRegistry()
+        text = instruction(2000)
+        caches.fail_with = RuntimeError("503 UNAVAILABLE")
+        assert await registry.get("gemini-2.5-flash", text, "a") is None
+
+        caches.fail_with = None
+        assert await registry.get("gemini-2.5-flash", text, "a") is None
+        clock[0] += llm._CONTEXT_CACHE_RETRY_SECONDS + 1
+        assert await registry.get("gemini-2.5-flash", text, "a") == "cachedContents/1"
+
+    @pytest.mark.asyncio
+    async def test_rejected_instruction_is_not_retried(self, caches, clock):
+        registry = ContextCacheRegistry()
+        text = instruction(2000)
+        caches.fail_with = RuntimeError("400 INVALID_ARGUMENT: content too small")
+        assert await registry.get("gemini-2.5-flash", text, "a") is None
+
+        caches.fail_with = None
+        clock[0] += 24 * 3600
+        assert await registry.get("gemini-2.5-flash", text, "a") is None
+        assert caches.created == []
+
+    @pytest.mark.asyncio
+    async def test_invalidate_and_close(self, caches):
+        registry = ContextCacheRegistry()
+        a, b = instruction(2000), instruction(3000)
+        await registry.get("gemini-2.5-flash", a, "a")
+        await registry.get("gemini-2.5-flash", b, "b")
+        registry.invalidate("gemini-2.5-flash", a)
+        await registry.close()
+        assert caches.deleted == ["cachedContents/2"]
@@ -0,0 +1,101 @@
+"""
+Unit tests for the CV analysis cache key (agents/cv_analyzer/cache.py) and
+the per-question matching of analyses (agents/cv_analyzer/agent.py).
+
+No database and no LLM calls: the cache runs memory-only.
+
+Run with: pytest tests/test_cv_cache.py -v
+"""
+import uuid
+
+import pytest
+
+from agents.cv_analyzer import cache as cv_cache
+from agents.cv_analyzer.agent import ANALYSIS_VERSION, _match_analyses
+from agents.cv_analyzer.cache import CVCache, question_set_hash
+
+KNOCKOUT = [{"id": "ko_1", "question_text": "Heb je een rijbewijs B?"}]
+QUALIFICATION = [
+    {"id": "qual_1", "question_text": "Hoeveel jaar ervaring heb je?", "ideal_answer": "Minstens 2 jaar"},
+    {"id": "qual_2", "question": "Werk je graag in ploegen?"},
+]
+
+
+class TestQuestionSetHash:
+    """question_set_hash changes with everything that changes the analysis."""
+
+    def test_stable(self):
+        assert question_set_hash(KNOCKOUT, QUALIFICATION, "v1") == question_set_hash(
+            [dict(q) for q in KNOCKOUT], [dict(q) for q in QUALIFICATION], "v1",
+        )
+
+    def test_version_changes_hash(self):
+        assert question_set_hash(KNOCKOUT, QUALIFICATION, "v1") != question_set_hash(KNOCKOUT, QUALIFICATION, "v2")
+        assert question_set_hash(KNOCKOUT, QUALIFICATION) != question_set_hash(KNOCKOUT, QUALIFICATION, "v1")
+
+    def test_question_edits_change_hash(self):
+        base = question_set_hash(KNOCKOUT, QUALIFICATION, "v1")
+        edited = [dict(QUALIFICATION[0], ideal_answer="Minstens 5 jaar"), QUALIFICATION[1]]
+        assert question_set_hash(KNOCKOUT, edited, "v1") != base
+        assert question_set_hash(KNOCKOUT, list(reversed(QUALIFICATION)), "v1") != base
+
+    def test_question_kind_matters(self):
+        assert question_set_hash(KNOCKOUT, [], "v1") != question_set_hash([], KNOCKOUT, "v1")
+
+    def test_question_and_question_text_are_equivalent(self):
+        a = [{"id": "q", "question": "Rijbewijs?"}]
+        b = [{"id": "q", "question_text": "Rijbewijs?"}]
+        assert question_set_hash(a, [], "v1") == question_set_hash(b, [], "v1")
+
+    def test_analysis_version(self):
+        assert len(ANALYSIS_VERSION) == 12
+        int(ANALYSIS_VERSION, 16)
+
+
+class TestMatchAnalyses:
+    """_match_analyses returns one analysis per question, in question order."""
+
+    def test_order_follows_questions(self):
+        analyses = [
+            {"id": "qual_2", "cv_evidence": "Ploegwerk bij DHL", "is_answered": True, "clarification_needed": None},
+            {"id": "qual_1", "cv_evidence": "3 jaar", "is_answered": True, "clarification_needed": None},
+        ]
+        matched = _match_analyses(QUALIFICATION, analyses)
+        assert [m["id"] for m in matched] == ["qual_1", "qual_2"]
+        assert matched[0]["cv_evidence"] == "3 jaar"
+        assert matched[1]["question_text"] == "Werk je graag in ploegen?"
+
+    def test_skipped_question_needs_clarification(self):
+        matched = _match_analyses(QUALIFICATION, [{"id": "qual_1", "is_answered": True}])
+        assert matched[1] == {
+            "id": "qual_2",
+            "question_text": "Werk je graag in ploegen?",
+            "cv_evidence": "Geen informatie gevonden",
+            "is_answered": False,
+            "clarification_needed": "Werk je graag in ploegen?",
+        }
+
+    def test_unknown_ids_are_ignored(self):
+        matched = _match_analyses(KNOCKOUT, [{"id": "ko_9", "is_answered": True}])
+        assert len(matched) == 1
+        assert not matched[0]["is_answered"]
+
+
+class TestCVCacheMemory:
+    """In-process analysis lookups are scoped per workspace and question set."""
+
+    @pytest.fixture(autouse=True)
+    def no_db(self, monkeypatch):
+        monkeypatch.setattr(cv_cache, "_db_pool", None)
+
+    @pytest.mark.asyncio
+    async def test_analyses_by_question_set(self):
+        cache = CVCache()
+        workspace = uuid.uuid4()
+        qhash = question_set_hash(KNOCKOUT, QUALIFICATION, ANALYSIS_VERSION)
+        other = question_set_hash(KNOCKOUT, [], ANALYSIS_VERSION)
+        await cache.store_analyses(workspace, "cv-sha", {qhash: {"knockout_analysis": []}})
+
+        assert await cache.get_analyses(workspace, "cv-sha", [qhash, other]) == {qhash: {"knockout_analysis": []}}
+        assert await cache.get_analyses(uuid.uuid4(), "cv-sha", [qhash]) == {}
+        assert await cache.get_analyses(workspace, "other-cv", [qhash]) == {}
@@ -0,0 +1,104 @@
+"""
+Unit tests for EventPump (src/utils/sse_helpers.py), which interleaves an
+agent's events with simulated-reasoning ticks and heartbeats.
+
+Run with: pytest tests/test_event_pump.py -v
+"""
+import asyncio
+
+import pytest
+
+from src.utils.sse_helpers import EventPump
+
+EVENT, TICK, HEARTBEAT = EventPump.EVENT, EventPump.TICK, EventPump.HEARTBEAT
+
+
+async def source(*steps):
+    """Yields the steps; a float is a pause, an exception is raised."""
+    for step in steps:
+        if isinstance(step, float):
+            await asyncio.sleep(step)
+        elif isinstance(step, Exception):
+            raise step
+        else:
+            yield step
+
+
+async def collect(pump: EventPump) -> list[tuple]:
+    return [item async for item in pump]
+
+
+class TestEventPump:
+    """Ordering, ticks, heartbeats, errors and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_fast_source_passes_through(self):
+        pump = EventPump(source("a", "b", "c"), ticks=["Denken..."], tick_interval=1.0)
+        assert await collect(pump) == [(EVENT, "a"), (EVENT, "b"), (EVENT, "c")]
+
+    @pytest.mark.asyncio
+    async def test_ticks_while_source_is_slow(self):
+        pump = EventPump(source(0.35, "done"), ticks=["t1", "t2", "t3", "t4"], tick_interval=0.1)
+        assert await collect(pump) == [(TICK, "t1"), (TICK, "t2"), (TICK, "t3"), (EVENT, "done")]
+
+    @pytest.mark.asyncio
+    async def test_ticks_run_out(self):
+        pump = EventPump(source(0.15, "done"), ticks=["t1"], tick_interval=0.05)
+        assert await collect(pump) == [(TICK, "t1"), (EVENT, "done")]
+
+    @pytest.mark.asyncio
+    async def test_stop_ticks(self):
+        pump = EventPump(source("thought", 0.15, "done"), ticks=["t1", "t2", "t3"], tick_interval=0.05)
+        items = []
+        async for kind, item in pump:
+            items.append((kind, item))
+            if item == "thought":
+                pump.stop_ticks()
+        assert items == [(EVENT, "thought"), (EVENT, "done")]
+
+    @pytest.mark.asyncio
+    async def test_heartbeats_while_idle(self):
+        pump = EventPump(source("a", 0.25, "b"), heartbeat_interval=0.1)
+        assert await collect(pump) == [(EVENT, "a"), (HEARTBEAT, None), (HEARTBEAT, None), (EVENT, "b")]
+
+    @pytest.mark.asyncio
+    async def test_error_after_items(self):
+        pump = EventPump(source("a", "b", RuntimeError("model failed")))
+        items = []
+        with pytest.raises(RuntimeError, match="model failed"):
+            async for item in pump:
+                items.append(item)
+        assert items == [(EVENT, "a"), (EVENT, "b")]
+
+    @pytest.mark.asyncio
+    async def test_closing_cancels_source(self):
+        cancelled = asyncio.Event()
+
+        async def endless():
+            try:
+                yield "first"
+                await asyncio.sleep(10)
+                yield "never"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        iterator = aiter(EventPump(endless()))
+        assert await anext(iterator) == (EVENT, "first")
+        await iterator.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_stall_source(self):
+        produced = []
+
+        async def counting():
+            for i in range(3):
+                produced.append(i)
+                yield i
+
+        iterator = aiter(EventPump(counting()))
+        assert await anext(iterator) == (EVENT, 0)
+        await asyncio.sleep(0.01)
+        assert produced == [0, 1, 2]
+        await iterator.aclose()
@@ -0,0 +1,218 @@
+"""
+Unit tests for the interview session write-behind cache
+(src/utils/interview_session_cache.py).
+
+A fake session service stands in for the ADK DatabaseSessionService.
+
+Run with: pytest tests/test_interview_session_cache.py -v
+"""
+import asyncio
+import copy
+
+import pytest
+
+from src.utils.interview_session_cache import InterviewSessionCache
+
+SESSION = "session-1"
+
+
+class FakeSessionService:
+    """Stores one interview (None: session deleted); counts loads and persisted events."""
+
+    def __init__(self, interview: dict):
+        self.interview = copy.deepcopy(interview)
+        self.loads = 0
+        self.events: list[str] = []
+
+    async def load(self):
+        self.loads += 1
+        await asyncio.sleep(0)
+        if self.interview is None:
+            return None
+        return object(), copy.deepcopy(self.interview)
+
+    async def persist(self, session, interview: dict, reason: str):
+        self.events.append(reason)
+        self.interview = copy.deepcopy(interview)
+        return session
+
+
+def append(value):
+    def mutate(interview: dict):
+        interview["questions"].append(value)
+        return len(interview["questions"])
+    return mutate
+
+
+def remove(value):
+    def mutate(interview: dict):
+        interview["questions"].remove(value)
+    return mutate
+
+
+@pytest.fixture
+def service():
+    return FakeSessionService({"questions": [0, 1]})
+
+
+@pytest.fixture
+def cache():
+    return InterviewSessionCache(flush_delay=0.05, turn_wait=0.2)
+
+
+async def edit(cache, service, mutate, reason="edit"):
+    return await cache.edit(SESSION, service.load, mutate, service.persist, reason)
+
+
+class TestReads:
+    """Reads are served from memory after one load."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_load_once(self, cache, service):
+        results = await asyncio.gather(*(cache.get(SESSION, service.load) for _ in range(5)))
+        assert all(r == {"questions": [0, 1]} for r in results)
+        assert service.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_get_returns_a_copy(self, cache, service):
+        (await cache.get(SESSION, service.load))["questions"].append(99)
+        assert await cache.get(SESSION, service.load) == {"questions": [0, 1]}
+
+    @pytest.mark.asyncio
+    async def test_missing_session(self, cache):
+        async def load():
+            return None
+
+        assert await cache.get(SESSION, load) is None
+        with pytest.raises(LookupError):
+            await cache.edit(SESSION, load, append(2), None, "add")
+
+
+class TestEdits:
+    """Edits are applied in memory and persisted as one debounced event."""
+
+    @pytest.mark.asyncio
+    async def test_edits_are_coalesced(self, cache, service):
+        result, interview = await edit(cache, service, append(2), "add")
+        assert result == 3
+        assert interview == {"questions": [0, 1, 2]}
+        await edit(cache, service, append(3), "add")
+        await edit(cache, service, remove(0), "delete")
+        assert service.events == []
+        assert cache.stats()["dirty"] == 1
+
+        await asyncio.sleep(0.2)
+        assert service.events == ["edits_3"]
+        assert service.interview == {"questions": [1, 2, 3]}
+        assert cache.stats()["dirty"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_mutation_leaves_session_untouched(self, cache, service):
+        with pytest.raises(ValueError):
+            await edit(cache, service, remove(42))
+        assert await cache.get(SESSION, service.load) == {"questions": [0, 1]}
+        assert cache.stats()["edits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_now(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        await cache.flush(SESSION)
+        assert service.events == ["add"]
+        await asyncio.sleep(0.1)
+        assert service.events == ["add"]
+
+    @pytest.mark.asyncio
+    async def test_changed_elsewhere_discards_edits(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        await edit(cache, service, remove(1), "delete")
+        # Regenerated elsewhere meanwhile: the edits referred to the old questions
+        service.interview = {"questions": [0, 5]}
+
+        await cache.flush(SESSION)
+        assert service.events == []
+        assert service.interview == {"questions": [0, 5]}
+        assert cache.stats()["conflicts"] == 1
+        assert cache.stats()["dirty"] == 0
+        assert await cache.get(SESSION, service.load) == {"questions": [0, 5]}
+
+    @pytest.mark.asyncio
+    async def test_deleted_session_drops_edits(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        service.interview = None  # session deleted meanwhile
+
+        await asyncio.sleep(0.2)
+        assert service.events == []
+        assert cache.stats()["sessions"] == 0
+        assert cache.stats()["dirty"] == 0
+        # Not retried once the session is gone
+        loads = service.loads
+        await asyncio.sleep(0.2)
+        assert service.loads == loads
+
+    @pytest.mark.asyncio
+    async def test_unchanged_store_is_not_a_conflict(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        await cache.flush(SESSION)
+        await edit(cache, service, append(3), "add")
+        await cache.flush(SESSION)
+        assert service.interview == {"questions": [0, 1, 2, 3]}
+        assert cache.stats()["conflicts"] == 0
+
+
+class TestAgentTurns:
+    """Edits wait for agent turns, which see the pending edits persisted."""
+
+    @pytest.mark.asyncio
+    async def test_turn_flushes_pending_edits(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        async with cache.agent_turn(SESSION):
+            assert service.events == ["add"]
+            assert cache.in_agent_turn(SESSION)
+        assert not cache.in_agent_turn(SESSION)
+
+    @pytest.mark.asyncio
+    async def test_reset_discards_pending_edits(self, cache, service):
+        await edit(cache, service, append(2), "add")
+        async with cache.agent_turn(SESSION, keep_edits=False):
+            pass
+        await asyncio.sleep(0.1)
+        assert service.events == []
+
+    @pytest.mark.asyncio
+    async def test_edit_waits_for_turn_and_sees_its_state(self, cache, service):
+        await cache.get(SESSION, service.load)
+
+        async def agent():
+            async with cache.agent_turn(SESSION):
+                await asyncio.sleep(0.05)
+                service.interview = {"questions": ["generated"]}
+                await cache.put(SESSION, None, service.interview)
+
+        turn = asyncio.create_task(agent())
+        await asyncio.sleep(0)
+        _, interview = await edit(cache, service, append("added"), "add")
+        await turn
+        assert interview == {"questions": ["generated", "added"]}
+
+    @pytest.mark.asyncio
+    async def test_turn_without_put_drops_entry(self, cache, service):
+        await cache.get(SESSION, service.load)
+        async with cache.agent_turn(SESSION):
+            service.interview = {"questions": ["generated"]}
+        assert await cache.get(SESSION, service.load) == {"questions": ["generated"]}
+        assert service.loads == 2
+
+    @pytest.mark.asyncio
+    async def test_edit_times_out_behind_a_long_turn(self, cache, service):
+        release = asyncio.Event()
+
+        async def agent():
+            async with cache.agent_turn(SESSION):
+                await release.wait()
+
+        turn = asyncio.create_task(agent())
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError):
+            await edit(cache, service, append(2), "add")
+        release.set()
+        await turn
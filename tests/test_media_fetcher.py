@@ -0,0 +1,112 @@
+"""
+Unit tests for the streaming media download (src/services/media_fetcher.py).
+
+Downloads go through an httpx MockTransport instead of Twilio.
+
+Run with: pytest tests/test_media_fetcher.py -v
+"""
+import hashlib
+
+import httpx
+import pytest
+
+from src.services import media_fetcher
+from src.services.media_fetcher import (
+    MediaFetchError,
+    MediaTooLargeError,
+    fetch_twilio_media,
+    stream_media,
+)
+
+CHUNK = b"x" * 1024
+
+
+def use_transport(monkeypatch, handler):
+    """Route the pooled client through a MockTransport."""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(media_fetcher, "_client", client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+async def close_client(monkeypatch):
+    yield
+    await media_fetcher.close_media_fetcher()
+
+
+class ChunkStream(httpx.AsyncByteStream):
+    """A body without Content-Length that counts the chunks it handed out."""
+
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aiter__(self):
+        for _ in range(self.chunks):
+            self.sent += 1
+            yield CHUNK
+
+
+class TestStreamMedia:
+    """stream_media enforces the size cap and hashes the body while streaming."""
+
+    @pytest.mark.asyncio
+    async def test_body_type_and_hash(self, monkeypatch):
+        body = b"%PDF-1.4 test"
+        use_transport(monkeypatch, lambda request: httpx.Response(
+            200, content=body, headers={"content-type": "application/pdf; charset=binary"},
+        ))
+        data, content_type, digest = await stream_media("https://media.test/1")
+        assert data == body
+        assert content_type == "application/pdf"
+        assert digest == hashlib.sha256(body).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_declared_length_over_cap_is_rejected_before_reading(self, monkeypatch):
+        stream = ChunkStream(8)
+        use_transport(monkeypatch, lambda request: httpx.Response(
+            200, stream=stream, headers={"content-length": str(8 * len(CHUNK))},
+        ))
+        with pytest.raises(MediaTooLargeError):
+            await stream_media("https://media.test/1", max_bytes=4 * len(CHUNK))
+        assert stream.sent == 0
+
+    @pytest.mark.asyncio
+    async def test_body_growing_past_cap_is_aborted(self, monkeypatch):
+        stream = ChunkStream(100)
+        use_transport(monkeypatch, lambda request: httpx.Response(200, stream=stream))
+        with pytest.raises(MediaTooLargeError):
+            await stream_media("https://media.test/1", max_bytes=4 * len(CHUNK))
+        assert stream.sent == 5
+
+    @pytest.mark.asyncio
+    async def test_body_at_cap_is_accepted(self, monkeypatch):
+        use_transport(monkeypatch, lambda request: httpx.Response(200, stream=ChunkStream(4)))
+        data, _, _ = await stream_media("https://media.test/1", max_bytes=4 * len(CHUNK))
+        assert data == CHUNK * 4
+
+    @pytest.mark.asyncio
+    async def test_http_error(self, monkeypatch):
+        use_transport(monkeypatch, lambda request: httpx.Response(404))
+        with pytest.raises(MediaFetchError):
+            await stream_media("https://media.test/1")
+
+
+class TestFetchTwilioMedia:
+    """Non-image media is passed through; the original is handed over once."""
+
+    @pytest.mark.asyncio
+    async def test_pdf_and_release_original(self, monkeypatch):
+        body = b"%PDF-1.4 contract"
+        use_transport(monkeypatch, lambda request: httpx.Response(
+            200, content=body, headers={"content-type": "application/pdf"},
+        ))
+        media = await fetch_twilio_media("https://media.test/1")
+        assert media.data == body
+        assert media.extension == ".pdf"
+        assert media.content_hash == hashlib.sha256(body).hexdigest()
+
+        assert media.release_original() == body
+        assert media.original is None
+        with pytest.raises(RuntimeError):
+            media.release_original()
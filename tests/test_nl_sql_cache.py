@@ -0,0 +1,110 @@
+"""
+Unit tests for the analyst question -> SQL cache (src/utils/nl_sql_cache.py).
+
+Covers question normalization and the cache key (workspace, schema
+fingerprint, normalized question), memory-only and with a local shared tier.
+
+Run with: pytest tests/test_nl_sql_cache.py -v
+"""
+import pytest
+
+from src.utils import nl_sql_cache
+from src.utils.nl_sql_cache import NlSqlCache, is_cacheable_sql, normalize_question
+from src.utils.shared_cache import LocalSharedCache
+
+SQL = "SELECT count(*) FROM ats.applications WHERE created_at >= date_trunc('week', now())"
+
+
+class TestNormalizeQuestion:
+    """normalize_question folds phrasing that doesn't change the question."""
+
+    @pytest.mark.parametrize("a, b", [
+        ("Hoeveel kandidaten deze week?", "hoeveel kandidaten deze week"),
+        ("Toon het aantal kandidaten deze week aub", "hoeveel sollicitanten deze week"),
+        ("Geef eens de vacatures aub", "vacatures"),
+        ("Hoeveel sollicitaties zijn er déze week?", "hoeveel applicaties zijn er deze week"),
+        ("How many candidates this week, please", "how many kandidaten this week"),
+    ])
+    def test_equivalent_questions(self, a, b):
+        assert normalize_question(a) == normalize_question(b)
+
+    @pytest.mark.parametrize("a, b", [
+        ("Toon de vacatures van mij", "Toon de vacatures"),
+        ("Hoeveel kandidaten zijn er nu?", "Hoeveel kandidaten zijn er?"),
+        ("Hoeveel kandidaten deze week?", "Hoeveel kandidaten vorige week?"),
+        ("Welke vacatures in Gent?", "Welke vacatures in Antwerpen?"),
+    ])
+    def test_different_questions(self, a, b):
+        assert normalize_question(a) != normalize_question(b)
+
+    def test_only_filler(self):
+        assert normalize_question("Graag, aub!") == ""
+
+    def test_literal_dates_are_not_cacheable(self):
+        assert is_cacheable_sql(SQL)
+        assert not is_cacheable_sql("SELECT * FROM ats.applications WHERE created_at >= '2026-10-12'")
+
+
+class TestNlSqlCache:
+    """Lookups are scoped to the workspace and the schema fingerprint."""
+
+    @pytest.mark.asyncio
+    async def test_store_and_hit(self):
+        cache = NlSqlCache()
+        await cache.put("ws-1", "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        assert await cache.get("ws-1", "fp-1", "hoeveel sollicitanten deze week aub") == SQL
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_scoped_to_workspace_and_schema(self):
+        cache = NlSqlCache()
+        await cache.put("ws-1", "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        assert await cache.get("ws-2", "fp-1", "Hoeveel kandidaten deze week?") is None
+        assert await cache.get("ws-1", "fp-2", "Hoeveel kandidaten deze week?") is None
+
+    @pytest.mark.asyncio
+    async def test_no_workspace_is_never_cached(self):
+        cache = NlSqlCache()
+        await cache.put(None, "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        assert cache.stats()["stores"] == 0
+        assert await cache.get(None, "fp-1", "Hoeveel kandidaten deze week?") is None
+        await cache.put("", "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_sql_with_dates_is_not_stored(self):
+        cache = NlSqlCache()
+        await cache.put("ws-1", "fp-1", "Hoeveel kandidaten deze week?", "SELECT 1 WHERE d >= '2026-10-12'")
+        assert await cache.get("ws-1", "fp-1", "Hoeveel kandidaten deze week?") is None
+
+    @pytest.mark.asyncio
+    async def test_discard(self):
+        cache = NlSqlCache()
+        await cache.put("ws-1", "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        await cache.discard("ws-1", "fp-1", "Hoeveel kandidaten?  deze week")
+        assert await cache.get("ws-1", "fp-1", "Hoeveel kandidaten deze week?") is None
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(nl_sql_cache.time, "time", lambda: now[0])
+        cache = NlSqlCache(ttl_seconds=60, max_entries=2)
+        for city in ("Gent", "Antwerpen", "Brugge"):
+            await cache.put("ws-1", "fp-1", f"vacatures in {city}", SQL)
+        assert await cache.get("ws-1", "fp-1", "vacatures in Gent") is None
+        assert await cache.get("ws-1", "fp-1", "vacatures in Brugge") == SQL
+        now[0] += 61
+        assert await cache.get("ws-1", "fp-1", "vacatures in Brugge") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_tier(self):
+        shared = LocalSharedCache()
+        first, second, third = NlSqlCache(), NlSqlCache(), NlSqlCache()
+        for cache in (first, second, third):
+            cache.attach_shared(shared)
+        await first.put("ws-1", "fp-1", "Hoeveel kandidaten deze week?", SQL)
+        assert await second.get("ws-1", "fp-1", "Hoeveel kandidaten deze week?") == SQL
+
+        await first.discard("ws-1", "fp-1", "Hoeveel kandidaten deze week?")
+        assert await first.get("ws-1", "fp-1", "Hoeveel kandidaten deze week?") is None
+        assert await third.get("ws-1", "fp-1", "Hoeveel kandidaten deze week?") is None
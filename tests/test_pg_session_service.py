@@ -0,0 +1,198 @@
+"""
+Unit tests for batched event appends in PgSessionService
+(src/services/pg_session_service.py).
+
+A fake pool applies the batch statement to in-memory sessions, so stale
+revisions, batching per session and retries can be checked without Postgres.
+
+Run with: pytest tests/test_pg_session_service.py -v
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import Session
+
+from src.services.pg_session_service import PgSessionService, SessionNotFoundError, StaleSessionError
+
+APP, USER = "taloo", "user-1"
+
+
+class FakeConnection:
+    def __init__(self, db: "FakeSessionDb"):
+        self.db = db
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql: str, *args):
+        """The append batch statement: apply each append whose expected revision matches."""
+        self.db.batches.append(len(args[0]))
+        await asyncio.sleep(0)
+        app_names, user_ids, session_ids, expected, deltas, timestamps, event_ids = args[:7]
+        rows = []
+        for i, key in enumerate(zip(app_names, user_ids, session_ids)):
+            stored = self.db.sessions.get(key)
+            if stored is None or stored["update_time"] != expected[i]:
+                continue
+            stored["update_time"] = max(timestamps[i], stored["update_time"] + 0.000001)
+            stored["state"].update(json.loads(deltas[i]))
+            stored["events"].append(event_ids[i])
+            rows.append({"app_name": key[0], "user_id": key[1], "id": key[2], "update_time": stored["update_time"]})
+        if self.db.drop_connection_after_commit:
+            self.db.drop_connection_after_commit = False
+            raise ConnectionResetError("connection lost")
+        return rows
+
+    async def fetchrow(self, sql: str, app_name, user_id, session_id, event_id):
+        """_explain_failure: the stored revision and whether the event is already there."""
+        stored = self.db.sessions.get((app_name, user_id, session_id))
+        if stored is None:
+            return None
+        return {"update_time": stored["update_time"], "already_written": event_id in stored["events"]}
+
+    async def execute(self, sql: str, *args):
+        self.db.shared_state_writes.append(args)
+
+
+class FakeSessionDb:
+    """Sessions by (app, user, id) with their revision, state and stored event ids."""
+
+    def __init__(self):
+        self.sessions: dict[tuple, dict] = {}
+        self.batches: list[int] = []
+        self.shared_state_writes: list[tuple] = []
+        self.drop_connection_after_commit = False
+
+    def add_session(self, session_id: str, update_time: float = 1.0) -> Session:
+        self.sessions[(APP, USER, session_id)] = {"update_time": update_time, "state": {}, "events": []}
+        return Session(id=session_id, app_name=APP, user_id=USER, state={}, last_update_time=update_time)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+
+@pytest.fixture
+def db():
+    return FakeSessionDb()
+
+
+@pytest.fixture
+async def service(db):
+    async def get_pool():
+        return db
+
+    svc = PgSessionService(get_pool)
+    yield svc
+    await svc.close()
+
+
+def event(**state_delta) -> Event:
+    return Event(author="user", invocation_id="inv-1", actions=EventActions(state_delta=state_delta))
+
+
+class TestAppendBatching:
+    """Concurrent appends share a round trip, one append per session per batch."""
+
+    @pytest.mark.asyncio
+    async def test_appends_to_different_sessions_share_a_batch(self, service, db):
+        sessions = [db.add_session(f"s{i}") for i in range(5)]
+        await asyncio.gather(*(service.append_event(s, event(step=i)) for i, s in enumerate(sessions)))
+        assert db.batches == [5]
+        for i, s in enumerate(sessions):
+            stored = db.sessions[(APP, USER, s.id)]
+            assert stored["state"] == {"step": i}
+            assert s.last_update_time == stored["update_time"]
+            assert s.state == {"step": i}
+        assert service.health()["appends"] == 5
+
+    @pytest.mark.asyncio
+    async def test_appends_to_one_session_build_on_each_other(self, service, db):
+        session = db.add_session("s")
+        await asyncio.gather(*(service.append_event(session, event(step=i)) for i in range(3)))
+        assert db.batches == [1, 1, 1]
+        stored = db.sessions[(APP, USER, "s")]
+        assert stored["state"] == {"step": 2}
+        assert len(stored["events"]) == 3
+        assert session.last_update_time == stored["update_time"]
+        assert len(session.events) == 3
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_bounded(self, db):
+        async def get_pool():
+            return db
+
+        service = PgSessionService(get_pool, append_batch=2)
+        sessions = [db.add_session(f"s{i}") for i in range(5)]
+        await asyncio.gather(*(service.append_event(s, event()) for s in sessions))
+        await service.close()
+        assert max(db.batches) == 2
+        assert sum(db.batches) == 5
+
+
+class TestAppendFailures:
+    """Stale and missing sessions fail their own append only."""
+
+    @pytest.mark.asyncio
+    async def test_stale_session(self, service, db):
+        fresh = db.add_session("fresh")
+        stale = db.add_session("stale")
+        db.sessions[(APP, USER, "stale")]["update_time"] = 5.0  # written elsewhere
+
+        results = await asyncio.gather(
+            service.append_event(fresh, event(ok=True)),
+            service.append_event(stale, event(ok=True)),
+            return_exceptions=True,
+        )
+        assert not isinstance(results[0], Exception)
+        assert isinstance(results[1], StaleSessionError)
+        assert "Stale session" in str(results[1])
+        assert db.sessions[(APP, USER, "stale")]["events"] == []
+        assert service.health()["stale"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_session(self, service):
+        session = Session(id="gone", app_name=APP, user_id=USER, state={}, last_update_time=1.0)
+        with pytest.raises(SessionNotFoundError):
+            await service.append_event(session, event())
+
+    @pytest.mark.asyncio
+    async def test_retry_after_committed_append_is_idempotent(self, service, db):
+        session = db.add_session("s")
+        db.drop_connection_after_commit = True
+        await service.append_event(session, event(step=1))
+
+        stored = db.sessions[(APP, USER, "s")]
+        assert len(stored["events"]) == 1
+        assert session.last_update_time == stored["update_time"]
+        assert service.health()["retries"] == 1
+
+
+class TestAppendState:
+    """Which parts of a state delta are stored where."""
+
+    @pytest.mark.asyncio
+    async def test_temp_state_is_not_stored(self, service, db):
+        session = db.add_session("s")
+        await service.append_event(session, event(**{"temp:draft": "x", "phase": "done"}))
+        assert db.sessions[(APP, USER, "s")]["state"] == {"phase": "done"}
+        assert session.state["phase"] == "done"
+
+    @pytest.mark.asyncio
+    async def test_app_and_user_state_are_upserted(self, service, db):
+        session = db.add_session("s")
+        await service.append_event(session, event(**{"app:model": "flash", "user:lang": "nl"}))
+        assert db.sessions[(APP, USER, "s")]["state"] == {}
+        assert len(db.shared_state_writes) == 2
+
+    @pytest.mark.asyncio
+    async def test_partial_events_are_not_written(self, service, db):
+        session = db.add_session("s")
+        partial = event(step=1)
+        partial.partial = True
+        assert await service.append_event(session, partial) is partial
+        assert db.batches == []
@@ -0,0 +1,147 @@
+"""
+Unit tests for speculative back-side verification
+(agents/document_collection/collection/speculation.py).
+
+verify_document is replaced by a stub, so no LLM calls are made.
+
+Run with: pytest tests/test_speculation.py -v
+"""
+import asyncio
+
+import pytest
+
+from agents.document_collection.collection import speculation
+from agents.document_collection.collection.speculation import (
+    claim_back_image,
+    discard_back_window,
+    open_back_window,
+    take_back_result,
+    take_released_image,
+)
+from agents.document_collection.recognition import agent as recognition_agent
+
+COLLECTION = "collection-1"
+
+
+@pytest.fixture(autouse=True)
+def clean_windows():
+    speculation._windows.clear()
+    speculation._released.clear()
+    yield
+    speculation._windows.clear()
+    speculation._released.clear()
+
+
+class FakeVerifier:
+    """Stands in for verify_document; waits for `gate`, fails for b"broken"."""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, image_data, **kwargs):
+        self.calls.append((image_data, kwargs))
+        await self.gate.wait()
+        if image_data == b"broken":
+            raise RuntimeError("vision call failed")
+        return ("verified", image_data, kwargs)
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    fake = FakeVerifier()
+    monkeypatch.setattr(recognition_agent, "verify_document", fake)
+    return fake
+
+
+class TestSpeculationWindow:
+    """claim_back_image / take_back_result / discard_back_window."""
+
+    @pytest.mark.asyncio
+    async def test_no_window_no_claim(self, verifier):
+        assert not claim_back_image(COLLECTION, b"back")
+        assert verifier.calls == []
+
+    @pytest.mark.asyncio
+    async def test_claimed_back_is_taken(self, verifier):
+        open_back_window(COLLECTION, "id_card", {"candidate_name": "Jan Peeters"})
+        assert claim_back_image(COLLECTION, b"back")
+        result = await take_back_result(COLLECTION)
+        assert result == ("verified", b"back", {"candidate_name": "Jan Peeters"})
+        assert take_released_image(COLLECTION) is None
+
+    @pytest.mark.asyncio
+    async def test_only_one_image_is_claimed(self, verifier):
+        open_back_window(COLLECTION, "id_card", {})
+        assert claim_back_image(COLLECTION, b"back")
+        assert not claim_back_image(COLLECTION, b"another")
+        await take_back_result(COLLECTION)
+        assert len(verifier.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_window_is_ignored(self, verifier, monkeypatch):
+        open_back_window(COLLECTION, "id_card", {})
+        opened_at = speculation._windows[COLLECTION].opened_at
+        monkeypatch.setattr(
+            speculation.time, "monotonic", lambda: opened_at + speculation.SPECULATION_TTL_SECONDS + 1,
+        )
+        assert not claim_back_image(COLLECTION, b"back")
+        assert COLLECTION not in speculation._windows
+
+    @pytest.mark.asyncio
+    async def test_take_without_claim(self, verifier):
+        open_back_window(COLLECTION, "id_card", {})
+        assert await take_back_result(COLLECTION) is None
+        assert COLLECTION not in speculation._windows
+
+
+class TestReleasedImages:
+    """A claimed image that isn't used as a back is released, never lost."""
+
+    @pytest.mark.asyncio
+    async def test_discard_releases_claimed_image(self, verifier):
+        verifier.gate.clear()
+        open_back_window(COLLECTION, "id_card", {})
+        assert claim_back_image(COLLECTION, b"back")
+        task = speculation._windows[COLLECTION].back_task
+
+        discard_back_window(COLLECTION)
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert take_released_image(COLLECTION) == b"back"
+        assert take_released_image(COLLECTION) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_back_verification_releases_image(self, verifier):
+        open_back_window(COLLECTION, "id_card", {})
+        assert claim_back_image(COLLECTION, b"broken")
+        assert await take_back_result(COLLECTION) is None
+        assert take_released_image(COLLECTION) == b"broken"
+
+    @pytest.mark.asyncio
+    async def test_window_left_open_is_released(self, verifier):
+        verifier.gate.clear()
+        open_back_window(COLLECTION, "id_card", {})
+        assert claim_back_image(COLLECTION, b"back")
+        assert take_released_image(COLLECTION) == b"back"
+        assert COLLECTION not in speculation._windows
+
+    @pytest.mark.asyncio
+    async def test_reopening_releases_previous_claim(self, verifier):
+        verifier.gate.clear()
+        open_back_window(COLLECTION, "id_card", {})
+        assert claim_back_image(COLLECTION, b"back")
+        open_back_window(COLLECTION, "passport", {})
+        assert take_released_image(COLLECTION) == b"back"
+        # The new window is still open and unclaimed
+        assert COLLECTION in speculation._windows
+        assert claim_back_image(COLLECTION, b"second")
+        verifier.gate.set()
+        assert await take_back_result(COLLECTION) == ("verified", b"second", {})
+
+    @pytest.mark.asyncio
+    async def test_open_window_without_claim_is_kept(self, verifier):
+        open_back_window(COLLECTION, "id_card", {})
+        assert take_released_image(COLLECTION) is None
+        assert COLLECTION in speculation._windows
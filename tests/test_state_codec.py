@@ -0,0 +1,82 @@
+"""
+Unit tests for the packed agent state encoding (src/utils/state_codec.py).
+
+Round trips plain dicts and the to_dict() of the WhatsApp pre-screening and
+document collection states.
+
+Run with: pytest tests/test_state_codec.py -v
+"""
+import json
+import uuid
+from datetime import date
+
+import pytest
+
+from agents.document_collection.collection.state import CollectionState
+from agents.pre_screening.whatsapp.agent import ConversationState, Phase
+from src.utils.state_codec import decode_state, encode_state
+
+
+def conversation_state() -> dict:
+    return ConversationState(
+        phase=Phase.SCHEDULE,
+        conversation_id=str(uuid.uuid4()),
+        candidate_name="Jan Peeters",
+        vacancy_title="Magazijnmedewerker",
+        company_name="Taloo",
+        knockout_questions=[{"id": "ko_1", "question": "Heb je een rijbewijs B?", "requirement": "Ja"}],
+        knockout_index=1,
+        knockout_results=[{"question_id": "ko_1", "answer": "Ja", "passed": True, "summary": "Heeft rijbewijs"}],
+        open_questions=["Waarom wil je bij ons werken?"],
+        open_index=1,
+        open_results=[{"question": "Waarom wil je bij ons werken?", "answer": "Ik zoek een job dichter bij huis."}],
+        available_slots=[{"date": "2026-11-02", "dutch_date": "maandag 2 november", "morning": ["9u"], "afternoon": []}],
+    ).to_dict()
+
+
+def collection_state() -> dict:
+    return CollectionState(
+        collection_id=str(uuid.uuid4()),
+        context={"candidate": "Jan Peeters", "vacancy": "Magazijnmedewerker"},
+        collected_documents={"id_card": {"status": "verified", "extracted_fields": {"expiry_date": "2031-04-30"}}},
+        collected_attributes={"address": {"value": {"street": "Kerkstraat", "stad": "Gent"}}},
+        last_agent_message="Top, dat is alles wat we nodig hebben.",
+        message_count=4,
+    ).to_dict()
+
+
+class TestStateCodec:
+    """encode_state/decode_state round trips and format checks."""
+
+    @pytest.mark.parametrize("state", [
+        {},
+        {"phase": "hello", "index": 0, "ok": True, "missing": None, "score": 0.5},
+        {"nested": {"list": [1, {"a": [None, "b"]}]}, "accents": "één café, naïef — ✅"},
+    ])
+    def test_round_trip(self, state):
+        assert decode_state(encode_state(state)) == state
+
+    def test_conversation_state_round_trip(self):
+        state = conversation_state()
+        decoded = decode_state(encode_state(state))
+        assert decoded == json.loads(json.dumps(state))
+        assert ConversationState.from_dict(decoded).to_dict() == ConversationState.from_dict(state).to_dict()
+
+    def test_collection_state_round_trip(self):
+        state = collection_state()
+        decoded = decode_state(encode_state(state))
+        assert decoded == json.loads(json.dumps(state))
+        assert CollectionState.from_dict(decoded).to_dict() == CollectionState.from_dict(state).to_dict()
+
+    def test_non_json_values_are_stringified(self):
+        # Same as the agent_state column: values json can't encode are stored as str()
+        assert decode_state(encode_state({"day": date(2026, 11, 2)})) == {"day": "2026-11-02"}
+
+    def test_packed_is_smaller_than_json(self):
+        state = {"results": [{"answer": "Ik werkte bij een logistiek bedrijf in Gent."} for _ in range(50)]}
+        assert len(encode_state(state)) < len(json.dumps(state))
+
+    @pytest.mark.parametrize("data", [b"", b"\x00abc", b"{\"a\": 1}"])
+    def test_unknown_encoding(self, data):
+        with pytest.raises(ValueError):
+            decode_state(data)
@@ -0,0 +1,171 @@
+"""
+Unit tests for compiled field mappings (src/utils/template_engine.py).
+
+Covers template rendering, CompiledMapping.apply/apply_batch and the plan
+cache keyed by mapping version.
+
+Run with: pytest tests/test_template_engine.py -v
+"""
+from datetime import date
+
+import pytest
+
+from src.utils import template_engine
+from src.utils.template_engine import (
+    CompiledMapping,
+    build_soql_fields,
+    compile_template,
+    get_compiled_mapping,
+    mapping_version,
+    resolve_mapping,
+    resolve_template,
+)
+
+
+class TestCompiledTemplate:
+    """Rendering of {{field}} placeholders."""
+
+    def test_render_constants_and_fields(self):
+        text, resolved = compile_template("{{FirstName}} {{LastName}}").render(
+            {"FirstName": "Jan", "LastName": "Peeters"}
+        )
+        assert text == "Jan Peeters"
+        assert resolved
+
+    def test_dot_path(self):
+        text, resolved = compile_template("{{Owner.Email}}").render({"Owner": {"Email": "a@b.be"}})
+        assert text == "a@b.be"
+        assert resolved
+
+    def test_missing_and_none_render_empty(self):
+        template = compile_template("{{A}}-{{B}}-{{Owner.Email}}")
+        text, resolved = template.render({"A": None, "Owner": "not a dict"})
+        assert text == "--"
+        assert not resolved
+
+    def test_fields(self):
+        assert compile_template("{{A}} x {{B.C}}").fields == ("A", "B.C")
+
+    def test_resolve_template(self):
+        assert resolve_template("", {"A": 1}) is None
+        assert resolve_template("{{A}}", {}) is None
+        assert resolve_template("n={{A}}", {"A": 0}) == "n=0"
+
+
+class TestCompiledMapping:
+    """CompiledMapping.apply and apply_batch."""
+
+    def test_apply_strips_and_coerces(self):
+        plan = CompiledMapping(
+            {
+                "title": {"template": "  {{Name}} "},
+                "start_date": {"template": "{{Start}}"},
+                "remote": {"template": "{{Remote}}"},
+                "ignored": {"template": ""},
+            },
+            field_types={"start_date": "date", "remote": "boolean"},
+        )
+        result = plan.apply({"Name": "Magazijnier", "Start": "2026-03-01T00:00:00Z", "Remote": "true"})
+        assert result == {"title": "Magazijnier", "start_date": date(2026, 3, 1), "remote": True}
+
+    def test_empty_values_are_coerced_to_none(self):
+        plan = CompiledMapping(
+            {"title": {"template": "{{Name}}"}, "start_date": {"template": "{{Start}}"}},
+            field_types={"start_date": "date"},
+        )
+        assert plan.apply({}) == {"title": "", "start_date": None}
+
+    def test_drop_empty(self):
+        plan = CompiledMapping(
+            {"title": {"template": "{{Name}}"}, "city": {"template": "{{City}}"}},
+            drop_empty=True,
+        )
+        assert plan.apply({"Name": "Chauffeur", "City": "  "}) == {"title": "Chauffeur"}
+
+    def test_preprocess_only_non_empty(self):
+        calls = []
+
+        def preprocess(value, field_type):
+            calls.append((value, field_type))
+            return value.upper()
+
+        plan = CompiledMapping(
+            {"title": {"template": "{{Name}}"}, "city": {"template": "{{City}}"}},
+            field_types={"title": "text"},
+            preprocess=preprocess,
+        )
+        assert plan.apply({"Name": "chauffeur"}) == {"title": "CHAUFFEUR", "city": ""}
+        assert calls == [("chauffeur", "text")]
+
+    def test_referenced_fields(self):
+        plan = CompiledMapping({
+            "name": {"template": "{{LastName}}, {{FirstName}}"},
+            "email": {"template": "{{Owner.Email}}"},
+            "first": {"template": "{{FirstName}}"},
+        })
+        assert plan.referenced_fields == ("FirstName", "LastName", "Owner.Email")
+
+    def test_apply_batch_reports_failures(self):
+        def preprocess(value, field_type):
+            if value == "bad":
+                raise ValueError("bad value")
+            return value
+
+        plan = CompiledMapping({"title": {"template": "{{Name}}"}}, preprocess=preprocess)
+        errors = []
+        results = plan.apply_batch(
+            [{"Name": "ok"}, {"Name": "bad"}, {"Name": "fine"}],
+            on_error=lambda record, e: errors.append((record["Name"], str(e))),
+        )
+        assert results == [{"title": "ok"}, None, {"title": "fine"}]
+        assert errors == [("bad", "bad value")]
+
+    def test_apply_batch_raises_without_on_error(self):
+        def preprocess(value, field_type):
+            raise ValueError("bad value")
+
+        plan = CompiledMapping({"title": {"template": "{{Name}}"}}, preprocess=preprocess)
+        with pytest.raises(ValueError):
+            plan.apply_batch([{"Name": "x"}])
+
+    def test_matches_resolve_mapping(self):
+        mappings = {"title": {"template": "{{Name}}"}, "owner": {"template": "{{Owner.Email}}"}}
+        record = {"Name": "Kassier", "Owner": {"Email": "r@taloo.be"}}
+        assert CompiledMapping(mappings).apply(record) == resolve_mapping(mappings, record)
+
+
+class TestPlanCache:
+    """get_compiled_mapping caches plans per (scope, mapping version)."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        template_engine._PLAN_CACHE.clear()
+        yield
+        template_engine._PLAN_CACHE.clear()
+
+    def test_same_mapping_same_plan(self):
+        mappings = {"title": {"template": "{{Name}}"}}
+        plan = get_compiled_mapping(mappings, scope="import:1")
+        assert get_compiled_mapping({"title": {"template": "{{Name}}"}}, scope="import:1") is plan
+
+    def test_scope_and_version_separate_plans(self):
+        mappings = {"title": {"template": "{{Name}}"}}
+        plan = get_compiled_mapping(mappings, scope="import:1")
+        assert get_compiled_mapping(mappings, scope="import:2") is not plan
+        assert get_compiled_mapping({"title": {"template": "{{Title}}"}}, scope="import:1") is not plan
+
+    def test_mapping_version_ignores_key_order(self):
+        a = {"title": {"template": "{{Name}}"}, "city": {"template": "{{City}}"}}
+        b = {"city": {"template": "{{City}}"}, "title": {"template": "{{Name}}"}}
+        assert mapping_version(a) == mapping_version(b)
+        assert len(mapping_version(a)) == 16
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(template_engine, "_PLAN_CACHE_SIZE", 2)
+        for i in range(4):
+            get_compiled_mapping({"title": {"template": f"{{{{Field{i}}}}}"}})
+        assert len(template_engine._PLAN_CACHE) == 2
+
+    def test_build_soql_fields(self):
+        mappings = {"name": {"template": "{{Name}}"}, "owner": {"template": "{{Owner.Email}} {{Name}}"}}
+        assert build_soql_fields(mappings) == ["Name", "Owner.Email"]
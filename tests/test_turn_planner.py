@@ -0,0 +1,84 @@
+"""
+Unit tests for the WhatsApp turn planner response handling
+(agents/pre_screening/whatsapp/turn_planner.py).
+
+Run with: pytest tests/test_turn_planner.py -v
+"""
+import json
+
+import pytest
+
+from agents.pre_screening.whatsapp.turn_planner import (
+    FAIL,
+    PASS,
+    UNRELATED,
+    TurnBranch,
+    TurnPlan,
+    build_turn_prompt,
+    parse_turn_plan,
+    turn_plan_schema,
+)
+
+BRANCHES = {
+    PASS: TurnBranch(when="De kandidaat heeft een rijbewijs B", reply="Stel de volgende vraag"),
+    FAIL: TurnBranch(when="De kandidaat heeft geen rijbewijs B", reply="Vraag of er andere vacatures interessant zijn"),
+    UNRELATED: TurnBranch(when="Het bericht gaat over iets anders", reply="Herhaal de vraag vriendelijk"),
+}
+
+
+class TestParseTurnPlan:
+    """parse_turn_plan accepts schema-conform plans and rejects everything else."""
+
+    def test_valid_plan(self):
+        response = json.dumps({
+            "classification": PASS,
+            "summary": " Heeft een rijbewijs B. ",
+            "reply": "  Top! Volgende vraag: werk je graag in ploegen?  ",
+        })
+        assert parse_turn_plan(response, BRANCHES) == TurnPlan(
+            classification=PASS,
+            reply="Top! Volgende vraag: werk je graag in ploegen?",
+            summary="Heeft een rijbewijs B.",
+        )
+
+    def test_missing_summary_is_allowed(self):
+        plan = parse_turn_plan(json.dumps({"classification": FAIL, "reply": "Jammer!"}), BRANCHES)
+        assert plan == TurnPlan(classification=FAIL, reply="Jammer!", summary="")
+
+    @pytest.mark.parametrize("response", [
+        None,
+        "",
+        "not json",
+        '{"classification": "pass", "reply": ',
+        json.dumps(["pass", "Top!"]),
+        json.dumps("pass"),
+    ])
+    def test_invalid_json_or_shape(self, response):
+        assert parse_turn_plan(response, BRANCHES) is None
+
+    @pytest.mark.parametrize("data", [
+        {"classification": "question", "reply": "Goeie vraag!"},
+        {"classification": None, "reply": "Top!"},
+        {"reply": "Top!"},
+        {"classification": PASS, "reply": "   "},
+        {"classification": PASS, "reply": None},
+        {"classification": PASS},
+    ])
+    def test_unusable_plan(self, data):
+        assert parse_turn_plan(json.dumps(data), BRANCHES) is None
+
+
+class TestTurnPrompt:
+    """The schema and prompt list exactly the branches of the current phase."""
+
+    def test_schema_enum(self):
+        schema = turn_plan_schema(list(BRANCHES))
+        assert schema["properties"]["classification"]["enum"] == [PASS, FAIL, UNRELATED]
+        assert schema["required"] == ["classification", "summary", "reply"]
+
+    def test_prompt_lists_branches(self):
+        prompt = build_turn_prompt("VRAAG: Heb je een rijbewijs B?", "ja hoor", BRANCHES)
+        assert 'BERICHT VAN KANDIDAAT: "ja hoor"' in prompt
+        for name, branch in BRANCHES.items():
+            assert f"- {name}: {branch.when}" in prompt
+            assert f"- {name}: {branch.reply}" in prompt
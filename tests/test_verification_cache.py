@@ -0,0 +1,211 @@
+"""
+Unit tests for the document verification cache
+(agents/document_collection/recognition/verification_cache.py).
+
+Covers the scope fingerprint (per workspace), image hashing (exact and near-duplicate
+matches), the BIGINT round trip and copy isolation of cached results.
+No database: the cache runs memory-only.
+
+Run with: pytest tests/test_verification_cache.py -v
+"""
+import io
+import uuid
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from agents.document_collection.recognition import verification_cache as vc
+from agents.document_collection.recognition.agent import DocumentVerificationResult
+from agents.document_collection.recognition.image_pipeline import StageTimer, resize_for_vision
+from agents.document_collection.recognition.verification_cache import (
+    VerificationCache,
+    _hamming,
+    _to_signed,
+    _to_unsigned,
+    verification_scope,
+)
+
+WS = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+def make_result(**overrides) -> DocumentVerificationResult:
+    values = dict(
+        document_category="id_card",
+        document_category_confidence=0.95,
+        extracted_name="Jan Peeters",
+        name_extraction_confidence=0.9,
+        name_match_performed=True,
+        name_match_result="exact_match",
+        name_match_confidence=0.95,
+        name_match_details=None,
+        fraud_risk_level="low",
+        fraud_indicators=[],
+        overall_fraud_confidence=0.05,
+        image_quality="good",
+        readability_issues=[],
+        verification_passed=True,
+        verification_summary="OK",
+        extracted_fields={"document_number": "123"},
+    )
+    values.update(overrides)
+    return DocumentVerificationResult(**values)
+
+
+def photo(seed: int = 0) -> bytes:
+    """A deterministic, card-like test image as PNG."""
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", (640, 400), "white")
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.integers(0, 560), rng.integers(0, 320)
+        w, h = rng.integers(20, 80), rng.integers(20, 80)
+        draw.rectangle((x, y, x + w, y + h), fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def reencode(data: bytes, quality: int) -> bytes:
+    buf = io.BytesIO()
+    Image.open(io.BytesIO(data)).convert("RGB").save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def hashes(data: bytes):
+    image = resize_for_vision(memoryview(data), StageTimer(), 512)
+    return image.content_hash, image.difference_hash, image.perceptual_hash
+
+
+@pytest.fixture(autouse=True)
+def no_db(monkeypatch):
+    monkeypatch.setattr(vc, "_db_pool", None)
+
+
+class TestVerificationScope:
+    """verification_scope changes with everything that changes the prompt."""
+
+    def test_name_is_normalized(self):
+        a = verification_scope(WS, "id_card", "Jan  Peeters", None, None)
+        b = verification_scope(WS, "id_card", "jan peeters", None, None)
+        assert a == b
+
+    def test_field_and_type_order_is_ignored(self):
+        fields = [{"name": "a"}, {"name": "b"}]
+        types = [{"slug": "id_card"}, {"slug": "passport"}]
+        assert verification_scope(WS, None, None, fields, types) == verification_scope(
+            WS, None, None, list(reversed(fields)), list(reversed(types))
+        )
+
+    def test_scope_differs_per_candidate_and_pages(self):
+        base = verification_scope(WS, "id_card", "Jan Peeters", None, None)
+        assert verification_scope(WS, "id_card", "Els Peeters", None, None) != base
+        assert verification_scope(WS, "id_card", "Jan Peeters", None, None, ["front", "back"]) != base
+
+    def test_scope_differs_per_workspace(self):
+        base = verification_scope(WS, "id_card", "Jan Peeters", None, None)
+        assert verification_scope(uuid.uuid4(), "id_card", "Jan Peeters", None, None) != base
+        assert verification_scope(None, "id_card", "Jan Peeters", None, None) != base
+
+
+class TestImageHashing:
+    """The 64-bit hashes recognise re-encoded copies, not other images."""
+
+    def test_reencoded_copy_is_near(self):
+        original = photo(1)
+        _, dhash, phash = hashes(original)
+        _, dhash2, phash2 = hashes(reencode(original, 60))
+        assert _hamming(phash, phash2) <= vc.PHASH_MAX_DISTANCE
+        assert _hamming(dhash, dhash2) <= vc.DHASH_MAX_DISTANCE
+
+    def test_other_image_is_far(self):
+        _, dhash, phash = hashes(photo(1))
+        _, dhash2, phash2 = hashes(photo(2))
+        assert (
+            _hamming(phash, phash2) > vc.PHASH_MAX_DISTANCE
+            or _hamming(dhash, dhash2) > vc.DHASH_MAX_DISTANCE
+        )
+
+    def test_hashes_fit_64_bits(self):
+        _, dhash, phash = hashes(photo(3))
+        assert 0 <= dhash < 1 << 64
+        assert 0 <= phash < 1 << 64
+
+    @pytest.mark.parametrize("value", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1, None])
+    def test_bigint_round_trip(self, value):
+        signed = _to_signed(value)
+        if value is not None:
+            assert -(1 << 63) <= signed < 1 << 63
+        assert _to_unsigned(signed) == value
+
+
+class TestVerificationCache:
+    """Memory lookups: exact, near-duplicate, scope isolation, copies."""
+
+    @pytest.mark.asyncio
+    async def test_exact_and_near_hits(self):
+        cache = VerificationCache()
+        original = photo(4)
+        sha, dhash, phash = hashes(original)
+        await cache.store("scope", sha, dhash, phash, make_result())
+
+        assert (await cache.lookup("scope", sha, None, None)).extracted_name == "Jan Peeters"
+        sha2, dhash2, phash2 = hashes(reencode(original, 50))
+        assert sha2 != sha
+        assert await cache.lookup("scope", sha2, dhash2, phash2) is not None
+
+    @pytest.mark.asyncio
+    async def test_near_match_requires_same_scope(self):
+        cache = VerificationCache()
+        original = photo(5)
+        sha, dhash, phash = hashes(original)
+        await cache.store("scope-a", sha, dhash, phash, make_result())
+        sha2, dhash2, phash2 = hashes(reencode(original, 50))
+        assert await cache.lookup("scope-b", sha2, dhash2, phash2) is None
+
+    @pytest.mark.asyncio
+    async def test_missing_hashes_never_near(self):
+        cache = VerificationCache()
+        await cache.store("scope", "sha-1", None, None, make_result())
+        assert await cache.lookup("scope", "sha-2", None, None) is None
+
+    @pytest.mark.asyncio
+    async def test_results_are_copies(self):
+        cache = VerificationCache()
+        result = make_result()
+        await cache.store("scope", "sha", 1, 1, result)
+        result.extracted_fields["document_number"] = "changed"
+
+        first = await cache.lookup("scope", "sha", 1, 1)
+        assert first.extracted_fields == {"document_number": "123"}
+        first.cached = True
+        first.extracted_fields["document_number"] = "mutated"
+        second = await cache.lookup("scope", "sha", 1, 1)
+        assert second.extracted_fields == {"document_number": "123"}
+        assert not second.cached
+
+    @pytest.mark.asyncio
+    async def test_hit_has_no_verification_id(self):
+        cache = VerificationCache()
+        result = make_result()
+        result.verification_id = str(uuid.uuid4())
+        await cache.store("scope", "sha", 1, 1, result)
+        assert (await cache.lookup("scope", "sha", 1, 1)).verification_id is None
+
+    @pytest.mark.asyncio
+    async def test_store_does_not_persist_by_default(self, monkeypatch):
+        monkeypatch.setattr(vc, "_db_pool", object())
+        cache = VerificationCache()
+        assert await cache.store("scope", "sha", 1, 1, make_result()) is None
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru(self, monkeypatch):
+        cache = VerificationCache(max_entries=2, ttl_seconds=10)
+        now = [100.0]
+        monkeypatch.setattr(vc.time, "monotonic", lambda: now[0])
+        for i in range(3):
+            await cache.store("scope", f"sha-{i}", None, None, make_result())
+        assert await cache.lookup("scope", "sha-0", None, None) is None
+        assert await cache.lookup("scope", "sha-2", None, None) is not None
+        now[0] += 11
+        assert await cache.lookup("scope", "sha-2", None, None) is None